@@ -0,0 +1,13 @@
+r"""
+**fastNLP** 训练与评测热点路径的性能回归测试。
+
+所有场景均使用固定随机种子生成的合成数据，只需要 cpu 即可运行，结果以 json 的格式输出，并可以与保存的 baseline 进行比较::
+
+    # 运行全部场景并将结果保存为 baseline
+    python -m benchmarks --output benchmarks/baseline.json
+
+    # 只运行 dataset 与 vocabulary 相关的场景，并与 baseline 比较，耗时增加超过 20% 时以非零状态码退出
+    python -m benchmarks --filter dataset vocabulary --baseline benchmarks/baseline.json --tolerance 0.2
+
+新的场景通过 :func:`~benchmarks.runner.register` 注册，具体见 :mod:`benchmarks.runner`。
+"""
@@ -0,0 +1,194 @@
+r"""
+性能测试场景的注册、运行以及与 baseline 的比较。
+
+一个场景是一个接受 ``scale`` 参数的函数，其负责准备数据，并返回 ``(fn, num_items)``；其中 ``fn`` 为需要计时的无参函数，
+``num_items`` 为 ``fn`` 每次运行所处理的条目数量（样本数、batch 数或者 step 数），用于计算吞吐量::
+
+    @register('vocabulary.from_dataset', unit='samples')
+    def vocabulary_from_dataset(scale):
+        dataset = make_dataset(int(20000 * scale))
+        return lambda: Vocabulary().from_dataset(dataset, field_name='words'), len(dataset)
+
+场景也可以返回 ``(fn, num_items, metrics)``，其中 ``metrics`` 为一个字典，会原样记录在结果的 ``'metrics'`` 中，例如量化后
+相对于 float32 的精度变化。
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+__all__ = [
+    'register',
+    'run_benchmarks',
+    'compare_with_baseline',
+    'main'
+]
+
+_SCENARIOS: Dict[str, Dict] = {}
+
+
+def register(name: str, unit: str = 'items', repeat: int = 5, warmup: int = 1):
+    r"""
+    注册一个性能测试场景的修饰器。
+
+    :param name: 场景的名字，使用 ``.`` 分隔的层级名称，例如 ``'dataset.apply'``；
+    :param unit: ``num_items`` 的单位，只用于展示；
+    :param repeat: 计时的次数，最终以中位数作为结果；
+    :param warmup: 计时前预跑的次数；
+    """
+    def wrapper(fn: Callable):
+        if name in _SCENARIOS:
+            raise RuntimeError(f"Benchmark scenario `{name}` is already registered.")
+        _SCENARIOS[name] = {'setup': fn, 'unit': unit, 'repeat': repeat, 'warmup': warmup}
+        return fn
+    return wrapper
+
+
+def _environment() -> Dict:
+    import fastNLP
+    env = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'fastNLP': fastNLP.__version__,
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    try:
+        import numpy
+        env['numpy'] = numpy.__version__
+    except ImportError:
+        pass
+    try:
+        import torch
+        env['torch'] = torch.__version__
+        env['torch_num_threads'] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return env
+
+
+def _run_one(name: str, scenario: Dict, scale: float, repeat: Optional[int]) -> Dict:
+    fn, num_items, *metrics = scenario['setup'](scale)
+    repeat = repeat or scenario['repeat']
+    for _ in range(scenario['warmup']):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    return {
+        'median': median,
+        'min': min(timings),
+        'max': max(timings),
+        'repeat': repeat,
+        'num_items': num_items,
+        'unit': scenario['unit'],
+        'items_per_sec': num_items / median if median > 0 else None,
+        **({'metrics': metrics[0]} if metrics else {}),
+    }
+
+
+def run_benchmarks(filters: Optional[List[str]] = None, scale: float = 1.0, repeat: Optional[int] = None,
+                   verbose: bool = True) -> Dict:
+    r"""
+    运行所有名字中包含 ``filters`` 中任意一个字符串的场景。
+
+    :param filters: 为 ``None`` 时运行所有场景；
+    :param scale: 合成数据规模的缩放系数；
+    :param repeat: 覆盖每个场景自身的计时次数；
+    :param verbose: 是否在 stderr 中打印每一个场景的结果；
+    :return: 一个字典，``'environment'`` 中为运行环境的信息，``'results'`` 中为每一个场景的结果；
+    """
+    from . import scenarios  # 导入时注册所有场景
+
+    results = {}
+    for name in sorted(_SCENARIOS):
+        if filters and not any(f in name for f in filters):
+            continue
+        try:
+            results[name] = _run_one(name, _SCENARIOS[name], scale, repeat)
+        except Exception as e:
+            results[name] = {'error': f'{type(e).__name__}: {e}'}
+        if verbose:
+            res = results[name]
+            if 'error' in res:
+                print(f'{name:<48} ERROR {res["error"]}', file=sys.stderr)
+            else:
+                print(f'{name:<48} {res["median"] * 1000:10.2f} ms  {res["items_per_sec"]:14.1f} {res["unit"]}/s',
+                      file=sys.stderr)
+    return {'environment': _environment(), 'scale': scale, 'results': results}
+
+
+def compare_with_baseline(report: Dict, baseline: Dict, tolerance: float = 0.2) -> Dict:
+    r"""
+    将 ``report`` 与 ``baseline`` 中同名场景的中位耗时进行比较。
+
+    :param report: :func:`run_benchmarks` 的返回值；
+    :param baseline: 之前保存的 :func:`run_benchmarks` 的返回值；
+    :param tolerance: 允许的耗时增加比例，超过时认为出现了性能回退；
+    :return: 一个字典，键为场景名，值包含 ``'ratio'``（当前耗时 / baseline 耗时）以及 ``'regression'``；
+    """
+    if baseline.get('scale') != report.get('scale'):
+        print(f"Warning: the scale of baseline ({baseline.get('scale')}) is different from the current run "
+              f"({report.get('scale')}).", file=sys.stderr)
+    comparison = {}
+    for name, res in report['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if base is None or 'median' not in base or 'median' not in res:
+            continue
+        ratio = res['median'] / base['median'] if base['median'] > 0 else float('inf')
+        comparison[name] = {'baseline': base['median'], 'current': res['median'], 'ratio': ratio,
+                            'regression': ratio > 1 + tolerance}
+    return comparison
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='fastNLP performance benchmarks.')
+    parser.add_argument('--filter', nargs='*', default=None, help='only run scenarios whose name contains one of these.')
+    parser.add_argument('--scale', type=float, default=1.0, help='scale factor of the synthetic data size.')
+    parser.add_argument('--repeat', type=int, default=None, help='override the number of timed runs per scenario.')
+    parser.add_argument('--output', type=str, default=None, help='write the json report to this path.')
+    parser.add_argument('--baseline', type=str, default=None, help='compare with a previously saved json report.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown ratio before failing.')
+    parser.add_argument('--list', action='store_true', help='list all scenarios and exit.')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        from . import scenarios
+        for name in sorted(_SCENARIOS):
+            print(name)
+        return 0
+
+    from fastNLP import logger
+    logger.set_stdout('raw', level='WARNING')
+
+    report = run_benchmarks(args.filter, scale=args.scale, repeat=args.repeat)
+    exit_code = 1 if any('error' in res for res in report['results'].values()) else 0
+    if args.baseline is not None:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['comparison'] = compare_with_baseline(report, baseline, args.tolerance)
+        regressions = [name for name, res in report['comparison'].items() if res['regression']]
+        for name in regressions:
+            res = report['comparison'][name]
+            print(f"Regression: {name} {res['baseline'] * 1000:.2f} ms -> {res['current'] * 1000:.2f} ms "
+                  f"({res['ratio']:.2f}x)", file=sys.stderr)
+        if regressions:
+            exit_code = 1
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return exit_code
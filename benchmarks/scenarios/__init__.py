@@ -0,0 +1,17 @@
+r"""
+所有的性能测试场景，导入该包即会通过 :func:`~benchmarks.runner.register` 完成注册；依赖 ``torch`` 的场景只有在安装了
+``torch`` 时才会注册。
+"""
+from fastNLP.envs.imports import _NEED_IMPORT_TORCH
+
+from . import dataset
+from . import vocabulary
+from . import collators
+from . import samplers
+from . import pipes
+
+if _NEED_IMPORT_TORCH:
+    from . import dataloaders
+    from . import controllers
+    from . import generator
+    from . import transformers
@@ -0,0 +1,33 @@
+r"""
+各个场景共用的合成数据。所有数据均由固定的随机种子生成，保证多次运行之间完全一致。
+"""
+import random
+from typing import List
+
+from fastNLP import DataSet
+
+__all__ = [
+    'make_words',
+    'make_dataset',
+]
+
+_WORDS = [f'w{i}' for i in range(5000)]
+
+
+def make_words(num_samples: int, min_len: int = 5, max_len: int = 50, seed: int = 0) -> List[List[str]]:
+    rng = random.Random(seed)
+    return [rng.choices(_WORDS, k=rng.randint(min_len, max_len)) for _ in range(num_samples)]
+
+
+def make_dataset(num_samples: int, min_len: int = 5, max_len: int = 50, num_labels: int = 5, seed: int = 0) -> DataSet:
+    r"""
+    生成包含 ``raw_words``（空格分隔的字符串）、``words``（词列表）、``seq_len`` 以及 ``target`` 字段的 :class:`DataSet`；
+    """
+    rng = random.Random(seed)
+    words = make_words(num_samples, min_len, max_len, seed)
+    return DataSet({
+        'raw_words': [' '.join(ws) for ws in words],
+        'words': words,
+        'seq_len': [len(ws) for ws in words],
+        'target': [rng.randrange(num_labels) for _ in range(num_samples)],
+    })
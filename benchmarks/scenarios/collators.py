@@ -0,0 +1,55 @@
+import random
+
+from fastNLP import Collator
+from fastNLP.envs.imports import _NEED_IMPORT_TORCH
+from fastNLP.core.collators.padders.raw_padder import RawSequencePadder
+from fastNLP.core.collators.padders.numpy_padder import NumpySequencePadder
+from fastNLP.core.collators.padders.torch_padder import TorchSequencePadder
+
+from ..runner import register
+
+_BATCH_SIZE = 32
+_BACKENDS = ('raw', 'numpy', 'torch') if _NEED_IMPORT_TORCH else ('raw', 'numpy')
+
+
+def _make_batches(num_batches, seed=0):
+    rng = random.Random(seed)
+    batches = []
+    for _ in range(num_batches):
+        batch = []
+        for _ in range(_BATCH_SIZE):
+            length = rng.randint(5, 100)
+            batch.append({'words': [rng.randrange(5000) for _ in range(length)], 'seq_len': length,
+                          'target': rng.randrange(5)})
+        batches.append(batch)
+    return batches
+
+
+def _collator_setup(scale, backend):
+    batches = _make_batches(max(int(200 * scale), 1))
+    collator = Collator(backend=backend)
+
+    def run():
+        for batch in batches:
+            collator(batch)
+    return run, len(batches)
+
+
+def _padder_setup(scale, padder_cls):
+    batches = [[ins['words'] for ins in batch] for batch in _make_batches(max(int(200 * scale), 1))]
+    padder = padder_cls(pad_val=0, ele_dtype=int, dtype=int)
+
+    def run():
+        for batch in batches:
+            padder(batch)
+    return run, len(batches)
+
+
+for _backend in _BACKENDS:
+    register(f'collator.{_backend}', unit='batches')(
+        lambda scale, _backend=_backend: _collator_setup(scale, _backend))
+
+_PADDERS = {'raw': RawSequencePadder, 'numpy': NumpySequencePadder, 'torch': TorchSequencePadder}
+for _backend in _BACKENDS:
+    register(f'padder.sequence.{_backend}', unit='batches')(
+        lambda scale, _padder_cls=_PADDERS[_backend]: _padder_setup(scale, _padder_cls))
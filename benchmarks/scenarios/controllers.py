@@ -0,0 +1,143 @@
+import random
+import operator
+
+import torch
+from torch import nn
+
+from fastNLP import Trainer, Evaluator, Callback, Accuracy, SpanFPreRecMetric, ClassifyFPreRecMetric, Vocabulary, \
+    prepare_torch_dataloader, DataSet
+from fastNLP.core.callbacks import CallbackManager
+from fastNLP.envs.utils import _compare_version
+
+from ..runner import register
+
+_NUM_LABELS = 5
+_VOCAB_SIZE = 1000
+
+
+class _TinyModel(nn.Module):
+    def __init__(self, num_labels=_NUM_LABELS, token_level=False):
+        super().__init__()
+        self.embed = nn.Embedding(_VOCAB_SIZE, 32)
+        self.fc = nn.Linear(32, num_labels)
+        self.token_level = token_level
+
+    def forward(self, words):
+        hidden = self.embed(words)
+        if self.token_level:
+            return self.fc(hidden)
+        return self.fc(hidden.mean(dim=1))
+
+    def train_step(self, words, target):
+        logits = self.forward(words)
+        if self.token_level:
+            return {'loss': nn.functional.cross_entropy(logits.transpose(1, 2), target)}
+        return {'loss': nn.functional.cross_entropy(logits, target)}
+
+    def evaluate_step(self, words, target, seq_len):
+        return {'pred': self.forward(words).argmax(dim=-1), 'target': target, 'seq_len': seq_len}
+
+
+def _prepare_dataloader(dataset, shuffle):
+    # torch>=2.0 在 num_workers=0 时要求 prefetch_factor 为 None；
+    kwargs = {'prefetch_factor': None} if _compare_version('torch', operator.ge, '2.0.0') else {}
+    return prepare_torch_dataloader(dataset, batch_size=32, shuffle=shuffle, **kwargs)
+
+
+def _make_dataset(num_samples, token_level=False, seed=0):
+    rng = random.Random(seed)
+    words, targets, seq_lens = [], [], []
+    for _ in range(num_samples):
+        length = rng.randint(5, 30)
+        words.append([rng.randrange(_VOCAB_SIZE) for _ in range(length)])
+        seq_lens.append(length)
+        if token_level:
+            targets.append([rng.randrange(_NUM_LABELS) for _ in range(length)])
+        else:
+            targets.append(rng.randrange(_NUM_LABELS))
+    return DataSet({'words': words, 'target': targets, 'seq_len': seq_lens})
+
+
+@register('trainer.steps', unit='steps', repeat=3)
+def trainer_steps(scale):
+    torch.manual_seed(0)
+    dataset = _make_dataset(int(8000 * scale))
+    dataloader = _prepare_dataloader(dataset, shuffle=True)
+    model = _TinyModel()
+    trainer = Trainer(model=model, driver='torch', device='cpu', train_dataloader=dataloader,
+                      optimizers=torch.optim.SGD(model.parameters(), lr=0.01), n_epochs=1, progress_bar=None)
+
+    def run():
+        trainer.trainer_state.cur_epoch_idx = 0
+        trainer.run(num_eval_sanity_batch=0)
+    return run, len(dataloader)
+
+
+def _evaluator_setup(scale, metrics, token_level):
+    torch.manual_seed(0)
+    dataset = _make_dataset(int(8000 * scale), token_level=token_level)
+    dataloader = _prepare_dataloader(dataset, shuffle=False)
+    evaluator = Evaluator(model=_TinyModel(token_level=token_level), dataloaders=dataloader, metrics=metrics,
+                          driver='torch', device='cpu', progress_bar=None, verbose=0)
+    return evaluator.run, len(dataloader)
+
+
+@register('evaluator.accuracy', unit='batches', repeat=3)
+def evaluator_accuracy(scale):
+    return _evaluator_setup(scale, {'acc': Accuracy()}, token_level=False)
+
+
+@register('evaluator.classify_f1', unit='batches', repeat=3)
+def evaluator_classify_f1(scale):
+    return _evaluator_setup(scale, {'f1': ClassifyFPreRecMetric(f_type='macro', only_gross=False)},
+                            token_level=False)
+
+
+@register('evaluator.span_f1', unit='batches', repeat=3)
+def evaluator_span_f1(scale):
+    tag_vocab = Vocabulary(unknown=None, padding=None).add_word_lst(['B-PER', 'I-PER', 'B-LOC', 'I-LOC', 'O'])
+    return _evaluator_setup(scale, {'f1': SpanFPreRecMetric(tag_vocab=tag_vocab, encoding_type='bio')},
+                            token_level=True)
+
+
+class _NoOpCallback(Callback):
+    def on_fetch_data_begin(self, trainer):
+        pass
+
+    def on_fetch_data_end(self, trainer):
+        pass
+
+    def on_train_batch_begin(self, trainer, batch, indices=None):
+        pass
+
+    def on_before_backward(self, trainer, outputs):
+        pass
+
+    def on_after_backward(self, trainer):
+        pass
+
+    def on_train_batch_end(self, trainer):
+        pass
+
+
+@register('callbacks.dispatch', unit='events', repeat=5)
+def callbacks_dispatch(scale):
+    # 8 个空的 callback 订阅 6 个 step 内的时机，另外 step 内的其余时机没有订阅者，用于衡量分发函数本身的开销；
+    manager = CallbackManager([_NoOpCallback() for _ in range(8)])
+    manager.initialize_class_callbacks()
+    manager.compile_dispatch()
+    num_steps = int(20000 * scale)
+
+    def run():
+        for _ in range(num_steps):
+            manager.on_fetch_data_begin(None)
+            manager.on_fetch_data_end(None)
+            manager.on_train_batch_begin(None, None, None)
+            manager.on_before_backward(None, None)
+            manager.on_after_backward(None)
+            manager.on_before_optimizers_step(None, None)
+            manager.on_after_optimizers_step(None, None)
+            manager.on_before_zero_grad(None, None)
+            manager.on_after_zero_grad(None, None)
+            manager.on_train_batch_end(None)
+    return run, num_steps * 10
@@ -0,0 +1,33 @@
+from fastNLP.core.dataloaders import MixDataLoader
+from fastNLP.core.samplers import MixBatchSampler
+
+from ..runner import register
+from ._data import make_dataset
+
+_BATCH_SIZE = 32
+
+
+def _index_dataset(num_samples, seed):
+    dataset = make_dataset(num_samples, max_len=20, seed=seed)
+    dataset.apply_field(lambda words: [int(word[1:]) for word in words], field_name='words', new_field_name='words')
+    dataset.delete_field('raw_words')
+    return dataset
+
+
+def _mix_dataloader_setup(scale, mode):
+    num_samples = int(20000 * scale)
+    datasets = {'a': _index_dataset(num_samples, seed=0), 'b': _index_dataset(num_samples // 2, seed=1)}
+    if mode == 'mix_batch':
+        mode = MixBatchSampler(datasets, batch_size=_BATCH_SIZE, seed=0)
+    # collate_fn 只返回 batch 的大小，只测量取数据本身的开销
+    dataloader = MixDataLoader(datasets, mode=mode, batch_size=_BATCH_SIZE, collate_fn=len)
+
+    def run():
+        for _ in dataloader:
+            pass
+    return run, num_samples + num_samples // 2
+
+
+for _mode in ['sequential', 'polling', 'mix_batch']:
+    register(f'dataloader.mix.{_mode}', unit='samples', repeat=5)(
+        lambda scale, _mode=_mode: _mix_dataloader_setup(scale, _mode))
@@ -0,0 +1,68 @@
+from ..runner import register
+from ._data import make_dataset
+
+
+def _split(raw_words):
+    return raw_words.split()
+
+
+def _split_more(ins):
+    words = ins['raw_words'].split()
+    return {'words': words, 'seq_len': len(words)}
+
+
+def _apply_setup(scale, num_proc):
+    dataset = make_dataset(int(20000 * scale))
+
+    def run():
+        dataset.apply_field(_split, field_name='raw_words', new_field_name='words', num_proc=num_proc,
+                            progress_bar=None)
+    return run, len(dataset)
+
+
+@register('dataset.apply_field', unit='samples')
+def dataset_apply_field(scale):
+    return _apply_setup(scale, num_proc=0)
+
+
+@register('dataset.apply_field.num_proc', unit='samples', repeat=3)
+def dataset_apply_field_num_proc(scale):
+    return _apply_setup(scale, num_proc=2)
+
+
+@register('dataset.apply', unit='samples')
+def dataset_apply(scale):
+    dataset = make_dataset(int(20000 * scale))
+    return lambda: dataset.apply(lambda ins: len(ins['words']), new_field_name='seq_len', progress_bar=None), \
+        len(dataset)
+
+
+@register('dataset.apply_more', unit='samples')
+def dataset_apply_more(scale):
+    dataset = make_dataset(int(20000 * scale))
+    return lambda: dataset.apply_more(_split_more, progress_bar=None), len(dataset)
+
+
+@register('dataset.apply_more.num_proc', unit='samples', repeat=3)
+def dataset_apply_more_num_proc(scale):
+    dataset = make_dataset(int(20000 * scale))
+    return lambda: dataset.apply_more(_split_more, num_proc=2, progress_bar=None), len(dataset)
+
+
+@register('dataset.split', unit='samples')
+def dataset_split(scale):
+    dataset = make_dataset(int(200000 * scale), max_len=10)
+    return lambda: dataset.split(0.1, shuffle=True), len(dataset)
+
+
+@register('dataset.getitem_list', unit='samples')
+def dataset_getitem_list(scale):
+    dataset = make_dataset(int(200000 * scale), max_len=10)
+    indices = list(range(0, len(dataset), 2)) + list(range(1, len(dataset), 2))
+    return lambda: dataset[indices], len(dataset)
+
+
+@register('dataset.drop', unit='samples')
+def dataset_drop(scale):
+    dataset = make_dataset(int(200000 * scale), max_len=10)
+    return lambda: dataset.drop(lambda ins: ins['target'] == 0, inplace=False), len(dataset)
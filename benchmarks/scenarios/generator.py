@@ -0,0 +1,97 @@
+import torch
+from torch import nn
+
+from fastNLP import Vocabulary, seq_len_to_mask
+from fastNLP.embeddings.torch import StaticEmbedding
+from fastNLP.modules.torch import TransformerSeq2SeqDecoder
+from fastNLP.modules.torch.generator import SequenceGenerator, ContinuousBatchingGenerator, Seq2SeqDecoderBackend
+
+from ..runner import register
+
+_BATCH_SIZE = 16
+_MAX_LENGTH = 30
+
+
+def _generator_setup(scale, num_beams, do_sample):
+    torch.manual_seed(0)
+    vocab = Vocabulary().add_word_lst([f'w{i}' for i in range(500)])
+    embed = StaticEmbedding(vocab, model_dir_or_name=None, embedding_dim=32)
+    decoder = TransformerSeq2SeqDecoder(embed=embed, pos_embed=nn.Embedding(_MAX_LENGTH + 2, 32), d_model=32,
+                                        num_layers=2, n_head=4, dim_ff=64, dropout=0.1,
+                                        bind_decoder_input_output_embed=True).eval()
+    generator = SequenceGenerator(decoder=decoder, max_length=_MAX_LENGTH, num_beams=num_beams, do_sample=do_sample,
+                                  bos_token_id=1, eos_token_id=None, pad_token_id=0)
+    num_batches = max(int(10 * scale), 1)
+    encoder_outputs = [torch.randn(_BATCH_SIZE, 20, 32) for _ in range(num_batches)]
+    encoder_mask = seq_len_to_mask(torch.randint(5, 21, (_BATCH_SIZE, )), max_len=20)
+
+    @torch.no_grad()
+    def run():
+        for encoder_output in encoder_outputs:
+            state = decoder.init_state(encoder_output, encoder_mask)
+            generator.generate(state=state, tokens=None)
+    return run, num_batches * _BATCH_SIZE
+
+
+@register('generator.greedy', unit='sequences', repeat=3)
+def generator_greedy(scale):
+    return _generator_setup(scale, num_beams=1, do_sample=False)
+
+
+@register('generator.beam', unit='sequences', repeat=3)
+def generator_beam(scale):
+    return _generator_setup(scale, num_beams=4, do_sample=False)
+
+
+@register('generator.sample', unit='sequences', repeat=3)
+def generator_sample(scale):
+    return _generator_setup(scale, num_beams=1, do_sample=True)
+
+
+def _request_trace(scale):
+    # 合成的请求序列：编码长度与生成长度都不相同，大部分请求很短，少量请求很长
+    generator = torch.Generator().manual_seed(0)
+    num_requests = max(int(64 * scale), 1)
+    src_lens = torch.randint(5, 21, (num_requests, ), generator=generator).tolist()
+    new_tokens = torch.where(torch.rand(num_requests, generator=generator) < 0.2,
+                             torch.randint(20, _MAX_LENGTH, (num_requests, ), generator=generator),
+                             torch.randint(2, 8, (num_requests, ), generator=generator)).tolist()
+    encoder_outputs = [torch.randn(src_len, 32, generator=generator) for src_len in src_lens]
+    return encoder_outputs, new_tokens
+
+
+def _trace_decoder():
+    torch.manual_seed(0)
+    return TransformerSeq2SeqDecoder(embed=nn.Embedding(500, 32), pos_embed=nn.Embedding(_MAX_LENGTH + 2, 32), d_model=32,
+                                     num_layers=2, n_head=4, dim_ff=64, dropout=0.1).eval()
+
+
+@register('generator.trace.static', unit='requests', repeat=3)
+def generator_trace_static(scale):
+    # 按到达顺序每 _BATCH_SIZE 个请求组成一个 batch，batch 内所有请求都要生成到最长的那一个结束
+    decoder = _trace_decoder()
+    encoder_outputs, new_tokens = _request_trace(scale)
+
+    @torch.no_grad()
+    def run():
+        for start in range(0, len(encoder_outputs), _BATCH_SIZE):
+            batch = encoder_outputs[start:start + _BATCH_SIZE]
+            lengths = torch.tensor([len(output) for output in batch])
+            generator = SequenceGenerator(decoder=decoder, max_length=max(new_tokens[start:start + _BATCH_SIZE]) + 1,
+                                          do_sample=False, bos_token_id=1, eos_token_id=None)
+            state = decoder.init_state(nn.utils.rnn.pad_sequence(batch, batch_first=True), seq_len_to_mask(lengths))
+            generator.generate(state=state, tokens=None)
+    return run, len(encoder_outputs)
+
+
+@register('generator.trace.continuous', unit='requests', repeat=3)
+def generator_trace_continuous(scale):
+    decoder = _trace_decoder()
+    encoder_outputs, new_tokens = _request_trace(scale)
+    generator = ContinuousBatchingGenerator(Seq2SeqDecoderBackend(decoder, bos_token_id=1), max_batch_size=_BATCH_SIZE)
+
+    def run():
+        for encoder_output, num_tokens in zip(encoder_outputs, new_tokens):
+            generator.submit(encoder_output, max_new_tokens=num_tokens)
+        generator.run_until_complete()
+    return run, len(encoder_outputs)
@@ -0,0 +1,83 @@
+import os
+import tempfile
+
+from fastNLP import DataSet
+from fastNLP.io import DataBundle, CLSBasePipe, MatchingBertPipe, R8PmiGraphPipe, CSVLoader, PipeCache
+
+from ..runner import register
+from ._data import make_dataset
+
+
+def _make_data_bundle(datasets, fields):
+    return DataBundle(datasets={name: DataSet({field: dataset[field].content for field in fields})
+                                for name, dataset in datasets.items()})
+
+
+def _pipe_setup(scale, pipe, fields):
+    datasets = {name: make_dataset(int(num_samples * scale), seed=seed)
+                for name, num_samples, seed in [('train', 20000, 0), ('dev', 2000, 1), ('test', 2000, 2)]}
+    for dataset in datasets.values():
+        dataset.apply_field(str, field_name='target', new_field_name='target', progress_bar=None)
+        dataset.copy_field('raw_words', 'raw_words1')
+        dataset.apply_field(lambda raw_words: raw_words[::-1], field_name='raw_words', new_field_name='raw_words2',
+                            progress_bar=None)
+
+    def run():
+        pipe.process(_make_data_bundle(datasets, fields))
+    return run, sum(len(dataset) for dataset in datasets.values())
+
+
+@register('pipe.cls', unit='samples', repeat=3)
+def pipe_cls(scale):
+    return _pipe_setup(scale, CLSBasePipe(lower=True), ['raw_words', 'target'])
+
+
+@register('pipe.matching_bert', unit='samples', repeat=3)
+def pipe_matching_bert(scale):
+    return _pipe_setup(scale, MatchingBertPipe(lower=True), ['raw_words1', 'raw_words2', 'target'])
+
+
+@register('pipe.pmi_graph', unit='samples', repeat=3)
+def pipe_pmi_graph(scale):
+    datasets = {name: make_dataset(int(num_samples * scale), min_len=50, max_len=300, seed=seed)
+                for name, num_samples, seed in [('train', 2000, 0), ('dev', 200, 1), ('test', 200, 2)]}
+    data_bundle = _make_data_bundle(datasets, ['raw_words'])
+    pipe = R8PmiGraphPipe()
+    return lambda: pipe.build_graph(data_bundle), sum(len(dataset) for dataset in datasets.values())
+
+
+def _write_shards(scale):
+    directory = tempfile.mkdtemp(prefix='fastnlp_bench_')
+    num_samples = 0
+    for name, size, num_shards, seed in [('train', 20000, 8, 0), ('dev', 2000, 1, 1), ('test', 2000, 1, 2)]:
+        dataset = make_dataset(int(size * scale), seed=seed)
+        shard_size = (len(dataset) + num_shards - 1) // num_shards
+        for i in range(num_shards):
+            with open(os.path.join(directory, f'{name}-{i}.tsv'), 'w', encoding='utf-8') as f:
+                f.write('raw_words\ttarget\n')
+                for ins in dataset[i * shard_size:(i + 1) * shard_size]:
+                    f.write(f"{ins['raw_words']}\t{ins['target']}\n")
+        num_samples += len(dataset)
+    paths = {name: os.path.join(directory, f'{name}-*.tsv') for name in ['train', 'dev', 'test']}
+    return directory, paths, num_samples
+
+
+@register('pipe.cls_from_file', unit='samples', repeat=3)
+def pipe_cls_from_file(scale):
+    _, paths, num_samples = _write_shards(scale)
+    loader, pipe = CSVLoader(sep='\t'), CLSBasePipe(lower=True)
+    return lambda: pipe.process(loader.load(paths, progress_bar=None)), num_samples
+
+
+@register('pipe.cls_from_file_cached', unit='samples', repeat=3)
+def pipe_cls_from_file_cached(scale):
+    # 缓存已经建立，每次运行时修改 dev 文件的修改时间，只有 dev 需要重新处理
+    directory, paths, num_samples = _write_shards(scale)
+    loader, pipe = CSVLoader(sep='\t'), CLSBasePipe(lower=True)
+    cache = PipeCache(os.path.join(directory, 'cache'))
+    cache.process_from_file(pipe, loader, paths)
+
+    def run():
+        os.utime(os.path.join(directory, 'dev-0.tsv'))
+        cache.process_from_file(pipe, loader, paths)
+    return run, num_samples
@@ -0,0 +1,72 @@
+from fastNLP.core.samplers import RandomSampler, SequentialSampler, SortedSampler, UnrepeatedRandomSampler, \
+    UnrepeatedSortedSampler, UnrepeatedSequentialSampler, ReproduceBatchSampler, RandomBatchSampler, \
+    BucketedBatchSampler, DopedSampler, MixSequentialSampler, PollingSampler, MixBatchSampler
+
+from ..runner import register
+from ._data import make_dataset
+
+_BATCH_SIZE = 32
+
+
+def _iterate(sampler):
+    def run():
+        for _ in sampler:
+            pass
+    return run
+
+
+_SAMPLERS = {
+    'random': lambda ds: RandomSampler(ds, shuffle=True, seed=0),
+    'sequential': lambda ds: SequentialSampler(ds),
+    'sorted': lambda ds: SortedSampler(ds, length='seq_len'),
+    'unrepeated_random': lambda ds: UnrepeatedRandomSampler(ds, shuffle=True, seed=0),
+    'unrepeated_sorted': lambda ds: UnrepeatedSortedSampler(ds, length='seq_len'),
+    'unrepeated_sequential': lambda ds: UnrepeatedSequentialSampler(ds),
+    'reproduce_batch': lambda ds: ReproduceBatchSampler(RandomSampler(ds, shuffle=True, seed=0),
+                                                        batch_size=_BATCH_SIZE, drop_last=False),
+    'random_batch': lambda ds: RandomBatchSampler(ds, batch_size=_BATCH_SIZE, shuffle=True, seed=0),
+    'bucketed_batch': lambda ds: BucketedBatchSampler(ds, length='seq_len', batch_size=_BATCH_SIZE, shuffle=True,
+                                                      seed=0),
+}
+
+# mix sampler 每次迭代都会重新初始化内部的 sampler，因此每次都需要新建一个实例；
+_MIX_SAMPLERS = {
+    'doped': lambda datasets: DopedSampler(datasets, batch_size=_BATCH_SIZE, sampler='rand'),
+    'mix_sequential': lambda datasets: MixSequentialSampler(datasets, batch_size=_BATCH_SIZE, sampler='rand'),
+    'polling': lambda datasets: PollingSampler(datasets, batch_size=_BATCH_SIZE, sampler='rand'),
+    'mix_batch': lambda datasets: MixBatchSampler(datasets, batch_size=_BATCH_SIZE, seed=0),
+    'mix_batch_temperature': lambda datasets: MixBatchSampler(datasets, batch_size=_BATCH_SIZE, temperature=2, seed=0),
+}
+
+
+def _sampler_setup(scale, build):
+    dataset = make_dataset(int(100000 * scale), max_len=10)
+    sampler = build(dataset)
+    if hasattr(sampler, 'set_epoch'):
+        epoch = [0]
+
+        def run():
+            epoch[0] += 1
+            sampler.set_epoch(epoch[0])
+            for _ in sampler:
+                pass
+        return run, len(dataset)
+    return _iterate(sampler), len(dataset)
+
+
+def _mix_sampler_setup(scale, build):
+    num_samples = int(50000 * scale)
+    datasets = {'a': make_dataset(num_samples, max_len=10, seed=0), 'b': make_dataset(num_samples // 2, max_len=10,
+                                                                                       seed=1)}
+
+    def run():
+        for _ in build(datasets):
+            pass
+    return run, num_samples + num_samples // 2
+
+
+for _name, _build in _SAMPLERS.items():
+    register(f'sampler.{_name}', unit='samples', repeat=10)(lambda scale, _build=_build: _sampler_setup(scale, _build))
+
+for _name, _build in _MIX_SAMPLERS.items():
+    register(f'sampler.mix.{_name}', unit='samples', repeat=10)(lambda scale, _build=_build: _mix_sampler_setup(scale, _build))
@@ -0,0 +1,44 @@
+import copy
+
+import torch
+
+from fastNLP.transformers.torch import BertConfig, BertForSequenceClassification
+
+from ..runner import register
+
+_BATCH_SIZE = 8
+_SEQ_LEN = 128
+
+
+def _bert_setup(scale):
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=5000, hidden_size=384, num_hidden_layers=4, num_attention_heads=6,
+                        intermediate_size=1536, num_labels=4)
+    model = BertForSequenceClassification(config).eval()
+    num_batches = max(int(4 * scale), 1)
+    batches = [torch.randint(1, 5000, (_BATCH_SIZE, _SEQ_LEN)) for _ in range(num_batches)]
+    return model, batches
+
+
+def _predict(model, batches):
+    with torch.no_grad():
+        return torch.cat([model(input_ids=input_ids).logits for input_ids in batches])
+
+
+@register('transformers.bert.fp32', unit='samples', repeat=3)
+def bert_fp32(scale):
+    model, batches = _bert_setup(scale)
+    return lambda: _predict(model, batches), len(batches) * _BATCH_SIZE
+
+
+@register('transformers.bert.int8', unit='samples', repeat=3)
+def bert_int8(scale):
+    model, batches = _bert_setup(scale)
+    quantized = copy.deepcopy(model).quantize_dynamic('qint8')
+    # 与 float32 模型在相同输入上的差异
+    logits, quantized_logits = _predict(model, batches), _predict(quantized, batches)
+    metrics = {
+        'max_logit_delta': (logits - quantized_logits).abs().max().item(),
+        'label_agreement': (logits.argmax(-1) == quantized_logits.argmax(-1)).float().mean().item(),
+    }
+    return lambda: _predict(quantized, batches), len(batches) * _BATCH_SIZE, metrics
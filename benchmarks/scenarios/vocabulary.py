@@ -0,0 +1,17 @@
+from fastNLP import Vocabulary
+
+from ..runner import register
+from ._data import make_dataset
+
+
+@register('vocabulary.from_dataset', unit='samples')
+def vocabulary_from_dataset(scale):
+    dataset = make_dataset(int(20000 * scale))
+    return lambda: Vocabulary().from_dataset(dataset, field_name='words'), len(dataset)
+
+
+@register('vocabulary.index_dataset', unit='samples')
+def vocabulary_index_dataset(scale):
+    dataset = make_dataset(int(20000 * scale))
+    vocab = Vocabulary().from_dataset(dataset, field_name='words')
+    return lambda: vocab.index_dataset(dataset, field_name='words', new_field_name='index'), len(dataset)
@@ -18,6 +18,7 @@ __all__ = [
     'HasMonitorCallback',
     "FitlogCallback",
     "TimerCallback",
+    "ProfilerCallback",
 
     # collators
     'Collator',
@@ -26,6 +26,12 @@ __all__ = [
 
     "TimerCallback",
 
+    "ProfilerCallback",
+    "ProfilerSink",
+    "JsonlProfilerSink",
+    "RingBufferProfilerSink",
+    "PrometheusProfilerSink",
+
     "TopkSaver"
 ]
 
@@ -43,4 +49,6 @@ from .more_evaluate_callback import MoreEvaluateCallback
 from .has_monitor_callback import ResultsMonitor, HasMonitorCallback
 from .fitlog_callback import FitlogCallback
 from .timer_callback import TimerCallback
+from .profiler_callback import ProfilerCallback, ProfilerSink, JsonlProfilerSink, RingBufferProfilerSink, \
+    PrometheusProfilerSink
 from .topk_saver import TopkSaver
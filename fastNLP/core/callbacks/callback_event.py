@@ -458,6 +458,17 @@ class Filter:
 
     def __call__(self, fn: Callable):
 
+        if self._filter == self.every_filter and self._every == 1:
+            # 每次都会运行的情况下不需要再经过 `_filter` 的判断，只需要维护计数即可；
+            @wraps(fn)
+            def wrapper(*args, **kwargs) -> Callable:
+                self.num_called += 1
+                self.num_executed += 1
+                return fn(*args, **kwargs)
+
+            wrapper.__fastNLP_filter__ = self
+            return wrapper
+
         @wraps(fn)
         def wrapper(*args, **kwargs) -> Callable:
             self.num_called += 1
@@ -1,5 +1,5 @@
 import inspect
-from typing import List, Optional, Dict, Sequence
+from typing import List, Optional, Dict, Sequence, Callable
 from collections import defaultdict
 
 from .callback_event import Event
@@ -10,15 +10,54 @@ from ..utils.exceptions import EarlyStopException
 from ..utils.utils import _get_fun_msg
 
 
+# 所有通过 `_transfer` 转发的 callback 时机；`on_save_checkpoint` 与 `on_load_checkpoint` 在 CallbackManager 上有实际的实现，
+#  不能被预编译的分发函数覆盖；
+_TRANSFER_EVENTS = set()
+
+
 def _transfer(func):
     r"""
     装饰器，将对CallbackManager的调用转发到各个Callback子类.
     需要注意这里的 wrapper 内的函数不会运行 `func` 本身，因此如果有什么需要直接在 callback 函数内运行的代码，请放在 TrainerCallback 内；
+
+    实际运行时 :class:`CallbackManager` 会通过 :meth:`CallbackManager.compile_dispatch` 为每一个 callback 时机预先编译好一个
+    分发函数并绑定在实例上，从而覆盖掉这里的 wrapper；这里的 wrapper 只是在预编译之前被调用时的兜底实现；
     """
 
     def wrapper(manager, *arg, **kwargs):
-        manager.callback_counter[func.__name__] += 1  # 给实际被调用的 callback_fn 的计数加 1；
-        for callback_fn in manager.callback_fns[func.__name__]:
+        manager._compile_one_event(func.__name__)(*arg, **kwargs)
+
+    wrapper.__name__ = func.__name__
+    _TRANSFER_EVENTS.add(func.__name__)
+    return wrapper
+
+
+def _no_callback_fn(*arg, **kwargs):
+    r"""
+    没有任何 callback 函数订阅的时机会被直接分发到这一空函数上；
+    """
+    pass
+
+
+def _build_dispatch_fn(fn_name: str, callback_fns: Sequence, callback_counter: Dict):
+    r"""
+    为一个具体的 callback 时机构建分发函数；订阅该时机的 callback 函数会被拍平为一个 tuple，从而在训练过程中不需要再进行任何的字典查找；
+
+    :param fn_name: callback 时机的名字，例如 ``'on_train_batch_begin'``；
+    :param callback_fns: 订阅该时机的所有 callback 函数；
+    :param callback_counter: 用于记录每一个 callback 时机被调用次数的字典；
+    :return: 一个分发函数，如果没有任何 callback 函数订阅该时机，那么返回一个空函数；
+    """
+    if len(callback_fns) == 0:
+        return _no_callback_fn
+
+    callback_fns = tuple(callback_fns)
+
+    if len(callback_fns) == 1:
+        callback_fn = callback_fns[0]
+
+        def dispatch(*arg, **kwargs):
+            callback_counter[fn_name] += 1  # 给实际被调用的 callback_fn 的计数加 1；
             try:
                 callback_fn(*arg, **kwargs)
             except (EarlyStopException, KeyboardInterrupt) as e:
@@ -26,7 +65,20 @@ def _transfer(func):
             except BaseException as e:
                 logger.error(f"The following callback_fn raise exception:{_get_fun_msg(callback_fn)}.")
                 raise e
-    return wrapper
+        return dispatch
+
+    def dispatch(*arg, **kwargs):
+        callback_counter[fn_name] += 1  # 给实际被调用的 callback_fn 的计数加 1；
+        callback_fn = None
+        try:
+            for callback_fn in callback_fns:
+                callback_fn(*arg, **kwargs)
+        except (EarlyStopException, KeyboardInterrupt) as e:
+            raise e
+        except BaseException as e:
+            logger.error(f"The following callback_fn raise exception:{_get_fun_msg(callback_fn)}.")
+            raise e
+    return dispatch
 
 
 def prepare_callbacks(callbacks, progress_bar: str):
@@ -98,6 +150,11 @@ class CallbackManager:
         # 预跑需要拿到每一个被 `Filter` 修饰的函数的 `Filter` 实例，从而在预跑结束后重置它们的内部状态；
         self._callback_filters = []  # [(callback_name, fn_name, filter 实例), ]
 
+        # 预编译的分发表，键为 callback 时机，值为该时机的分发函数；没有订阅者的时机会被分发到一个空函数上，从而在训练过程中几乎没有开销；
+        self._dispatch_table = {}
+        # 作用在每一个被订阅的 callback 时机的分发函数上的修饰器，例如 `ProfilerCallback` 用其统计 callback 函数的耗时；
+        self._dispatch_decorators = []
+
         # 保留所有 callback 的引用，用于断点重训；包括全部的三种callback：函数修饰器 callback；类 callback；纯函数 callback；
         # 因为所有的 callback 都是通过函数 `self.add_one_callback` 添加，因此我们选择在其下进行添加；
         # 一个比较重要的概念在于在训练过程运行的时候，两个 callback 的 callback_name 可以是一样的，并且理论上不会造成任何影响；但是当
@@ -128,6 +185,43 @@ class CallbackManager:
                 if inspect.getsource(_fn) != inspect.getsource(getattr(Callback, name)):
                     self.callback_fns[name].append(_fn)
                     self.extract_callback_filter_state(callback.callback_name, _fn)
+                    # 在训练过程中仍然可以通过 `Trainer.add_callback_fn` 加入新的 callback 函数，因此需要重新编译该时机的分发函数；
+                    if name in self._dispatch_table:
+                        self._compile_one_event(name)
+
+    def compile_dispatch(self):
+        r"""
+        为所有的 callback 时机预先编译好分发函数，并直接绑定到当前实例上，从而使得训练过程中对 callback 时机的调用不会再经过额外的
+        字典查找与计数；没有任何 callback 函数订阅的时机会直接成为一个空函数；
+
+        通常在 ``Trainer`` 初始化完所有的 callback 后调用；之后再通过 :meth:`dissect_one_callback` 加入的 callback 函数会自动
+        更新对应时机的分发函数；只有通过 ``_transfer`` 转发的时机会被编译，:meth:`on_save_checkpoint` 与
+        :meth:`on_load_checkpoint` 仍旧使用其自身的实现；
+        """
+        for name, member in Event.__dict__.items():
+            if isinstance(member, staticmethod) and name in _TRANSFER_EVENTS:
+                self._compile_one_event(name)
+
+    def add_dispatch_decorator(self, decorator: Callable):
+        r"""
+        为所有被订阅的 callback 时机的分发函数加上一个修饰器，并重新编译分发表；没有被订阅的时机仍旧保持为空函数，不会被修饰；
+
+        :param decorator: 输入参数为 ``(fn_name, dispatch_fn)``，返回一个新的分发函数；
+        """
+        self._dispatch_decorators.append(decorator)
+        for fn_name in list(self._dispatch_table.keys()):
+            self._compile_one_event(fn_name)
+
+    def _compile_one_event(self, fn_name: str):
+        # 注意这里不能使用 `self.callback_fns[fn_name]`，因为 `callback_fns` 是一个 defaultdict，直接访问会在其中插入一个空列表，
+        #  而 `Trainer._check_callback_called_legality` 会依赖 `callback_fns` 中的键来判断某一个时机是否被订阅；
+        dispatch_fn = _build_dispatch_fn(fn_name, self.callback_fns.get(fn_name, []), self.callback_counter)
+        if dispatch_fn is not _no_callback_fn:
+            for decorator in self._dispatch_decorators:
+                dispatch_fn = decorator(fn_name, dispatch_fn)
+        self._dispatch_table[fn_name] = dispatch_fn
+        setattr(self, fn_name, dispatch_fn)
+        return dispatch_fn
 
     def extract_callback_filter_state(self, callback_name, callback_fn):
         r"""
@@ -0,0 +1,526 @@
+__all__ = [
+    'ProfilerCallback',
+    'ProfilerSink',
+    'JsonlProfilerSink',
+    'RingBufferProfilerSink',
+    'PrometheusProfilerSink',
+]
+
+import os
+import json
+import sys
+import threading
+import time
+from collections import deque
+from typing import Union, List, Optional, Callable, Dict, Sequence, Tuple
+
+from .callback import Callback
+from ..log import logger
+from ...envs import get_global_rank
+from fastNLP.envs.imports import _NEED_IMPORT_TORCH
+
+if _NEED_IMPORT_TORCH:
+    import torch
+
+
+# 用于计时的 callback 时机；当 ``ProfilerCallback`` 被关闭时，这些时机都不会被注册到 ``CallbackManager`` 中；
+_PROFILE_EVENTS = ('on_after_trainer_initialized', 'on_train_begin', 'on_train_end', 'on_fetch_data_begin',
+                   'on_fetch_data_end', 'on_train_batch_begin', 'on_before_backward', 'on_after_backward',
+                   'on_before_optimizers_step', 'on_after_optimizers_step', 'on_train_batch_end',
+                   'on_evaluate_begin', 'on_evaluate_end', 'on_exception')
+
+# 每一个 step 中被统计的阶段；
+_STAGES = ('data_fetch', 'to_device', 'forward', 'backward', 'optimize', 'callbacks')
+
+
+class ProfilerSink:
+    r"""
+    :class:`ProfilerCallback` 的输出端基类；每一条记录都是一个 ``dict``，其中 ``'event'`` 为 ``'step'`` 或 ``'evaluate'``。
+    如需自定义输出位置，继承该类并实现 :meth:`write` 即可。:class:`ProfilerCallback` 会在训练开始时调用 :meth:`open`，在训练
+    结束（包括出现异常）时调用 :meth:`close`，因此需要占用文件、端口等资源的输出端应当在 :meth:`open` 中申请资源，并在 :meth:`close`
+    中释放。
+    """
+
+    def open(self):
+        pass
+
+    def write(self, record: Dict):
+        raise NotImplementedError()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class JsonlProfilerSink(ProfilerSink):
+    r"""
+    将每一条记录以一行 json 的形式写入到文件中。为了减少对训练过程的影响，记录会先缓存在内存中，每 ``flush_every`` 条写入一次。
+    文件在 :meth:`open` 或第一次写入时才会被打开，并在 :meth:`close` 时关闭。
+
+    :param path: 输出文件的路径；
+    :param flush_every: 每缓存多少条记录写入一次文件；
+    """
+    def __init__(self, path: str, flush_every: int = 100):
+        self.path = path
+        self.flush_every = max(int(flush_every), 1)
+        self._buffer = []
+        self._fp = None
+
+    def open(self):
+        if self._fp is None:
+            folder = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(folder, exist_ok=True)
+            self._fp = open(self.path, 'a', encoding='utf-8')
+
+    def write(self, record: Dict):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if len(self._buffer) == 0:
+            return
+        self.open()
+        self._fp.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in self._buffer))
+        self._fp.flush()
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+
+class RingBufferProfilerSink(ProfilerSink):
+    r"""
+    将最近的 ``capacity`` 条记录保存在内存中，可以通过 :attr:`records` 获取，或通过 :meth:`summary` 获得各项指标的平均值。
+
+    :param capacity: 最多保存多少条记录；
+    """
+    def __init__(self, capacity: int = 1000):
+        self._records = deque(maxlen=capacity)
+
+    def write(self, record: Dict):
+        self._records.append(record)
+
+    @property
+    def records(self) -> List[Dict]:
+        return list(self._records)
+
+    def summary(self, event: str = 'step') -> Dict:
+        r"""
+        计算当前保存的 ``event`` 类型的记录中所有数值型指标的平均值；
+
+        :param event: 需要统计的记录类型；
+        :return: 一个字典，键为指标名称，值为其平均值；另外 ``'num_records'`` 为参与统计的记录数量；
+        """
+        totals, counts = {}, {}
+        num_records = 0
+        for record in self._records:
+            if record.get('event') != event:
+                continue
+            num_records += 1
+            for key, value in record.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and key not in ('step', 'epoch'):
+                    totals[key] = totals.get(key, 0) + value
+                    counts[key] = counts.get(key, 0) + 1
+        summary = {key: totals[key] / counts[key] for key in totals}
+        summary['num_records'] = num_records
+        return summary
+
+
+class PrometheusProfilerSink(ProfilerSink):
+    r"""
+    在本地启动一个 http 服务，以 Prometheus 的文本格式暴露最近一次的各项指标，以及累计的样本数、step 数等计数器。服务运行在一个
+    daemon 线程中，不依赖 ``prometheus_client``。端口在 :meth:`open` 时才会被绑定，并在 :meth:`close` 时释放，因此创建该对象
+    本身没有任何副作用。
+
+    :param port: 监听的端口，为 ``0`` 时由系统自动分配，可以在 :meth:`open` 之后通过 :attr:`port` 获得实际的端口；
+    :param host: 监听的地址，默认只监听本机；
+    :param prefix: 所有指标名称的前缀；
+    """
+    def __init__(self, port: int = 9464, host: str = '127.0.0.1', prefix: str = 'fastnlp'):
+        self.host = host
+        self.port = port
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._gauges = {}
+        self._counters = {}
+        self._server = None
+        self._thread = None
+
+    def open(self):
+        if self._server is not None:
+            return
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+        sink = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = sink.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fastNLP-prometheus-sink', daemon=True)
+        self._thread.start()
+
+    def write(self, record: Dict):
+        event = record.get('event', 'step')
+        with self._lock:
+            self._counters[f'{event}s_total'] = self._counters.get(f'{event}s_total', 0) + 1
+            for key in ('samples', 'tokens', 'starved'):
+                if isinstance(record.get(key), (int, float)):
+                    self._counters[f'{key}_total'] = self._counters.get(f'{key}_total', 0) + record[key]
+            for key, value in record.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self._gauges[f'{event}_{key}'] = value
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, value in sorted(self._counters.items()):
+                lines.append(f'# TYPE {self.prefix}_{name} counter')
+                lines.append(f'{self.prefix}_{name} {float(value)}')
+            for name, value in sorted(self._gauges.items()):
+                lines.append(f'# TYPE {self.prefix}_{name} gauge')
+                lines.append(f'{self.prefix}_{name} {float(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+            self._thread = None
+
+
+def _count_samples(batch) -> Optional[int]:
+    r"""
+    从一个 batch 中推断样本数量，即第一个具有 ``shape`` 或者长度的字段的第一维大小；
+    """
+    if isinstance(batch, dict):
+        values = batch.values()
+    elif isinstance(batch, (list, tuple)):
+        values = batch
+    else:
+        values = (batch, )
+    for value in values:
+        shape = getattr(value, 'shape', None)
+        if shape is not None and len(shape) > 0:
+            return int(shape[0])
+        if isinstance(value, (list, tuple)):
+            return len(value)
+    return None
+
+
+def _peak_memory() -> Tuple[Optional[int], str]:
+    r"""
+    获取当前进程的内存峰值；使用 cuda 时为上一次重置后 cuda 的显存峰值，否则为进程整个生命周期的常驻内存峰值；
+    """
+    if _NEED_IMPORT_TORCH and torch.cuda.is_available() and torch.cuda.is_initialized():
+        peak = torch.cuda.max_memory_allocated()
+        torch.cuda.reset_peak_memory_stats()
+        return int(peak), 'cuda'
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # linux 下单位为 KB，macOS 下为 B；
+        return int(peak if sys.platform == 'darwin' else peak * 1024), 'cpu'
+    except ImportError:
+        return None, 'cpu'
+
+
+class ProfilerCallback(Callback):
+    r"""
+    统计训练过程中每一个 step 各个阶段的耗时以及吞吐量，并将结果输出到一个或多个 :class:`ProfilerSink` 中。每一条 ``'step'`` 记录包含：
+
+        * ``data_fetch``: 从 dataloader 中取数据的耗时；
+        * ``to_device``: 将数据迁移到设备上（包括 ``input_mapping``）的耗时；
+        * ``forward`` / ``backward`` / ``optimize``: 前向、反向传播以及优化器更新的耗时；
+        * ``callbacks``: 这一 step 中所有 callback 函数（包括本 callback 自身）的总耗时；
+        * ``step_time``: 从取数据开始到这一 step 结束的总耗时；
+        * ``samples`` / ``tokens`` 以及 ``samples_per_sec`` / ``tokens_per_sec``；
+        * ``data_wait_ratio``: 取数据耗时在这一 step 中的占比；``starved`` 表示其是否超过了 ``starvation_threshold``，即
+          dataloader 的数据供应是否跟不上训练速度；
+        * ``peak_memory``: 这一 step 的显存峰值（使用 cuda 时），或者进程的内存峰值（使用 cpu 时），单位为字节；
+
+    另外每一次评测会产生一条 ``'evaluate'`` 记录。所有的输出端会在训练开始时被打开（:meth:`ProfilerSink.open`），并在训练结束或
+    出现异常时被关闭（:meth:`ProfilerSink.close`）。
+
+    使用示例::
+
+        sink = RingBufferProfilerSink(capacity=1000)
+        trainer = Trainer(..., callbacks=[ProfilerCallback(sinks=[sink, JsonlProfilerSink('profile.jsonl')])])
+        trainer.run()
+        print(sink.summary())
+
+    .. note::
+
+        当 ``enable=False`` 时，该 callback 不会注册任何 callback 函数，因此对训练过程没有任何额外的开销，方便通过配置开关性能统计。
+        在使用 cuda 时，由于 cuda 的计算是异步的，如需准确的分阶段耗时请设置 ``synchronize=True``，但这会带来一定的额外开销。
+
+    :param sinks: 输出端，可以为一个或多个 :class:`ProfilerSink`；为 ``None`` 时使用一个 :class:`RingBufferProfilerSink`，可以通过
+        :attr:`sinks` 获取；
+    :param every: 每隔多少个 step 统计一次；
+    :param num_tokens: 如何统计一个 batch 中的 token 数量。为 ``str`` 时表示 batch 中保存每个样本长度的字段名（例如 ``'seq_len'``），
+        为 ``Callable`` 时其输入为 batch，返回 token 数量；为 ``None`` 时不统计 token 数量；
+    :param num_samples: 如何统计一个 batch 中的样本数量，为 ``Callable`` 时其输入为 batch，返回样本数量；为 ``None`` 时使用 batch
+        中第一个字段的第一维大小；
+    :param starvation_threshold: ``data_wait_ratio`` 超过该值时认为这一 step 在等待数据；
+    :param synchronize: 是否在每一个阶段的边界处同步 cuda，以获得准确的分阶段耗时；
+    :param trace_steps: 使用 ``torch.profiler`` 记录详细 trace 的 step 区间，例如 ``(10, 15)`` 表示记录全局第 10 到第 15 个 step
+        （包含两端，从 1 开始计数）；也可以传入多个区间组成的列表；
+    :param trace_folder: trace 文件的保存文件夹，文件名为 ``trace_rank{rank}_{start}-{end}.json``，可以在 ``chrome://tracing`` 中查看；
+    :param only_rank_zero: 是否只在 rank 0 上进行输出；
+    :param log_summary: 是否在训练结束时通过 logger 打印平均的统计结果；
+    :param enable: 是否开启统计；
+    """
+    def __init__(self, sinks: Union[ProfilerSink, Sequence[ProfilerSink], None] = None, every: int = 1,
+                 num_tokens: Union[str, Callable, None] = None, num_samples: Optional[Callable] = None,
+                 starvation_threshold: float = 0.1, synchronize: bool = False,
+                 trace_steps: Union[Tuple[int, int], List[Tuple[int, int]], None] = None, trace_folder: str = 'traces',
+                 only_rank_zero: bool = True, log_summary: bool = True, enable: bool = True):
+        assert isinstance(every, int) and every > 0, "every must be a positive integer."
+        if sinks is None:
+            sinks = [RingBufferProfilerSink()]
+        elif isinstance(sinks, ProfilerSink):
+            sinks = [sinks]
+        self.sinks = list(sinks)
+        for sink in self.sinks:
+            if not isinstance(sink, ProfilerSink):
+                raise TypeError(f"sinks must be of ProfilerSink type, instead of `{type(sink)}`")
+        self.every = every
+        if isinstance(num_tokens, str):
+            field = num_tokens
+            num_tokens = lambda batch: float(batch[field].sum()) if hasattr(batch[field], 'sum') else sum(batch[field])
+        self.num_tokens = num_tokens
+        self.num_samples = num_samples if num_samples is not None else _count_samples
+        self.starvation_threshold = starvation_threshold
+        self.synchronize = synchronize
+        if trace_steps is not None and isinstance(trace_steps[0], int):
+            trace_steps = [trace_steps]
+        self.trace_steps = sorted(trace_steps) if trace_steps is not None else []
+        for start, end in self.trace_steps:
+            assert 0 < start <= end, "Each window in trace_steps should be (start, end) with 0 < start <= end."
+        self.trace_folder = trace_folder
+        self.only_rank_zero = only_rank_zero
+        self.log_summary = log_summary
+        self.enable = enable
+
+        self._recording = False
+        self._marks = {}
+        self._callback_time = 0.
+        self._in_callback = False
+        self._eval_start = None
+        self._torch_profiler = None
+        self._trace_window = None
+        self._totals = {'steps': 0, 'samples': 0, 'tokens': 0, 'starved': 0, 'step_time': 0.}
+        self._rank = 0
+
+        if not enable:
+            # 将所有的 callback 函数替换为基类的空实现，这样 ``CallbackManager`` 不会注册任何 callback 函数；
+            for name in _PROFILE_EVENTS:
+                setattr(self, name, getattr(Callback, name).__get__(self))
+
+    def _now(self):
+        if self.synchronize and _NEED_IMPORT_TORCH and torch.cuda.is_available() and torch.cuda.is_initialized():
+            torch.cuda.synchronize()
+        return time.perf_counter()
+
+    def _time_dispatch(self, fn_name, dispatch_fn):
+        r"""
+        作用在 ``CallbackManager`` 的分发函数上，统计所有 callback 函数的耗时；
+        """
+        perf_counter = time.perf_counter
+
+        def timed_dispatch(*args, **kwargs):
+            if not self._recording or self._in_callback:
+                return dispatch_fn(*args, **kwargs)
+            self._in_callback = True
+            start = perf_counter()
+            try:
+                return dispatch_fn(*args, **kwargs)
+            finally:
+                self._callback_time += perf_counter() - start
+                self._in_callback = False
+        return timed_dispatch
+
+    def on_after_trainer_initialized(self, trainer, driver):
+        self._rank = get_global_rank()
+        if self.only_rank_zero and self._rank != 0:
+            self.sinks = []
+        trainer.callback_manager.add_dispatch_decorator(self._time_dispatch)
+
+    def on_train_begin(self, trainer):
+        self._totals = {'steps': 0, 'samples': 0, 'tokens': 0, 'starved': 0, 'step_time': 0.}
+        for sink in self.sinks:
+            sink.open()
+
+    def on_fetch_data_begin(self, trainer):
+        step = trainer.global_forward_batches + 1
+        self._recording = step % self.every == 0
+        self._maybe_start_trace(step)
+        if self._recording:
+            self._callback_time = 0.
+            self._marks = {'fetch_begin': self._now()}
+
+    def on_fetch_data_end(self, trainer):
+        if self._recording:
+            self._marks['fetch_end'] = self._now()
+
+    def on_train_batch_begin(self, trainer, batch, indices=None):
+        if self._recording:
+            self._marks['forward_begin'] = self._now()
+            self._marks['samples'] = self.num_samples(batch)
+            if self.num_tokens is not None:
+                self._marks['tokens'] = self.num_tokens(batch)
+
+    def on_before_backward(self, trainer, outputs):
+        if self._recording:
+            self._marks['backward_begin'] = self._now()
+
+    def on_after_backward(self, trainer):
+        if self._recording:
+            self._marks['backward_end'] = self._now()
+
+    def on_before_optimizers_step(self, trainer, optimizers):
+        if self._recording:
+            self._marks['optimize_begin'] = self._now()
+
+    def on_after_optimizers_step(self, trainer, optimizers):
+        if self._recording:
+            self._marks['optimize_end'] = self._now()
+
+    def on_train_batch_end(self, trainer):
+        if self._recording:
+            end = self._now()
+            self._emit(self._step_record(trainer, end))
+            self._recording = False
+        self._maybe_stop_trace(trainer.global_forward_batches)
+
+    def on_evaluate_begin(self, trainer):
+        self._eval_start = self._now()
+
+    def on_evaluate_end(self, trainer, results):
+        if self._eval_start is not None:
+            self._emit({'event': 'evaluate', 'step': trainer.global_forward_batches, 'epoch': trainer.cur_epoch_idx,
+                        'evaluate': self._now() - self._eval_start})
+            self._eval_start = None
+
+    def on_exception(self, trainer, exception):
+        self._maybe_stop_trace(None)
+        self._close_sinks()
+
+    def on_train_end(self, trainer):
+        self._maybe_stop_trace(None)
+        if self.log_summary and self._totals['steps'] > 0 and (not self.only_rank_zero or self._rank == 0):
+            logger.info(f"Profiled {self._totals['steps']} steps, " + ', '.join(
+                f'{key}: {round(value, 3)}' for key, value in self.summary().items()))
+        self._close_sinks()
+
+    def summary(self) -> Dict:
+        r"""
+        返回到目前为止所有被统计的 step 的累计吞吐量；
+
+        :return: 包含 ``samples_per_sec``、``tokens_per_sec``（如果统计了 token）、``avg_step_time`` 以及 ``starved_ratio`` 的字典；
+        """
+        steps, step_time = self._totals['steps'], self._totals['step_time']
+        if steps == 0:
+            return {}
+        summary = {'avg_step_time': step_time / steps,
+                   'samples_per_sec': self._totals['samples'] / step_time if step_time > 0 else 0.,
+                   'starved_ratio': self._totals['starved'] / steps}
+        if self.num_tokens is not None:
+            summary['tokens_per_sec'] = self._totals['tokens'] / step_time if step_time > 0 else 0.
+        return summary
+
+    def _step_record(self, trainer, end) -> Dict:
+        marks = self._marks
+        fetch_begin = marks['fetch_begin']
+        fetch_end = marks.get('fetch_end', fetch_begin)
+        forward_begin = marks.get('forward_begin', fetch_end)
+        backward_begin = marks.get('backward_begin')
+        backward_end = marks.get('backward_end')
+        record = {
+            'event': 'step',
+            'step': trainer.global_forward_batches,
+            'epoch': trainer.cur_epoch_idx,
+            'data_fetch': fetch_end - fetch_begin,
+            'to_device': forward_begin - fetch_end,
+            'forward': (backward_begin if backward_begin is not None else end) - forward_begin,
+            'backward': backward_end - backward_begin if backward_begin is not None and backward_end is not None else 0.,
+            'optimize': marks['optimize_end'] - marks['optimize_begin'] if 'optimize_end' in marks else 0.,
+            'callbacks': self._callback_time,
+        }
+        step_time = end - fetch_begin
+        record['step_time'] = step_time
+        samples = marks.get('samples')
+        record['samples'] = samples
+        record['samples_per_sec'] = samples / step_time if samples is not None and step_time > 0 else None
+        if self.num_tokens is not None:
+            tokens = marks.get('tokens')
+            record['tokens'] = tokens
+            record['tokens_per_sec'] = tokens / step_time if tokens is not None and step_time > 0 else None
+        record['data_wait_ratio'] = record['data_fetch'] / step_time if step_time > 0 else 0.
+        record['starved'] = int(record['data_wait_ratio'] > self.starvation_threshold)
+        record['peak_memory'], record['memory_device'] = _peak_memory()
+
+        self._totals['steps'] += 1
+        self._totals['step_time'] += step_time
+        self._totals['samples'] += samples or 0
+        self._totals['tokens'] += marks.get('tokens') or 0
+        self._totals['starved'] += record['starved']
+        return record
+
+    def _close_sinks(self):
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                logger.warning(f"Fail to close the profiler sink {sink}: {e}")
+
+    def _emit(self, record: Dict):
+        for sink in self.sinks:
+            sink.write(record)
+
+    def _maybe_start_trace(self, step):
+        if self._torch_profiler is not None or len(self.trace_steps) == 0 or not _NEED_IMPORT_TORCH:
+            return
+        for window in self.trace_steps:
+            if window[0] == step:
+                activities = [torch.profiler.ProfilerActivity.CPU]
+                if torch.cuda.is_available():
+                    activities.append(torch.profiler.ProfilerActivity.CUDA)
+                self._torch_profiler = torch.profiler.profile(activities=activities)
+                self._torch_profiler.__enter__()
+                self._trace_window = window
+                break
+
+    def _maybe_stop_trace(self, step):
+        if self._torch_profiler is None or (step is not None and step < self._trace_window[1]):
+            return
+        self._torch_profiler.__exit__(None, None, None)
+        os.makedirs(self.trace_folder, exist_ok=True)
+        path = os.path.join(self.trace_folder,
+                            f'trace_rank{self._rank}_{self._trace_window[0]}-{self._trace_window[1]}.json')
+        self._torch_profiler.export_chrome_trace(path)
+        logger.info(f"torch.profiler trace for steps {self._trace_window} is saved to {path}.")
+        self._torch_profiler = None
+        self._trace_window = None
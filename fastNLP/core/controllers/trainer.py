@@ -502,6 +502,8 @@ class Trainer(TrainerEventTrigger):
         self._fetch_matched_fn_callbacks()
         # 添加所有的类 callbacks；
         self.callback_manager.initialize_class_callbacks()
+        # 预编译每一个 callback 时机的分发函数，没有被订阅的时机在训练过程中不会产生额外开销；
+        self.callback_manager.compile_dispatch()
 
         # 初始化 state，包括提供给用户的接口和我们自己使用的接口；
         self.state = State()
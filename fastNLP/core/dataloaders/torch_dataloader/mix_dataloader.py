@@ -8,7 +8,7 @@ import numpy as np
 from pkg_resources import parse_version
 
 from fastNLP.core.dataset import DataSet, Instance
-from fastNLP.core.samplers import PollingSampler, MixSequentialSampler, DopedSampler
+from fastNLP.core.samplers import PollingSampler, MixSequentialSampler, DopedSampler, ReproducibleBatchSampler
 from fastNLP.envs.imports import _NEED_IMPORT_TORCH
 from fastNLP.core.collators import Collator
 
@@ -19,6 +19,22 @@ else:
     from fastNLP.core.utils.dummy_class import DummyClass as DataLoader
 
 
+class _MixBatch:
+    """
+    :meth:`_MixDataset.__getitems__` 一次取出的一个 batch 的数据，``samples`` 为按照 batch 中顺序排列的 sample ，``ds_index``
+    为决定使用哪个 collate_fn 的数据集下标。
+
+    """
+    __slots__ = ['samples', 'ds_index']
+
+    def __init__(self, samples: List, ds_index: int) -> None:
+        self.samples = samples
+        self.ds_index = ds_index
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+
 class _MixDataset:
     """
     将所有数据集当成一个混合大数据集来对待， 在 __getitem__() 能根据输入的 idx 来判断属于哪个小数据并返回其 ds_index
@@ -36,6 +52,7 @@ class _MixDataset:
         for item in self.datasets:
             index += len(item)
             self.lens.append(index)
+        self.starts = np.array([0] + self.lens[:-1], dtype=np.int64)
 
     def __getitem__(self, idx: Union[int, List[int]]) -> Union[Tuple[Instance, int], Tuple[DataSet, int]]:
         """
@@ -54,20 +71,61 @@ class _MixDataset:
             return self.datasets[ds_index][idx], ds_index
         elif isinstance(idx, list):
             # 一般一个list列表只能是属于一种数据的，否则会报错
-            dataset = DataSet()
-            ds_index = 0
             for i in idx:
                 assert isinstance(i, int), "Only int index allowed."
-                instance, ds_index = self[i]
-                dataset.append(instance)
-            return dataset, ds_index
+            batch = self.__getitems__(idx)
+            return DataSet(batch.samples), batch.ds_index
         else:
             raise KeyError("Unrecognized type {} for idx in __getitem__ method".format(type(idx)))
 
+    def __getitems__(self, indices: List[int]) -> _MixBatch:
+        """
+        一次取出一个 batch 的数据，pytorch 的 ``DataLoader`` 在 dataset 实现了该方法时会使用它来代替逐个调用 __getitem__() 。
+        所有下标只通过一次 searchsorted 定位到所属的数据集，然后按数据集成批地取出数据，并保持其在 batch 中的顺序。
+
+        :param indices: 混合大数据集中的下标
+        :return: :class:`_MixBatch`，batch 中的数据来自多个数据集时，``ds_index`` 为最后一个 sample 所属的数据集
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if len(indices) == 0:
+            return _MixBatch([], 0)
+        if indices.min() < 0 or indices.max() >= self.lens[-1]:
+            raise ValueError(f"idx: {indices.max() if indices.max() >= self.lens[-1] else indices.min()} out of range")
+        ds_indices = np.searchsorted(self.lens, indices, side='right')
+        local_indices = indices - self.starts[ds_indices]
+        ds_index = int(ds_indices[-1])
+        if (ds_indices == ds_index).all():
+            return _MixBatch(_gather(self.datasets[ds_index], local_indices.tolist()), ds_index)
+
+        samples = [None] * len(indices)
+        for _ds_index in np.unique(ds_indices):
+            positions = np.flatnonzero(ds_indices == _ds_index)
+            for pos, sample in zip(positions.tolist(),
+                                   _gather(self.datasets[_ds_index], local_indices[positions].tolist())):
+                samples[pos] = sample
+        return _MixBatch(samples, ds_index)
+
     def __len__(self) -> int:
         return self.lens[-1]
 
 
+def _gather(dataset, indices: List[int]) -> List:
+    """
+    成批地从 ``dataset`` 中取出 ``indices`` 对应的数据，结果与 ``[dataset[i] for i in indices]`` 相同。
+
+    :class:`~fastNLP.core.dataset.DataSet` 按列直接从每个 field 的内容中取出后再组成 :class:`~fastNLP.core.dataset.Instance`，
+    实现了 ``__getitems__`` 的数据集调用其 ``__getitems__`` 。
+    """
+    if isinstance(dataset, DataSet):
+        field_names = list(dataset.field_arrays.keys())
+        columns = [[content[i] for i in indices] for content in
+                   (dataset.field_arrays[name].content for name in field_names)]
+        return [Instance(**dict(zip(field_names, row))) for row in zip(*columns)]
+    if callable(getattr(dataset, '__getitems__', None)):
+        return list(dataset.__getitems__(indices))
+    return [dataset[i] for i in indices]
+
+
 class _MixCollateFn:
     """
     存在多个auto_collate和多个collate_fn时候，对一个批次数据集应用哪个auto_collate和collate_fn的问题
@@ -83,13 +141,15 @@ class _MixCollateFn:
         else:
             self.collate_fns = lambda idx, lst: lst
 
-    def __call__(self, ins_list: List) -> Dict:
+    def __call__(self, ins_list: Union[_MixBatch, List]) -> Dict:
         """
         调用一次该方法，我们将ins_list视为同一个数据集采样出来的，故ds_index只能为一种
 
-        :param ins_list:
+        :param ins_list: :meth:`_MixDataset.__getitems__` 返回的 :class:`_MixBatch`，或者由 ``(sample, ds_index)`` 组成的列表
         :return:
         """
+        if isinstance(ins_list, _MixBatch):
+            return self.collate_fns(ins_list.ds_index, ins_list.samples)
         _ins_list, _ds_index = [], 0
         for ins, _ds_index in ins_list:
             _ins_list.append(ins)
@@ -109,7 +169,8 @@ class MixDataLoader(DataLoader):
           再从第二数据集采样一个 batch 数据返回， 直至最后一个数据集采样一个 batch 数据返回后再从第一个数据采样第二个 batch 数据返回，直至所有的数据集都被轮询地的采样完。
         * 当 mode 为 ``'Sampler'`` 时， 该 Sampler 是实现 __iter__() 的实例化对象， 其功能是每次 iter 时返回一个 batch 序列， 其类型为 List[int];
           且 Sampler 必须将输入的 datasets 视为一个混合大数据集， 其 index 范围为 ``0<idx<len(datasets[0])+...+len(datasets[x])``, 然后参数
-          ``sampler``, ``drop_last``, ``ds_ratio`` 均无效。
+          ``sampler``, ``drop_last``, ``ds_ratio`` 均无效。传入 :class:`~fastNLP.core.samplers.MixBatchSampler` 等
+          :class:`~fastNLP.core.samplers.ReproducibleBatchSampler` 时可以在 :class:`~fastNLP.core.controllers.Trainer` 中实现断点重训。
 
     :param datasets: 实现了 __getitem__() 和 __len__() 对象的序列或者字典。
     :param mode: ``mode`` 控制 ``MixDataLoader`` 运行模式。 ``mode`` 的取值范围为 ``['sequential', 'mix', 'polling', 'Sampler']``，每种模式的详细功能见上文。
@@ -147,6 +208,9 @@ class MixDataLoader(DataLoader):
         * ds_ratio 为 ``Dict[str, float]`` 时， datasets 类型也必须为 ``Dict[str, DataSet]``, 其 key 一一对应。 ds_ratio 的 value 是任意大于 0 的浮点数，
           代表着 datasets 的 value 数据进行扩充或者缩减的倍数。
 
+    :param pin_memory: 是否将数据放到 pin memory 中。
+    :param batch_sampler: fastNLP 内部使用的参数，断点重训时用于替换 ``mode`` 中传入的 BatchSampler 。
+    :param kwargs: fastNLP 内部使用的参数，断点重训替换 BatchSampler 重新初始化时会传入 ``DataLoader`` 自身的属性，这些属性会被忽略。
     """
 
     def __init__(self, datasets: Dict = None, mode: str = 'sequential',
@@ -154,7 +218,7 @@ class MixDataLoader(DataLoader):
                  sampler: Union[str, None] = None,
                  num_workers: int = 0, batch_size: int = 16, drop_last=False,
                  ds_ratio: Union[None, str, Dict[str, float]] = None,
-                 pin_memory: bool = False) -> None:
+                 pin_memory: bool = False, batch_sampler: ReproducibleBatchSampler = None, **kwargs) -> None:
         # sampler 为 dict，则判断是否与 datasets 的 key 相同
         if isinstance(sampler, Dict):
             for key in datasets.keys():
@@ -185,8 +249,16 @@ class MixDataLoader(DataLoader):
 
         dataset = [ds for _, ds in datasets.items()]
 
-        # 对 collate_fn 进行包裹， 统一处理 collate_fn 不同情况下使用的问题
-        collate_fn = _MixCollateFn(collate_fn)
+        # 对 collate_fn 进行包裹， 统一处理 collate_fn 不同情况下使用的问题；替换 batch_sampler 重新初始化时已经包裹过了
+        if not isinstance(collate_fn, _MixCollateFn):
+            collate_fn = _MixCollateFn(collate_fn)
+
+        if batch_sampler is not None:
+            mode = batch_sampler
+        # 保存下来，以便在断点重训替换 batch_sampler 时重新初始化
+        self.datasets = datasets
+        self.mode = mode
+        self.ds_ratio = ds_ratio
 
         if mode == 'sequential':
             batch_sampler = MixSequentialSampler(datasets, batch_size=batch_size, sampler=sampler,
@@ -197,18 +269,20 @@ class MixDataLoader(DataLoader):
         elif mode == 'mix':
             batch_sampler = DopedSampler(datasets, batch_size=batch_size, sampler=sampler,
                                          drop_last=drop_last, ds_ratio=ds_ratio)
-        elif isinstance(mode, Sampler):
+        elif isinstance(mode, (Sampler, ReproducibleBatchSampler)):
             batch_sampler = mode
         else:
             raise ValueError(f"{mode} must be sequential, polling, mix or batch_sampler")
 
         if parse_version(torchversion) >= parse_version('1.7'):
+            # 较新版本的 pytorch 在 num_workers=0 时不允许设置 prefetch_factor
+            prefetch_kwargs = {'prefetch_factor': 2} if num_workers > 0 else {}
             super(MixDataLoader, self).__init__(
                 _MixDataset(datasets=dataset), batch_size=1, shuffle=False, sampler=None,
                 batch_sampler=batch_sampler, num_workers=num_workers, collate_fn=collate_fn,
                 pin_memory=pin_memory, drop_last=False, timeout=0,
                 worker_init_fn=None, multiprocessing_context=None, generator=None,
-                prefetch_factor=2, persistent_workers=False
+                persistent_workers=False, **prefetch_kwargs
             )
         else:
             super(MixDataLoader, self).__init__(
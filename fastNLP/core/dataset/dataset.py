@@ -154,7 +154,8 @@ __all__ = [
 
 import _pickle as pickle
 from copy import deepcopy
-from typing import Optional, List, Callable, Union, Dict, Any, Mapping
+from itertools import compress
+from typing import Optional, List, Callable, Union, Dict, Any, Mapping, Sequence
 from types import LambdaType
 import sys
 import time
@@ -220,15 +221,16 @@ def _apply_single(ds=None, _apply_field=None, func: Optional[Callable] = None, p
     return results
 
 
-def _multi_proc(ds, _apply_field, func, counter, queue):
+def _multi_proc(ds, _apply_field, func, counter, queue, worker_idx=0):
     """
     对数据集进行处理封装函数，以便多进程使用
 
     :param ds: 实现了 __getitem__() 和 __len__() 的对象
     :param _apply_field: 需要处理数据集的 field_name
     :param func: 用户自定义的 func
-    :param counter: 计数器
+    :param counter: 共享的计数数组，每个进程只写入自己的位置，因此不需要加锁
     :param queue: 多进程时，将结果输入到这个 queue 中
+    :param worker_idx: 当前进程在 ``counter`` 中的位置
     :return:
     """
     idx = -1
@@ -244,8 +246,7 @@ def _multi_proc(ds, _apply_field, func, counter, queue):
                 else:
                     res = func(ins)
                 results.append(res)
-                with counter.get_lock():
-                    counter.value += 1
+                counter[worker_idx] = idx + 1
         except BaseException as e:
             if idx != -1:
                 logger.error("Exception happens at the `{}`th instance.".format(idx))
@@ -282,6 +283,7 @@ class DataSet:
     def __init__(self, data: Union[List[Instance], Dict[str, List[Any]], None] = None):
         self.field_arrays = {}
         self._collator = Collator()
+        self._collator_shared = False
         if data is not None:
             if isinstance(data, Dict):
                 length_set = {}
@@ -363,20 +365,15 @@ class DataSet:
             dataset = DataSet()
             for field_name, field in self.field_arrays.items():
                 dataset.add_field(field_name=field_name, fields=field.content[idx])
-            dataset._collator = deepcopy(self.collator)
+            self._share_collator(dataset)
             return dataset
         elif isinstance(idx, str):
             if idx not in self:
                 raise KeyError("No such field called {} in DataSet.".format(idx))
             return self.field_arrays[idx]
         elif isinstance(idx, list):
-            dataset = DataSet()
-            for i in idx:
-                assert isinstance(i, int), "Only int index allowed."
-                instance = self[i]
-                dataset.append(instance)
-            dataset._collator = deepcopy(self.collator)
-            return dataset
+            assert all(isinstance(i, int) for i in idx), "Only int index allowed."
+            return self.take(idx)
         else:
             raise KeyError("Unrecognized type {} for idx in __getitem__ method".format(type(idx)))
 
@@ -710,31 +707,52 @@ class DataSet:
                 end = shard_len + int(_i<num_left_sample) + start
                 shard_data.append(self[start:end])
                 start = end
-            #   配置共享参数，线程以实现 main progress 能够实时更新。
-            counter = ctx.Value('i', 0, lock=True)
+            #   每个进程只更新共享数组中属于自己的计数，主进程以固定的频率读取并刷新进度条，不需要加锁与忙等。
+            counter = ctx.Array('q', num_proc, lock=False)
             pool = []
             queues = []
             results = []
             for i in range(num_proc):
                 queue = ctx.SimpleQueue()
-                proc = ctx.Process(target=_multi_proc, args=(shard_data[i], _apply_field, func, counter, queue))
+                proc = ctx.Process(target=_multi_proc, args=(shard_data[i], _apply_field, func, counter, queue, i))
                 proc.start()
                 pool.append(proc)
                 queues.append(queue)
             progress_bar = progress_bars.get(progress_bar, DummyFRichProgress())
             total_len = len(self)
             task_id = progress_bar.add_task(description=progress_desc, total=total_len)
-            last_count = -1
-            while counter.value < total_len or last_count == -1:
-                while counter.value == last_count:
-                    time.sleep(0.1)
-                advance = counter.value - last_count
-                last_count = counter.value
-                progress_bar.update(task_id, advance=advance, refresh=True)
-
-            for idx, proc in enumerate(pool):
-                results.extend(pickle.loads(queues[idx].get()))
-                proc.join()
+            sub_task_ids = [progress_bar.add_task(description=f'{progress_desc} Process {i}', total=len(shard_data[i]))
+                            for i in range(num_proc)]
+            refresh_per_second = getattr(progress_bar, 'refresh_per_second', 10)
+            interval = 1 / refresh_per_second if isinstance(refresh_per_second, (int, float)) else 0.1
+            last_counts = [0] * num_proc
+            shard_results = [None] * num_proc
+            try:
+                while any(res is None for res in shard_results):
+                    for i in range(num_proc):
+                        if shard_results[i] is None and not queues[i].empty():
+                            shard_results[i] = pickle.loads(queues[i].get())
+                        elif shard_results[i] is None and pool[i].exitcode not in (None, 0):
+                            raise RuntimeError(f"Process {i} exits with code {pool[i].exitcode} when applying "
+                                               f"function:{_get_fun_msg(func)}.")
+                    counts = list(counter)
+                    for i in range(num_proc):
+                        if counts[i] != last_counts[i]:
+                            progress_bar.update(sub_task_ids[i], advance=counts[i] - last_counts[i])
+                    if sum(counts) != sum(last_counts):
+                        progress_bar.update(task_id, advance=sum(counts) - sum(last_counts), refresh=True)
+                    last_counts = counts
+                    if any(res is None for res in shard_results):
+                        time.sleep(interval)
+                for res in shard_results:
+                    results.extend(res)
+            finally:
+                for proc in pool:
+                    if proc.exitcode is None and any(res is None for res in shard_results):
+                        proc.terminate()
+                    proc.join()
+                for sub_task_id in sub_task_ids:
+                    progress_bar.destroy_task(sub_task_id)
             progress_bar.destroy_task(task_id)
         return results
 
@@ -845,6 +863,81 @@ class DataSet:
             raise KeyError(f"Field:{field_name} not found.")
         return self
 
+    def take(self, indices: Union[Sequence[int], np.ndarray]) -> 'DataSet':
+        r"""
+        取出 ``indices`` 对应的 instance 组成一个新的 DataSet 。与 ``[self[i] for i in indices]`` 再逐个 ``append`` 不同，
+        该方法直接按列从每个 field 中取出内容，不会创建任何 :class:`~fastNLP.core.dataset.Instance` 。新 DataSet 与当前 DataSet
+        共享每个元素（不进行 copy），并拥有当前 collator 的一个 copy 。
+
+        Example::
+
+            ds = DataSet({'x': [[1, 0, 1], [0, 1, 1], [1, 1, 0]], 'y': [0, 1, 1]})
+            sub_ds = ds.take([2, 0])  # sub_ds['y'].content == [1, 0]
+
+        :param indices: int 的序列或者 :class:`numpy.ndarray`，可以重复，支持负数下标；
+        :return: 一个新的 DataSet
+        """
+        if isinstance(indices, np.ndarray):
+            if indices.ndim != 1 or (indices.size > 0 and not np.issubdtype(indices.dtype, np.integer)):
+                raise TypeError(f"`indices` should be a one-dimensional integer array, not {indices.dtype} with "
+                                f"shape {indices.shape}.")
+            indices = indices.tolist()
+        elif not isinstance(indices, list):
+            indices = list(indices)
+        if len(indices) > 0 and (min(indices) < -len(self) or max(indices) >= len(self)):
+            raise IndexError(f"Index {max(indices) if max(indices) >= len(self) else min(indices)} is out of range "
+                             f"for a DataSet with {len(self)} instances.")
+        return self._new_dataset({name: [field.content[i] for i in indices]
+                                  for name, field in self.field_arrays.items()})
+
+    def filter(self, mask: Union[Sequence[bool], np.ndarray], inplace: bool = False) -> 'DataSet':
+        r"""
+        只保留 ``mask`` 中为 ``True`` 的位置对应的 instance 。
+
+        Example::
+
+            ds = DataSet({'x': [[1, 0, 1], [0, 1, 1], [1, 1, 0]], 'y': [0, 1, 1]})
+            ds = ds.filter([y == 1 for y in ds['y']])
+
+        :param mask: 与 DataSet 等长的 bool 序列或者 :class:`numpy.ndarray`；
+        :param inplace: 是否直接修改当前 DataSet ；为 ``False`` 时返回一个新的 DataSet ，其与当前 DataSet 共享每个元素；
+        :return: DataSet
+        """
+        if isinstance(mask, np.ndarray):
+            mask = mask.tolist()
+        elif not isinstance(mask, list):
+            mask = list(mask)
+        if len(mask) != len(self):
+            raise ValueError(f"The length of mask ({len(mask)}) is different from the DataSet ({len(self)}).")
+        contents = {name: list(compress(field.content, mask)) for name, field in self.field_arrays.items()}
+        if inplace:
+            for name, content in contents.items():
+                self.field_arrays[name].content = content
+            return self
+        return self._new_dataset(contents)
+
+    def _new_dataset(self, contents: Dict[str, list]) -> 'DataSet':
+        r"""
+        使用每个 field 的内容直接组成一个新的 DataSet ，允许内容为空。
+        """
+        dataset = DataSet()
+        for name, content in contents.items():
+            # FieldArray 不允许使用空的内容初始化，并且会再 copy 一次内容，因此直接替换其 content
+            field = FieldArray(name, [None])
+            field.content = content
+            dataset.field_arrays[name] = field
+        self._share_collator(dataset)
+        return dataset
+
+    def _share_collator(self, dataset: 'DataSet'):
+        r"""
+        让 ``dataset`` 与当前 DataSet 共享同一个 collator 。由于双方之后都可能通过 :meth:`set_pad` 等方法修改各自的 collator ，
+        因此两者都会在第一次通过 :attr:`collator` 访问时才 copy 一份，从而避免每次 ``take`` 、 ``filter`` 或切片都 deepcopy 一次。
+        """
+        dataset._collator = self._collator
+        if self._collator is not None:
+            self._collator_shared = dataset._collator_shared = True
+
     def drop(self, func: Callable, inplace=True):
         r"""
         删除某些 Instance。 需要注意的是 ``func`` 接受一个 Instance ，返回 bool 值。返回值为 ``True`` 时，
@@ -855,22 +948,7 @@ class DataSet:
 
         :return: DataSet
         """
-        if inplace:
-            results = [ins for ins in self if not func(ins)]
-            for name, old_field in self.field_arrays.items():
-                self.field_arrays[name].content = [ins[name] for ins in results]
-            return self
-        else:
-            results = [ins for ins in self if not func(ins)]
-            if len(results) != 0:
-                dataset = DataSet(results)
-            else:
-                dataset = DataSet()
-                for name in self.field_arrays.keys():
-                    empty_field = FieldArray(name, [None])
-                    empty_field.content = []
-                    dataset.field_arrays[name] = empty_field
-            return dataset
+        return self.filter([not func(ins) for ins in self], inplace=inplace)
 
     def split(self, ratio: float, shuffle=True):
         r"""
@@ -883,23 +961,15 @@ class DataSet:
         assert len(self) > 1, f'DataSet with {len(self)} instance cannot be split.'
         assert isinstance(ratio, float)
         assert 0 < ratio < 1
-        all_indices = [_ for _ in range(len(self))]
+        all_indices = np.arange(len(self))
         if shuffle:
             np.random.shuffle(all_indices)
         split = int(ratio * len(self))
         if split == 0:
             error_msg = f'Dev DataSet has `{split}` instance after split.'
             raise IndexError(error_msg)
-        dev_indices = all_indices[:split]
-        train_indices = all_indices[split:]
-        dev_set = DataSet()
-        train_set = DataSet()
-        for idx in dev_indices:
-            dev_set.append(self[idx])
-        for idx in train_indices:
-            train_set.append(self[idx])
-        dev_set._collator = deepcopy(self.collator)
-        train_set._collator = deepcopy(self.collator)
+        dev_set = self.take(all_indices[:split])
+        train_set = self.take(all_indices[split:])
 
         return dev_set, train_set
 
@@ -998,6 +1068,10 @@ class DataSet:
     def collator(self) -> Collator:
         if self._collator is None:
             self._collator = Collator()
+        elif getattr(self, '_collator_shared', False):
+            # 与其它 DataSet 共享的 collator 在第一次被访问时才进行 copy
+            self._collator = deepcopy(self._collator)
+            self._collator_shared = False
         return self._collator
 
     def set_pad(self, field_name: Union[str, tuple], pad_val: Union[int, float, None] = 0, dtype=None, backend=None,
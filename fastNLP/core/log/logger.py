@@ -19,16 +19,25 @@ r"""
     logger.warning_once('your msg')
     # 分布式训练下，仅在 rank 0 输出警告
     logger.rank_zero_warning('your msg')
+    # 同一处调用每 100 次只输出一次，可以通过 rank_zero_only 只在 rank 0 输出
+    logger.every_n(100, 'your msg', rank_zero_only=True)
+    # 开启异步模式，日志会在后台线程中批量写入，适合高频输出日志的训练过程
+    logger.set_async(True)
 
 """
 
 
+import atexit
 import logging
 import logging.config
 from logging import DEBUG, ERROR, INFO, WARNING, CRITICAL, raiseExceptions
 import os
+import queue
 import sys
+import threading
+import time
 import warnings
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional, Union
 from rich.logging import RichHandler
@@ -54,10 +63,102 @@ class LoggerSingleton(type):
         return cls._instances[cls]
 
 
+class _AsyncLogWorker:
+    r"""
+    异步日志的后台线程；从队列中一次性取出当前所有的 record（最多 ``batch_size`` 条）交给实际的 handler 处理，对于写文件的
+    handler 会将一批 record 合并为一次写入与一次 flush。
+    """
+    def __init__(self, handlers, batch_size: int = 256):
+        self.handlers = list(handlers)
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='fastNLP-async-logger', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        _queue = self.queue
+        while True:
+            records = [_queue.get()]
+            while len(records) < self.batch_size:
+                try:
+                    records.append(_queue.get_nowait())
+                except queue.Empty:
+                    break
+            num_records = len(records)
+            stop = any(record is None for record in records)
+            try:
+                self._handle_batch([record for record in records if record is not None])
+            finally:
+                for _ in range(num_records):
+                    _queue.task_done()
+            if stop:
+                return
+
+    def _handle_batch(self, records):
+        for handler in self.handlers:
+            records_to_handle = [record for record in records if record.levelno >= handler.level]
+            if len(records_to_handle) == 0:
+                continue
+            if isinstance(handler, logging.FileHandler):
+                lines = []
+                for record in records_to_handle:
+                    try:
+                        if handler.filter(record):
+                            lines.append(handler.format(record))
+                    except Exception:
+                        handler.handleError(record)
+                if len(lines) == 0:
+                    continue
+                handler.acquire()
+                try:
+                    if handler.stream is None:
+                        handler.stream = handler._open()
+                    handler.stream.write(handler.terminator.join(lines) + handler.terminator)
+                    handler.flush()
+                except Exception:
+                    handler.handleError(records_to_handle[-1])
+                finally:
+                    handler.release()
+            else:
+                for record in records_to_handle:
+                    handler.handle(record)
+
+    def flush(self):
+        self.queue.join()
+
+    def stop(self):
+        self.queue.put(None)
+        self._thread.join()
+
+
+class _AsyncLogHandler(logging.Handler):
+    r"""
+    异步模式下 logger 唯一的 handler，在调用日志的线程中只将 record 放入队列，格式化以及写入均在后台线程中进行。
+    """
+    def __init__(self, worker: _AsyncLogWorker):
+        super().__init__()
+        self.worker = worker
+
+    def handle(self, record):
+        # 不需要加锁，也不在这里进行过滤，过滤由后台线程中实际的 handler 完成；
+        self.emit(record)
+        return True
+
+    def emit(self, record):
+        # 参数需要在当前线程中合并进 msg，避免参数对象在写入前被修改；
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        self.worker.queue.put(record)
+
+
 class FastNLPLogger(logging.Logger, metaclass=LoggerSingleton):
     def __init__(self, name):
         super().__init__(name)
         self._warning_msgs = set()
+        self._every_n_counter = {}
+        self._every_seconds_last = {}
+        self._async_worker = None
 
     def add_file(self, path: Optional[Union[str, Path]] = None, level='AUTO', remove_other_handlers: bool = False,
                  mode: str = "w"):
@@ -75,7 +176,8 @@ class FastNLPLogger(logging.Logger, metaclass=LoggerSingleton):
         r"""添加日志输出文件和输出级别"""
         if level == 'AUTO':
             level = parse_level()
-        return _add_file_handler(self, path, level, remove_other_handlers, mode)
+        with self._sync_handlers():
+            return _add_file_handler(self, path, level, remove_other_handlers, mode)
 
     def set_stdout(self, stdout: str = 'raw', level: str = 'AUTO'):
         """
@@ -89,7 +191,76 @@ class FastNLPLogger(logging.Logger, metaclass=LoggerSingleton):
         r"""设置标准输出格式和输出级别"""
         if level == 'AUTO':
             level = parse_level()
-        return _set_stdout_handler(self, stdout, level)
+        with self._sync_handlers():
+            return _set_stdout_handler(self, stdout, level)
+
+    def set_async(self, flag: bool = True, batch_size: int = 256):
+        """
+        设置是否使用异步模式输出日志。异步模式下，调用 log 的线程只会将日志放入队列中，格式化与输出均由一个后台线程完成，并且
+        写入文件时会将多条日志合并为一次写入，适合 ``print_every=1`` 等高频输出日志的场景。``warning_once`` 与 ``rank_zero_warning``
+        等函数的行为不受影响。
+
+        异步模式下仍然可以正常调用 :meth:`add_file` 、 :meth:`set_stdout` 等函数；程序退出时会自动输出队列中剩余的日志，如需在
+        中途确保日志已经写入，请调用 :meth:`flush` 。
+
+        :param flag: 是否开启异步模式；
+        :param batch_size: 后台线程每次最多合并处理多少条日志；
+        :return:
+        """
+        if flag:
+            if self._async_worker is not None:
+                return
+            handlers = list(self.handlers)
+            worker = _AsyncLogWorker(handlers, batch_size=batch_size)
+            for handler in handlers:
+                self.removeHandler(handler)
+            self.addHandler(_AsyncLogHandler(worker))
+            self._async_worker = worker
+        else:
+            if self._async_worker is None:
+                return
+            worker = self._async_worker
+            self._async_worker = None
+            for handler in list(self.handlers):
+                if isinstance(handler, _AsyncLogHandler):
+                    self.removeHandler(handler)
+            worker.stop()
+            for handler in worker.handlers:
+                self.addHandler(handler)
+
+    @property
+    def is_async(self) -> bool:
+        """
+        当前是否处于异步模式。
+        """
+        return self._async_worker is not None
+
+    def flush(self):
+        """
+        等待异步模式下队列中的日志全部输出，并 flush 所有的 handler 。
+        """
+        if self._async_worker is not None:
+            self._async_worker.flush()
+            handlers = self._async_worker.handlers
+        else:
+            handlers = self.handlers
+        for handler in handlers:
+            handler.flush()
+
+    @contextmanager
+    def _sync_handlers(self):
+        """
+        在异步模式下临时将实际的 handler 挂回 logger 上，使得对 handler 的修改可以直接作用在 ``self.handlers`` 上。
+        """
+        if self._async_worker is None:
+            yield
+            return
+        batch_size = self._async_worker.batch_size
+        self.set_async(False)
+        try:
+            yield
+        finally:
+            self.set_async(True, batch_size=batch_size)
 
     def debug(self, msg, *args, **kwargs):
         """
@@ -150,6 +321,62 @@ class FastNLPLogger(logging.Logger, metaclass=LoggerSingleton):
                 kwargs = self._add_rank_info(kwargs)
                 self._log(WARNING, msg, args, **kwargs)
 
+    def every_n(self, n: int, msg, *args, level='INFO', key=None, rank_zero_only: bool = False, **kwargs):
+        """
+        同一处调用每 ``n`` 次只输出一次（即第 1、n+1、2n+1 ... 次调用时输出），用于在高频的循环中限制日志的输出频率。
+
+        :param n: 每多少次调用输出一次；
+        :param msg:
+        :param args:
+        :param level: 日志的等级，可选 ['INFO', 'WARNING', 'DEBUG', 'ERROR'] 或者 logging 中的等级；
+        :param key: 用来区分不同调用的键，默认为调用处的文件名与行号；
+        :param rank_zero_only: 是否只在 rank 0 上输出；
+        :param kwargs:
+        :return:
+        """
+        if rank_zero_only and os.environ.get(FASTNLP_GLOBAL_RANK, '0') != '0':
+            return
+        if key is None:
+            frame = sys._getframe(1)
+            key = (frame.f_code.co_filename, frame.f_lineno)
+        count = self._every_n_counter.get(key, 0)
+        self._every_n_counter[key] = count + 1
+        if count % n != 0:
+            return
+        level = _get_level(level)
+        if self.isEnabledFor(level):
+            kwargs = self._add_rank_info(kwargs)
+            self._log(level, msg, args, **kwargs)
+
+    def every_seconds(self, interval: float, msg, *args, level='INFO', key=None, rank_zero_only: bool = False,
+                      **kwargs):
+        """
+        同一处调用在 ``interval`` 秒内最多只输出一次。
+
+        :param interval: 两次输出之间至少间隔的秒数；
+        :param msg:
+        :param args:
+        :param level: 日志的等级，可选 ['INFO', 'WARNING', 'DEBUG', 'ERROR'] 或者 logging 中的等级；
+        :param key: 用来区分不同调用的键，默认为调用处的文件名与行号；
+        :param rank_zero_only: 是否只在 rank 0 上输出；
+        :param kwargs:
+        :return:
+        """
+        if rank_zero_only and os.environ.get(FASTNLP_GLOBAL_RANK, '0') != '0':
+            return
+        if key is None:
+            frame = sys._getframe(1)
+            key = (frame.f_code.co_filename, frame.f_lineno)
+        now = time.monotonic()
+        last = self._every_seconds_last.get(key)
+        if last is not None and now - last < interval:
+            return
+        self._every_seconds_last[key] = now
+        level = _get_level(level)
+        if self.isEnabledFor(level):
+            kwargs = self._add_rank_info(kwargs)
+            self._log(level, msg, args, **kwargs)
+
     def warn(self, msg, *args, **kwargs):
         if self.isEnabledFor(WARNING):
             kwargs = self._add_rank_info(kwargs)
@@ -209,7 +436,8 @@ class FastNLPLogger(logging.Logger, metaclass=LoggerSingleton):
         if isinstance(level, str):
             level = level.upper()
         super().setLevel(level)
-        for handler in self.handlers:
+        handlers = self._async_worker.handlers if self._async_worker is not None else self.handlers
+        for handler in handlers:
             handler.setLevel(level)
 
     def _set_distributed(self):
@@ -218,7 +446,8 @@ class FastNLPLogger(logging.Logger, metaclass=LoggerSingleton):
 
         :return:
         """
-        for handler in self.handlers:
+        handlers = self._async_worker.handlers if self._async_worker is not None else self.handlers
+        for handler in handlers:
             if isinstance(handler, logging.FileHandler):
                 formatter = logging.Formatter(fmt='Rank: %(rank)s - %(asctime)s - %(module)s - [%(levelname)s] - %(message)s',
                                            datefmt='%Y/%m/%d %H:%M:%S')
@@ -232,7 +461,7 @@ def _get_level(level):
         level = level.lower()
         level = {'info': logging.INFO, 'debug': logging.DEBUG,
                  'warn': logging.WARN, 'warning': logging.WARNING,
-                 'error': logging.ERROR}[level]
+                 'error': logging.ERROR, 'critical': logging.CRITICAL}[level]
     return level
 
 
@@ -382,5 +611,7 @@ def parse_level():
 
 
 logger = _init_logger(path=None, stdout='rich', level=parse_level())
+# 保证异步模式下程序退出前队列中的日志都能够被输出；
+atexit.register(logger.set_async, False)
 logger.debug("The environment variables are as following:")
 logger.debug(os.environ)
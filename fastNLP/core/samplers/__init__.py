@@ -3,6 +3,7 @@ __all__ = [
     'DopedSampler',
     'MixSequentialSampler',
     'PollingSampler',
+    'MixBatchSampler',
 
     'ReproducibleSampler',
     'RandomSampler',
@@ -23,7 +24,7 @@ __all__ = [
 ]
 
 from .unrepeated_sampler import UnrepeatedSampler, UnrepeatedRandomSampler, UnrepeatedSortedSampler, UnrepeatedSequentialSampler
-from .mix_sampler import MixSampler, DopedSampler, MixSequentialSampler, PollingSampler
+from .mix_sampler import MixSampler, DopedSampler, MixSequentialSampler, PollingSampler, MixBatchSampler
 from .reproducible_sampler import ReproducibleSampler, RandomSampler, SequentialSampler, SortedSampler
 from .utils import re_instantiate_sampler
 from .conversion_utils import conversion_between_reproducible_and_unrepeated_sampler
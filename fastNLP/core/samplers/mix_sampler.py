@@ -1,14 +1,19 @@
 import array
+import math
 import numpy as np
-from typing import Union, List, Iterable, Dict
+from typing import Union, List, Iterable, Dict, Sequence, Sized
 
 __all__ = [
     'MixSampler',
     'DopedSampler',
     'MixSequentialSampler',
-    'PollingSampler'
+    'PollingSampler',
+    'MixBatchSampler'
 ]
 
+from fastNLP.core.log import logger
+from .reproducible_batch_sampler import ReproducibleBatchSampler
+
 from fastNLP.envs.imports import _NEED_IMPORT_TORCH
 
 if _NEED_IMPORT_TORCH:
@@ -506,6 +511,259 @@ class PollingSampler(MixSampler):
         return lens
 
 
+class MixBatchSampler(ReproducibleBatchSampler):
+    """
+    定制给 :class:`~fastNLP.core.dataloaders.MixDataLoader` 的 **可复现** ``BatchSampler``，将 ``dataset`` 中的多个数据集混合采样
+    组成一个个 batch 返回，返回的 index 为混合大数据集（即各个数据集首尾相接）中的下标。
+
+    与 :class:`DopedSampler` 不同，每个 epoch 中每一个位置属于哪个数据集、对应该数据集的哪个样本都在 epoch 开始时一次性地向量化生成，
+    随机数只来自于由 ``seed`` 和 ``epoch`` 确定的局部 ``np.random.Generator``，不会影响也不受全局随机状态的影响。并且实现了
+    :class:`~fastNLP.core.samplers.ReproducibleBatchSampler` 的接口，可以在多任务训练中实现断点重训以及分布式训练。使用时可以将其
+    作为 ``mode`` 传入 :class:`~fastNLP.core.dataloaders.MixDataLoader`::
+
+        datasets = {'ner': ner_ds, 'pos': pos_ds}
+        sampler = MixBatchSampler(datasets, batch_size=32, temperature=2)
+        dl = MixDataLoader(datasets, mode=sampler)
+
+    :param dataset: 每个元素都实现了 __len__ 方法的字典或者序列；
+    :param batch_size: 每个 batch 的大小；
+    :param ds_ratio: 控制一个 epoch 中每个数据集采样多少个样本，其取值为 ``[None, 'truncate_to_least', 'pad_to_most', Dict[str, float]]``，
+        含义与 :class:`MixSampler` 相同。数据集需要采样的数量多于其长度时会重复使用该数据集（每一轮都重新打乱），少于其长度时
+        只使用其中的一部分；
+    :param temperature: 不为 ``None`` 时使用温度采样，即数据集 ``i`` 的采样概率正比于 ``len_i ** (1 / temperature)``，一个 epoch
+        的样本总数保持为所有数据集长度之和。``temperature=1`` 等价于按照长度比例采样，越大越接近均匀采样。不能与 ``ds_ratio`` 同时使用；
+    :param shuffle: 为 ``True`` 时打乱数据集内的样本顺序并将不同数据集的样本随机混合；为 ``False`` 时按照数据集的顺序依次返回；
+    :param drop_last: 如果最后一个 batch 无法构成 ``batch_size`` 个 sample ，是否丢掉；
+    :param seed: 设置的随机数种子；
+    :param kwargs: fastNLP 内部使用的参数；
+    """
+    def __init__(self, dataset: Union[Dict[str, Sized], Sequence[Sized]], batch_size: int = 16,
+                 ds_ratio: Union[str, None, Dict[str, float]] = None, temperature: float = None,
+                 shuffle: bool = True, drop_last: bool = False, seed: int = 0, **kwargs):
+        super().__init__()
+        if batch_size <= 0:
+            raise ValueError("batch_size should be a positive integer value, "
+                             "but got batch_size={}".format(batch_size))
+        if temperature is not None:
+            if ds_ratio is not None:
+                raise ValueError("`ds_ratio` and `temperature` cannot be used at the same time.")
+            if temperature <= 0:
+                raise ValueError(f"temperature should be a positive value, but got temperature={temperature}.")
+        if isinstance(ds_ratio, Dict):
+            if not isinstance(dataset, Dict):
+                raise TypeError("`dataset` must be a dict when `ds_ratio` is a dict.")
+            if any(ds_ratio[name] < 0 for name in dataset.keys()):
+                raise ValueError(f"The values of ds_ratio should be non-negative, but got ds_ratio={ds_ratio}.")
+        elif ds_ratio not in (None, 'pad_to_most', 'truncate_to_least'):
+            raise ValueError(f"{ds_ratio} must be pad_to_most or truncate_to_least or None or Dict")
+
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.ds_ratio = ds_ratio
+        self.temperature = temperature
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.seed = int(seed)
+
+        self.num_consumed_samples = kwargs.get("num_consumed_samples", 0)  # 总共迭代了多少数据了，包括多卡情况下的其它卡上的输出的数量
+
+        # 多卡的相关的参数
+        self.num_replicas = kwargs.get("num_replicas", 1)
+        self.rank = kwargs.get("rank", 0)
+        self.epoch = kwargs.get("epoch", -1)
+        self.pad = kwargs.get("pad", False)  # 该参数在单卡上不具有任何意义；
+
+        # 是否处于iteration之间，为True不允许调用 set_distributed()和load_state_dict()
+        self.during_iter = kwargs.get("during_iter", False)
+
+    @property
+    def ds_lengths(self) -> List[int]:
+        """
+        每个数据集的长度。
+        """
+        datasets = self.dataset.values() if isinstance(self.dataset, Dict) else self.dataset
+        return [len(ds) for ds in datasets]
+
+    @property
+    def sampler_lengths(self) -> List[int]:
+        """
+        一个 epoch 中每个数据集需要采样的样本数量。
+        """
+        ds_lengths = self.ds_lengths
+        if self.temperature is not None:
+            probs = np.power(np.array(ds_lengths, dtype=np.float64), 1 / self.temperature)
+            expected = probs / probs.sum() * sum(ds_lengths)
+            lengths = np.floor(expected).astype(np.int64)
+            # 将取整后剩余的数量分给小数部分最大的数据集，保证总数不变
+            remain = sum(ds_lengths) - int(lengths.sum())
+            lengths[np.argsort(lengths - expected, kind='stable')[:remain]] += 1
+            return lengths.tolist()
+        if self.ds_ratio is None:
+            return ds_lengths
+        elif self.ds_ratio == 'pad_to_most':
+            # 空的数据集无法扩充
+            return [max(ds_lengths) if length > 0 else 0 for length in ds_lengths]
+        elif self.ds_ratio == 'truncate_to_least':
+            return [min(ds_lengths)] * len(ds_lengths)
+        return [int(length * self.ds_ratio[name]) for name, length in zip(self.dataset.keys(), ds_lengths)]
+
+    def set_distributed(self, num_replicas, rank, pad=True):
+        """
+        进行分布式的相关设置，应当在初始化该 BatchSampler 本身后立即被调用。
+
+        :param num_replicas: 分布式训练中的进程总数
+        :param rank: 当前进程的 ``global_rank``
+        :param pad: 如果 sample 数量不整除 ``num_replicas`` 的时候，要不要 pad 一下，使得最终使得每个进程上
+            的 sample 数量是完全一致的
+        :return: 自身
+        """
+        assert self.during_iter is False, "Cannot set the sampler to be distributed when it is " \
+                                          "during an unfinished iteration."
+        assert num_replicas > 0 and isinstance(num_replicas, int)
+        assert isinstance(rank, int) and 0 <= rank < num_replicas
+        # 注意初始化该函数时，所有的状态都应当默认是一个 epoch 刚开始训练的状态；
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.pad = pad
+
+        return self
+
+    def generate_indices(self) -> np.ndarray:
+        """
+        生成当前 epoch 中所有进程的 index 序列。结果只由 ``seed``、``epoch`` 和数据集的长度决定，与 ``batch_size`` 以及
+        ``num_replicas`` 无关，因此断点重训时只需要跳过前 ``num_consumed_samples`` 个即可。
+
+        :return: 长度为 ``num_samples`` 的 ``np.ndarray``
+        """
+        ds_lengths, sampler_lengths = self.ds_lengths, self.sampler_lengths
+        offsets = np.cumsum([0] + ds_lengths[:-1])
+        rng = np.random.default_rng(abs(self.seed + self.epoch))
+        ds_indices = []
+        for offset, ds_length, sampler_length in zip(offsets, ds_lengths, sampler_lengths):
+            if sampler_length == 0:
+                continue
+            if self.shuffle:
+                # 需要的数量超过数据集长度时，每一轮都使用一个新的排列
+                num_rounds = math.ceil(sampler_length / ds_length)
+                indices = rng.random((num_rounds, ds_length)).argsort(axis=1).ravel()[:sampler_length]
+            else:
+                indices = np.arange(sampler_length) % ds_length
+            ds_indices.append(indices + offset)
+        if len(ds_indices) == 0:
+            return np.zeros(0, dtype=np.int64)
+        indices = np.concatenate(ds_indices)
+        if self.shuffle:
+            # 每个位置属于哪个数据集，同一个数据集的样本按照上面生成的顺序依次填入
+            assignment = np.repeat(np.arange(len(ds_indices)), [len(_indices) for _indices in ds_indices])
+            rng.shuffle(assignment)
+            mixed = np.empty_like(indices)
+            mixed[np.argsort(assignment, kind='stable')] = indices
+            indices = mixed
+        return indices
+
+    def __iter__(self):
+        if self.during_iter:  # 如果发现_during_iter为True，说明之前的还没结束，只有强制重新初始化了
+            self.num_consumed_samples = 0
+        self.during_iter = True
+
+        left_indices = self.generate_indices()[self.num_consumed_samples:]
+        indices = left_indices[self.rank:len(left_indices):self.num_replicas]
+        need_pad_num = len(left_indices) % self.num_replicas
+        if self.pad and need_pad_num != 0 and need_pad_num <= self.rank:
+            indices = np.append(indices, left_indices[:1])
+        elif self.pad is False and need_pad_num != 0 and need_pad_num > self.rank:
+            indices = indices[:-1]
+
+        assert len(indices) == self.num_left_samples
+
+        num_batches = len(indices) // self.batch_size if self.drop_last else \
+            (len(indices) + self.batch_size - 1) // self.batch_size
+        for start in range(0, num_batches * self.batch_size, self.batch_size):
+            batch = indices[start:start + self.batch_size].tolist()
+            self.num_consumed_samples += self.num_replicas * len(batch)
+            yield batch
+        self.during_iter = False
+        self.num_consumed_samples = 0
+        if self.epoch < 0:  # 防止用户没有修改epoch，导致每个epoch都一样了
+            self.epoch -= 1
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    @property
+    def batch_idx_in_epoch(self):
+        if self.drop_last:
+            return self.num_samples // self.num_replicas // self.batch_size - self.num_left_samples // self.batch_size
+        else:
+            return (self.num_samples // self.num_replicas + self.batch_size - 1) // self.batch_size - \
+                   (self.num_left_samples + self.batch_size - 1) // self.batch_size
+
+    @property
+    def total_size(self):
+        """
+        当前 BatchSampler 会最终产生出的 index 数量（包括了其它 rank 的），因为 ``replica`` 和 ``pad`` 的原因，这个值可能等于、
+        大于或者小于 ``num_samples``。
+        """
+        return self.num_consumed_samples + self.num_replicas*self.num_left_samples
+
+    @property
+    def num_left_samples(self):
+        """
+        当前迭代还有多少个 sample 结束，表示的是 **当前 rank** 的还剩多少。
+        """
+        num_consumed_samples = self.num_consumed_samples
+        return math.ceil((self.num_samples - num_consumed_samples) / self.num_replicas) if \
+            self.pad else math.floor(((self.num_samples - num_consumed_samples) / self.num_replicas))
+
+    @property
+    def num_samples(self):
+        """
+        一个 epoch 中所有数据集采样的样本总数。
+        """
+        return sum(self.sampler_lengths)
+
+    def __len__(self) -> int:
+        """
+        返回当前 sampler 还会返回多少个 batch 的数据
+
+        :return:
+        """
+        num_sampler_per_rank = self.total_size//self.num_replicas
+        num_batches = num_sampler_per_rank//self.batch_size if self.drop_last else \
+            (num_sampler_per_rank+self.batch_size-1)//self.batch_size
+        return num_batches
+
+    def state_dict(self) -> Dict:
+        states = {'seed': self.seed, 'epoch': self.epoch, 'num_consumed_samples': self.num_consumed_samples,
+                  'sampler_type': self.__class__.__name__, 'length': self.num_samples, 'shuffle': self.shuffle,
+                  'ds_lengths': self.ds_lengths, 'sampler_lengths': self.sampler_lengths}
+        return states
+
+    def load_state_dict(self, states: Dict):
+        # 如果 self.during_iter 是 True，那么 num_consumed_samples 一定是 0；
+        assert self.during_iter is False, "Cannot call load_state_dict() when it is " \
+                                          "during an unfinished iteration."
+
+        assert states['sampler_type'] == self.__class__.__name__, f"The sampler type in checkpoint is {states['sampler_type']}," \
+                                                                  f"we cannot use {self.__class__.__name__} to load it."
+
+        assert states['ds_lengths'] == self.ds_lengths, "The number of samples is different between the checkpoint " \
+                                                        "record and current datasets."
+        # 每个数据集的采样数量不同时，同一个 seed 和 epoch 生成的序列也不同，无法接着上次的位置继续
+        assert states['sampler_lengths'] == self.sampler_lengths, "The `ds_ratio` or `temperature` is different " \
+                                                                  "between the checkpoint record and current sampler."
+        length = states['length']
+        self.seed = states['seed']
+        self.epoch = states['epoch']
+        self.num_consumed_samples = states['num_consumed_samples']
+        if self.num_consumed_samples >= length:  # 如果保存的时候已经到达了最后一个sample了，则直接将结果重置为0
+            self.num_consumed_samples = 0
+        if self.shuffle != states['shuffle']:
+            logger.info(f"The shuffle from the checkpoint is {states['shuffle']}, while set as {self.shuffle}, "
+                        f"we use shuffle={states['shuffle']}")
+        self.shuffle = states["shuffle"]
+
+
 if __name__ == '__main__':
     from fastNLP.core.dataset import DataSet
     ds = DataSet({'x': ["x1a", "1ws2", "xa qa", "ax wq", "iu, lk"] * 101, 'y': [1, 0, 1, 0, 1] * 101})
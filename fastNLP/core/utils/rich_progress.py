@@ -2,7 +2,9 @@
 该文件用于为 **fastNLP** 提供一个统一的 ``progress bar`` 管理，通过共用一个 ``Task`` 对象， :class:`~fastNLP.core.Trainer`
 中的 ``progress bar`` 和 :class:`~fastNLP.core.Evaluator` 中的 ``progress bar`` 才能不冲突
 """
+import os
 import sys
+import threading
 from typing import Any, Union, Optional
 
 from rich.progress import Progress, Console, GetTimeCallable, get_console, TaskID, Live, Text, ProgressSample
@@ -14,6 +16,7 @@ __all__ = [
 
 from fastNLP.envs import get_global_rank
 from .utils import is_notebook
+from ..log import logger
 
 
 class Singleton(type):
@@ -45,6 +48,16 @@ class DummyFRichProgress:
 
 
 class FRichProgress(Progress, metaclass=Singleton):
+    """
+    **fastNLP** 中统一使用的 rich progress bar。
+
+    开启 ``background_refresh`` 时（默认开启），训练过程中对 :meth:`update` 只修改 ``advance``、``description`` 以及额外字段的调用
+    只会在内存中累加计数，不加锁也不刷新；由一个后台线程以 ``refresh_per_second`` 的固定频率将累加的结果同步到 task 上并刷新显示，
+    使得进度条的开销与调用 :meth:`update` 的频率无关。后台线程在第一次 :meth:`add_task` 时启动，在所有 task 都被移除后退出，
+    并且只会在有新的更新时刷新，因此在使用 pdb 调试时不会持续刷新。
+
+    在 fork 出的子进程（例如 ``DataLoader`` 的 worker 进程）中对 progress bar 的更新会被直接忽略，从而不会破坏主进程的显示。
+    """
     def new_progess(self, *columns: Union[str, ProgressColumn],
                     # 这里将 auto_refresh 关掉是想要避免单独开启线程，同时也是为了避免pdb的时候会持续刷新
                     auto_refresh: bool = False,
@@ -55,7 +68,19 @@ class FRichProgress(Progress, metaclass=Singleton):
                     redirect_stderr: bool = True,
                     get_time: Optional[GetTimeCallable] = None,
                     disable: bool = False,
-                    expand: bool = False):
+                    expand: bool = False,
+                    background_refresh: bool = True):
+        if not hasattr(self, '_owner_pid'):
+            # 记录累加的更新：_pending_advance 只由调用 update 的线程写入，_applied_advance 只由同步的线程写入，
+            #  因此不需要加锁；
+            self._pending_advance = {}
+            self._applied_advance = {}
+            self._pending_fields = {}
+            self._refresh_thread = None
+            self._refresh_stop = None
+            self._background_refresh = False
+            self._sync_lock = threading.Lock()
+        self._owner_pid = os.getpid()
         for task_id in self.task_ids:  # 首先移除已有的
             self.remove_task(task_id)
 
@@ -97,9 +122,89 @@ class FRichProgress(Progress, metaclass=Singleton):
         self.redirect_stderr = redirect_stderr
         self.refresh_per_second = refresh_per_second
         self._need_renew_live = False
+        self.set_background_refresh(background_refresh)
 
         return self
 
+    def set_background_refresh(self, flag: bool = True, refresh_per_second: Optional[float] = None):
+        """
+        设置是否由后台线程以固定的频率刷新显示。
+
+        :param flag: 为 ``True`` 时 :meth:`update` 只会累加计数，由后台线程同步并刷新；为 ``False`` 时每次 :meth:`update` 都会
+            直接修改 task ，并根据 ``refresh`` 参数决定是否刷新；
+        :param refresh_per_second: 后台线程每秒刷新的次数，为 ``None`` 时使用 :meth:`new_progess` 中设置的值；
+        :return:
+        """
+        if refresh_per_second is not None:
+            assert refresh_per_second > 0, "refresh_per_second must be > 0"
+            self.refresh_per_second = refresh_per_second
+        self._background_refresh = flag
+        if not flag:
+            self._stop_refresh_thread()
+            self._sync_pending()
+        elif len(self._tasks) > 0:
+            self._start_refresh_thread()
+
+    def _start_refresh_thread(self):
+        if self._refresh_thread is not None and self._refresh_thread.is_alive() and \
+                self._refresh_thread_pid == os.getpid():
+            return
+        # 每个线程使用自己的 Event ，停止旧线程与启动新线程之间不会互相影响
+        self._refresh_stop = threading.Event()
+        self._refresh_thread_pid = os.getpid()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, args=(self._refresh_stop,),
+                                                name='fastNLP-rich-progress', daemon=True)
+        self._refresh_thread.start()
+
+    def _stop_refresh_thread(self):
+        if self._refresh_thread is not None:
+            self._refresh_stop.set()
+            self._refresh_thread = None
+            self._refresh_stop = None
+
+    def _refresh_loop(self, stop: threading.Event):
+        while not stop.wait(1 / self.refresh_per_second):
+            if self._sync_pending() and self.live.is_started and not self.disable:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.debug(f"Failed to refresh the progress bar: {e!r}")
+
+    def _sync_pending(self, task_id: Optional[TaskID] = None) -> bool:
+        """
+        将累加的更新同步到 task 上。
+
+        :param task_id: 为 ``None`` 时同步所有的 task；
+        :return: 是否有新的更新被同步；
+        """
+        with self._sync_lock:
+            return self._sync_pending_unlocked(task_id)
+
+    def _sync_pending_unlocked(self, task_id: Optional[TaskID] = None) -> bool:
+        updated = False
+        task_ids = list(self._pending_advance.keys()) if task_id is None else [task_id]
+        for _task_id in task_ids:
+            pending = self._pending_advance.get(_task_id)
+            if pending is None:
+                continue
+            advance = pending[0] - self._applied_advance.get(_task_id, 0)
+            fields = self._pending_fields.pop(_task_id, None)
+            if advance == 0 and fields is None:
+                continue
+            self._applied_advance[_task_id] = pending[0]
+            if _task_id not in self._tasks:
+                continue
+            description, fields = fields if fields is not None else (None, {})
+            self._update(_task_id, advance=advance if advance != 0 else None, description=description, **fields)
+            updated = True
+        return updated
+
+    def _clear_pending(self, task_id: TaskID):
+        with self._sync_lock:
+            self._pending_advance.pop(task_id, None)
+            self._applied_advance.pop(task_id, None)
+            self._pending_fields.pop(task_id, None)
+
     def set_transient(self, transient: bool = True):
         """
         设置是否在bar运行结束之后不关闭
@@ -145,28 +250,46 @@ class FRichProgress(Progress, metaclass=Singleton):
         if not self.live.is_started:
             self.start()
         post_desc = fields.pop('post_desc', '')
-        return super().add_task(description=description,
-                                start=start,
-                                total=total,
-                                completed=completed,
-                                visible=visible,
-                                post_desc=post_desc,
-                                **fields)
+        task_id = super().add_task(description=description,
+                                   start=start,
+                                   total=total,
+                                   completed=completed,
+                                   visible=visible,
+                                   post_desc=post_desc,
+                                   **fields)
+        if self._background_refresh:
+            self._start_refresh_thread()
+        return task_id
 
     def stop_task(self, task_id: TaskID) -> None:
         if task_id in self._tasks:
+            self._sync_pending(task_id)
             super().stop_task(task_id)
 
     def remove_task(self, task_id: TaskID) -> None:
         if task_id in self._tasks:
             super().remove_task(task_id)
+        self._clear_pending(task_id)
+        if len(self._tasks) == 0:
+            self._stop_refresh_thread()
+
+    def reset(self, task_id: TaskID, **kwargs) -> None:
+        if os.getpid() != self._owner_pid:
+            return
+        self._sync_pending(task_id)
+        super().reset(task_id, **kwargs)
 
     def destroy_task(self, task_id: TaskID):
+        if os.getpid() != self._owner_pid:
+            return
         if task_id in self._tasks:
+            self._sync_pending(task_id)
+            self._clear_pending(task_id)
             super().stop_task(task_id)
             super().remove_task(task_id)
             self.refresh()  # 使得bar不残留
         if len(self._tasks) == 0:
+            self._stop_refresh_thread()
             # 这里将这个line函数给hack一下防止stop的时候打印出空行
             old_line = getattr(self.live.console, 'line')
             setattr(self.live.console, 'line', lambda *args,**kwargs:...)
@@ -203,6 +326,39 @@ class FRichProgress(Progress, metaclass=Singleton):
             refresh (bool): Force a refresh of progress information. Default is False.
             **fields (Any): Additional data fields required for rendering.
         """
+        if os.getpid() != self._owner_pid:  # 例如 dataloader 的 worker 进程中，直接忽略
+            return
+        if self._background_refresh and total is None and completed is None and visible is None:
+            # 热路径，只进行累加，由后台线程负责同步与刷新；
+            if advance is not None:
+                pending = self._pending_advance.get(task_id)
+                if pending is None:
+                    self._pending_advance[task_id] = pending = [0]
+                pending[0] += advance
+            if description is not None or fields:
+                last = self._pending_fields.get(task_id)
+                if last is not None:
+                    description = description if description is not None else last[0]
+                    fields = {**last[1], **fields}
+                self._pending_fields[task_id] = (description, fields)
+            return
+        self._sync_pending(task_id)
+        self._update(task_id, total=total, completed=completed, advance=advance, description=description,
+                     visible=visible, **fields)
+        if refresh:
+            self.refresh()
+
+    def _update(
+            self,
+            task_id: TaskID,
+            *,
+            total: Optional[float] = None,
+            completed: Optional[float] = None,
+            advance: Optional[float] = None,
+            description: Optional[str] = None,
+            visible: Optional[bool] = None,
+            **fields: Any,
+    ) -> None:
         with self._lock:
             task = self._tasks[task_id]
             completed_start = task.completed
@@ -234,9 +390,6 @@ class FRichProgress(Progress, metaclass=Singleton):
             if task.completed >= task.total and task.finished_time is None:
                 task.finished_time = task.elapsed
 
-        if refresh:
-            self.refresh()
-
     @property
     def dummy(self) -> bool:
         """
@@ -56,6 +56,8 @@ __all__ = [
     "CMRC2018Loader",
 
     "Pipe",
+    "PipePlan",
+    "PipeCache",
 
     "CLSBasePipe",
     "AGsNewsPipe",
@@ -108,6 +110,7 @@ __all__ = [
     "TruncateBertPipe",
 
     "CMRC2018BertPipe",
+    "merge_window_predictions",
 
     "iob2",
     "iob2bioes"
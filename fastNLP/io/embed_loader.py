@@ -5,6 +5,7 @@ __all__ = [
 
 import logging
 import os
+from itertools import chain
 from typing import Callable
 
 import numpy as np
@@ -12,6 +13,7 @@ import numpy as np
 from fastNLP.core.utils.utils import Option
 from fastNLP.core.vocabulary import Vocabulary
 from fastNLP.core.log import logger
+from .file_reader import _open_file
 
 
 class EmbeddingOption(Option):
@@ -43,7 +45,7 @@ class EmbedLoader:
         从 ``embed_filepath`` 这个预训练的词向量中抽取出 ``vocab`` 这个词表的词的 embedding。 :class:`EmbedLoader` 将自动判断 ``embed_filepath``
         是 **word2vec** （第一行只有两个元素） 还是 **glove** 格式的数据。
 
-        :param embed_filepath: 预训练的 embedding 的路径。
+        :param embed_filepath: 预训练的 embedding 的路径，以 ``.gz`` 、 ``.bz2`` 、 ``.xz`` 、 ``.zst`` 等结尾的压缩文件会在读取时流式解压。
         :param vocab: 词表 :class:`~fastNLP.core.Vocabulary` 类型，读取出现在 ``vocab`` 中的词的 embedding。
             没有出现在 ``vocab`` 中的词的 embedding 将通过找到的词的 embedding 的 *正态分布* 采样出来，以使得整个 Embedding 是同分布的。
         :param dtype: 读出的 embedding 的类型
@@ -58,21 +60,23 @@ class EmbedLoader:
         assert isinstance(vocab, Vocabulary), "Only fastNLP.Vocabulary is supported."
         if not os.path.exists(embed_filepath):
             raise FileNotFoundError("`{}` does not exist.".format(embed_filepath))
-        with open(embed_filepath, 'r', encoding='utf-8') as f:
+        with _open_file(embed_filepath, encoding='utf-8') as f:
             hit_flags = np.zeros(len(vocab), dtype=bool)
-            line = f.readline().strip()
-            parts = line.split()
+            line = f.readline()
+            parts = line.strip().split()
             start_idx = 0
+            lines = f
             if len(parts) == 2:
                 dim = int(parts[1])
                 start_idx += 1
             else:
                 dim = len(parts) - 1
-                f.seek(0)
+                # 压缩文件不一定支持 seek ，因此将第一行重新接回
+                lines = chain([line], f)
             matrix = np.random.randn(len(vocab), dim).astype(dtype)
             if init_method:
                 matrix = init_method(matrix)
-            for idx, line in enumerate(f, start_idx):
+            for idx, line in enumerate(lines, start_idx):
                 try:
                     parts = line.strip().split()
                     word = ''.join(parts[:-dim])
@@ -114,7 +118,7 @@ class EmbedLoader:
         r"""
         从 ``embed_filepath`` 中读取预训练的 word vector。根据预训练的词表读取 embedding 并生成一个对应的 :class:`~fastNLP.core.Vocabulary` 。
 
-        :param embed_filepath: 预训练的 embedding 的路径。
+        :param embed_filepath: 预训练的 embedding 的路径，以 ``.gz`` 、 ``.bz2`` 、 ``.xz`` 、 ``.zst`` 等结尾的压缩文件会在读取时流式解压。
         :param dtype: 读出的 embedding 的类型
         :param padding: 词表中的 *padding* 的 token。
         :param unknown: 词表中的 *unknown* 的 token。
@@ -131,14 +135,16 @@ class EmbedLoader:
         found_unknown = False
         found_pad = False
         
-        with open(embed_filepath, 'r', encoding='utf-8') as f:
+        with _open_file(embed_filepath, encoding='utf-8') as f:
             line = f.readline()
             start = 1
             dim = -1
+            lines = f
             if len(line.strip().split()) != 2:
-                f.seek(0)
+                # 压缩文件不一定支持 seek ，因此将第一行重新接回
+                lines = chain([line], f) if line else f
                 start = 0
-            for idx, line in enumerate(f, start=start):
+            for idx, line in enumerate(lines, start=start):
                 try:
                     parts = line.strip().split()
                     if dim == -1:
@@ -1,12 +1,196 @@
 __all__ = []
 
+import bz2
+import gzip
+import io
 import json
 import csv
+import lzma
+import os
+import sys
+from collections import deque
 
 from ..core import logger
 
+_COMPRESSIONS = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+    '.lzma': 'xz',
+    '.zst': 'zstd',
+    '.zstd': 'zstd',
+}
 
-def _read_csv(path, encoding='utf-8', headers=None, sep=',', dropna=True):
+
+def _get_compression(path):
+    return _COMPRESSIONS.get(os.path.splitext(str(path))[1].lower())
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Reading `.zst` files requires zstandard, please install it by `pip install zstandard`.")
+    return zstandard
+
+
+def _open_file(path, encoding='utf-8', num_proc=0):
+    r"""
+    Open a text file for reading. Files ending with ``.gz``, ``.bz2``, ``.xz``/``.lzma`` and ``.zst``/``.zstd`` are
+    decompressed on the fly.
+
+    If ``num_proc`` > 1 and the file consists of independently compressed blocks whose offsets are known without
+    decompressing it, i.e. a BGZF file written by ``bgzip`` or a zstd file in the seekable format, the blocks are
+    decompressed in ``num_proc`` processes while the file is read.
+
+    :param path: file path
+    :param encoding: file's encoding, default: utf-8
+    :param num_proc: number of processes to decompress the file. default: 0
+    :return: text file object
+    """
+    compression = _get_compression(path)
+    if compression is None:
+        return open(path, 'r', encoding=encoding)
+    if num_proc > 1 and sys.platform not in ('win32', 'msys', 'cygwin'):
+        import multiprocessing as mp
+        # daemon processes, e.g. the workers of Loader.load, can not start a pool
+        members = None if mp.current_process().daemon else _find_members(path, compression)
+        if members is not None and len(members) > 1:
+            raw = _ChunkStream(_decompress_in_parallel(path, compression, members, num_proc))
+            return io.TextIOWrapper(io.BufferedReader(raw), encoding=encoding)
+    if compression == 'gzip':
+        return gzip.open(path, 'rt', encoding=encoding)
+    if compression == 'bz2':
+        return bz2.open(path, 'rt', encoding=encoding)
+    if compression == 'xz':
+        return lzma.open(path, 'rt', encoding=encoding)
+    zstandard = _import_zstandard()
+    reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+    return io.TextIOWrapper(reader, encoding=encoding)
+
+
+class _ChunkStream(io.RawIOBase):
+    r"""
+    A readable raw stream over an iterator of bytes.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = memoryview(b'')
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not len(self._buffer):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = memoryview(chunk)
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+    def close(self):
+        if hasattr(self._chunks, 'close'):
+            self._chunks.close()
+        super().close()
+
+
+def _find_members(path, compression):
+    r"""
+    Find the byte ranges of the independently compressed blocks of ``path``.
+
+    :return: list of (start, end), or None if the offsets of the blocks are not recorded in the file
+    """
+    if compression == 'gzip':
+        return _find_bgzf_blocks(path)
+    if compression == 'zstd':
+        return _find_zstd_frames(path)
+    return None
+
+
+def _find_bgzf_blocks(path):
+    # every BGZF block is a gzip member whose extra field `BC` records the size of the block
+    size = os.path.getsize(path)
+    blocks = []
+    with open(path, 'rb') as f:
+        pos = 0
+        while pos < size:
+            f.seek(pos)
+            header = f.read(18)
+            if len(header) < 18 or header[:4] != b'\x1f\x8b\x08\x04' or header[12:16] != b'BC\x02\x00':
+                return None
+            end = pos + int.from_bytes(header[16:18], 'little') + 1
+            blocks.append((pos, end))
+            pos = end
+    return blocks
+
+
+def _find_zstd_frames(path):
+    # the seek table is a skippable frame at the end of the file, followed by a footer:
+    # Number_Of_Frames (4 bytes), Seek_Table_Descriptor (1 byte), Seekable_Magic_Number (4 bytes)
+    size = os.path.getsize(path)
+    if size < 17:
+        return None
+    with open(path, 'rb') as f:
+        f.seek(size - 9)
+        footer = f.read(9)
+        if int.from_bytes(footer[5:9], 'little') != 0x8F92EAB1:
+            return None
+        num_frames = int.from_bytes(footer[:4], 'little')
+        entry_size = 12 if footer[4] & 0x80 else 8
+        table_size = num_frames * entry_size
+        if size < table_size + 17:
+            return None
+        f.seek(size - 17 - table_size)
+        header = f.read(8)
+        if int.from_bytes(header[:4], 'little') != 0x184D2A5E or int.from_bytes(header[4:8], 'little') != table_size + 9:
+            return None
+        table = f.read(table_size)
+    frames = []
+    pos = 0
+    for i in range(0, table_size, entry_size):
+        end = pos + int.from_bytes(table[i:i + 4], 'little')
+        frames.append((pos, end))
+        pos = end
+    return frames
+
+
+def _decompress_members(path, compression, members):
+    with open(path, 'rb') as f:
+        f.seek(members[0][0])
+        data = f.read(members[-1][1] - members[0][0])
+    if compression == 'gzip':
+        return gzip.decompress(data)
+    dctx = _import_zstandard().ZstdDecompressor()
+    offset = members[0][0]
+    return b''.join(dctx.decompressobj().decompress(data[start - offset:end - offset]) for start, end in members)
+
+
+def _decompress_in_parallel(path, compression, members, num_proc, chunk_size=4 << 20):
+    r"""
+    Decompress groups of about ``chunk_size`` compressed bytes in ``num_proc`` processes, yield the decompressed
+    bytes in order while keeping at most ``2 * num_proc`` groups in flight.
+    """
+    groups = [[]]
+    for start, end in members:
+        if groups[-1] and end - groups[-1][0][0] > chunk_size:
+            groups.append([])
+        groups[-1].append((start, end))
+    import multiprocessing as mp
+    with mp.get_context('fork').Pool(num_proc) as pool:
+        pending = deque()
+        for group in groups:
+            pending.append(pool.apply_async(_decompress_members, (path, compression, group)))
+            if len(pending) >= 2 * num_proc:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def _read_csv(path, encoding='utf-8', headers=None, sep=',', dropna=True, num_proc=0):
     r"""
     Construct a generator to read csv items.
 
@@ -16,9 +200,10 @@ def _read_csv(path, encoding='utf-8', headers=None, sep=',', dropna=True):
     :param sep: separator for each column. default: ','
     :param dropna: weather to ignore and drop invalid data,
             :if False, raise ValueError when reading invalid data. default: True
+    :param num_proc: number of processes to decompress the file, see :func:`_open_file`. default: 0
     :return: generator, every time yield (line number, csv item)
     """
-    with open(path, 'r', encoding=encoding) as csv_file:
+    with _open_file(path, encoding, num_proc) as csv_file:
         f = csv.reader(csv_file, delimiter=sep)
         start_idx = 0
         if headers is None:
@@ -46,7 +231,7 @@ def _read_csv(path, encoding='utf-8', headers=None, sep=',', dropna=True):
             yield line_idx, _dict
 
 
-def _read_json(path, encoding='utf-8', fields=None, dropna=True):
+def _read_json(path, encoding='utf-8', fields=None, dropna=True, num_proc=0):
     r"""
     Construct a generator to read json items.
 
@@ -55,11 +240,12 @@ def _read_json(path, encoding='utf-8', fields=None, dropna=True):
     :param fields: json object's fields that needed, if None, all fields are needed. default: None
     :param dropna: weather to ignore and drop invalid data,
             :if False, raise ValueError when reading invalid data. default: True
+    :param num_proc: number of processes to decompress the file, see :func:`_open_file`. default: 0
     :return: generator, every time yield (line number, json item)
     """
     if fields:
         fields = set(fields)
-    with open(path, 'r', encoding=encoding) as f:
+    with _open_file(path, encoding, num_proc) as f:
         for line_idx, line in enumerate(f):
             data = json.loads(line)
             if fields is None:
@@ -77,7 +263,7 @@ def _read_json(path, encoding='utf-8', fields=None, dropna=True):
             yield line_idx, _res
 
 
-def _read_conll(path, encoding='utf-8',sep=None, indexes=None, dropna=True, drophash=True):
+def _read_conll(path, encoding='utf-8',sep=None, indexes=None, dropna=True, drophash=True, num_proc=0):
     r"""
     Construct a generator to read conll items.
 
@@ -88,46 +274,255 @@ def _read_conll(path, encoding='utf-8',sep=None, indexes=None, dropna=True, drop
     :param dropna: weather to ignore and drop invalid data,
             :if False, raise ValueError when reading invalid data. default: True
     :param drophash: 是否丢掉以 # 开头的 line 。
+    :param num_proc: number of processes to decompress the file, see :func:`_open_file`. default: 0
     :return: generator, every time yield (line number, conll item)
     """
 
-    def parse_conll(sample):
-        sample = list(map(list, zip(*sample)))
-        sample = [sample[i] for i in indexes]
-        for f in sample:
-            if len(f) <= 0:
-                raise ValueError('empty field')
-        return sample
+    with _open_file(path, encoding, num_proc) as f:
+        for line_idx, res in _iter_conll(f, sep, indexes, dropna, drophash):
+            if res is None:
+                logger.error('Invalid instance which ends at line: {} has been dropped.'.format(line_idx))
+                continue
+            yield line_idx, res
+
+
+def _parse_conll(sample, indexes):
+    sample = list(map(list, zip(*sample)))
+    sample = [sample[i] for i in indexes]
+    for f in sample:
+        if len(f) <= 0:
+            raise ValueError('empty field')
+    return sample
+
 
-    with open(path, 'r', encoding=encoding) as f:
-        sample = []
+def _iter_conll(f, sep=None, indexes=None, dropna=True, drophash=True, file_start=True):
+    r"""
+    Parse conll samples from the lines of ``f``, yield (line number, conll item) and (line number, None) for the
+    dropped samples. If ``file_start`` is False, ``f`` is a chunk in the middle of a file and its first line is not
+    treated specially.
+    """
+    sample = []
+    line_idx = 0
+    if file_start:
         start = next(f).strip()
         if start != '':
             sample.append(start.split(sep)) if sep else sample.append(start.split())
-        for line_idx, line in enumerate(f, 1):
-            line = line.strip()
-            if line == '':
-                if len(sample):
-                    try:
-                        res = parse_conll(sample)
+    for line_idx, line in enumerate(f, int(file_start)):
+        line = line.strip()
+        if line == '':
+            if len(sample):
+                try:
+                    res = _parse_conll(sample, indexes)
+                    sample = []
+                    yield line_idx, res
+                except Exception as e:
+                    if dropna:
                         sample = []
-                        yield line_idx, res
-                    except Exception as e:
-                        if dropna:
-                            logger.error('Invalid instance which ends at line: {} has been dropped.'.format(line_idx))
-                            sample = []
-                            continue
-                        raise ValueError('Invalid instance which ends at line: {}'.format(line_idx))
-            elif line.startswith('#') and drophash:
+                        yield line_idx, None
+                        continue
+                    raise ValueError('Invalid instance which ends at line: {}'.format(line_idx))
+        elif line.startswith('#') and drophash:
+            continue
+        else:
+            sample.append(line.split(sep)) if sep else sample.append(line.split())
+    if len(sample) > 0:
+        try:
+            res = _parse_conll(sample, indexes)
+            yield line_idx, res
+        except Exception as e:
+            if dropna:
+                return
+            logger.error('invalid instance ends at line: {}'.format(line_idx))
+            raise e
+
+
+def _split_file(path, num_chunks, start=0, blank_line=False):
+    r"""
+    Split the bytes of ``path`` after ``start`` into at most ``num_chunks`` ranges. Every range ends at a record
+    boundary: a newline, or a blank line if ``blank_line`` is True.
+
+    :return: list of (start, end) byte offsets
+    """
+    size = os.path.getsize(path)
+    boundaries = [start]
+    with open(path, 'rb') as f:
+        for i in range(1, num_chunks):
+            pos = start + (size - start) * i // num_chunks
+            if pos <= boundaries[-1]:
+                continue
+            f.seek(pos - 1)
+            f.readline()
+            if blank_line:
+                line = f.readline()
+                while line and line.strip() != b'':
+                    line = f.readline()
+            pos = f.tell()
+            if pos >= size:
+                break
+            if pos > boundaries[-1]:
+                boundaries.append(pos)
+    if size > boundaries[-1]:
+        boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _open_chunk(path, start, end, encoding):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # the same newline translation as open(path, 'r')
+    return io.TextIOWrapper(io.BytesIO(data), encoding=encoding)
+
+
+def _read_chunks(worker, path, num_proc, chunk_size, args, start=0, blank_line=False):
+    r"""
+    Run ``worker(path, start, end, *args)`` on every chunk of ``path`` with a process pool, return the results in
+    the order of the chunks, or None if any chunk fails or the pool can not be started.
+    """
+    import multiprocessing as mp
+    if num_proc > 1 and sys.platform in ('win32', 'msys', 'cygwin'):
+        raise RuntimeError("Your platform does not support multiprocessing with fork, please set `num_proc=0`")
+    if num_proc > 1 and mp.current_process().daemon:
+        # daemon processes, e.g. the workers of Loader.load, can not start a pool
+        return None
+    num_chunks = max(1, min(num_proc * 4, (os.path.getsize(path) - start) // max(chunk_size, 1)))
+    chunks = [(path, chunk_start, chunk_end, *args)
+              for chunk_start, chunk_end in _split_file(path, num_chunks, start, blank_line)]
+    try:
+        if num_proc > 1 and len(chunks) > 1:
+            with mp.get_context('fork').Pool(min(num_proc, len(chunks))) as pool:
+                return pool.starmap(worker, chunks)
+        return [worker(*chunk) for chunk in chunks]
+    except (ValueError, csv.Error) as e:
+        # invalid data or records that can not be split into chunks, the serial reader gives the same result or error
+        logger.debug("Fall back to the serial reader for `{}`: {}".format(path, e))
+        return None
+
+
+def _is_ascii_compatible(encoding):
+    # records are split at b'\n', which is only safe when the encoding keeps newlines as single bytes
+    return '\n\n'.encode(encoding).endswith(b'\n\n')
+
+
+def _read_csv_chunk(path, start, end, encoding, num_headers, sep, dropna):
+    columns = [[] for _ in range(num_headers)]
+    # a quoted record split by the chunk boundary ends inside the quotes, which raises in strict mode
+    reader = csv.reader(_open_chunk(path, start, end, encoding), delimiter=sep, strict=True)
+    line_num = 0
+    for contents in reader:
+        if reader.line_num != line_num + 1:
+            raise ValueError("Records spanning multiple lines can not be split into chunks.")
+        line_num = reader.line_num
+        if len(contents) != num_headers:
+            if dropna:
                 continue
-            else:
-                sample.append(line.split(sep)) if sep else sample.append(line.split())
-        if len(sample) > 0:
-            try:
-                res = parse_conll(sample)
-                yield line_idx, res
-            except Exception as e:
+            raise ValueError("Line has {} parts, while header has {} parts.".format(len(contents), num_headers))
+        for column, content in zip(columns, contents):
+            column.append(content)
+    return columns
+
+
+def _read_csv_columns(path, encoding='utf-8', headers=None, sep=',', dropna=True, num_proc=0, chunk_size=1 << 20):
+    r"""
+    Read a csv file into columns by splitting it at newlines and parsing the chunks in ``num_proc`` processes.
+
+    :return: dict of header to column list in the order of rows; None if the file is compressed, can not be read in
+        chunks or contains invalid data while ``dropna`` is False, in which case :func:`_read_csv` should be used to get
+        the same result or error as before.
+    """
+    if not _is_ascii_compatible(encoding) or _get_compression(path) is not None or \
+            (headers is not None and not isinstance(headers, (list, tuple))):
+        return None
+    start = 0
+    if headers is None:
+        with open(path, 'rb') as f:
+            line = f.readline()
+            start = f.tell()
+        headers = next(csv.reader([line.decode(encoding)], delimiter=sep), None)
+        if headers is None:
+            return None
+    results = _read_chunks(_read_csv_chunk, path, num_proc, chunk_size, (encoding, len(headers), sep, dropna),
+                           start=start)
+    if results is None:
+        return None
+    columns = [[value for res in results for value in res[i]] for i in range(len(headers))]
+    return dict(zip(headers, columns))
+
+
+def _read_json_chunk(path, start, end, encoding, fields, dropna):
+    columns = None
+    for line in _open_chunk(path, start, end, encoding):
+        data = json.loads(line)
+        if not isinstance(data, dict):
+            raise ValueError("Json object expected.")
+        if fields is not None:
+            data = {k: v for k, v in data.items() if k in fields}
+            if len(data) < len(fields):
                 if dropna:
-                    return
-                logger.error('invalid instance ends at line: {}'.format(line_idx))
-                raise e
+                    continue
+                raise ValueError('invalid instance')
+        if columns is None:
+            columns = {k: [] for k in data}
+        elif data.keys() != columns.keys():
+            raise ValueError("Json objects have different fields.")
+        for k, v in data.items():
+            columns[k].append(v)
+    return columns or {}
+
+
+def _read_json_columns(path, encoding='utf-8', fields=None, dropna=True, num_proc=0, chunk_size=1 << 20):
+    r"""
+    Read a json lines file into columns by splitting it at newlines and parsing the chunks in ``num_proc``
+    processes.
+
+    :return: dict of field to column list in the order of rows; None if the file is compressed, can not be read in
+        chunks, contains invalid data while ``dropna`` is False or its json objects have different fields, in which
+        case :func:`_read_json` should be used to get the same result or error as before.
+    """
+    if not _is_ascii_compatible(encoding) or _get_compression(path) is not None:
+        return None
+    results = _read_chunks(_read_json_chunk, path, num_proc, chunk_size,
+                           (encoding, set(fields) if fields else None, dropna))
+    if results is None:
+        return None
+    results = [res for res in results if res]
+    if any(res.keys() != results[0].keys() for res in results):
+        return None
+    return {k: [v for res in results for v in res[k]] for k in (results[0] if results else ())}
+
+
+def _read_conll_chunk(path, start, end, encoding, sep, indexes, dropna, drophash):
+    columns = [[] for _ in indexes]
+    dropped = []
+    f = _open_chunk(path, start, end, encoding)
+    for line_idx, res in _iter_conll(f, sep, indexes, dropna, drophash, file_start=start == 0):
+        if res is None:
+            dropped.append(line_idx)
+            continue
+        for column, field in zip(columns, res):
+            column.append(field)
+    f.seek(0)
+    return columns, dropped, sum(1 for _ in f)
+
+
+def _read_conll_columns(path, encoding='utf-8', sep=None, indexes=None, dropna=True, drophash=True, num_proc=0,
+                        chunk_size=1 << 20):
+    r"""
+    Read a conll file into columns by splitting it at blank lines and parsing the chunks in ``num_proc`` processes.
+
+    :return: list of columns in the order of ``indexes``; None if the file is compressed, can not be read in chunks or
+        contains invalid data while ``dropna`` is False, in which case :func:`_read_conll` should be used to get the same
+        result or error as before.
+    """
+    if not _is_ascii_compatible(encoding) or _get_compression(path) is not None or os.path.getsize(path) == 0:
+        return None
+    results = _read_chunks(_read_conll_chunk, path, num_proc, chunk_size,
+                           (encoding, sep, indexes, dropna, drophash), blank_line=True)
+    if results is None:
+        return None
+    line_offset = 0
+    for _, dropped, num_lines in results:
+        for line_idx in dropped:
+            logger.error('Invalid instance which ends at line: {} has been dropped.'.format(line_offset + line_idx))
+        line_offset += num_lines
+    return [[field for columns, _, _ in results for field in columns[i]] for i in range(len(indexes))]
@@ -18,7 +18,7 @@ import time
 from typing import List
 
 from .loader import Loader
-from ..file_reader import _read_conll
+from ..file_reader import _read_conll, _read_conll_columns
 # from ...core.const import Const
 from fastNLP.core.dataset import DataSet, Instance
 
@@ -52,10 +52,17 @@ class ConllLoader(Loader):
     :param indexes: 需要保留的数据列下标，从 **0** 开始。若为 ``None`` ，则所有列都保留。
     :param dropna: 是否忽略非法数据，若为 ``False`` ，则遇到非法数据时抛出 :class:`ValueError` 。
     :param drophashtag: 是否忽略以 ``#`` 开头的句子。
+    :param num_proc: 大于 1 时在空行处将文件切分为多块，使用 ``num_proc`` 个进程并行地将每块直接解析为列，再按顺序拼接为
+        :class:`~fastNLP.core.DataSet` 。若在 ``dropna`` 为 ``False`` 时遇到非法数据，会退回逐行读取，因此结果和报错与单进程
+        时一致。
+        以 ``.gz`` 、 ``.bz2`` 、 ``.xz`` 、 ``.zst`` 等结尾的压缩文件会在读取时流式解压，无法按字节切分，此时 ``num_proc`` 用于并行解压
+        由 ``bgzip`` 生成的 gzip 文件或者 seekable 格式的 zstd 文件。
     """
     
-    def __init__(self, headers: List[str], sep: str=None, indexes: List[int]=None, dropna: bool=True, drophash: bool=True):
+    def __init__(self, headers: List[str], sep: str=None, indexes: List[int]=None, dropna: bool=True, drophash: bool=True,
+                 num_proc: int=0):
         super(ConllLoader, self).__init__()
+        self.num_proc = num_proc
         if not isinstance(headers, (list, tuple)):
             raise TypeError(
                 'invalid headers: {}, should be list of strings'.format(headers))
@@ -77,9 +84,14 @@ class ConllLoader(Loader):
         :param str path: 文件的路径
         :return: DataSet
         """
+        if self.num_proc > 1:
+            columns = _read_conll_columns(path, sep=self.sep, indexes=self.indexes, dropna=self.dropna,
+                                          drophash=self.drophash, num_proc=self.num_proc)
+            if columns is not None:
+                return DataSet(dict(zip(self.headers, columns))) if columns and len(columns[0]) else DataSet()
         ds = DataSet()
         for idx, data in _read_conll(path,sep=self.sep, indexes=self.indexes, dropna=self.dropna,
-                                     drophash=self.drophash):
+                                     drophash=self.drophash, num_proc=self.num_proc):
             ins = {h: data[i] for i, h in enumerate(self.headers)}
             ds.append(Instance(**ins))
         return ds
@@ -5,7 +5,7 @@ __all__ = [
 from typing import List
 
 from .loader import Loader
-from ..file_reader import _read_csv
+from ..file_reader import _read_csv, _read_csv_columns
 from fastNLP.core.dataset import DataSet, Instance
 
 
@@ -17,18 +17,29 @@ class CSVLoader(Loader):
         若为 ``None`` ，则将读入文件的第一行视作 ``headers`` 。
     :param sep: CSV文件中列与列之间的分隔符。
     :param dropna: 是否忽略非法数据，若为 ``True`` 则忽略；若为 ``False`` 则在遇到非法数据时抛出 :class:`ValueError`。
+    :param num_proc: 大于 1 时在换行处将文件切分为多块，使用 ``num_proc`` 个进程并行地将每块直接解析为列，再按顺序拼接为
+        :class:`~fastNLP.core.DataSet` 。若文件中有跨行的记录，或者在 ``dropna`` 为 ``False`` 时遇到非法数据，会退回逐行读取，
+        因此结果和报错与单进程时一致。
+        以 ``.gz`` 、 ``.bz2`` 、 ``.xz`` 、 ``.zst`` 等结尾的压缩文件会在读取时流式解压，无法按字节切分，此时 ``num_proc`` 用于并行解压
+        由 ``bgzip`` 生成的 gzip 文件或者 seekable 格式的 zstd 文件。
     """
 
-    def __init__(self, headers: List[str]=None, sep: str=",", dropna: bool=False):
+    def __init__(self, headers: List[str]=None, sep: str=",", dropna: bool=False, num_proc: int=0):
         super().__init__()
         self.headers = headers
         self.sep = sep
         self.dropna = dropna
+        self.num_proc = num_proc
 
     def _load(self, path):
+        if self.num_proc > 1:
+            columns = _read_csv_columns(path, headers=self.headers, sep=self.sep, dropna=self.dropna,
+                                        num_proc=self.num_proc)
+            if columns is not None:
+                return DataSet(columns) if columns and len(next(iter(columns.values()))) else DataSet()
         ds = DataSet()
         for idx, data in _read_csv(path, headers=self.headers,
-                                   sep=self.sep, dropna=self.dropna):
+                                   sep=self.sep, dropna=self.dropna, num_proc=self.num_proc):
             ds.append(Instance(**data))
         return ds
 
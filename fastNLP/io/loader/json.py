@@ -3,7 +3,7 @@ __all__ = [
 ]
 
 from .loader import Loader
-from ..file_reader import _read_json
+from ..file_reader import _read_json, _read_json_columns
 from fastNLP.core.dataset import DataSet, Instance
 
 
@@ -16,11 +16,17 @@ class JsonLoader(Loader):
         `value` 也可为 ``None`` ，这时读入后的  `field_name` 与 json 对象对应属性同名。
         ``fields`` 可为 ``None`` ，这时 json 对象所有属性都保存在 ``DataSet`` 中。
     :param dropna: 是否忽略非法数据，若为 ``True`` 则忽略；若为 ``False`` 则在遇到非法数据时抛出 :class:`ValueError`。
+    :param num_proc: 大于 1 时在换行处将文件切分为多块，使用 ``num_proc`` 个进程并行地将每块直接解析为列，再按顺序拼接为
+        :class:`~fastNLP.core.DataSet` 。若在 ``dropna`` 为 ``False`` 时遇到非法数据，或者各行 json 对象的属性不一致，会退回
+        逐行读取，因此结果和报错与单进程时一致。
+        以 ``.gz`` 、 ``.bz2`` 、 ``.xz`` 、 ``.zst`` 等结尾的压缩文件会在读取时流式解压，无法按字节切分，此时 ``num_proc`` 用于并行解压
+        由 ``bgzip`` 生成的 gzip 文件或者 seekable 格式的 zstd 文件。
     """
 
-    def __init__(self, fields: dict=None, dropna=False):
+    def __init__(self, fields: dict=None, dropna=False, num_proc: int=0):
         super(JsonLoader, self).__init__()
         self.dropna = dropna
+        self.num_proc = num_proc
         self.fields = None
         self.fields_list = None
         if fields:
@@ -30,8 +36,14 @@ class JsonLoader(Loader):
             self.fields_list = list(self.fields.keys())
 
     def _load(self, path):
+        if self.num_proc > 1:
+            columns = _read_json_columns(path, fields=self.fields_list, dropna=self.dropna, num_proc=self.num_proc)
+            if columns is not None:
+                if self.fields:
+                    columns = {self.fields[k]: v for k, v in columns.items()}
+                return DataSet(columns) if columns and len(next(iter(columns.values()))) else DataSet()
         ds = DataSet()
-        for idx, d in _read_json(path, fields=self.fields_list, dropna=self.dropna):
+        for idx, d in _read_json(path, fields=self.fields_list, dropna=self.dropna, num_proc=self.num_proc):
             if self.fields:
                 ins = {self.fields[k]: v for k, v in d.items()}
             else:
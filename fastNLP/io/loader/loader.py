@@ -2,12 +2,52 @@ __all__ = [
     "Loader"
 ]
 
-from typing import Union, Dict
+import sys
+from collections import deque
+from typing import Union, Dict, List, Iterator, Tuple
 
 from fastNLP.io.data_bundle import DataBundle
 from fastNLP.io.file_utils import _get_dataset_url, get_cache_path, cached_path
 from fastNLP.io.utils import check_loader_paths
 from fastNLP.core.dataset import DataSet
+from fastNLP.core.log import logger
+from fastNLP.core.utils.rich_progress import f_rich_progress, DummyFRichProgress
+from fastNLP.core.utils.tqdm_progress import f_tqdm_progress
+
+progress_bars = {
+    'rich': f_rich_progress,
+    'tqdm': f_tqdm_progress
+}
+
+_shard_loader = None
+
+
+def _init_shard_worker(loader):
+    # fork 出的子进程直接继承 loader ，不需要 pickle
+    global _shard_loader
+    _shard_loader = loader
+
+
+def _load_shard(path):
+    return _shard_loader._load(path)
+
+
+def _concat_shards(datasets: List[DataSet]) -> DataSet:
+    r"""
+    按顺序拼接同一个 split 的各个分片，跳过空的分片。分片由 :meth:`Loader._load` 新读入，因此直接拼接各 field 的内容而不复制。
+    """
+    datasets = [dataset for dataset in datasets if len(dataset.field_arrays)]
+    if not datasets:
+        return DataSet()
+    ds = datasets[0]
+    field_names = ds.get_field_names()
+    for dataset in datasets[1:]:
+        fn_not_seen = [fn for fn in field_names if not dataset.has_field(fn)]
+        if fn_not_seen:
+            raise RuntimeError(f"The following fields are not provided in the dataset:{fn_not_seen}")
+        for fn in field_names:
+            ds.get_field(fn).content.extend(dataset.get_field(fn).content)
+    return ds
 
 
 class Loader:
@@ -32,7 +72,8 @@ class Loader:
         """
         raise NotImplementedError
     
-    def load(self, paths: Union[str, Dict[str, str]] = None) -> DataBundle:
+    def load(self, paths: Union[str, List[str], Dict[str, Union[str, List[str]]]] = None, num_proc: int = 0,
+             progress_bar: str = 'rich') -> DataBundle:
         r"""
         从指定一个或多个路径中的文件中读取数据，返回 :class:`~fastNLP.io.DataBundle` 。
 
@@ -58,14 +99,78 @@ class Loader:
                 data_bundle = xxxLoader().load("/path/to/a/train.conll") # 返回DataBundle对象, datasets中仅包含'train'
                 tr_data = data_bundle.get_dataset('train')  # 取出DataSet
 
+            - 传入 glob 或者由文件路径与 glob 组成的 list ，此时这些文件被视作同一个 split 的多个分片，按文件名排序后依次拼接；
+              dict 的 value 也可以是 glob 或者 list::
+
+                paths = {'train': "/path/to/train-*.jsonl", 'dev': ["/to/dev-0.jsonl", "/to/dev-1.jsonl"]}
+                data_bundle = xxxLoader().load(paths, num_proc=8)
+
+        :param num_proc: 大于 1 时使用 ``num_proc`` 个进程并行地读取各个文件；
+        :param progress_bar: 显示读取分片进度的方式，支持 ``["rich", "tqdm", None]``，只在有多个文件时显示；
         :return: :class:`~fastNLP.io.DataBundle`
         """
+        datasets = {}
+        for name, path, dataset in self.iter_load(paths, num_proc=num_proc, progress_bar=progress_bar):
+            datasets.setdefault(name, []).append(dataset)
+        datasets = {name: shards[0] if len(shards) == 1 else _concat_shards(shards)
+                    for name, shards in datasets.items()}
+        data_bundle = DataBundle(datasets=datasets)
+        return data_bundle
+
+    def iter_load(self, paths: Union[str, List[str], Dict[str, Union[str, List[str]]]] = None, num_proc: int = 0,
+                  progress_bar: str = 'rich') -> Iterator[Tuple[str, str, DataSet]]:
+        r"""
+        与 :meth:`load` 接受相同的 ``paths`` ，但不拼接各个分片，而是按顺序逐个返回每个文件读取的结果，适用于无法一次全部放入内存的
+        大量分片::
+
+            for name, path, dataset in xxxLoader().iter_load({'train': "/path/to/train-*.jsonl"}, num_proc=4):
+                ...
+
+        :param paths: 同 :meth:`load` ；
+        :param num_proc: 大于 1 时使用 ``num_proc`` 个进程并行地读取各个文件，同时最多预先读取 ``num_proc`` 个尚未返回的文件；
+        :param progress_bar: 显示读取分片进度的方式，支持 ``["rich", "tqdm", None]``，只在有多个文件时显示；
+        :return: 一个生成器，依次返回 ``(split 的名称, 文件路径, DataSet)``
+        """
         if paths is None:
             paths = self.download()
         paths = check_loader_paths(paths)
-        datasets = {name: self._load(path) for name, path in paths.items()}
-        data_bundle = DataBundle(datasets=datasets)
-        return data_bundle
+        tasks = [(name, shard) for name, path in paths.items()
+                 for shard in (path if isinstance(path, list) else [path])]
+        if num_proc > 1 and sys.platform in ('win32', 'msys', 'cygwin'):
+            raise RuntimeError("Your platform does not support multiprocessing with fork, please set `num_proc=0`")
+
+        progress_bar = progress_bars.get(progress_bar, DummyFRichProgress()) if len(tasks) > 1 else DummyFRichProgress()
+        task_id = progress_bar.add_task(description='Loading', total=len(tasks))
+        try:
+            if num_proc > 1 and len(tasks) > 1:
+                import multiprocessing as mp
+                with mp.get_context('fork').Pool(min(num_proc, len(tasks)), initializer=_init_shard_worker,
+                                                 initargs=(self,)) as pool:
+                    pending = deque()
+                    for name, path in tasks:
+                        pending.append((name, path, pool.apply_async(_load_shard, (path,))))
+                        if len(pending) > num_proc:
+                            name, path, result = pending.popleft()
+                            yield name, path, self._get_shard(name, path, result.get)
+                            progress_bar.update(task_id, advance=1)
+                    while pending:
+                        name, path, result = pending.popleft()
+                        yield name, path, self._get_shard(name, path, result.get)
+                        progress_bar.update(task_id, advance=1)
+            else:
+                for name, path in tasks:
+                    yield name, path, self._get_shard(name, path, lambda: self._load(path))
+                    progress_bar.update(task_id, advance=1)
+        finally:
+            progress_bar.destroy_task(task_id)
+
+    @staticmethod
+    def _get_shard(name, path, get):
+        try:
+            return get()
+        except BaseException as e:
+            logger.error(f"Exception happens when loading `{path}` of `{name}`.")
+            raise e
     
     def download(self) -> str:
         r"""
@@ -9,6 +9,8 @@ Pipe用于处理通过 Loader 读取的数据，所有的 Pipe 都包含 ``proce
 """
 __all__ = [
     "Pipe",
+    "PipePlan",
+    "PipeCache",
     
     "CWSPipe",
     
@@ -56,6 +58,7 @@ __all__ = [
 
 
     "CMRC2018BertPipe",
+    "merge_window_predictions",
 
     "R52PmiGraphPipe",
     "R8PmiGraphPipe",
@@ -76,6 +79,8 @@ from .matching import MatchingBertPipe, RTEBertPipe, SNLIBertPipe, QuoraBertPipe
     MatchingPipe, RTEPipe, SNLIPipe, QuoraPipe, QNLIPipe, MNLIPipe, CNXNLIBertPipe, CNXNLIPipe, BQCorpusBertPipe, \
     LCQMCPipe, BQCorpusPipe, LCQMCBertPipe, RenamePipe, GranularizePipe, TruncateBertPipe
 from .pipe import Pipe
-from .qa import CMRC2018BertPipe
+from .plan import PipePlan
+from .cache import PipeCache
+from .qa import CMRC2018BertPipe, merge_window_predictions
 
 from .construct_graph import MRPmiGraphPipe, R8PmiGraphPipe, R52PmiGraphPipe, NG20PmiGraphPipe, OhsumedPmiGraphPipe
@@ -0,0 +1,202 @@
+r"""
+:class:`PipeCache` 按输入文件缓存 **Pipe** 的处理结果。每个文件读入后作为一个单独的 :class:`~fastNLP.core.DataSet` 交给
+:meth:`Pipe.process <fastNLP.io.pipe.Pipe.process>` ，其中 :class:`~fastNLP.io.pipe.PipePlan` 的每个阶段（tokenize 与词频统计、
+index 等）在每个文件上的结果与词频都会以该文件的指纹为键保存下来::
+
+    cache = PipeCache('caches/yelp')
+    data_bundle = cache.process_from_file(YelpFullPipe(tokenizer='raw'), YelpFullLoader(),
+                                          {'train': 'data/train-*.csv', 'dev': 'data/dev.csv'})
+
+再次运行时，只有新增或者被修改过的文件需要重新 tokenize；词表由所有文件缓存的词频合并得到，只有词表发生变化时才会重新 index。
+合并后的词表以及每个 DataSet 的内容与直接调用 ``pipe.process(loader.load(paths))`` 的结果相同。
+
+.. warning::
+
+    与 :func:`~fastNLP.cache_results` 一样，缓存的键只包含 Pipe 与 Loader 的参数以及 :class:`~fastNLP.io.pipe.PipePlan`
+    中各个操作所使用的函数的源码，如果修改了 Pipe 中其它部分的代码，请删除缓存目录。
+
+.. note::
+
+    缓存只作用于 :class:`~fastNLP.io.pipe.PipePlan` 中的操作；``Pipe.process`` 中 PipePlan 之外的处理在每次运行时都会重新
+    执行。同一个 split 的多个文件在处理时是名称为 ``'train'`` 、 ``'train#1'`` 、... 的不同 DataSet ，因此直接通过
+    ``data_bundle.get_dataset('train')`` 获取整个训练集的 Pipe 不适用于按文件缓存。
+"""
+__all__ = [
+    "PipeCache",
+]
+
+import _pickle as pickle
+import functools
+import hashlib
+import inspect
+import os
+from typing import Union, Dict, List, Optional
+
+from fastNLP.core.dataset import DataSet, FieldArray
+from fastNLP.core.vocabulary import Vocabulary
+from ..data_bundle import DataBundle
+from ..loader.loader import Loader, _concat_shards
+from ..utils import check_loader_paths
+from .pipe import Pipe
+from .plan import _active_cache
+
+
+def _stable_repr(obj, depth: int = 0) -> str:
+    r"""
+    生成在不同进程之间保持不变的描述，函数使用其源码，对象使用其属性，用于计算缓存的键。
+    """
+    if obj is None or isinstance(obj, (bool, int, float, str, bytes)):
+        return repr(obj)
+    if isinstance(obj, (list, tuple)):
+        return f"{type(obj).__name__}({','.join(_stable_repr(o, depth) for o in obj)})"
+    if isinstance(obj, (set, frozenset)):
+        return f"set({','.join(sorted(_stable_repr(o, depth) for o in obj))})"
+    if isinstance(obj, dict):
+        return f"dict({','.join(sorted(f'{_stable_repr(k, depth)}:{_stable_repr(v, depth)}' for k, v in obj.items()))})"
+    if isinstance(obj, functools.partial):
+        return f"partial({_stable_repr(obj.func, depth)},{_stable_repr(obj.args, depth)}," \
+               f"{_stable_repr(obj.keywords, depth)})"
+    if inspect.ismethod(obj):
+        return _stable_repr(obj.__func__, depth)
+    if inspect.isfunction(obj) or inspect.isbuiltin(obj) or inspect.isclass(obj):
+        name = f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', repr(obj))}"
+        try:
+            return f"{name}:{hashlib.md5(inspect.getsource(obj).encode('utf-8')).hexdigest()}"
+        except (OSError, TypeError):
+            return name
+    if depth < 2 and hasattr(obj, '__dict__'):
+        return f"{type(obj).__qualname__}({_stable_repr(vars(obj), depth + 1)})"
+    return type(obj).__qualname__
+
+
+def _md5(*parts: str) -> str:
+    return hashlib.md5('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _vocab_signature(vocab: Vocabulary) -> str:
+    return hashlib.md5(pickle.dumps((vocab.padding, vocab.unknown, list(vocab._word2idx.items())))).hexdigest()
+
+
+class PipeCache:
+    r"""
+    按输入文件缓存 **Pipe** 处理结果的目录，使用方法见 :mod:`fastNLP.io.pipe.cache` 。
+
+    :param cache_dir: 缓存保存的目录，不存在时会自动创建；
+    :param fingerprint: 判断文件是否被修改的方式，支持 ``['mtime', 'hash']`` 。``'mtime'`` 使用文件的路径、大小与修改时间；
+        ``'hash'`` 使用文件内容的哈希值，需要完整读一遍文件，但文件被移动或者复制后缓存仍然有效；
+    """
+
+    def __init__(self, cache_dir: str, fingerprint: str = 'mtime'):
+        if fingerprint not in ('mtime', 'hash'):
+            raise ValueError(f"fingerprint only supports 'mtime' and 'hash', not {fingerprint}.")
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self.fingerprint = fingerprint
+        self._keys = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def file_fingerprint(self, path: str) -> str:
+        r"""
+        计算文件 ``path`` 的指纹。
+        """
+        if self.fingerprint == 'hash':
+            md5 = hashlib.md5()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    md5.update(chunk)
+            return md5.hexdigest()
+        stat = os.stat(path)
+        return _md5(os.path.abspath(path), str(stat.st_size), str(stat.st_mtime_ns))
+
+    def process_from_file(self, pipe: Pipe, loader: Loader,
+                          paths: Union[str, List[str], Dict[str, Union[str, List[str]]]] = None,
+                          num_proc: int = 0) -> DataBundle:
+        r"""
+        使用 ``loader`` 逐个读取 ``paths`` 中的文件，并使用 ``pipe`` 处理，每个文件的处理结果都会被缓存。
+
+        :param pipe: 需要使用的 :class:`~fastNLP.io.pipe.Pipe` ；
+        :param loader: 与 ``pipe`` 对应的 :class:`~fastNLP.io.loader.Loader` ，即 ``pipe.process_from_file`` 中使用的 Loader ；
+        :param paths: 支持的形式与 :meth:`fastNLP.io.Loader.load` 相同；
+        :param num_proc: 读取文件时使用的进程数，参见 :meth:`fastNLP.io.Loader.iter_load` ；
+        :return: 处理后的 :class:`~fastNLP.io.DataBundle` ，每个 split 的多个文件会按顺序拼接为一个 DataSet
+        """
+        if paths is None:
+            paths = loader.download()
+        prefix = _md5(_stable_repr(pipe), _stable_repr(loader))
+        data_bundle = DataBundle()
+        splits = {}
+        keys = {}
+        for name, path, dataset in loader.iter_load(check_loader_paths(paths), num_proc=num_proc, progress_bar=None):
+            shard_name = name if name not in splits else f'{name}#{sum(split == name for split in splits.values())}'
+            splits[shard_name] = name
+            data_bundle.set_dataset(dataset, shard_name)
+            keys[id(dataset)] = _md5(prefix, self.file_fingerprint(path))
+
+        self._keys = keys
+        token = _active_cache.set(self)
+        try:
+            data_bundle = pipe.process(data_bundle)
+        finally:
+            _active_cache.reset(token)
+            self._keys = {}
+
+        datasets = {}
+        for shard_name, dataset in data_bundle.iter_datasets():
+            datasets.setdefault(splits.get(shard_name, shard_name), []).append(dataset)
+        datasets = {name: shards[0] if len(shards) == 1 else _concat_shards(shards)
+                    for name, shards in datasets.items()}
+        return DataBundle(vocabs=data_bundle.vocabs, datasets=datasets)
+
+    def dataset_key(self, dataset: DataSet) -> Optional[str]:
+        return self._keys.get(id(dataset))
+
+    @staticmethod
+    def stage_signature(ops: list, vocabs: Dict[str, Vocabulary]) -> str:
+        r"""
+        一个阶段的签名，包含其中的所有操作以及 index 操作所使用的词表。
+        """
+        parts = []
+        for op in ops:
+            parts.append(_stable_repr((op.kind, op.required, op.adds, op.removes, op.kwargs)))
+            if op.kind == 'index':
+                parts.append(_vocab_signature(vocabs[op.kwargs['vocab_name']]))
+        return _md5(*parts)
+
+    @staticmethod
+    def stage_key(key: str, signature: str) -> str:
+        return _md5(key, signature)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.{suffix}')
+
+    def _dump(self, obj, path: str):
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(obj, f)
+        os.replace(tmp_path, path)
+
+    def get_counters(self, key: str) -> Optional[dict]:
+        r"""
+        返回该阶段在某个文件上的词频统计结果，没有缓存时返回 ``None`` 。
+        """
+        path = self._path(key, 'counts')
+        if not os.path.exists(path) or not os.path.exists(self._path(key, 'data')):
+            return None
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def put(self, key: str, dataset: DataSet, counters: dict):
+        # 先写入数据，counts 文件存在即表示缓存完整
+        self._dump({name: field.content for name, field in dataset.field_arrays.items()}, self._path(key, 'data'))
+        self._dump(counters, self._path(key, 'counts'))
+
+    def restore(self, dataset: DataSet, key: str):
+        r"""
+        使用缓存的内容原位替换 ``dataset`` 的所有 field 。
+        """
+        with open(self._path(key, 'data'), 'rb') as f:
+            contents = pickle.load(f)
+        dataset.field_arrays.clear()
+        for name, content in contents.items():
+            field = FieldArray(name, [None])
+            field.content = content
+            dataset.field_arrays[name] = field
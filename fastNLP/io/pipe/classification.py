@@ -22,7 +22,8 @@ except:
     pass
 
 from .pipe import Pipe
-from .utils import get_tokenizer, _indexize, _add_words_field, _add_chars_field, _granularize
+from .plan import PipePlan
+from .utils import get_tokenizer, _indexize, _add_indexize_ops, _add_chars_field, _granularize
 from ..data_bundle import DataBundle
 from ..loader.classification import ChnSentiCorpLoader, THUCNewsLoader, WeiboSenti100kLoader
 from ..loader.classification import IMDBLoader, YelpFullLoader, SSTLoader, SST2Loader, YelpPolarityLoader, \
@@ -81,16 +82,21 @@ class CLSBasePipe(Pipe):
         :return: 处理后的 ``data_bundle``
         """
         # 复制一列words
-        data_bundle = _add_words_field(data_bundle, lower=self.lower)
+        plan = PipePlan().copy_field('raw_words', 'words')
+        if self.lower:
+            plan.lower('words')
         # 进行tokenize
-        data_bundle = self._tokenize(data_bundle=data_bundle, field_name='words')
+        if type(self)._tokenize is CLSBasePipe._tokenize:
+            plan.apply_field(self.tokenizer, 'words')
+        else:
+            # 子类重写了 _tokenize ，在其前后分别执行计划
+            data_bundle = self._tokenize(plan.run(data_bundle, num_proc=self.num_proc), field_name='words')
+            plan = PipePlan()
         # 建立词表并index
-        data_bundle = _indexize(data_bundle=data_bundle)
-
-        for name, dataset in data_bundle.datasets.items():
-            dataset.add_seq_len('words')
+        _add_indexize_ops(plan)
+        plan.add_seq_len('words')
 
-        return data_bundle
+        return plan.run(data_bundle, num_proc=self.num_proc)
 
     def process_from_file(self, paths) -> DataBundle:
         r"""
@@ -9,7 +9,8 @@ __all__ = [
 
 from .pipe import Pipe
 from .utils import _add_chars_field
-from .utils import _indexize, _add_words_field
+from .plan import PipePlan
+from .utils import _indexize, _add_indexize_ops, _add_words_field
 from .utils import iob2, iob2bioes
 from fastNLP.io.data_bundle import DataBundle
 from ..loader.conll import Conll2003NERLoader, OntoNotesNERLoader
@@ -61,18 +62,16 @@ class _NERPipe(Pipe):
         :return: 处理后的 ``data_bundle``
         """
         # 转换tag
-        for name, dataset in data_bundle.iter_datasets():
-            dataset.apply_field(self.convert_tag, field_name='target', new_field_name='target', num_proc=self.num_proc)
-        
-        _add_words_field(data_bundle, lower=self.lower)
+        plan = PipePlan().apply_field(self.convert_tag, 'target')
+        plan.copy_field('raw_words', 'words')
+        if self.lower:
+            plan.lower('words')
         
         # index
-        _indexize(data_bundle)
-        
-        for name, dataset in data_bundle.iter_datasets():
-            dataset.add_seq_len('words')
+        _add_indexize_ops(plan)
+        plan.add_seq_len('words')
 
-        return data_bundle
+        return plan.run(data_bundle, num_proc=self.num_proc)
 
 
 class Conll2003NERPipe(_NERPipe):
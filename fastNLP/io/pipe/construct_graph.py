@@ -6,105 +6,96 @@ __all__ = [
     'NG20PmiGraphPipe'
 ]
 try:
-    import networkx as nx
-    from sklearn.feature_extraction.text import CountVectorizer
-    from sklearn.feature_extraction.text import TfidfTransformer
-    from sklearn.pipeline import Pipeline
+    import scipy.sparse as sp
 except:
     pass
-from collections import defaultdict
-import itertools
-import math
 import numpy as np
 
 from ..data_bundle import DataBundle
 # from ...core.const import Const
 from ..loader.classification import MRLoader, OhsumedLoader, R52Loader, R8Loader, NG20Loader
-from fastNLP.core.utils import f_rich_progress
 
 
-def _get_windows(content_lst: list, window_size: int):
+def _index_docs(docs: list):
     r"""
-        滑动窗口处理文本，获取词频和共现词语的词频
-        :param content_lst:
-        :param window_size:
-        :return: 词频，共现词频，窗口化后文本段的数量
+        与 ``CountVectorizer(token_pattern=r'\S+')`` 相同，将文本小写化后按空白切分，并按照字典序建立词表。
+        :param docs: 文本的列表
+        :return: 词表，所有文本拼接后的词 index，每个文本在其中的起始位置（长度为文本数量+1）
     """
-    word_window_freq = defaultdict(int)  # w(i)  单词在窗口单位内出现的次数
-    word_pair_count = defaultdict(int)  # w(i, j)
-    windows_len = 0
-    task_id = f_rich_progress.add_task(description="Split by window", total=len(content_lst))
-    for words in content_lst:
-        windows = list()
-
-        if isinstance(words, str):
-            words = words.split()
-        length = len(words)
-
-        if length <= window_size:
-            windows.append(words)
-        else:
-            for j in range(length - window_size + 1):
-                window = words[j: j + window_size]
-                windows.append(list(set(window)))
-
-        for window in windows:
-            for word in window:
-                word_window_freq[word] += 1
-
-            for word_pair in itertools.combinations(window, 2):
-                word_pair_count[word_pair] += 1
+    tokens = [doc.lower().split() for doc in docs]
+    vocab_lst = sorted(set(word for words in tokens for word in words))
+    word2id = {word: ind for ind, word in enumerate(vocab_lst)}
+    lengths = np.fromiter((len(words) for words in tokens), dtype=np.int64, count=len(tokens))
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    ids = np.fromiter((word2id[word] for words in tokens for word in words), dtype=np.int64, count=int(offsets[-1]))
+    return vocab_lst, ids, offsets
 
-        windows_len += len(windows)
 
-        f_rich_progress.update(task_id, advance=1)
-    f_rich_progress.destroy_task(task_id)
-    return word_window_freq, word_pair_count, windows_len
+def _doc_tfidf(ids: np.ndarray, offsets: np.ndarray, vocab_size: int):
+    r"""
+        计算与 ``TfidfTransformer(norm=None, use_idf=True, smooth_idf=False)`` 相同的文档-单词 tfidf 矩阵，即
+        ``tf * (ln(文本数量 / df) + 1)`` 。
+    """
+    num_docs = len(offsets) - 1
+    tf = sp.csr_matrix((np.ones(len(ids), dtype=np.float64), ids, offsets), shape=(num_docs, vocab_size))
+    tf.sum_duplicates()
+    df = np.bincount(tf.indices, minlength=vocab_size)
+    idf = np.log(num_docs / np.maximum(df, 1)) + 1
+    tf.data *= idf[tf.indices]
+    return tf
 
 
-def _cal_pmi(W_ij, W, word_freq_i, word_freq_j):
+def _count_windows(ids: np.ndarray, offsets: np.ndarray, window_size: int, vocab_size: int):
     r"""
-        params: w_ij:为词语i,j的共现词频
-                w:文本数量
-                word_freq_i: 词语i的词频
-                word_freq_j: 词语j的词频
-        return: 词语i，j的tfidf值
+        滑动窗口处理文本，获取词频和共现词语的词频。长度不超过 ``window_size`` 的文本整体作为一个窗口（重复的词重复计数），
+        更长的文本中每个窗口内的词只计一次。共现次数通过窗口-单词矩阵 ``B`` 的乘积 ``B^T B`` 得到。
+
+        :param ids: 这部分文本拼接后的词 index
+        :param offsets: 每个文本在 ``ids`` 中的起始位置
+        :param window_size:
+        :param vocab_size:
+        :return: 词频，共现词频（只保留上三角部分的 ``csr`` 矩阵），窗口的数量
     """
-    p_i = word_freq_i / W
-    p_j = word_freq_j / W
-    p_i_j = W_ij / W
-    pmi = math.log(p_i_j / (p_i * p_j))
+    lengths = np.diff(offsets)
+    token_doc = np.repeat(np.arange(len(lengths)), lengths)
 
-    return pmi
+    is_short = lengths <= window_size
+    short_rows = (np.cumsum(is_short) - 1)[token_doc[is_short[token_doc]]]
+    short = sp.csr_matrix((np.ones(len(short_rows)), (short_rows, ids[is_short[token_doc]])),
+                          shape=(int(is_short.sum()), vocab_size))
+
+    long_docs = np.nonzero(~is_short)[0]
+    num_windows = lengths[long_docs] - window_size + 1
+    window_doc = np.repeat(long_docs, num_windows)
+    window_start = offsets[window_doc] + np.arange(len(window_doc)) - \
+        np.repeat(np.cumsum(num_windows) - num_windows, num_windows)
+    windows = ids[window_start[:, None] + np.arange(window_size)]
+    long = sp.csr_matrix((np.ones(windows.size), (np.repeat(np.arange(len(windows)), window_size), windows.ravel())),
+                         shape=(len(windows), vocab_size))
+    long.data[:] = 1  # 窗口内重复的词只计一次
+
+    word_window_freq = np.asarray(short.sum(axis=0)).ravel() + np.asarray(long.sum(axis=0)).ravel()
+    word_pair_count = sp.triu(short.T @ short + long.T @ long, k=1, format='csr')
+    return word_window_freq, word_pair_count, short.shape[0] + long.shape[0]
 
 
 def _count_pmi(windows_len, word_pair_count, word_window_freq, threshold):
     r"""
         params: windows_len: 文本段数量
-                word_pair_count: 词共现频率字典
-                word_window_freq: 词频率字典
+                word_pair_count: 词共现频率的上三角矩阵
+                word_window_freq: 词频率
                 threshold: 阈值
-        return 词语pmi的list列表,其中元素为[word1, word2, pmi]
+        return pmi 大于阈值的词对，为 (word1, word2, pmi) 三个数组，其中 word1 < word2
     """
-    word_pmi_lst = list()
-    task_id = f_rich_progress.add_task(description="Calculate pmi between words", total=len(word_pair_count))
-    for word_pair, W_i_j in word_pair_count.items():
-        word_freq_1 = word_window_freq[word_pair[0]]
-        word_freq_2 = word_window_freq[word_pair[1]]
-
-        pmi = _cal_pmi(W_i_j, windows_len, word_freq_1, word_freq_2)
-        if pmi <= threshold:
-            continue
-        word_pmi_lst.append([word_pair[0], word_pair[1], pmi])
-
-        f_rich_progress.update(task_id, advance=1)
-    f_rich_progress.destory_task(task_id)
-    return word_pmi_lst
+    pairs = word_pair_count.tocoo()
+    pmi = np.log(pairs.data * windows_len / (word_window_freq[pairs.row] * word_window_freq[pairs.col]))
+    mask = pmi > threshold
+    return pairs.row[mask], pairs.col[mask], pmi[mask]
 
 
 class GraphBuilderBase:
-    def __init__(self, graph_type='pmi', widow_size=10, threshold=0.):
-        self.graph = nx.Graph()
+    def __init__(self, graph_type='pmi', widow_size=10, threshold=0., num_proc=0, chunk_size=2000):
+        self.graph = None
         self.word2id = dict()
         self.graph_type = graph_type
         self.window_size = widow_size
@@ -114,6 +105,11 @@ class GraphBuilderBase:
         self.dev_doc_index = None
         self.doc = None
         self.threshold = threshold
+        self.num_proc = num_proc
+        self.chunk_size = chunk_size
+        self._ids = None
+        self._offsets = None
+        self._edges = []
 
     def _get_doc_edge(self, data_bundle: DataBundle):
         r"""
@@ -129,29 +125,53 @@ class GraphBuilderBase:
         self.tr_doc_index = [ind for ind in range(len(tr_doc))]
         self.dev_doc_index = [ind + len(tr_doc) for ind in range(len(val_doc))]
         self.te_doc_index = [ind + len(tr_doc) + len(val_doc) for ind in range(len(te_doc))]
-        text_tfidf = Pipeline([('count', CountVectorizer(token_pattern=r'\S+', min_df=1, max_df=1.0)),
-                               ('tfidf',
-                                TfidfTransformer(norm=None, use_idf=True, smooth_idf=False, sublinear_tf=False))])
 
-        tfidf_vec = text_tfidf.fit_transform(doc)
+        vocab_lst, self._ids, self._offsets = _index_docs(doc)
+        self.word2id = {word: ind for ind, word in enumerate(vocab_lst)}
+        tfidf_vec = _doc_tfidf(self._ids, self._offsets, len(vocab_lst)).tocoo()
         self.doc_node_num = tfidf_vec.shape[0]
-        vocab_lst = text_tfidf['count'].get_feature_names()
-        for ind, word in enumerate(vocab_lst):
-            self.word2id[word] = ind
-        for ind, row in enumerate(tfidf_vec):
-            for col_index, value in zip(row.indices, row.data):
-                self.graph.add_edge(ind, self.doc_node_num + col_index, weight=value)
-        return nx.to_scipy_sparse_matrix(self.graph)
+        self._edges = [(tfidf_vec.row, self.doc_node_num + tfidf_vec.col, tfidf_vec.data)]
+        return tfidf_vec.tocsr()
 
     def _get_word_edge(self):
-        word_window_freq, word_pair_count, windows_len = _get_windows(self.doc, self.window_size)
-        pmi_edge_lst = _count_pmi(windows_len, word_pair_count, word_window_freq, self.threshold)
-        for edge_item in pmi_edge_lst:
-            word_indx1 = self.doc_node_num + self.word2id[edge_item[0]]
-            word_indx2 = self.doc_node_num + self.word2id[edge_item[1]]
-            if word_indx1 == word_indx2:
-                continue
-            self.graph.add_edge(word_indx1, word_indx2, weight=edge_item[2])
+        vocab_size = len(self.word2id)
+        num_docs = len(self._offsets) - 1
+        chunks = []
+        for start in range(0, num_docs, self.chunk_size):
+            end = min(start + self.chunk_size, num_docs)
+            offsets = self._offsets[start:end + 1]
+            chunks.append((self._ids[offsets[0]:offsets[-1]], offsets - offsets[0], self.window_size, vocab_size))
+        if self.num_proc > 1 and len(chunks) > 1:
+            import multiprocessing as mp
+            with mp.get_context('fork').Pool(min(self.num_proc, len(chunks))) as pool:
+                results = pool.starmap(_count_windows, chunks)
+        else:
+            results = [_count_windows(*chunk) for chunk in chunks]
+
+        word_window_freq = np.zeros(vocab_size)
+        word_pair_count = sp.csr_matrix((vocab_size, vocab_size))
+        windows_len = 0
+        for freq, pair_count, num_windows in results:
+            word_window_freq += freq
+            word_pair_count = word_pair_count + pair_count
+            windows_len += num_windows
+
+        word1, word2, pmi = _count_pmi(windows_len, word_pair_count, word_window_freq, self.threshold)
+        self._edges.append((self.doc_node_num + word1, self.doc_node_num + word2, pmi))
+
+    def _build_graph(self, data_bundle: DataBundle):
+        r"""
+            依次生成文档-单词与单词-单词的边，并直接组装为对称的 ``csr`` 邻接矩阵。
+        """
+        self._get_doc_edge(data_bundle)
+        self._get_word_edge()
+        rows = np.concatenate([edge[0] for edge in self._edges] + [edge[1] for edge in self._edges])
+        cols = np.concatenate([edge[1] for edge in self._edges] + [edge[0] for edge in self._edges])
+        weights = np.concatenate([edge[2] for edge in self._edges] * 2).astype(np.float32)
+        num_nodes = self.doc_node_num + len(self.word2id)
+        self.graph = sp.csr_matrix((weights, (rows, cols)), shape=(num_nodes, num_nodes), dtype=np.float32)
+        self._edges = []
+        return self.graph, (self.tr_doc_index, self.dev_doc_index, self.te_doc_index)
 
     def build_graph(self, data_bundle: DataBundle):
         r"""
@@ -177,23 +197,21 @@ class MRPmiGraphPipe(GraphBuilderBase):
     构建 **MR** 数据集的 **Graph** 。
 
     :param graph_type: 
-    :param widow_size:
-    :param threshold:
+    :param widow_size: 统计词语共现时滑动窗口的大小。
+    :param threshold: 只保留 pmi 大于该值的单词-单词边。
+    :param num_proc: 统计词语共现时使用的进程数目。
+    :param chunk_size: 统计词语共现时每次处理的文本数量。
     """
-    def __init__(self, graph_type='pmi', widow_size=10, threshold=0.):
-        super().__init__(graph_type=graph_type, widow_size=widow_size, threshold=threshold)
+    def __init__(self, graph_type='pmi', widow_size=10, threshold=0., num_proc=0, chunk_size=2000):
+        super().__init__(graph_type=graph_type, widow_size=widow_size, threshold=threshold, num_proc=num_proc,
+                         chunk_size=chunk_size)
 
     def build_graph(self, data_bundle: DataBundle):
         r"""
         :param data_bundle: 需要处理的 :class:`~fastNLP.io.DataBundle` 对象。
         :return: 返回 ``csr`` 类型的稀疏矩阵图；包含训练集，验证集，测试集，在图中的 index 。
         """
-        self._get_doc_edge(data_bundle)
-        self._get_word_edge()
-        return nx.to_scipy_sparse_matrix(self.graph,
-                                         nodelist=list(range(self.graph.number_of_nodes())),
-                                         weight='weight', dtype=np.float32, format='csr'), (
-               self.tr_doc_index, self.dev_doc_index, self.te_doc_index)
+        return self._build_graph(data_bundle)
 
     def build_graph_from_file(self, path: str):
         r"""
@@ -211,23 +229,21 @@ class R8PmiGraphPipe(GraphBuilderBase):
     构建 **R8** 数据集的 **Graph** 。
 
     :param graph_type: 
-    :param widow_size:
-    :param threshold:
+    :param widow_size: 统计词语共现时滑动窗口的大小。
+    :param threshold: 只保留 pmi 大于该值的单词-单词边。
+    :param num_proc: 统计词语共现时使用的进程数目。
+    :param chunk_size: 统计词语共现时每次处理的文本数量。
     """
-    def __init__(self, graph_type='pmi', widow_size=10, threshold=0.):
-        super().__init__(graph_type=graph_type, widow_size=widow_size, threshold=threshold)
+    def __init__(self, graph_type='pmi', widow_size=10, threshold=0., num_proc=0, chunk_size=2000):
+        super().__init__(graph_type=graph_type, widow_size=widow_size, threshold=threshold, num_proc=num_proc,
+                         chunk_size=chunk_size)
 
     def build_graph(self, data_bundle: DataBundle):
         r"""
         :param data_bundle: 需要处理的 :class:`~fastNLP.io.DataBundle` 对象。
         :return: 返回 ``csr`` 类型的稀疏矩阵图；包含训练集，验证集，测试集，在图中的 index 。
         """
-        self._get_doc_edge(data_bundle)
-        self._get_word_edge()
-        return nx.to_scipy_sparse_matrix(self.graph,
-                                         nodelist=list(range(self.graph.number_of_nodes())),
-                                         weight='weight', dtype=np.float32, format='csr'), (
-               self.tr_doc_index, self.dev_doc_index, self.te_doc_index)
+        return self._build_graph(data_bundle)
 
     def build_graph_from_file(self, path: str):
         r"""
@@ -245,23 +261,21 @@ class R52PmiGraphPipe(GraphBuilderBase):
     构建 **R52** 数据集的 **Graph** 。
 
     :param graph_type: 
-    :param widow_size:
-    :param threshold:
+    :param widow_size: 统计词语共现时滑动窗口的大小。
+    :param threshold: 只保留 pmi 大于该值的单词-单词边。
+    :param num_proc: 统计词语共现时使用的进程数目。
+    :param chunk_size: 统计词语共现时每次处理的文本数量。
     """
-    def __init__(self, graph_type='pmi', widow_size=10, threshold=0.):
-        super().__init__(graph_type=graph_type, widow_size=widow_size, threshold=threshold)
+    def __init__(self, graph_type='pmi', widow_size=10, threshold=0., num_proc=0, chunk_size=2000):
+        super().__init__(graph_type=graph_type, widow_size=widow_size, threshold=threshold, num_proc=num_proc,
+                         chunk_size=chunk_size)
 
     def build_graph(self, data_bundle: DataBundle):
         r"""
         :param data_bundle: 需要处理的 :class:`~fastNLP.io.DataBundle` 对象。
         :return: 返回 ``csr`` 类型的稀疏矩阵图；包含训练集，验证集，测试集，在图中的 index 。
         """
-        self._get_doc_edge(data_bundle)
-        self._get_word_edge()
-        return nx.to_scipy_sparse_matrix(self.graph,
-                                         nodelist=list(range(self.graph.number_of_nodes())),
-                                         weight='weight', dtype=np.float32, format='csr'), (
-               self.tr_doc_index, self.dev_doc_index, self.te_doc_index)
+        return self._build_graph(data_bundle)
 
     def build_graph_from_file(self, path: str):
         r"""
@@ -279,23 +293,21 @@ class OhsumedPmiGraphPipe(GraphBuilderBase):
     构建 **Ohsuned** 数据集的 **Graph** 。
 
     :param graph_type: 
-    :param widow_size:
-    :param threshold:
+    :param widow_size: 统计词语共现时滑动窗口的大小。
+    :param threshold: 只保留 pmi 大于该值的单词-单词边。
+    :param num_proc: 统计词语共现时使用的进程数目。
+    :param chunk_size: 统计词语共现时每次处理的文本数量。
     """
-    def __init__(self, graph_type='pmi', widow_size=10, threshold=0.):
-        super().__init__(graph_type=graph_type, widow_size=widow_size, threshold=threshold)
+    def __init__(self, graph_type='pmi', widow_size=10, threshold=0., num_proc=0, chunk_size=2000):
+        super().__init__(graph_type=graph_type, widow_size=widow_size, threshold=threshold, num_proc=num_proc,
+                         chunk_size=chunk_size)
 
     def build_graph(self, data_bundle: DataBundle):
         r"""
         :param data_bundle: 需要处理的 :class:`~fastNLP.io.DataBundle` 对象。
         :return: 返回 ``csr`` 类型的稀疏矩阵图；包含训练集，验证集，测试集，在图中的 index 。
         """
-        self._get_doc_edge(data_bundle)
-        self._get_word_edge()
-        return nx.to_scipy_sparse_matrix(self.graph,
-                                         nodelist=list(range(self.graph.number_of_nodes())),
-                                         weight='weight', dtype=np.float32, format='csr'), (
-               self.tr_doc_index, self.dev_doc_index, self.te_doc_index)
+        return self._build_graph(data_bundle)
 
     def build_graph_from_file(self, path: str):
         r"""
@@ -313,23 +325,21 @@ class NG20PmiGraphPipe(GraphBuilderBase):
     构建 **NG20** 数据集的 **Graph** 。
 
     :param graph_type: 
-    :param widow_size:
-    :param threshold:
+    :param widow_size: 统计词语共现时滑动窗口的大小。
+    :param threshold: 只保留 pmi 大于该值的单词-单词边。
+    :param num_proc: 统计词语共现时使用的进程数目。
+    :param chunk_size: 统计词语共现时每次处理的文本数量。
     """
-    def __init__(self, graph_type='pmi', widow_size=10, threshold=0.):
-        super().__init__(graph_type=graph_type, widow_size=widow_size, threshold=threshold)
+    def __init__(self, graph_type='pmi', widow_size=10, threshold=0., num_proc=0, chunk_size=2000):
+        super().__init__(graph_type=graph_type, widow_size=widow_size, threshold=threshold, num_proc=num_proc,
+                         chunk_size=chunk_size)
 
     def build_graph(self, data_bundle: DataBundle):
         r"""
         :param data_bundle: 需要处理的 :class:`~fastNLP.io.DataBundle` 对象。
         :return: 返回 ``csr`` 类型的稀疏矩阵图；包含训练集，验证集，测试集，在图中的 index 。
         """
-        self._get_doc_edge(data_bundle)
-        self._get_word_edge()
-        return nx.to_scipy_sparse_matrix(self.graph,
-                                         nodelist=list(range(self.graph.number_of_nodes())),
-                                         weight='weight', dtype=np.float32, format='csr'), (
-                   self.tr_doc_index, self.dev_doc_index, self.te_doc_index)
+        return self._build_graph(data_bundle)
 
     def build_graph_from_file(self, path: str):
         r"""
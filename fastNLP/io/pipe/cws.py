@@ -6,7 +6,8 @@ import re
 from itertools import chain
 
 from .pipe import Pipe
-from .utils import _indexize
+from .plan import PipePlan
+from .utils import _add_indexize_ops
 from fastNLP.io.data_bundle import DataBundle
 from fastNLP.io.loader import CWSLoader
 # from ...core.const import Const
@@ -131,6 +132,37 @@ def _find_and_replace_digit_spans(line):
     return new_line
 
 
+def _split_word_into_chars(raw_chars):
+    r"""
+    将一句已经分好词的句子切分为每个词的字，``<`` 与 ``>`` 包围的特殊 tag 被当作一个字。
+    例如 "共同  创造  <NUM>.."->[[共, 同], [创, 造], [<NUM>], ...]
+    """
+    words = raw_chars.split()
+    chars = []
+    for word in words:
+        char = []
+        subchar = []
+        for c in word:
+            if c == '<':
+                if subchar:
+                    char.extend(subchar)
+                    subchar = []
+                subchar.append(c)
+                continue
+            if c == '>' and len(subchar)>0 and subchar[0] == '<':
+                subchar.append(c)
+                char.append(''.join(subchar))
+                subchar = []
+                continue
+            if subchar:
+                subchar.append(c)
+            else:
+                char.append(c)
+        char.extend(subchar)
+        chars.append(char)
+    return chars
+
+
 class CWSPipe(Pipe):
     r"""
     对 **CWS** 数据进行处理，处理之后 :class:`~fastNLP.core.DataSet` 中的内容如下：
@@ -176,34 +208,8 @@ class CWSPipe(Pipe):
         :param data_bundle:
         :return:
         """
-        def split_word_into_chars(raw_chars):
-            words = raw_chars.split()
-            chars = []
-            for word in words:
-                char = []
-                subchar = []
-                for c in word:
-                    if c == '<':
-                        if subchar:
-                            char.extend(subchar)
-                            subchar = []
-                        subchar.append(c)
-                        continue
-                    if c == '>' and len(subchar)>0 and subchar[0] == '<':
-                        subchar.append(c)
-                        char.append(''.join(subchar))
-                        subchar = []
-                        continue
-                    if subchar:
-                        subchar.append(c)
-                    else:
-                        char.append(c)
-                char.extend(subchar)
-                chars.append(char)
-            return chars
-        
         for name, dataset in data_bundle.iter_datasets():
-            dataset.apply_field(split_word_into_chars, field_name='chars',
+            dataset.apply_field(_split_word_into_chars, field_name='chars',
                                 new_field_name='chars', num_proc=self.num_proc)
         return data_bundle
     
@@ -221,13 +227,18 @@ class CWSPipe(Pipe):
         :param data_bundle:
         :return: 处理后的 ``data_bundle``
         """
-        data_bundle.copy_field('raw_words', 'chars')
+        plan = PipePlan().copy_field('raw_words', 'chars')
         
         if self.replace_num_alpha:
-            data_bundle.apply_field(_find_and_replace_alpha_spans, 'chars', 'chars', num_proc=self.num_proc)
-            data_bundle.apply_field(_find_and_replace_digit_spans, 'chars', 'chars', num_proc=self.num_proc)
+            plan.apply_field(_find_and_replace_alpha_spans, 'chars')
+            plan.apply_field(_find_and_replace_digit_spans, 'chars')
         
-        self._tokenize(data_bundle)
+        if type(self)._tokenize is CWSPipe._tokenize:
+            plan.apply_field(_split_word_into_chars, 'chars')
+        else:
+            # 子类重写了 _tokenize ，在其前后分别执行计划
+            data_bundle = self._tokenize(plan.run(data_bundle, num_proc=self.num_proc))
+            plan = PipePlan()
 
         def func1(chars):
             return self.word_lens_to_tags(map(len, chars))
@@ -235,9 +246,8 @@ class CWSPipe(Pipe):
         def func2(chars):
             return list(chain(*chars))
         
-        for name, dataset in data_bundle.iter_datasets():
-            dataset.apply_field(func1, field_name='chars', new_field_name='target', num_proc=self.num_proc)
-            dataset.apply_field(func2, field_name='chars', new_field_name='chars', num_proc=self.num_proc)
+        plan.apply_field(func1, field_name='chars', new_field_name='target')
+        plan.apply_field(func2, field_name='chars')
         input_field_names = ['chars']
 
         def bigram(chars):
@@ -248,20 +258,16 @@ class CWSPipe(Pipe):
                     zip(chars, chars[1:] + ['<eos>'], chars[2:] + ['<eos>'] * 2)]
 
         if self.bigrams:
-            for name, dataset in data_bundle.iter_datasets():
-                dataset.apply_field(bigram, field_name='chars', new_field_name='bigrams', num_proc=self.num_proc)
+            plan.apply_field(bigram, field_name='chars', new_field_name='bigrams')
             input_field_names.append('bigrams')
         if self.trigrams:
-            for name, dataset in data_bundle.iter_datasets():
-                dataset.apply_field(trigrams, field_name='chars', new_field_name='trigrams', num_proc=self.num_proc)
+            plan.apply_field(trigrams, field_name='chars', new_field_name='trigrams')
             input_field_names.append('trigrams')
         
-        _indexize(data_bundle, input_field_names, 'target')
+        _add_indexize_ops(plan, input_field_names, 'target')
+        plan.add_seq_len('chars')
 
-        for name, dataset in data_bundle.iter_datasets():
-            dataset.add_seq_len('chars')
-
-        return data_bundle
+        return plan.run(data_bundle, num_proc=self.num_proc)
     
     def process_from_file(self, paths=None) -> DataBundle:
         r"""
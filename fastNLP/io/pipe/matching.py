@@ -25,6 +25,7 @@ from functools import partial
 
 from fastNLP.core.log import logger
 from .pipe import Pipe
+from .plan import PipePlan
 from .utils import get_tokenizer
 from ..data_bundle import DataBundle
 from ..loader.matching import SNLILoader, MNLILoader, QNLILoader, RTELoader, QuoraLoader, BQCorpusLoader, CNXNLILoader, \
@@ -87,21 +88,23 @@ class MatchingBertPipe(Pipe):
         :param data_bundle:
         :return: 处理后的 ``data_bundle``
         """
-        for dataset in data_bundle.datasets.values():
-            if dataset.has_field('target'):
-                dataset.drop(lambda x: x['target'] == '-')
+        plan = PipePlan().drop(lambda x: x['target'] == '-', field_name='target')
         
-        for name, dataset in data_bundle.datasets.items():
-            dataset.copy_field('raw_words1', 'words1', )
-            dataset.copy_field('raw_words2', 'words2', )
+        plan.copy_field('raw_words1', 'words1')
+        plan.copy_field('raw_words2', 'words2')
         
         if self.lower:
-            for name, dataset in data_bundle.datasets.items():
-                dataset['words1'].lower()
-                dataset['words2'].lower()
+            plan.lower('words1')
+            plan.lower('words2')
         
-        data_bundle = self._tokenize(data_bundle, ['words1', 'words2'],
-                                     ['words1', 'words2'])
+        if type(self)._tokenize is MatchingBertPipe._tokenize:
+            plan.apply_field(self.tokenizer, 'words1')
+            plan.apply_field(self.tokenizer, 'words2')
+        else:
+            # 子类重写了 _tokenize ，在其前后分别执行计划
+            data_bundle = self._tokenize(plan.run(data_bundle, num_proc=self.num_proc), ['words1', 'words2'],
+                                         ['words1', 'words2'])
+            plan = PipePlan()
         
         # concat两个words
         def concat(ins):
@@ -110,40 +113,24 @@ class MatchingBertPipe(Pipe):
             words = words0 + ['[SEP]'] + words1
             return words
         
-        for name, dataset in data_bundle.iter_datasets():
-            dataset.apply(concat, new_field_name='words', num_proc=self.num_proc)
-            dataset.delete_field('words1')
-            dataset.delete_field('words2')
+        plan.apply(concat, new_field_name='words')
+        plan.delete_field('words1')
+        plan.delete_field('words2')
         
-        word_vocab = Vocabulary()
-        word_vocab.from_dataset(*[dataset for name, dataset in data_bundle.datasets.items() if 'train' in name],
-                                field_name='words',
-                                no_create_entry_dataset=[dataset for name, dataset in data_bundle.datasets.items() if
-                                                         'train' not in name])
-        word_vocab.index_dataset(*data_bundle.datasets.values(), field_name='words')
+        plan.build_vocab('words')
+        plan.build_vocab('target', vocab=Vocabulary(padding=None, unknown=None))
+        plan.index('words')
+        plan.index('target')
+        plan.add_seq_len('words')
+        data_bundle = plan.run(data_bundle, num_proc=self.num_proc)
         
-        target_vocab = Vocabulary(padding=None, unknown=None)
-        target_vocab.from_dataset(*[ds for name, ds in data_bundle.iter_datasets() if 'train' in name],
-                                  field_name='target',
-                                  no_create_entry_dataset=[ds for name, ds in data_bundle.iter_datasets()
-                                                           if ('train' not in name) and (ds.has_field('target'))]
-                                  )
+        target_vocab = data_bundle.get_vocab('target')
         if len(target_vocab._no_create_word) > 0:
             warn_msg = f"There are {len(target_vocab._no_create_word)} target labels" \
                        f" in {[name for name in data_bundle.datasets.keys() if 'train' not in name]} " \
                        f"data set but not in train data set!."
             logger.warning(warn_msg)
             print(warn_msg)
-        
-        has_target_datasets = [dataset for name, dataset in data_bundle.datasets.items() if
-                               dataset.has_field('target')]
-        target_vocab.index_dataset(*has_target_datasets, field_name='target')
-        
-        data_bundle.set_vocab(word_vocab, 'words')
-        data_bundle.set_vocab(target_vocab, 'target')
-
-        for name, dataset in data_bundle.iter_datasets():
-            dataset.add_seq_len('words')
 
         return data_bundle
 
@@ -303,48 +290,37 @@ class MatchingPipe(Pipe):
         :param data_bundle:
         :return: 处理后的 ``data_bundle``
         """
-        data_bundle = self._tokenize(data_bundle, ['raw_words1', 'raw_words2'],
-                                     ['words1', 'words2'])
+        plan = PipePlan().drop(lambda x: x['target'] == '-', field_name='target')
         
-        for dataset in data_bundle.datasets.values():
-            if dataset.has_field('target'):
-                dataset.drop(lambda x: x['target'] == '-')
+        if type(self)._tokenize is MatchingPipe._tokenize:
+            plan.apply_field(self.tokenizer, 'raw_words1', 'words1')
+            plan.apply_field(self.tokenizer, 'raw_words2', 'words2')
+        else:
+            # 子类重写了 _tokenize ，在其前后分别执行计划
+            data_bundle = self._tokenize(plan.run(data_bundle, num_proc=self.num_proc), ['raw_words1', 'raw_words2'],
+                                         ['words1', 'words2'])
+            plan = PipePlan()
         
         if self.lower:
-            for name, dataset in data_bundle.datasets.items():
-                dataset['words1'].lower()
-                dataset['words2'].lower()
+            plan.lower('words1')
+            plan.lower('words2')
         
-        word_vocab = Vocabulary()
-        word_vocab.from_dataset(*[dataset for name, dataset in data_bundle.datasets.items() if 'train' in name],
-                                field_name=['words1', 'words2'],
-                                no_create_entry_dataset=[dataset for name, dataset in data_bundle.datasets.items() if
-                                                         'train' not in name])
-        word_vocab.index_dataset(*data_bundle.datasets.values(), field_name=['words1', 'words2'])
+        plan.build_vocab(['words1', 'words2'])
+        plan.build_vocab('target', vocab=Vocabulary(padding=None, unknown=None))
+        plan.index('words1')
+        plan.index('words2', vocab_name='words1')
+        plan.index('target')
+        plan.add_seq_len('words1', 'seq_len1')
+        plan.add_seq_len('words2', 'seq_len2')
+        data_bundle = plan.run(data_bundle, num_proc=self.num_proc)
         
-        target_vocab = Vocabulary(padding=None, unknown=None)
-        target_vocab.from_dataset(*[ds for name, ds in data_bundle.iter_datasets() if 'train' in name],
-                                  field_name='target',
-                                  no_create_entry_dataset=[ds for name, ds in data_bundle.iter_datasets()
-                                                           if ('train' not in name) and (ds.has_field('target'))]
-                                  )
+        target_vocab = data_bundle.get_vocab('target')
         if len(target_vocab._no_create_word) > 0:
             warn_msg = f"There are {len(target_vocab._no_create_word)} target labels" \
                        f" in {[name for name in data_bundle.datasets.keys() if 'train' not in name]} " \
                        f"data set but not in train data set!."
             logger.warning(warn_msg)
             print(warn_msg)
-        
-        has_target_datasets = [dataset for name, dataset in data_bundle.datasets.items() if
-                               dataset.has_field('target')]
-        target_vocab.index_dataset(*has_target_datasets, field_name='target')
-        
-        data_bundle.set_vocab(word_vocab, 'words1')
-        data_bundle.set_vocab(target_vocab, 'target')
-
-        for name, dataset in data_bundle.datasets.items():
-            dataset.add_seq_len('words1', 'seq_len1')
-            dataset.add_seq_len('words2', 'seq_len2')
 
         return data_bundle
 
@@ -0,0 +1,540 @@
+r"""
+:class:`PipePlan` 用于以惰性的方式描述 **Pipe** 中对 :class:`~fastNLP.core.DataSet` 的一系列 field 变换，并在 :meth:`PipePlan.run`
+时将它们融合为尽量少的遍历。例如 :class:`~fastNLP.io.pipe.CLSBasePipe` 的处理可以写作::
+
+    plan = PipePlan().copy_field('raw_words', 'words').lower('words').apply_field(tokenizer, 'words') \
+        .build_vocab('words').build_vocab('target', vocab=Vocabulary(padding=None, unknown=None)) \
+        .index('words').index('target').add_seq_len('words')
+    plan.run(data_bundle, num_proc=4)
+
+逐条执行时，上面的每一步都需要完整遍历一次 DataSet 并生成一个新的 :class:`list` 列；而 :class:`PipePlan` 只在 ``index`` 需要
+使用当前计划中统计得到的词表时将计划切分为两个阶段：第一个阶段在一次遍历中完成所有的变换与词频统计，第二个阶段完成 index 以及之后
+的操作。每个阶段中，每一条数据只在一个 :class:`dict` 中依次经过所有操作，因此被删除的中间 field（例如 ``words1`` ）不会生成完整
+的列，没有被修改的 field 也不会被复制。
+"""
+__all__ = [
+    "PipePlan",
+]
+
+import pickle
+import sys
+import time
+from collections import Counter
+from contextvars import ContextVar
+from copy import deepcopy
+from typing import Callable, Union, List, Optional
+
+from fastNLP.core.log import logger
+from fastNLP.core.dataset import FieldArray
+from fastNLP.core.utils.dummy_class import DummyClass
+from fastNLP.core.utils.utils import _is_iterable
+from fastNLP.core.vocabulary import Vocabulary
+from ..data_bundle import DataBundle
+
+
+# 由 :meth:`fastNLP.io.pipe.PipeCache.process_from_file` 设置，使 Pipe 内部调用的 PipePlan.run 按文件缓存每个阶段的结果
+_active_cache = ContextVar('_active_cache', default=None)
+
+
+def _copy_value(value):
+    # 由 str 构成的 list 只需要浅拷贝就与 deepcopy 等价
+    if isinstance(value, (str, int, float)) or value is None:
+        return value
+    if type(value) is list and all(type(v) is str for v in value):
+        return value[:]
+    return deepcopy(value)
+
+
+def _lower_value(value):
+    if isinstance(value, list):
+        return [v.lower() for v in value]
+    return value.lower()
+
+
+class _Op:
+    r"""
+    计划中的一个操作。``required`` 为执行该操作时 DataSet 中必须存在的 field，不满足时在该 DataSet 上跳过这个操作（与
+    :class:`~fastNLP.io.DataBundle` 中 ``ignore_miss_dataset=True`` 的行为一致）；``adds`` 与 ``removes`` 为该操作新增与删除
+    的 field。
+    """
+    def __init__(self, kind: str, required=(), adds=(), removes=(), **kwargs):
+        self.kind = kind
+        self.required = tuple(required)
+        self.adds = tuple(adds)
+        self.removes = tuple(removes)
+        self.kwargs = kwargs
+
+    @property
+    def reads_instance(self) -> bool:
+        return self.kind in ('apply', 'drop')
+
+    def make(self, counters: dict, vocabs: dict) -> Callable:
+        r"""
+        生成作用在一条数据（:class:`dict`）上的函数，返回 ``True`` 表示这条数据需要被删除。
+        """
+        kw = self.kwargs
+        kind = self.kind
+        if kind == 'drop':
+            func = kw['func']
+            return lambda row: bool(func(row))
+        if kind == 'copy':
+            src, dst = kw['field_name'], kw['new_field_name']
+
+            def copy(row):
+                row[dst] = _copy_value(row[src])
+            return copy
+        if kind == 'apply_field':
+            func, src, dst = kw['func'], kw['field_name'], kw['new_field_name']
+
+            def apply_field(row):
+                row[dst] = func(row[src])
+            return apply_field
+        if kind == 'apply':
+            func, dst = kw['func'], kw['new_field_name']
+
+            def apply(row):
+                row[dst] = func(row)
+            return apply
+        if kind == 'lower':
+            name = kw['field_name']
+
+            def lower(row):
+                row[name] = _lower_value(row[name])
+            return lower
+        if kind == 'delete':
+            name = kw['field_name']
+
+            def delete(row):
+                del row[name]
+            return delete
+        if kind == 'rename':
+            src, dst = kw['field_name'], kw['new_field_name']
+
+            def rename(row):
+                row[dst] = row.pop(src)
+            return rename
+        if kind == 'seq_len':
+            src, dst = kw['field_name'], kw['new_field_name']
+
+            def seq_len(row):
+                row[dst] = len(row[src])
+            return seq_len
+        if kind == 'count':
+            return self._make_count(counters.setdefault(id(self), Counter()))
+        if kind == 'index':
+            return self._make_index(vocabs[kw['vocab_name']])
+        raise RuntimeError(f"Unknown operation `{kind}`.")
+
+    def _make_count(self, counter: Counter):
+        field_names = self.kwargs['field_names']
+
+        # 与 Vocabulary.from_dataset 相同，支持 str，1d 以及 2d 的 field
+        def count(row):
+            for fn in field_names:
+                field = row[fn]
+                if field is None or (hasattr(field, "__len__") and len(field) == 0):
+                    logger.warning(f"instance: {row} has null field. Skip now!")
+                    continue
+                if isinstance(field, str) or not _is_iterable(field):
+                    counter[field] += 1
+                elif isinstance(field[0], str) or not _is_iterable(field[0]):
+                    counter.update(field)
+                else:
+                    if not isinstance(field[0][0], str) and _is_iterable(field[0][0]):
+                        raise RuntimeError("Only support field with 2 dimensions.")
+                    for words in field:
+                        counter.update(words)
+        return count
+
+    def _make_index(self, vocab: Vocabulary):
+        src, dst = self.kwargs['field_name'], self.kwargs['new_field_name']
+        word2idx = vocab._word2idx
+        if vocab.unknown is not None:
+            unknown_idx = word2idx[vocab.unknown]
+            to_index = lambda w: word2idx.get(w, unknown_idx)
+        else:
+            to_index = vocab.to_index
+
+        # 与 Vocabulary.index_dataset 相同，支持 str，1d 以及 2d 的 field
+        def index(row):
+            field = row[src]
+            if isinstance(field, str) or not _is_iterable(field):
+                row[dst] = to_index(field)
+            elif len(field) == 0:
+                row[dst] = []
+            elif isinstance(field[0], str) or not _is_iterable(field[0]):
+                row[dst] = [to_index(w) for w in field]
+            else:
+                if not isinstance(field[0][0], str) and _is_iterable(field[0][0]):
+                    raise RuntimeError("Only support field with 2 dimensions.")
+                row[dst] = [[to_index(c) for c in w] for w in field]
+        return index
+
+
+def _run_rows(columns: dict, start: int, end: int, ops: List[_Op], vocabs: dict, written: List[str],
+              has_drop: bool):
+    r"""
+    对 ``[start, end)`` 之间的数据依次执行 ``ops`` 。
+
+    :return: ``(outputs, keep, counters)``，其中 ``outputs`` 为 ``written`` 中每一个 field 的新内容，``keep`` 为没有被删除的
+        数据的下标（没有 ``drop`` 操作时为 ``None``），``counters`` 为每一个词频统计操作得到的 :class:`Counter` 。
+    """
+    counters = {}
+    funcs = [op.make(counters, vocabs) for op in ops]
+    names = list(columns.keys())
+    contents = [columns[name] for name in names]
+    outputs = {name: [] for name in written}
+    appends = [(name, outputs[name].append) for name in written]
+    keep = [] if has_drop else None
+    idx = start
+    try:
+        for idx in range(start, end):
+            row = {name: content[idx] for name, content in zip(names, contents)}
+            dropped = False
+            for func in funcs:
+                if func(row):
+                    dropped = True
+                    break
+            if dropped:
+                continue
+            if keep is not None:
+                keep.append(idx)
+            for name, append in appends:
+                append(row[name])
+    except BaseException as e:
+        logger.error("Exception happens at the `{}`th instance.".format(idx))
+        raise e
+    return outputs, keep, counters
+
+
+def _run_rows_proc(queue, *args):
+    import contextlib
+    null = DummyClass()
+    with contextlib.redirect_stdout(null):
+        logger.set_stdout(stdout='raw')
+        result = _run_rows(*args)
+    queue.put(pickle.dumps(result))
+
+
+class PipePlan:
+    r"""
+    以惰性的方式记录一系列作用于 :class:`~fastNLP.io.DataBundle` 中所有 :class:`~fastNLP.core.DataSet` 的 field 变换，调用
+    :meth:`run` 时才真正执行。所有记录操作的方法都返回 :class:`PipePlan` 自身，因此可以链式调用。
+
+    与 :class:`~fastNLP.io.DataBundle` 中 ``ignore_miss_dataset=True`` 的行为一致，如果某个 DataSet 在执行某个操作时不包含
+    该操作所需要的 field，这个操作会在该 DataSet 上被跳过。
+
+    .. note::
+
+        传给 :meth:`apply` 与 :meth:`drop` 的函数接受的是一个 :class:`dict` ，其中为该条数据在当前时刻的所有 field；
+        由于各个操作被融合在了同一次遍历中，这些函数不应该依赖其它数据。
+    """
+
+    def __init__(self):
+        self._ops: List[_Op] = []
+
+    def __len__(self):
+        return len(self._ops)
+
+    def drop(self, func: Callable, field_name: Optional[str] = None) -> 'PipePlan':
+        r"""
+        删除 ``func`` 返回 ``True`` 的数据，参见 :meth:`~fastNLP.core.DataSet.drop` 。
+
+        :param func: 接受一条数据，返回 :class:`bool` 值；
+        :param field_name: 如果不为 ``None``，则只在包含该 field 的 DataSet 上执行；
+        """
+        self._ops.append(_Op('drop', required=() if field_name is None else (field_name,), func=func))
+        return self
+
+    def copy_field(self, field_name: str, new_field_name: str) -> 'PipePlan':
+        r"""
+        将 ``field_name`` 复制一份为 ``new_field_name`` ，参见 :meth:`~fastNLP.core.DataSet.copy_field` 。
+        """
+        self._ops.append(_Op('copy', required=(field_name,), adds=(new_field_name,), field_name=field_name,
+                             new_field_name=new_field_name))
+        return self
+
+    def apply_field(self, func: Callable, field_name: str, new_field_name: Optional[str] = None) -> 'PipePlan':
+        r"""
+        将 ``field_name`` 的内容传给 ``func`` ，并将结果写入 ``new_field_name`` ，参见 :meth:`~fastNLP.core.DataSet.apply_field` 。
+
+        :param func: 接受 ``field_name`` 的内容；
+        :param field_name: 传入 ``func`` 的 field 名称；
+        :param new_field_name: 为 ``None`` 时覆盖 ``field_name`` ；
+        """
+        new_field_name = new_field_name or field_name
+        self._ops.append(_Op('apply_field', required=(field_name,), adds=(new_field_name,), func=func,
+                             field_name=field_name, new_field_name=new_field_name))
+        return self
+
+    def apply(self, func: Callable, new_field_name: str) -> 'PipePlan':
+        r"""
+        将一条数据传给 ``func`` ，并将结果写入 ``new_field_name`` ，参见 :meth:`~fastNLP.core.DataSet.apply` 。
+        """
+        self._ops.append(_Op('apply', adds=(new_field_name,), func=func, new_field_name=new_field_name))
+        return self
+
+    def lower(self, field_name: str) -> 'PipePlan':
+        r"""
+        将 ``field_name`` 中的内容小写化，参见 :meth:`~fastNLP.core.dataset.FieldArray.lower` 。
+        """
+        self._ops.append(_Op('lower', required=(field_name,), adds=(field_name,), field_name=field_name))
+        return self
+
+    def delete_field(self, field_name: str) -> 'PipePlan':
+        r"""
+        删除 ``field_name`` 。
+        """
+        self._ops.append(_Op('delete', required=(field_name,), removes=(field_name,), field_name=field_name))
+        return self
+
+    def rename_field(self, field_name: str, new_field_name: str) -> 'PipePlan':
+        r"""
+        将 ``field_name`` 重命名为 ``new_field_name`` 。
+        """
+        self._ops.append(_Op('rename', required=(field_name,), adds=(new_field_name,), removes=(field_name,),
+                             field_name=field_name, new_field_name=new_field_name))
+        return self
+
+    def add_seq_len(self, field_name: str, new_field_name: str = 'seq_len') -> 'PipePlan':
+        r"""
+        将 ``field_name`` 的长度写入 ``new_field_name`` ，参见 :meth:`~fastNLP.core.DataSet.add_seq_len` 。
+        """
+        self._ops.append(_Op('seq_len', required=(field_name,), adds=(new_field_name,), field_name=field_name,
+                             new_field_name=new_field_name))
+        return self
+
+    def build_vocab(self, field_name: Union[str, List[str]], vocab: Optional[Vocabulary] = None,
+                    vocab_name: Optional[str] = None, warn_unseen: bool = False) -> 'PipePlan':
+        r"""
+        统计 ``field_name`` 在当前时刻的内容以建立词表，运行结束后词表会以 ``vocab_name`` 加入到 ``data_bundle`` 中。与
+        :func:`fastNLP.io.pipe.utils._indexize` 相同，名称中包含 ``'train'`` 的 DataSet 中的词正常计入词表，其它 DataSet 中的词
+        以 ``no_create_entry=True`` 的方式计入，得到的词表与 :meth:`~fastNLP.core.Vocabulary.from_dataset` 完全相同。
+
+        :param field_name: 一个或多个 field，多个 field 共享同一个词表；
+        :param vocab: 作为模板的词表，每次 :meth:`run` 时会复制一份。为 ``None`` 时使用 ``Vocabulary()`` ；
+        :param vocab_name: 词表的名称，为 ``None`` 时使用第一个 field 的名称；
+        :param warn_unseen: 是否在非训练集中存在训练集中没有出现过的词时打印 warning，一般用于 ``target`` 列；
+        """
+        field_names = [field_name] if isinstance(field_name, str) else list(field_name)
+        vocab_name = vocab_name or field_names[0]
+        self._ops.append(_Op('count', required=field_names, field_names=field_names, vocab=vocab,
+                             vocab_name=vocab_name, warn_unseen=warn_unseen))
+        return self
+
+    def index(self, field_name: str, new_field_name: Optional[str] = None,
+              vocab_name: Optional[str] = None) -> 'PipePlan':
+        r"""
+        使用名为 ``vocab_name`` 的词表将 ``field_name`` 转换为 index，参见 :meth:`~fastNLP.core.Vocabulary.index_dataset` 。
+        该词表可以由计划中之前的 :meth:`build_vocab` 建立，也可以是 ``data_bundle`` 中已有的词表。
+
+        :param field_name: 需要转换的 field；
+        :param new_field_name: 为 ``None`` 时覆盖 ``field_name`` ；
+        :param vocab_name: 为 ``None`` 时使用 ``field_name`` ；
+        """
+        new_field_name = new_field_name or field_name
+        self._ops.append(_Op('index', required=(field_name,), adds=(new_field_name,), field_name=field_name,
+                             new_field_name=new_field_name, vocab_name=vocab_name or field_name))
+        return self
+
+    def _stages(self) -> List[List[_Op]]:
+        r"""
+        在使用当前阶段中统计的词表进行 index 的位置切分计划。
+        """
+        stages, current, counting = [], [], set()
+        for op in self._ops:
+            if op.kind == 'index' and op.kwargs['vocab_name'] in counting:
+                stages.append(current)
+                current, counting = [], set()
+            if op.kind == 'count':
+                counting.add(op.kwargs['vocab_name'])
+            current.append(op)
+        if current:
+            stages.append(current)
+        return stages
+
+    def run(self, data_bundle: DataBundle, num_proc: int = 0) -> DataBundle:
+        r"""
+        在 ``data_bundle`` 中的所有 DataSet 上原位执行计划。
+
+        :param data_bundle: 需要处理的 :class:`~fastNLP.io.DataBundle` ；
+        :param num_proc: 使用的进程数量，大于 1 时每个 DataSet 会被切分为 ``num_proc`` 块并行处理，每块的词频统计结果
+            在主进程中按顺序合并；
+        :return: 处理后的 ``data_bundle``
+        """
+        if num_proc > 1 and sys.platform in ('win32', 'msys', 'cygwin'):
+            raise RuntimeError("Your platform does not support multiprocessing with fork, please set `num_proc=0`")
+        cache = _active_cache.get()
+        keys = {}
+        if cache is not None:
+            for name, dataset in data_bundle.iter_datasets():
+                if cache.dataset_key(dataset) is not None:
+                    keys[name] = cache.dataset_key(dataset)
+        positions = {id(op): i for i, op in enumerate(self._ops)}
+        # 命中缓存的 DataSet 只记录结果所在的位置，直到之后的阶段没有命中或者运行结束时才读入
+        pending = {}
+        vocabs = {}
+        for stage in self._stages():
+            for op in stage:
+                if op.kind == 'index' and op.kwargs['vocab_name'] not in vocabs:
+                    vocabs[op.kwargs['vocab_name']] = data_bundle.get_vocab(op.kwargs['vocab_name'])
+            for vocab in vocabs.values():
+                if vocab._word2idx is None or vocab.rebuild:
+                    vocab.build_vocab()
+
+            counts = {id(op): [] for op in stage if op.kind == 'count'}
+            signature = cache.stage_signature(stage, vocabs) if keys else None
+            for name, dataset in data_bundle.iter_datasets():
+                key = keys.get(name)
+                if key is not None:
+                    key = keys[name] = cache.stage_key(key, signature)
+                    cached = cache.get_counters(key)
+                    if cached is not None:
+                        pending[name] = key
+                        for op in stage:
+                            if op.kind == 'count' and positions[id(op)] in cached:
+                                counts[id(op)].append((name, cached[positions[id(op)]]))
+                        continue
+                    if name in pending:
+                        cache.restore(dataset, pending.pop(name))
+                counters = self._run_dataset(dataset, stage, vocabs, num_proc)
+                for op_id, counter in counters.items():
+                    counts[op_id].append((name, counter))
+                if key is not None:
+                    cache.put(key, dataset, {positions[op_id]: counter for op_id, counter in counters.items()})
+
+            for op in stage:
+                if op.kind == 'count':
+                    vocab = self._finish_vocab(op, counts[id(op)], data_bundle)
+                    vocabs[op.kwargs['vocab_name']] = vocab
+                    data_bundle.set_vocab(vocab, op.kwargs['vocab_name'])
+        for name, key in pending.items():
+            cache.restore(data_bundle.get_dataset(name), key)
+        return data_bundle
+
+    @staticmethod
+    def _finish_vocab(op: _Op, counts: list, data_bundle: DataBundle) -> Vocabulary:
+        vocab = Vocabulary() if op.kwargs['vocab'] is None else deepcopy(op.kwargs['vocab'])
+        # 先加入训练集，再以 no_create_entry 的方式加入其它数据集，与 Vocabulary.from_dataset 逐个词加入的结果相同
+        for name, counter in counts:
+            if 'train' in name:
+                for word in counter:
+                    vocab._no_create_word.pop(word, None)
+                vocab.word_count.update(counter)
+        for name, counter in counts:
+            if 'train' not in name:
+                for word, count in counter.items():
+                    if vocab.word_count.get(word, 0) == vocab._no_create_word.get(word, 0):
+                        vocab._no_create_word[word] += count
+                vocab.word_count.update(counter)
+        vocab.rebuild = True
+        if op.kwargs['warn_unseen'] and len(vocab._no_create_word) > 0:
+            field_name = op.kwargs['field_names'][0]
+            warn_msg = f"There are {len(vocab._no_create_word)} `{field_name}` labels" \
+                       f" in {[name for name in data_bundle.datasets.keys() if 'train' not in name]} " \
+                       f"data set but not in train data set!.\n" \
+                       f"These label(s) are {vocab._no_create_word}"
+            logger.warning(warn_msg)
+        return vocab
+
+    @staticmethod
+    def _bind(ops: List[_Op], field_names: List[str]):
+        r"""
+        根据 DataSet 已有的 field 选出会被执行的操作，并推导出执行后 DataSet 中 field 的顺序。
+        """
+        fields = list(field_names)
+        bound = []
+        for op in ops:
+            if any(name not in fields for name in op.required):
+                continue
+            bound.append(op)
+            for name in op.removes:
+                fields.remove(name)
+            for name in op.adds:
+                if name not in fields:
+                    fields.append(name)
+        return bound, fields
+
+    def _run_dataset(self, dataset, ops: List[_Op], vocabs: dict, num_proc: int) -> dict:
+        field_arrays = dataset.field_arrays
+        ops, final_fields = self._bind(ops, list(field_arrays.keys()))
+        if len(ops) == 0 or len(dataset) == 0:
+            return {}
+
+        if any(op.reads_instance for op in ops):
+            load = list(field_arrays.keys())
+        else:
+            load = [name for name in field_arrays if any(name in op.required for op in ops)]
+        columns = {name: field_arrays[name].content for name in load}
+        written = [name for name in final_fields if any(name in op.adds for op in ops)]
+        has_drop = any(op.kind == 'drop' for op in ops)
+
+        num_proc = min(num_proc, len(dataset))
+        if num_proc < 2:
+            outputs, keep, counters = _run_rows(columns, 0, len(dataset), ops, vocabs, written, has_drop)
+        else:
+            outputs, keep, counters = self._run_multi_proc(columns, len(dataset), ops, vocabs, written, has_drop,
+                                                          num_proc)
+
+        new_field_arrays = {}
+        for name in final_fields:
+            if name in written:
+                content = outputs[name]
+            elif keep is not None:
+                content = field_arrays[name].content
+                content = [content[idx] for idx in keep]
+            else:
+                new_field_arrays[name] = field_arrays[name]
+                continue
+            field = FieldArray(name, [None])
+            field.content = content
+            new_field_arrays[name] = field
+        field_arrays.clear()
+        field_arrays.update(new_field_arrays)
+        return counters
+
+    @staticmethod
+    def _run_multi_proc(columns, length, ops, vocabs, written, has_drop, num_proc):
+        import multiprocessing as mp
+        ctx = mp.get_context('fork')
+        shard_len, num_left_sample = divmod(length, num_proc)
+        pool, queues = [], []
+        start = 0
+        for i in range(num_proc):
+            end = start + shard_len + int(i < num_left_sample)
+            queue = ctx.SimpleQueue()
+            proc = ctx.Process(target=_run_rows_proc,
+                               args=(queue, columns, start, end, ops, vocabs, written, has_drop))
+            proc.start()
+            pool.append(proc)
+            queues.append(queue)
+            start = end
+
+        shard_results = [None] * num_proc
+        try:
+            while any(res is None for res in shard_results):
+                for i in range(num_proc):
+                    if shard_results[i] is None and not queues[i].empty():
+                        shard_results[i] = pickle.loads(queues[i].get())
+                    elif shard_results[i] is None and pool[i].exitcode not in (None, 0):
+                        raise RuntimeError(f"Process {i} exits with code {pool[i].exitcode} when running the plan.")
+                if any(res is None for res in shard_results):
+                    time.sleep(0.01)
+        finally:
+            for proc in pool:
+                if proc.exitcode is None and any(res is None for res in shard_results):
+                    proc.terminate()
+                proc.join()
+
+        outputs = {name: [] for name in written}
+        keep = [] if has_drop else None
+        counters = {}
+        # 按照分块的顺序合并，保证词第一次出现的顺序与单进程时相同
+        for shard_outputs, shard_keep, shard_counters in shard_results:
+            for name in written:
+                outputs[name].extend(shard_outputs[name])
+            if keep is not None:
+                keep.extend(shard_keep)
+            for key, counter in shard_counters.items():
+                counters.setdefault(key, Counter()).update(counter)
+        return outputs, keep, counters
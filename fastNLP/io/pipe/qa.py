@@ -4,15 +4,18 @@ r"""
 """
 
 from copy import deepcopy
+from typing import Optional, Tuple
+
+import numpy as np
 
 from .pipe import Pipe
+from .plan import PipePlan
 from fastNLP.io.data_bundle import DataBundle
 from ..loader.qa import CMRC2018Loader
 from .utils import get_tokenizer
 from fastNLP.core.dataset import DataSet
-from fastNLP.core.vocabulary import Vocabulary
 
-__all__ = ['CMRC2018BertPipe']
+__all__ = ['CMRC2018BertPipe', 'merge_window_predictions']
 
 
 def _concat_clip(data_bundle, max_len, concat_field_name='raw_chars'):
@@ -76,6 +79,94 @@ def _concat_clip(data_bundle, max_len, concat_field_name='raw_chars'):
     return data_bundle
 
 
+def _concat_stride(data_bundle, max_len, doc_stride, concat_field_name='raw_chars'):
+    r"""
+    与 :func:`_concat_clip` 相同地拼接 context 与 question，但是过长的 context 不会被截断，而是以 ``doc_stride`` 为步长切分为
+    多个相互重叠的窗口，每个窗口成为一个新的 instance。窗口的位置与答案在窗口中的位置都是对整个 DataSet 批量计算的。
+
+    除 :func:`_concat_clip` 中的 field 外还会新增 field: doc_index(int), context_offset(int)，分别为窗口所属的 instance
+    在原 DataSet 中的下标以及窗口在 context 中的开始位置。答案不完整地落在窗口内时 target_start 与 target_end 均为 -1 。
+
+    :param DataBundle data_bundle:
+    :return:
+    """
+    tokenizer = get_tokenizer('cn-char', lang='cn')
+    for name in list(data_bundle.datasets.keys()):
+        ds = data_bundle.get_dataset(name)
+        if len(ds) == 0:
+            continue
+        contexts = [tokenizer(context) for context in ds.get_field('context').content]
+        questions = [tokenizer(question) for question in ds.get_field('question').content]
+        context_lens = np.array([len(context) for context in contexts], dtype=np.int64)
+        # 预留开头的[CLS]和[SEP]和中间的[sep]
+        budgets = np.maximum(max_len - 3 - np.array([len(q) for q in questions], dtype=np.int64), 1)
+        strides = np.minimum(doc_stride, budgets)
+        num_windows = np.where(context_lens > budgets, -((budgets - context_lens) // strides) + 1, 1)
+
+        doc_index = np.repeat(np.arange(len(ds)), num_windows)
+        window_index = np.arange(len(doc_index)) - np.repeat(np.cumsum(num_windows) - num_windows, num_windows)
+        starts = window_index * strides[doc_index]
+        ends = np.minimum(starts + budgets[doc_index], context_lens[doc_index])
+
+        indices = doc_index.tolist()
+        columns = {field_name: [field.content[i] for i in indices] for field_name, field in ds.field_arrays.items()}
+        columns['context_len'] = (ends - starts).tolist()
+        columns[concat_field_name] = [contexts[i][start:end] + ['[SEP]'] + questions[i]
+                                      for i, start, end in zip(indices, starts.tolist(), ends.tolist())]
+        if ds.has_field('answer_starts') and ds.has_field('answers'):
+            answer_starts = np.array([int(starts_[0]) for starts_ in ds.get_field('answer_starts').content],
+                                     dtype=np.int64)
+            answer_ends = answer_starts + np.array([len(answers[0]) for answers in ds.get_field('answers').content],
+                                                   dtype=np.int64)
+            answer_starts, answer_ends = answer_starts[doc_index], answer_ends[doc_index]
+            inside = (answer_starts >= starts) & (answer_ends <= ends)
+            columns['target_start'] = np.where(inside, answer_starts - starts, -1).tolist()
+            columns['target_end'] = np.where(inside, answer_ends - 1 - starts, -1).tolist()
+        columns['doc_index'] = indices
+        columns['context_offset'] = starts.tolist()
+        data_bundle.set_dataset(DataSet(columns), name)
+
+    return data_bundle
+
+
+def merge_window_predictions(dataset: DataSet, pred_starts, pred_ends, scores) -> Tuple[np.ndarray, np.ndarray]:
+    r"""
+    将 :class:`CMRC2018BertPipe` 在 ``doc_stride`` 模式下每个窗口的预测合并为原始样本的预测。每个样本在其所有窗口中选取
+    分数最高、且完整落在 context 内的答案，分数相同时选取靠前的窗口。
+
+    :param dataset: 经过 ``doc_stride`` 模式处理后的 :class:`~fastNLP.core.DataSet` ，需要包含 ``doc_index`` 、
+        ``context_offset`` 与 ``context_len`` ；
+    :param pred_starts: 每个窗口预测的答案开始位置，为在 ``raw_chars`` 中的下标，长度与 ``dataset`` 相同；
+    :param pred_ends: 每个窗口预测的答案结束位置（闭区间）；
+    :param scores: 每个窗口预测的分数，例如开始位置与结束位置的 logits 之和；
+    :return: 两个长度为原始样本数的 :class:`numpy.ndarray` ，为答案在原始 ``context`` 中的开始与结束位置（闭区间），
+        ``context[start:end+1]`` 即为预测的答案；没有合法预测的样本为 -1
+    """
+    doc_index = np.asarray(dataset.get_field('doc_index').content, dtype=np.int64)
+    offsets = np.asarray(dataset.get_field('context_offset').content, dtype=np.int64)
+    context_lens = np.asarray(dataset.get_field('context_len').content, dtype=np.int64)
+    pred_starts = np.asarray(pred_starts, dtype=np.int64).reshape(-1)
+    pred_ends = np.asarray(pred_ends, dtype=np.int64).reshape(-1)
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    if not len(doc_index) == len(pred_starts) == len(pred_ends) == len(scores):
+        raise ValueError(f"The number of predictions ({len(pred_starts)}, {len(pred_ends)}, {len(scores)}) does not "
+                         f"match the number of windows ({len(doc_index)}).")
+
+    num_docs = int(doc_index.max()) + 1 if len(doc_index) else 0
+    merged_starts = np.full(num_docs, -1, dtype=np.int64)
+    merged_ends = np.full(num_docs, -1, dtype=np.int64)
+    valid = np.flatnonzero((pred_starts >= 0) & (pred_starts <= pred_ends) & (pred_ends < context_lens))
+    if len(valid) == 0:
+        return merged_starts, merged_ends
+    # 按 doc_index 升序、分数降序排列，每个样本取第一个
+    order = valid[np.lexsort((-scores[valid], doc_index[valid]))]
+    sorted_docs = doc_index[order]
+    best = order[np.concatenate(([True], sorted_docs[1:] != sorted_docs[:-1]))]
+    merged_starts[doc_index[best]] = pred_starts[best] + offsets[best]
+    merged_ends[doc_index[best]] = pred_ends[best] + offsets[best]
+    return merged_starts, merged_ends
+
+
 class CMRC2018BertPipe(Pipe):
     r"""
     处理 **CMRC2018** 的数据，处理之后 :class:`~fastNLP.core.DataSet` 中新增的内容如下（原有的 field 仍然保留）：
@@ -91,12 +182,21 @@ class CMRC2018BertPipe(Pipe):
     index 的值， ``target_start`` 为答案开始的位置， ``target_end`` 为答案结束的位置（闭区间）； ``context_len``
     指示的是 ``chars`` 列中 context 的长度。
 
-    :param max_len:
+    默认情况下过长的 context 会被截断到 ``max_len`` ，截断时尽量保留答案。设置 ``doc_stride`` 后，过长的 context 会以
+    ``doc_stride`` 为步长切分为多个相互重叠的窗口，每个窗口成为一个 instance，并额外新增 ``doc_index`` （窗口所属样本在原
+    DataSet 中的下标）与 ``context_offset`` （窗口在 context 中的开始位置）两列；答案不完整地落在窗口内时 ``target_start``
+    与 ``target_end`` 为 -1 。模型在各个窗口上的预测可以通过 :func:`merge_window_predictions` 合并为原始样本的预测。
+
+    :param max_len: ``raw_chars`` 的最大长度，已经预留了 ``[CLS]`` 和两个 ``[SEP]`` 的位置；
+    :param doc_stride: 滑动窗口的步长，为 ``None`` 时截断过长的 context ；步长大于窗口长度时使用窗口长度；
     """
 
-    def __init__(self, max_len=510):
+    def __init__(self, max_len=510, doc_stride: Optional[int] = None):
         super().__init__()
+        if doc_stride is not None and doc_stride < 1:
+            raise ValueError(f"doc_stride must be a positive integer, not {doc_stride}.")
         self.max_len = max_len
+        self.doc_stride = doc_stride
 
     def process(self, data_bundle: DataBundle) -> DataBundle:
         r"""
@@ -112,18 +212,14 @@ class CMRC2018BertPipe(Pipe):
         :param data_bundle:
         :return: 处理后的 ``data_bundle``
         """
-        data_bundle = _concat_clip(data_bundle, max_len=self.max_len, concat_field_name='raw_chars')
-
-        src_vocab = Vocabulary()
-        src_vocab.from_dataset(*[ds for name, ds in data_bundle.iter_datasets() if 'train' in name],
-                               field_name='raw_chars',
-                               no_create_entry_dataset=[ds for name, ds in data_bundle.iter_datasets()
-                                                        if 'train' not in name]
-                               )
-        src_vocab.index_dataset(*data_bundle.datasets.values(), field_name='raw_chars', new_field_name='chars')
-        data_bundle.set_vocab(src_vocab, 'chars')
-
-        return data_bundle
+        if self.doc_stride is None:
+            data_bundle = _concat_clip(data_bundle, max_len=self.max_len, concat_field_name='raw_chars')
+        else:
+            data_bundle = _concat_stride(data_bundle, max_len=self.max_len, doc_stride=self.doc_stride,
+                                         concat_field_name='raw_chars')
+
+        plan = PipePlan().build_vocab('raw_chars', vocab_name='chars').index('raw_chars', 'chars', vocab_name='chars')
+        return plan.run(data_bundle)
 
     def process_from_file(self, paths=None) -> DataBundle:
         r"""
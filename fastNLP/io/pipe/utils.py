@@ -8,8 +8,8 @@ from typing import List
 
 # from ...core.const import Const
 from ...core.vocabulary import Vocabulary
+from .plan import PipePlan
 # from ...core._logger import log
-from fastNLP.core.log import logger
 from pkg_resources import parse_version
 
 
@@ -103,47 +103,40 @@ def _raw_split(sent):
     return sent.split()
 
 
-def _indexize(data_bundle, input_field_names='words', target_field_names='target'):
+def _add_indexize_ops(plan, input_field_names='words', target_field_names='target'):
     r"""
-    在dataset中的field_name列建立词表，'target'列建立词表，并把词表加入到data_bundle中。
+    在 ``plan`` 中加入 :func:`_indexize` 所需的操作：在 input 与 target 列建立词表并转换为 index。
 
-    :param ~fastNLP.DataBundle data_bundle:
+    :param ~fastNLP.io.pipe.PipePlan plan:
     :param: str,list input_field_names:
     :param: str,list target_field_names: 这一列的vocabulary没有unknown和padding
-    :return:
+    :return: 传入的 plan
     """
     if isinstance(input_field_names, str):
         input_field_names = [input_field_names]
     if isinstance(target_field_names, str):
         target_field_names = [target_field_names]
     for input_field_name in input_field_names:
-        src_vocab = Vocabulary()
-        src_vocab.from_dataset(*[ds for name, ds in data_bundle.iter_datasets() if 'train' in name],
-                               field_name=input_field_name,
-                               no_create_entry_dataset=[ds for name, ds in data_bundle.iter_datasets()
-                                                        if ('train' not in name) and (ds.has_field(input_field_name))]
-                               )
-        src_vocab.index_dataset(*data_bundle.datasets.values(), field_name=input_field_name)
-        data_bundle.set_vocab(src_vocab, input_field_name)
-    
+        plan.build_vocab(input_field_name)
     for target_field_name in target_field_names:
-        tgt_vocab = Vocabulary(unknown=None, padding=None)
-        tgt_vocab.from_dataset(*[ds for name, ds in data_bundle.iter_datasets() if 'train' in name],
-                               field_name=target_field_name,
-                               no_create_entry_dataset=[ds for name, ds in data_bundle.iter_datasets()
-                                                        if ('train' not in name) and (ds.has_field(target_field_name))]
-                               )
-        if len(tgt_vocab._no_create_word) > 0:
-            warn_msg = f"There are {len(tgt_vocab._no_create_word)} `{target_field_name}` labels" \
-                       f" in {[name for name in data_bundle.datasets.keys() if 'train' not in name]} " \
-                       f"data set but not in train data set!.\n" \
-                       f"These label(s) are {tgt_vocab._no_create_word}"
-            logger.warning(warn_msg)
-            # log.warning(warn_msg)
-        tgt_vocab.index_dataset(*[ds for ds in data_bundle.datasets.values() if ds.has_field(target_field_name)], field_name=target_field_name)
-        data_bundle.set_vocab(tgt_vocab, target_field_name)
-    
-    return data_bundle
+        plan.build_vocab(target_field_name, vocab=Vocabulary(unknown=None, padding=None), warn_unseen=True)
+    for field_name in input_field_names + target_field_names:
+        plan.index(field_name)
+    return plan
+
+
+def _indexize(data_bundle, input_field_names='words', target_field_names='target', num_proc=0):
+    r"""
+    在dataset中的field_name列建立词表，'target'列建立词表，并把词表加入到data_bundle中。
+
+    :param ~fastNLP.DataBundle data_bundle:
+    :param: str,list input_field_names:
+    :param: str,list target_field_names: 这一列的vocabulary没有unknown和padding
+    :param num_proc: 处理数据时使用的进程数目。
+    :return:
+    """
+    plan = _add_indexize_ops(PipePlan(), input_field_names, target_field_names)
+    return plan.run(data_bundle, num_proc=num_proc)
 
 
 def _add_words_field(data_bundle, lower=False):
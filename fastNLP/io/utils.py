@@ -2,14 +2,46 @@ __all__ = [
     "check_loader_paths"
 ]
 
+import glob
 import os
 from pathlib import Path
-from typing import Union, Dict
+from typing import Union, Dict, List
 
 # from ..core import log
 
 
-def check_loader_paths(paths: Union[str, Dict[str, str]]) -> Dict[str, str]:
+def _is_glob(path: str) -> bool:
+    # 已经存在的文件名中也可能包含 ``[`` 等字符
+    path = os.path.expanduser(path)
+    return any(c in path for c in '*?[') and not os.path.exists(path)
+
+
+def _expand_shards(paths: Union[str, List[str]]) -> List[str]:
+    r"""
+    将一个 glob 或者由文件路径与 glob 组成的 list 展开为排好序的文件路径列表。
+    """
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+    files = []
+    for path in paths:
+        if not isinstance(path, (str, Path)):
+            raise TypeError(f"Shard paths should be str, not {type(path)}.")
+        path = os.path.abspath(os.path.expanduser(path))
+        if _is_glob(path):
+            matched = sorted(filename for filename in glob.glob(path, recursive=True) if os.path.isfile(filename))
+            if not matched:
+                raise FileNotFoundError(f"No file matches the pattern {path}.")
+            files.extend(matched)
+        elif os.path.exists(path):
+            files.append(path)
+        else:
+            raise FileNotFoundError(f"{path} is not a valid file path.")
+    if not files:
+        raise ValueError("Empty shard list is not allowed.")
+    return files
+
+
+def check_loader_paths(paths: Union[str, List[str], Dict[str, Union[str, List[str]]]]) -> Dict[str, Union[str, List[str]]]:
     r"""
     检查传入 ``dataloader`` 的文件的合法性。如果为合法路径，将返回至少包含 ``'train'`` 这个 key 的字典。类似于下面的结果::
 
@@ -25,9 +57,17 @@ def check_loader_paths(paths: Union[str, Dict[str, str]]) -> Dict[str, str]:
     
             - 一个文件路径，此时认为该文件就是 train 的文件；
             - 一个文件目录，将在该目录下寻找包含 ``train`` （文件名中包含 train 这个字段）， ``test`` ，``dev`` 这三个字段的文件或文件夹；
-            - 一个 dict, 则 key 是用户自定义的某个文件的名称，value 是这个文件的路径。
+            - 一个 dict, 则 key 是用户自定义的某个文件的名称，value 是这个文件的路径；
+            - 一个 glob（例如 ``'/path/to/train-*.jsonl'``）或者一个由文件路径与 glob 组成的 list，此时认为这些文件是 train
+              的多个分片；dict 的 value 也可以是 glob 或者 list。
+
+        glob 和 list 会被展开为排好序的文件路径列表。
     :return:
     """
+    if isinstance(paths, (list, tuple)):
+        return {'train': _expand_shards(paths)}
+    if isinstance(paths, (str, Path)) and _is_glob(str(paths)):
+        return {'train': _expand_shards(paths)}
     if isinstance(paths, (str, Path)):
         paths = os.path.abspath(os.path.expanduser(paths))
         if os.path.isfile(paths):
@@ -63,18 +103,23 @@ def check_loader_paths(paths: Union[str, Dict[str, str]]) -> Dict[str, str]:
     
     elif isinstance(paths, dict):
         if paths:
+            # 不修改传入的 dict ，否则其中的 glob 会在第一次调用后被替换为当时匹配到的文件
+            paths = dict(paths)
             # if 'train' not in paths:
             #     raise KeyError("You have to include `train` in your dict.")
             for key, value in paths.items():
-                if isinstance(key, str) and isinstance(value, str):
+                if isinstance(key, str) and (isinstance(value, (list, tuple)) or
+                                             (isinstance(value, str) and _is_glob(value))):
+                    paths[key] = _expand_shards(value)
+                elif isinstance(key, str) and isinstance(value, str):
                     value = os.path.abspath(os.path.expanduser(value))
                     if not os.path.exists(value):
                         raise TypeError(f"{value} is not a valid path.")
                     paths[key] = value
                 else:
-                    raise TypeError("All keys and values in paths should be str.")
+                    raise TypeError("All keys in paths should be str, and values should be str or list of str.")
             return paths
         else:
             raise ValueError("Empty paths is not allowed.")
     else:
-        raise TypeError(f"paths only supports str and dict. not {type(paths)}.")
+        raise TypeError(f"paths only supports str, list and dict. not {type(paths)}.")
@@ -17,6 +17,10 @@ __all__ = [
     "VarGRU",
 
     'SequenceGenerator',
+    'ContinuousBatchingGenerator',
+    'GenerationRequest',
+    'Seq2SeqDecoderBackend',
+    'CausalLMBackend',
 
     "TimestepDropout",
 ]
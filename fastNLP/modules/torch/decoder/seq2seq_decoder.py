@@ -271,7 +271,8 @@ class TransformerSeq2SeqDecoderLayer(nn.Module):
 
         self.final_layer_norm = nn.LayerNorm(self.d_model)
 
-    def forward(self, x, encoder_output, encoder_mask=None, self_attn_mask=None, state: TransformerState=None):
+    def forward(self, x, encoder_output, encoder_mask=None, self_attn_mask=None, state: TransformerState=None,
+                self_key_mask=None):
         """
 
         :param x: ``decoder`` 端的输入，形状为 ``[batch_size, seq_len, dim]`` 
@@ -279,6 +280,8 @@ class TransformerSeq2SeqDecoderLayer(nn.Module):
         :param encoder_mask: 掩码，形状为 ``[batch_size, src_seq_len]``，为 **1** 的地方表示需要 attend
         :param self_attn_mask: 下三角的mask矩阵，只在训练时传入。形状为 ``[seq_len, seq_len]``
         :param state: 只在 inference 阶段传入，记录了 ``encoder`` 和 ``decoder`` 的状态
+        :param self_key_mask: self attention 中 ``key`` 的掩码，形状为 ``[batch_size, decode_length + seq_len]``，为 **0** 的位置是
+            :meth:`~fastNLP.modules.torch.decoder.TransformerState.merge_state` 在左侧补齐的 padding
         :return:
         """
 
@@ -288,6 +291,7 @@ class TransformerSeq2SeqDecoderLayer(nn.Module):
         x, _ = self.self_attn(query=x,
                               key=x,
                               value=x,
+                              key_mask=self_key_mask,
                               attn_mask=self_attn_mask,
                               state=state)
 
@@ -380,8 +384,13 @@ class TransformerSeq2SeqDecoder(Seq2SeqDecoder):
         device = tokens.device
 
         x = self.embed_scale * self.embed(tokens)
+        self_key_mask = None
+        if state.decoder_key_mask is not None:  # 合并过解码长度不同的样本，每个样本左侧 padding 的数量不同
+            self_key_mask = torch.cat([state.decoder_key_mask, state.decoder_key_mask.new_ones(tokens.size())], dim=1)
         if self.pos_embed is not None:
             position = torch.arange(state.decode_length, state.decode_length+tokens.size(1)).long().to(device)[None]
+            if self_key_mask is not None:
+                position = position - (~state.decoder_key_mask).sum(dim=1, keepdim=True)
             x += self.pos_embed(position)
         x = self.input_fc(x)
         x = F.dropout(x, p=self.dropout, training=self.training)
@@ -397,8 +406,11 @@ class TransformerSeq2SeqDecoder(Seq2SeqDecoder):
                                    encoder_output=encoder_output,
                                    encoder_mask=encoder_mask,
                                    self_attn_mask=triangle_mask,
-                                   state=state
+                                   state=state,
+                                   self_key_mask=self_key_mask
                                    )
+        if self_key_mask is not None:
+            state.decoder_key_mask = self_key_mask
 
         x = self.layer_norm(x)  # batch, tgt_len, dim
         x = self.output_fc(x)
@@ -74,6 +74,52 @@ class State:
         if self.encoder_output is not None:
             self.encoder_output = self._reorder_state(self.encoder_output, indices)
 
+    def _merge_state(self, state: Union[torch.Tensor, list, tuple], other: Union[torch.Tensor, list, tuple], dim: int = 0,
+                     pad_dim: int = None, left_pad: bool = False):
+        """
+        将 ``other`` 拼接在 ``state`` 之后；如果 ``pad_dim`` 不为 ``None``，会先在 ``pad_dim`` 维度上用 **0** 将两者补齐到相同的长度。
+        """
+        if isinstance(state, torch.Tensor):
+            if pad_dim is not None and state.size(pad_dim) != other.size(pad_dim):
+                length = max(state.size(pad_dim), other.size(pad_dim))
+                state, other = (_pad_to(state, length, pad_dim, left_pad), _pad_to(other, length, pad_dim, left_pad))
+            return torch.cat([state, other], dim=dim)
+        elif isinstance(state, (list, tuple)):
+            merged = [self._merge_state(state[i], other[i], dim, pad_dim, left_pad) for i in range(len(state))]
+            return merged if isinstance(state, list) else tuple(merged)
+        else:
+            raise TypeError(f"Cannot merge data of type:{type(state)}")
+
+    def merge_state(self, state: "State"):
+        """
+        将 ``state`` 中的样本拼接在当前 ``State`` 的样本之后，主要用于 :class:`~fastNLP.modules.torch.generator.ContinuousBatchingGenerator`
+        在生成的过程中加入新的样本。两者 ``encoder`` 输出的长度不同时，较短的会在末尾补齐并通过 ``encoder_mask`` 遮盖掉。
+
+        :param state: 与当前对象类型相同的 :class:`State`
+        """
+        if self.encoder_output is None:
+            return
+        if self.encoder_output.size(1) != state.encoder_output.size(1) or \
+                (self.encoder_mask is None) != (state.encoder_mask is None):
+            self.encoder_mask = _ones_mask_if_none(self.encoder_mask, self.encoder_output)
+            state.encoder_mask = _ones_mask_if_none(state.encoder_mask, state.encoder_output)
+        if self.encoder_mask is not None:
+            self.encoder_mask = self._merge_state(self.encoder_mask, state.encoder_mask, pad_dim=1)
+        self.encoder_output = self._merge_state(self.encoder_output, state.encoder_output, pad_dim=1)
+
+
+def _pad_to(tensor: torch.Tensor, length: int, dim: int, left: bool = False):
+    shape = list(tensor.shape)
+    shape[dim] = length - tensor.size(dim)
+    padding = tensor.new_zeros(shape)
+    return torch.cat([padding, tensor] if left else [tensor, padding], dim=dim)
+
+
+def _ones_mask_if_none(mask, encoder_output):
+    if mask is None and encoder_output is not None:
+        mask = encoder_output.new_ones(encoder_output.shape[:2], dtype=torch.bool)
+    return mask
+
 
 class LSTMState(State):
     """
@@ -111,6 +157,14 @@ class LSTMState(State):
         if self.input_feed is not None:
             self.input_feed = self._reorder_state(self.input_feed, indices, dim=0)
 
+    def merge_state(self, state: "LSTMState"):
+        super().merge_state(state)
+        self.hidden = self._merge_state(self.hidden, state.hidden, dim=1)
+        self.cell = self._merge_state(self.cell, state.cell, dim=1)
+        self.input_feed = self._merge_state(self.input_feed, state.input_feed, dim=0)
+        # LSTM 的状态与解码的位置无关，只需要保证之后输入的 tokens 长度与 decode_length 一致
+        self.decode_length = max(self.decode_length, state.decode_length)
+
 
 class TransformerState(State):
     """
@@ -126,6 +180,8 @@ class TransformerState(State):
         self.encoder_value = [None] * num_decoder_layer  # 每一个元素 bsz x encoder_max_len x value_dim
         self.decoder_prev_key = [None] * num_decoder_layer  # 每一个元素 bsz x decode_length x key_dim
         self.decoder_prev_value = [None] * num_decoder_layer  # 每一个元素 bsz x decode_length x key_dim
+        # bsz x decode_length，只在 merge_state 合并了解码长度不同的样本后不为 None，为 0 的位置是左侧补齐的 padding
+        self.decoder_key_mask = None
 
     def reorder_state(self, indices: torch.LongTensor):
         super().reorder_state(indices)
@@ -133,6 +189,44 @@ class TransformerState(State):
         self.encoder_value = self._reorder_state(self.encoder_value, indices)
         self.decoder_prev_key = self._reorder_state(self.decoder_prev_key, indices)
         self.decoder_prev_value = self._reorder_state(self.decoder_prev_value, indices)
+        if self.decoder_key_mask is not None:
+            self.decoder_key_mask = self._reorder_state(self.decoder_key_mask, indices)
+            # 去掉所有样本都是 padding 的位置
+            num_pads = int((~self.decoder_key_mask).sum(dim=1).min()) if self.decoder_key_mask.size(0) else 0
+            if num_pads > 0:
+                self.decoder_key_mask = self.decoder_key_mask[:, num_pads:]
+                self.decoder_prev_key = [key[:, num_pads:] for key in self.decoder_prev_key]
+                self.decoder_prev_value = [value[:, num_pads:] for value in self.decoder_prev_value]
+            if bool(self.decoder_key_mask.all()):
+                self.decoder_key_mask = None
+
+    def merge_state(self, state: "TransformerState"):
+        """
+        将 ``state`` 中的样本拼接在当前样本之后。两者已经解码的长度不同时，较短的缓存会在左侧补齐，并通过 ``decoder_key_mask``
+        在 self attention 中遮盖掉，同时 :class:`~fastNLP.modules.torch.decoder.TransformerSeq2SeqDecoder` 会据此计算每个样本
+        自己的位置。两者都需要已经至少解码过一次。
+
+        :param state: 另一个 :class:`TransformerState`
+        """
+        if self.decoder_prev_key[0] is None or state.decoder_prev_key[0] is None:
+            raise RuntimeError("Only the states that have been decoded can be merged.")
+        self_mask = self._get_decoder_key_mask()
+        other_mask = state._get_decoder_key_mask()
+        super().merge_state(state)
+        self.encoder_key = self._merge_state(self.encoder_key, state.encoder_key, pad_dim=1)
+        self.encoder_value = self._merge_state(self.encoder_value, state.encoder_value, pad_dim=1)
+        self.decoder_prev_key = self._merge_state(self.decoder_prev_key, state.decoder_prev_key, pad_dim=1, left_pad=True)
+        self.decoder_prev_value = self._merge_state(self.decoder_prev_value, state.decoder_prev_value, pad_dim=1,
+                                                    left_pad=True)
+        self.decoder_key_mask = self._merge_state(self_mask, other_mask, pad_dim=1, left_pad=True)
+        if bool(self.decoder_key_mask.all()):
+            self.decoder_key_mask = None
+
+    def _get_decoder_key_mask(self):
+        if self.decoder_key_mask is not None:
+            return self.decoder_key_mask
+        key = self.decoder_prev_key[0]
+        return key.new_ones(key.shape[:2], dtype=torch.bool)
 
     @property
     def decode_length(self):
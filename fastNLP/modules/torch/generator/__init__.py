@@ -1,6 +1,11 @@
 __all__ = [
-    'SequenceGenerator'
+    'SequenceGenerator',
+    'ContinuousBatchingGenerator',
+    'GenerationRequest',
+    'Seq2SeqDecoderBackend',
+    'CausalLMBackend'
 ]
 
 
-from .seq2seq_generator import SequenceGenerator
\ No newline at end of file
+from .seq2seq_generator import SequenceGenerator
+from .continuous_batching import ContinuousBatchingGenerator, GenerationRequest, Seq2SeqDecoderBackend, CausalLMBackend
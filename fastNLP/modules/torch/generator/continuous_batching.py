@@ -0,0 +1,447 @@
+r"""
+以 **continuous batching** 的方式进行生成：每一个 decode 的 step 之后，已经结束的请求会立刻离开 batch，等待中的请求会在下一个 step
+加入 batch，而不需要等待整个 batch 中最长的句子生成结束。
+
+"""
+
+__all__ = [
+    'GenerationRequest',
+    'Seq2SeqDecoderBackend',
+    'CausalLMBackend',
+    'ContinuousBatchingGenerator'
+]
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import torch
+import torch.nn.functional as F
+from torch import nn
+
+from ..decoder.seq2seq_decoder import Seq2SeqDecoder
+from .seq2seq_generator import _get_model_device, top_k_top_p_filtering
+
+
+class GenerationRequest:
+    """
+    一个生成请求，由 :meth:`ContinuousBatchingGenerator.submit` 创建。
+
+    :param inputs: 交给 backend 的输入，具体的格式见 :class:`Seq2SeqDecoderBackend` 和 :class:`CausalLMBackend`
+    :param max_new_tokens: 最多生成的 token 数量
+    :param eos_token_id: 生成该 token 之后结束，为 ``None`` 时一定会生成 ``max_new_tokens`` 个 token
+    :param stopping_criteria: 一个函数，接受到目前为止生成的 token 列表，返回 ``True`` 时结束该请求的生成
+    """
+    def __init__(self, inputs: Any, max_new_tokens: int, eos_token_id: Optional[int] = None,
+                 stopping_criteria: Optional[Callable[[List[int]], bool]] = None):
+        self.inputs = inputs
+        self.max_new_tokens = max_new_tokens
+        self.eos_token_id = eos_token_id
+        self.stopping_criteria = stopping_criteria
+        self.generated: List[int] = []
+        self.future = Future()
+        self.submit_time = time.perf_counter()
+        self.first_token_time = None
+        self.finish_time = None
+
+    @property
+    def done(self) -> bool:
+        if len(self.generated) == 0:
+            return False
+        if len(self.generated) >= self.max_new_tokens:
+            return True
+        if self.eos_token_id is not None and self.generated[-1] == self.eos_token_id:
+            return True
+        return self.stopping_criteria is not None and bool(self.stopping_criteria(self.generated))
+
+    def result(self, timeout: Optional[float] = None) -> List[int]:
+        """
+        阻塞直到生成结束，返回生成的 token 列表。
+        """
+        return self.future.result(timeout)
+
+
+class Seq2SeqDecoderBackend:
+    """
+    将 :class:`~fastNLP.modules.torch.decoder.Seq2SeqDecoder` 接入 :class:`ContinuousBatchingGenerator` 。缓存即 ``decoder``
+    对应的 :class:`~fastNLP.modules.torch.decoder.State` ，新的请求通过 :meth:`~fastNLP.modules.torch.decoder.State.merge_state`
+    加入，结束的请求通过 :meth:`~fastNLP.modules.torch.decoder.State.reorder_state` 移除。
+
+    每个请求的 ``inputs`` 为单个样本的 ``encoder`` 输出，形状为 ``[src_len, hidden_size]`` ；对于
+    :class:`~fastNLP.modules.torch.decoder.LSTMSeq2SeqDecoder` 也可以是 ``(encoder_output, (hidden, cell))`` ，其中
+    ``hidden`` 和 ``cell`` 的形状为 ``[hidden_size]`` 。
+
+    :param decoder: 需要实现了 :meth:`init_state` 的 ``decoder``
+    :param bos_token_id: 每个请求开始生成时输入的 token
+    """
+    def __init__(self, decoder: Seq2SeqDecoder, bos_token_id: int):
+        self.decoder = decoder
+        self.bos_token_id = bos_token_id
+
+    @property
+    def device(self):
+        return _get_model_device(self.decoder)
+
+    def prefill(self, inputs: Sequence[Any]):
+        device = self.device
+        if isinstance(inputs[0], torch.Tensor):
+            encoder_outputs, hidden_cell = inputs, None
+        else:
+            encoder_outputs = [_input[0] for _input in inputs]
+            hidden_cell = [_input[1] for _input in inputs]
+        lengths = torch.tensor([len(output) for output in encoder_outputs], device=device)
+        encoder_output = nn.utils.rnn.pad_sequence([output.to(device) for output in encoder_outputs], batch_first=True)
+        encoder_mask = torch.arange(encoder_output.size(1), device=device)[None] < lengths[:, None]
+        if hidden_cell is not None:
+            hidden = torch.stack([h for h, _ in hidden_cell]).to(device)
+            cell = torch.stack([c for _, c in hidden_cell]).to(device)
+            encoder_output = (encoder_output, (hidden, cell))
+        state = self.decoder.init_state(encoder_output, encoder_mask)
+        tokens = torch.full([len(inputs), 1], fill_value=self.bos_token_id, dtype=torch.long, device=device)
+        return state, self.decoder.decode(tokens=tokens, state=state)
+
+    def decode(self, state, tokens: torch.LongTensor):
+        # decoder 只会使用 decode_length 之后的 token，因此前面的位置不需要是真实的历史
+        _tokens = tokens.new_zeros(tokens.size(0), state.decode_length + 1)
+        _tokens[:, -1] = tokens
+        return state, self.decoder.decode(tokens=_tokens, state=state)
+
+    def merge(self, state, new_state):
+        state.merge_state(new_state)
+        return state
+
+    def reorder(self, state, indices: torch.LongTensor):
+        self.decoder.reorder_states(indices, state)
+        return state
+
+
+class CausalLMBackend:
+    """
+    将 ``fastNLP.transformers`` 中 decoder-only 的模型（例如 :class:`~fastNLP.transformers.torch.GPT2LMHeadModel` ）接入
+    :class:`ContinuousBatchingGenerator` 。模型需要在 ``forward`` 中接受 ``attention_mask`` 、 ``position_ids`` 以及
+    ``past_key_values`` 。不同长度的 prompt 和缓存在左侧补齐，通过 ``attention_mask`` 遮盖；结束的请求通过模型的
+    ``_reorder_cache`` 移除，之后所有请求都是 padding 的位置也会被去掉。
+
+    每个请求的 ``inputs`` 为 prompt 的 token id，可以是 :class:`list` 或者一维的 :class:`torch.LongTensor` 。
+
+    :param model: ``GenerationMixin`` 的模型
+    :param pad_token_id: prompt 补齐时使用的 token，不会被 attend 到
+    """
+    def __init__(self, model: nn.Module, pad_token_id: int = 0):
+        self.model = model
+        self.pad_token_id = pad_token_id
+
+    @property
+    def device(self):
+        return _get_model_device(self.model)
+
+    def _forward(self, input_ids, attention_mask, position_ids, past_key_values=None):
+        outputs = self.model(input_ids=input_ids, attention_mask=attention_mask, position_ids=position_ids,
+                             past_key_values=past_key_values, use_cache=True, return_dict=True)
+        return (outputs.past_key_values, attention_mask), outputs.logits[:, -1]
+
+    def prefill(self, inputs: Sequence[Any]):
+        device = self.device
+        prompts = [torch.as_tensor(_input, dtype=torch.long) for _input in inputs]
+        max_len = max(len(prompt) for prompt in prompts)
+        input_ids = torch.full([len(prompts), max_len], fill_value=self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros(len(prompts), max_len, dtype=torch.long)
+        for i, prompt in enumerate(prompts):
+            input_ids[i, max_len - len(prompt):] = prompt
+            attention_mask[i, max_len - len(prompt):] = 1
+        input_ids, attention_mask = input_ids.to(device), attention_mask.to(device)
+        position_ids = (attention_mask.cumsum(dim=-1) - 1).clamp(min=0)
+        return self._forward(input_ids, attention_mask, position_ids)
+
+    def decode(self, cache, tokens: torch.LongTensor):
+        past_key_values, attention_mask = cache
+        attention_mask = torch.cat([attention_mask, attention_mask.new_ones(attention_mask.size(0), 1)], dim=-1)
+        position_ids = attention_mask.sum(dim=-1, keepdim=True) - 1
+        return self._forward(tokens[:, None], attention_mask, position_ids, past_key_values)
+
+    def merge(self, cache, new_cache):
+        (past, mask), (new_past, new_mask) = cache, new_cache
+        length = max(mask.size(1), new_mask.size(1))
+        past = tuple(
+            tuple(torch.cat([_left_pad(state, length, dim=-2), _left_pad(new_state, length, dim=-2)])
+                  for state, new_state in zip(layer_past, new_layer_past))
+            for layer_past, new_layer_past in zip(past, new_past)
+        )
+        mask = torch.cat([_left_pad(mask, length, dim=1), _left_pad(new_mask, length, dim=1)])
+        return past, mask
+
+    def reorder(self, cache, indices: torch.LongTensor):
+        past, mask = cache
+        past = self.model._reorder_cache(past, indices)
+        mask = mask.index_select(0, indices)
+        num_pads = int((mask.cumsum(dim=1) == 0).sum(dim=1).min())
+        if num_pads > 0:
+            past = tuple(tuple(state[..., num_pads:, :] for state in layer_past) for layer_past in past)
+            mask = mask[:, num_pads:]
+        return past, mask
+
+
+def _left_pad(tensor: torch.Tensor, length: int, dim: int) -> torch.Tensor:
+    if tensor.size(dim) == length:
+        return tensor
+    shape = list(tensor.shape)
+    shape[dim] = length - tensor.size(dim)
+    return torch.cat([tensor.new_zeros(shape), tensor], dim=dim)
+
+
+class ContinuousBatchingGenerator:
+    """
+    step 级别调度的生成器。与 :class:`~fastNLP.modules.torch.generator.SequenceGenerator` 一次处理一个固定的 batch、直到其中
+    最长的句子结束不同，:class:`ContinuousBatchingGenerator` 在每一个 step 结束后移除已经完成的请求，并将等待中的请求加入
+    batch（最多 ``max_batch_size`` 个），因此短的请求不需要等待长的请求，batch 中也不会有空转的位置。每个请求可以有自己的
+    ``max_new_tokens`` 、 ``eos_token_id`` 以及 ``stopping_criteria`` 。
+
+    可以同步地使用::
+
+        generator = ContinuousBatchingGenerator(Seq2SeqDecoderBackend(decoder, bos_token_id=1), max_batch_size=16)
+        outputs = generator.generate([encoder_output_1, encoder_output_2])
+
+    也可以通过 :meth:`start` 在后台线程中不断地进行生成，在其它线程中通过 :meth:`submit` 或者在 asyncio 中通过
+    :meth:`generate_async` 提交请求::
+
+        generator.start()
+        token_ids = await generator.generate_async(encoder_output, max_new_tokens=30)
+
+    目前只支持 greedy 和采样的生成方式，不支持 **beam search** 。
+
+    :param backend: :class:`Seq2SeqDecoderBackend` 或 :class:`CausalLMBackend`
+    :param max_batch_size: batch 中同时进行生成的最大请求数量
+    :param max_new_tokens: 请求默认的最大生成 token 数量
+    :param eos_token_id: 请求默认的结束 token
+    :param do_sample: 是否通过采样的方式生成
+    :param temperature: 只有在 ``do_sample`` 为 ``True`` 才有意义
+    :param top_k: 只从 ``top_k`` 中采样
+    :param top_p: 只从 ``top_p`` 的 token 中采样（ **nucleus sampling** ）
+    """
+    def __init__(self, backend, max_batch_size: int = 32, max_new_tokens: int = 20, eos_token_id: Optional[int] = None,
+                 do_sample: bool = False, temperature: float = 1.0, top_k: int = 50, top_p: float = 1.0):
+        if max_batch_size < 1:
+            raise ValueError("`max_batch_size` should be at least 1.")
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_new_tokens = max_new_tokens
+        self.eos_token_id = eos_token_id
+        self.do_sample = do_sample
+        self.temperature = temperature
+        self.top_k = top_k
+        self.top_p = top_p
+
+        self._waiting = queue.Queue()
+        self._running: List[GenerationRequest] = []
+        self._cache = None
+        self._has_request = threading.Event()
+        self._thread = None
+        self._stop = False
+        self._admit = True
+        self._stats = {'steps': 0, 'generated_tokens': 0, 'finished': 0, 'batch_size_sum': 0, 'latency_sum': 0.0,
+                       'first_token_latency_sum': 0.0}
+
+    def submit(self, inputs: Any, max_new_tokens: Optional[int] = None, eos_token_id: Optional[int] = None,
+               stopping_criteria: Optional[Callable[[List[int]], bool]] = None) -> GenerationRequest:
+        """
+        提交一个请求，可以在任意线程中调用。
+
+        :param inputs: 交给 backend 的输入
+        :param max_new_tokens: 为 ``None`` 时使用初始化时的 ``max_new_tokens`` ；为 ``0`` 时请求直接以空列表结束
+        :param eos_token_id: 为 ``None`` 时使用初始化时的 ``eos_token_id``
+        :param stopping_criteria: 一个函数，接受到目前为止生成的 token 列表，返回 ``True`` 时结束该请求的生成
+        :return: 一个 :class:`GenerationRequest` ，可以通过 ``request.future`` 或 :meth:`GenerationRequest.result` 获取结果
+        """
+        request = GenerationRequest(inputs,
+                                    max_new_tokens=self.max_new_tokens if max_new_tokens is None else max_new_tokens,
+                                    eos_token_id=self.eos_token_id if eos_token_id is None else eos_token_id,
+                                    stopping_criteria=stopping_criteria)
+        if request.max_new_tokens <= 0:
+            request.finish_time = time.perf_counter()
+            request.future.set_result([])
+            return request
+        self._waiting.put(request)
+        self._has_request.set()
+        return request
+
+    @property
+    def num_running(self) -> int:
+        return len(self._running)
+
+    @property
+    def num_waiting(self) -> int:
+        return self._waiting.qsize()
+
+    def _select_tokens(self, scores: torch.FloatTensor) -> torch.LongTensor:
+        if not self.do_sample:
+            return scores.argmax(dim=-1)
+        if self.temperature > 0 and self.temperature != 1:
+            scores = scores / self.temperature
+        scores = top_k_top_p_filtering(scores, self.top_k, self.top_p, min_tokens_to_keep=2)
+        # 加上1e-12是为了避免https://github.com/pytorch/pytorch/pull/27523
+        probs = F.softmax(scores, dim=-1) + 1e-12
+        return torch.multinomial(probs, num_samples=1).squeeze(1)
+
+    def _append_tokens(self, requests: List[GenerationRequest], scores: torch.FloatTensor):
+        next_tokens = self._select_tokens(scores).tolist()
+        now = time.perf_counter()
+        for request, token in zip(requests, next_tokens):
+            if request.first_token_time is None:
+                request.first_token_time = now
+            request.generated.append(token)
+        self._stats['generated_tokens'] += len(next_tokens)
+
+    @torch.no_grad()
+    def step(self) -> List[GenerationRequest]:
+        """
+        进行一个 step：batch 中的请求各生成一个 token，等待中的请求加入 batch 并生成第一个 token，最后移除已经完成的请求。
+
+        :return: 这一个 step 中完成的请求
+        """
+        if self._running:
+            tokens = torch.tensor([request.generated[-1] for request in self._running], dtype=torch.long,
+                                  device=self.backend.device)
+            self._cache, scores = self.backend.decode(self._cache, tokens)
+            self._append_tokens(self._running, scores)
+
+        new_requests = []
+        while self._admit and len(self._running) + len(new_requests) < self.max_batch_size:
+            try:
+                new_requests.append(self._waiting.get_nowait())
+            except queue.Empty:
+                break
+        if new_requests:
+            cache, scores = self.backend.prefill([request.inputs for request in new_requests])
+            self._append_tokens(new_requests, scores)
+            self._cache = cache if self._cache is None else self.backend.merge(self._cache, cache)
+            self._running.extend(new_requests)
+
+        if not self._running:
+            return []
+        self._stats['steps'] += 1
+        self._stats['batch_size_sum'] += len(self._running)
+
+        keep, finished = [], []
+        for idx, request in enumerate(self._running):
+            (finished if request.done else keep).append(idx)
+        finished = [self._running[idx] for idx in finished]
+        if finished:
+            if keep:
+                indices = torch.tensor(keep, dtype=torch.long, device=self.backend.device)
+                self._cache = self.backend.reorder(self._cache, indices)
+            else:
+                self._cache = None
+            self._running = [self._running[idx] for idx in keep]
+            now = time.perf_counter()
+            for request in finished:
+                request.finish_time = now
+                self._stats['finished'] += 1
+                self._stats['latency_sum'] += now - request.submit_time
+                self._stats['first_token_latency_sum'] += request.first_token_time - request.submit_time
+                request.future.set_result(list(request.generated))
+        return finished
+
+    def run_until_complete(self):
+        """
+        不断地进行 :meth:`step` ，直到没有运行中和等待中的请求。
+        """
+        while self._running or not self._waiting.empty():
+            self.step()
+
+    def generate(self, inputs: Sequence[Any], max_new_tokens: Optional[int] = None, eos_token_id: Optional[int] = None,
+                 stopping_criteria: Optional[Callable[[List[int]], bool]] = None) -> List[List[int]]:
+        """
+        同步地完成 ``inputs`` 中的所有请求。不能在 :meth:`start` 之后调用。
+
+        :return: 每个请求生成的 token 列表
+        """
+        if self._thread is not None:
+            raise RuntimeError("Use `submit()` or `generate_async()` when the generator is running in background.")
+        requests = [self.submit(_input, max_new_tokens, eos_token_id, stopping_criteria) for _input in inputs]
+        self.run_until_complete()
+        return [request.result() for request in requests]
+
+    async def generate_async(self, inputs: Any, max_new_tokens: Optional[int] = None,
+                             eos_token_id: Optional[int] = None,
+                             stopping_criteria: Optional[Callable[[List[int]], bool]] = None) -> List[int]:
+        """
+        在 asyncio 中提交一个请求并等待它的结果；如果后台线程还没有启动，会先调用 :meth:`start` 。
+
+        :return: 生成的 token 列表
+        """
+        if self._thread is None:
+            self.start()
+        request = self.submit(inputs, max_new_tokens, eos_token_id, stopping_criteria)
+        return await asyncio.wrap_future(request.future)
+
+    def start(self):
+        """
+        启动一个后台线程不断地处理提交的请求。
+        """
+        if self._thread is not None:
+            return
+        self._stop = False
+        self._thread = threading.Thread(target=self._loop, name='ContinuousBatchingGenerator', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        停止后台线程，运行中的请求会先完成，等待中的请求保持在队列中。
+        """
+        if self._thread is None:
+            return
+        self._stop = True
+        self._has_request.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _loop(self):
+        while True:
+            if not self._running and self._waiting.empty():
+                if self._stop:
+                    break
+                self._has_request.wait()
+                self._has_request.clear()
+                continue
+            if self._stop and not self._running:
+                break
+            # stop 之后不再将等待中的请求加入 batch
+            self._admit = not self._stop
+            try:
+                self.step()
+            except BaseException as e:
+                self._fail_all(e)
+        self._admit = True
+
+    def _fail_all(self, exception: BaseException):
+        requests = self._running
+        while True:
+            try:
+                requests.append(self._waiting.get_nowait())
+            except queue.Empty:
+                break
+        for request in requests:
+            if not request.future.done():
+                request.future.set_exception(exception)
+        self._running = []
+        self._cache = None
+
+    def stats(self) -> Dict[str, float]:
+        """
+        返回到目前为止的统计信息：step 数量、生成的 token 数量、完成的请求数量、平均的 batch 大小、平均的请求延迟以及
+        平均的第一个 token 的延迟（单位为秒）。
+        """
+        stats = self._stats
+        finished = max(stats['finished'], 1)
+        return {
+            'steps': stats['steps'],
+            'generated_tokens': stats['generated_tokens'],
+            'finished': stats['finished'],
+            'avg_batch_size': stats['batch_size_sum'] / max(stats['steps'], 1),
+            'avg_latency': stats['latency_sum'] / finished,
+            'avg_first_token_latency': stats['first_token_latency_sum'] / finished,
+        }
+
@@ -0,0 +1,134 @@
+"""
+Preallocated key/value cache used by :meth:`~fastNLP.transformers.torch.generation_utils.GenerationMixin.generate`
+when ``use_static_cache=True``.
+"""
+from typing import Tuple
+
+from fastNLP.envs.imports import _NEED_IMPORT_TORCH
+
+if _NEED_IMPORT_TORCH:
+    import torch
+
+__all__ = [
+    "StaticCache",
+    "StaticCacheLayer",
+]
+
+
+class StaticCacheLayer(tuple):
+    """
+    The cache of one layer, as seen by the attention modules. It is a tuple of the key and value states filled so far
+    (plus the cross-attention key and value states for encoder-decoder models), so the code reading
+    ``past_key_value[0]`` or ``past_key_values[0][0].shape[-2]`` keeps working. The attention modules recognize it
+    and call :meth:`update` instead of concatenating the new states.
+    """
+
+    def __new__(cls, cache: "StaticCache", layer_idx: int, with_cross: bool = True):
+        obj = super().__new__(cls, cache.layer_states(layer_idx, with_cross))
+        obj.cache = cache
+        obj.layer_idx = layer_idx
+        return obj
+
+    def __getitem__(self, item):
+        if isinstance(item, slice) and item.start is None and item.stop == 2 and item.step is None:
+            # ``past_key_value[:2]`` is the self-attention part
+            return StaticCacheLayer(self.cache, self.layer_idx, with_cross=False)
+        return super().__getitem__(item)
+
+    def update(self, key_states: "torch.Tensor", value_states: "torch.Tensor") -> Tuple["torch.Tensor", "torch.Tensor"]:
+        """
+        Writes the states of the new positions in place and returns the key and value states of all the positions.
+        """
+        return self.cache.update(self.layer_idx, key_states, value_states)
+
+
+class StaticCache:
+    """
+    A key/value cache whose self-attention states live in one buffer of shape ``[num_layers, 2, batch_size, num_heads,
+    max_length, head_dim]`` allocated once. Each decoding step writes the new states in place and the attention
+    modules read views of the filled prefix, so the memory stays flat during the generation instead of growing by a
+    ``torch.cat`` per layer and per step. Beam search reorders the prefix with an ``index_select`` into a second
+    buffer of the same shape, which is then swapped with the first one.
+
+    The buffers are allocated after the first forward pass, from the shapes of the ``past_key_values`` it returns.
+
+    Args:
+        max_length (:obj:`int`):
+            The maximum number of positions, prompt included, that will be cached.
+    """
+
+    def __init__(self, max_length: int):
+        self.max_length = max_length
+        self.length = 0
+        self.buffer = None
+        self._spare = None
+        # the cross-attention states do not grow and are identical for all the beams of a sample, they are neither
+        # updated nor reordered
+        self.cross_states = None
+
+    @property
+    def is_initialized(self) -> bool:
+        return self.buffer is not None
+
+    def __len__(self):
+        return 0 if self.buffer is None else self.buffer.shape[0]
+
+    def __bool__(self):
+        return self.buffer is not None
+
+    def __getitem__(self, layer_idx: int) -> StaticCacheLayer:
+        return StaticCacheLayer(self, layer_idx)
+
+    def __iter__(self):
+        for layer_idx in range(len(self)):
+            yield StaticCacheLayer(self, layer_idx)
+
+    def layer_states(self, layer_idx: int, with_cross: bool = True) -> Tuple["torch.Tensor", ...]:
+        states = (self.buffer[layer_idx, 0, :, :, :self.length], self.buffer[layer_idx, 1, :, :, :self.length])
+        if with_cross and self.cross_states is not None:
+            states = states + self.cross_states[layer_idx]
+        return states
+
+    def update(self, layer_idx: int, key_states: "torch.Tensor", value_states: "torch.Tensor"):
+        end = self.length + key_states.shape[-2]
+        if end > self.max_length:
+            raise RuntimeError(f"The static cache can only hold {self.max_length} positions, but {end} are needed.")
+        self.buffer[layer_idx, 0, :, :, self.length:end].copy_(key_states)
+        self.buffer[layer_idx, 1, :, :, self.length:end].copy_(value_states)
+        return self.buffer[layer_idx, 0, :, :, :end], self.buffer[layer_idx, 1, :, :, :end]
+
+    def update_from_outputs(self, past_key_values) -> "StaticCache":
+        """
+        Called after every forward pass with the ``past_key_values`` returned by the model. The first call allocates
+        the buffers and copies the states of the prompt in, the next ones only move the filled length forward since
+        the states have already been written by :meth:`update`.
+        """
+        if past_key_values is None:
+            return self
+        length = past_key_values[0][0].shape[-2]
+        if self.buffer is None:
+            key_states = past_key_values[0][0]
+            batch_size, num_heads, _, head_dim = key_states.shape
+            if length > self.max_length:
+                raise RuntimeError(f"The static cache can only hold {self.max_length} positions, but {length} are needed.")
+            shape = (len(past_key_values), 2, batch_size, num_heads, self.max_length, head_dim)
+            self.buffer = key_states.new_zeros(shape)
+            self._spare = key_states.new_zeros(shape)
+            for layer_idx, layer_past in enumerate(past_key_values):
+                self.buffer[layer_idx, 0, :, :, :length].copy_(layer_past[0])
+                self.buffer[layer_idx, 1, :, :, :length].copy_(layer_past[1])
+            if len(past_key_values[0]) == 4:
+                self.cross_states = [tuple(layer_past[2:]) for layer_past in past_key_values]
+        self.length = length
+        return self
+
+    def reorder_(self, beam_idx: "torch.LongTensor") -> "StaticCache":
+        """
+        Reorders the cached beams in place with ``beam_idx``.
+        """
+        if self.buffer is not None:
+            torch.index_select(
+                self.buffer[..., :self.length, :], 2, beam_idx, out=self._spare[..., :self.length, :]
+            )
+            self.buffer, self._spare = self._spare, self.buffer
+        return self
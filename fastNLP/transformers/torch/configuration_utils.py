@@ -97,6 +97,10 @@ class PretrainedConfig:
             that the feed forward layer is not chunked. A chunk size of n means that the feed forward layer processes
             :obj:`n` < sequence_length embeddings at a time. For more information on feed forward chunking, see `How
             does Feed Forward Chunking work? <../glossary.html#feed-forward-chunking>`__ .
+        unpad_inputs (:obj:`bool`, `optional`, defaults to :obj:`False`):
+            Whether the encoders supporting it (BERT, RoBERTa, ElasticBERT and the encoder of CPT) should remove the
+            padding tokens before the encoder layers and only attend over the real tokens. The outputs are padded
+            back with zeros at the padding positions. See :class:`~fastNLP.transformers.torch.modeling_utils.UnpaddedBatch`.
 
     Parameters for sequence generation
 
@@ -207,6 +211,10 @@ class PretrainedConfig:
 
           This attribute is currently not being used during model loading time, but this may change in the future
           versions. But we can already start preparing for the future by saving the dtype with save_pretrained.
+        - **quantization_config** (:obj:`dict`, `optional`) -- Set by
+          :meth:`~fastNLP.transformers.torch.PreTrainedModel.quantize_dynamic`, e.g. ``{"method": "dynamic", "dtype":
+          "qint8"}``. :meth:`~fastNLP.transformers.torch.PreTrainedModel.from_pretrained` quantizes the model the same
+          way when it is set.
 
     TensorFlow specific parameters
 
@@ -234,6 +242,7 @@ class PretrainedConfig:
         self.output_attentions = kwargs.pop("output_attentions", False)
         self.torchscript = kwargs.pop("torchscript", False)  # Only used by PyTorch models
         self.torch_dtype = kwargs.pop("torch_dtype", None)  # Only used by PyTorch models
+        self.quantization_config = kwargs.pop("quantization_config", None)  # Only used by PyTorch models
         self.use_bfloat16 = kwargs.pop("use_bfloat16", False)
         self.pruned_heads = kwargs.pop("pruned_heads", {})
         self.tie_word_embeddings = kwargs.pop(
@@ -264,6 +273,7 @@ class PretrainedConfig:
         self.bad_words_ids = kwargs.pop("bad_words_ids", None)
         self.num_return_sequences = kwargs.pop("num_return_sequences", 1)
         self.chunk_size_feed_forward = kwargs.pop("chunk_size_feed_forward", 0)
+        self.unpad_inputs = kwargs.pop("unpad_inputs", False)
         self.output_scores = kwargs.pop("output_scores", False)
         self.return_dict_in_generate = kwargs.pop("return_dict_in_generate", False)
         self.forced_bos_token_id = kwargs.pop("forced_bos_token_id", None)
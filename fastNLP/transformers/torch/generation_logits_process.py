@@ -16,7 +16,7 @@
 import inspect
 import math
 from abc import ABC
-from typing import Callable, Iterable, List, Optional
+from typing import Callable, List, Optional
 
 import numpy as np
 
@@ -239,39 +239,54 @@ class TopKLogitsWarper(LogitsWarper):
         return scores
 
 
-def _get_ngrams(ngram_size: int, prev_input_ids: "torch.Tensor", num_hypos: int):
-    generated_ngrams = [{} for _ in range(num_hypos)]
-    for idx in range(num_hypos):
-        gen_tokens = prev_input_ids[idx].tolist()
-        generated_ngram = generated_ngrams[idx]
-        for ngram in zip(*[gen_tokens[i:] for i in range(ngram_size)]):
-            prev_ngram_tuple = tuple(ngram[:-1])
-            generated_ngram[prev_ngram_tuple] = generated_ngram.get(prev_ngram_tuple, []) + [ngram[-1]]
-    return generated_ngrams
+# polynomial rolling hash of token windows, the products stay below 2**62 so the int64 arithmetic never overflows
+_NGRAM_HASH_BASE = 1000003
+_NGRAM_HASH_MOD = 2147483647
 
 
-def _get_generated_ngrams(banned_ngrams, prev_input_ids, ngram_size, cur_len):
-    # Before decoding the next token, prevent decoding of ngrams that have already appeared
-    start_idx = cur_len + 1 - ngram_size
-    ngram_idx = tuple(prev_input_ids[start_idx:cur_len].tolist())
-    return banned_ngrams.get(ngram_idx, [])
+def _hash_windows(windows: "torch.LongTensor") -> "torch.LongTensor":
+    """Hashes the last dimension of ``windows``, the hash of an empty window is 0."""
+    hashes = windows.new_zeros(windows.shape[:-1])
+    for k in range(windows.shape[-1]):
+        hashes = (hashes * _NGRAM_HASH_BASE + windows[..., k]) % _NGRAM_HASH_MOD
+    return hashes
 
 
-def _calc_banned_ngram_tokens(
-    ngram_size: int, prev_input_ids: "torch.Tensor", num_hypos: int, cur_len: int
-) -> List[Iterable[int]]:
-    """Copied from fairseq for no_repeat_ngram in beam_search"""
-    if cur_len + 1 < ngram_size:
-        # return no banned tokens if we haven't generated no_repeat_ngram_size tokens yet
-        return [[] for _ in range(num_hypos)]
-
-    generated_ngrams = _get_ngrams(ngram_size, prev_input_ids, num_hypos)
-
-    banned_tokens = [
-        _get_generated_ngrams(generated_ngrams[hypo_idx], prev_input_ids[hypo_idx], ngram_size, cur_len)
-        for hypo_idx in range(num_hypos)
-    ]
-    return banned_tokens
+def _hash_prefixes(input_ids: "torch.LongTensor", prefix_len: int) -> "torch.LongTensor":
+    """
+    Returns the hashes of all the windows of ``prefix_len`` tokens of ``input_ids``, of shape :obj:`(batch_size,
+    sequence_length - prefix_len + 1)`.
+    """
+    if prefix_len == 0:
+        return input_ids.new_zeros(input_ids.shape[0], input_ids.shape[1] + 1)
+    return _hash_windows(input_ids.unfold(1, prefix_len, 1))
+
+
+def _ban_ngram_matches(
+    scores: "torch.FloatTensor",
+    input_ids: "torch.LongTensor",
+    matches: "torch.BoolTensor",
+    ngram_ids: "torch.LongTensor",
+    prefix_len: int,
+    ngram_rows: Optional["torch.LongTensor"] = None,
+) -> "torch.FloatTensor":
+    """
+    Sets to `-inf` the scores of the tokens following the n-gram prefixes whose hash matches the hash of the last
+    ``prefix_len`` tokens of each hypothesis. ``matches[i, j]`` tells whether the prefix starting at position ``j`` of
+    the row ``ngram_rows[i]`` of ``ngram_ids`` matches the hypothesis ``i``; the candidates are checked token by token
+    so that a hash collision never bans a token.
+    """
+    rows, positions = matches.nonzero(as_tuple=True)
+    if rows.numel() == 0:
+        return scores
+    source_rows = rows if ngram_rows is None else ngram_rows[rows]
+    if prefix_len > 0:
+        offsets = torch.arange(prefix_len, device=input_ids.device)
+        candidates = ngram_ids[source_rows.unsqueeze(1), positions.unsqueeze(1) + offsets]
+        keep = (candidates == input_ids[rows, -prefix_len:]).all(-1)
+        rows, source_rows, positions = rows[keep], source_rows[keep], positions[keep]
+    scores[rows, ngram_ids[source_rows, positions + prefix_len]] = -float("inf")
+    return scores
 
 
 class NoRepeatNGramLogitsProcessor(LogitsProcessor):
@@ -279,6 +294,10 @@ class NoRepeatNGramLogitsProcessor(LogitsProcessor):
     :class:`transformers.LogitsProcessor` that enforces no repetition of n-grams. See `Fairseq
     <https://github.com/pytorch/fairseq/blob/a07cb6f40480928c9e0548b737aadd36ee66ac76/fairseq/sequence_generator.py#L345>`__.
 
+    The processor keeps, for each hypothesis, the hashes of the prefixes of all the n-grams generated so far. When it
+    is called with the sequences of the previous call extended by one token (possibly reordered by beam search), only
+    the n-gram ending with the new token is hashed; otherwise the table is rebuilt from :obj:`input_ids`.
+
     Args:
         ngram_size (:obj:`int`):
             All ngrams of size :obj:`ngram_size` can only occur once.
@@ -288,16 +307,62 @@ class NoRepeatNGramLogitsProcessor(LogitsProcessor):
         if not isinstance(ngram_size, int) or ngram_size <= 0:
             raise ValueError(f"`ngram_size` has to be a strictly positive integer, but is {ngram_size}")
         self.ngram_size = ngram_size
+        self._input_ids = None
+        # hashes of the prefixes of the complete n-grams, of shape (num_hypos, cur_len - ngram_size + 1)
+        self._ngram_hashes = None
+        # hashes of the last ngram_size - 1 tokens of each hypothesis
+        self._suffix_hashes = None
+
+    def _rebuild(self, input_ids: "torch.LongTensor"):
+        prefix_len = self.ngram_size - 1
+        prefix_hashes = _hash_prefixes(input_ids, prefix_len)
+        self._ngram_hashes = prefix_hashes[:, :-1]
+        self._suffix_hashes = prefix_hashes[:, -1]
+
+    def _parents(self, input_ids: "torch.LongTensor") -> Optional["torch.LongTensor"]:
+        """
+        Finds, for each hypothesis of ``input_ids``, the hypothesis of the previous call it extends. Returns ``None``
+        when ``input_ids`` does not extend the previous sequences by exactly one token.
+        """
+        prev = self._input_ids
+        if prev is None or prev.device != input_ids.device or input_ids.shape[1] != prev.shape[1] + 1:
+            return None
+        if input_ids.shape[0] == prev.shape[0] and torch.equal(input_ids[:, :-1], prev):
+            return torch.arange(prev.shape[0], device=prev.device)
+        # beam search reorders the hypotheses: the candidate parents are the previous hypotheses ending with the same
+        # tokens, and only these pairs are compared on the whole sequence
+        width = min(self.ngram_size, prev.shape[1])
+        found = (input_ids[:, -width - 1:-1].unsqueeze(1) == prev[:, prev.shape[1] - width:].unsqueeze(0)).all(-1)
+        rows, candidates = found.nonzero(as_tuple=True)
+        same = (input_ids[rows, :-1] == prev[candidates]).all(-1)
+        found = torch.zeros_like(found)
+        found[rows[same], candidates[same]] = True
+        if not bool(found.any(1).all()):
+            return None
+        return found.int().argmax(1)
+
+    def _update(self, input_ids: "torch.LongTensor"):
+        parents = self._parents(input_ids)
+        if parents is None:
+            self._rebuild(input_ids)
+        else:
+            prefix_len = self.ngram_size - 1
+            if input_ids.shape[1] > prefix_len:
+                # the previous suffix is the prefix of the n-gram completed by the new token
+                self._ngram_hashes = torch.cat(
+                    [self._ngram_hashes[parents], self._suffix_hashes[parents].unsqueeze(1)], dim=1
+                )
+                self._suffix_hashes = _hash_windows(input_ids[:, input_ids.shape[1] - prefix_len:])
+        self._input_ids = input_ids
 
     def __call__(self, input_ids: "torch.LongTensor", scores: "torch.FloatTensor") -> "torch.FloatTensor":
-        num_batch_hypotheses = scores.shape[0]
         cur_len = input_ids.shape[-1]
-        banned_batch_tokens = _calc_banned_ngram_tokens(self.ngram_size, input_ids, num_batch_hypotheses, cur_len)
-
-        for i, banned_tokens in enumerate(banned_batch_tokens):
-            scores[i, banned_tokens] = -float("inf")
-
-        return scores
+        if cur_len + 1 < self.ngram_size:
+            # no banned tokens if we haven't generated no_repeat_ngram_size tokens yet
+            return scores
+        self._update(input_ids)
+        matches = self._ngram_hashes == self._suffix_hashes.unsqueeze(1)
+        return _ban_ngram_matches(scores, input_ids, matches, input_ids, self.ngram_size - 1)
 
 
 class EncoderNoRepeatNGramLogitsProcessor(LogitsProcessor):
@@ -321,30 +386,33 @@ class EncoderNoRepeatNGramLogitsProcessor(LogitsProcessor):
         if len(encoder_input_ids.shape) == 1:
             encoder_input_ids = encoder_input_ids.unsqueeze(0)
         self.batch_size = encoder_input_ids.shape[0]
-        self.generated_ngrams = _get_ngrams(encoder_ngram_size, encoder_input_ids, self.batch_size)
+        self.encoder_input_ids = encoder_input_ids
+        if encoder_input_ids.shape[1] >= encoder_ngram_size:
+            self.encoder_ngram_hashes = _hash_prefixes(encoder_input_ids, encoder_ngram_size - 1)[:, :-1]
+        else:
+            self.encoder_ngram_hashes = encoder_input_ids.new_zeros(self.batch_size, 0)
 
     def __call__(self, input_ids: "torch.LongTensor", scores: "torch.FloatTensor") -> "torch.FloatTensor":
         # B x num_beams
         num_hypos = scores.shape[0]
         num_beams = num_hypos // self.batch_size
         cur_len = input_ids.shape[-1]
-        banned_batch_tokens = [
-            _get_generated_ngrams(
-                self.generated_ngrams[hypo_idx // num_beams], input_ids[hypo_idx], self.ngram_size, cur_len
-            )
-            for hypo_idx in range(num_hypos)
-        ]
-
-        for i, banned_tokens in enumerate(banned_batch_tokens):
-            scores[i, banned_tokens] = -float("inf")
-
-        return scores
+        prefix_len = self.ngram_size - 1
+        if cur_len < prefix_len:
+            return scores
+        suffix_hashes = _hash_windows(input_ids[:, cur_len - prefix_len:])
+        ngram_rows = torch.arange(num_hypos, device=input_ids.device) // num_beams
+        matches = self.encoder_ngram_hashes[ngram_rows] == suffix_hashes.unsqueeze(1)
+        return _ban_ngram_matches(scores, input_ids, matches, self.encoder_input_ids, prefix_len, ngram_rows)
 
 
 class NoBadWordsLogitsProcessor(LogitsProcessor):
     """
     :class:`transformers.LogitsProcessor` that enforces that specified sequences will never be sampled.
 
+    The bad words of more than one token are grouped by length, so each call compares the end of all the hypotheses
+    with all the bad words of a group at once and writes the banned tokens into a mask with a single ``scatter_``.
+
     Args:
         bad_words_ids (:obj:`List[List[int]]`):
             List of list of token ids that are not allowed to be generated. In order to get the tokens of the words
@@ -378,6 +446,9 @@ class NoBadWordsLogitsProcessor(LogitsProcessor):
                 self.bad_words_id_length_greater_than_1.append(word)
 
         self.static_bad_words_mask: Optional[torch.LongTensor] = None
+        # (prefixes, last tokens) of the bad words of more than one token grouped by prefix length, built on the
+        # device of the scores at the first call
+        self._dynamic_bad_words = None
 
         for banned_token_seq in self.bad_words_id_length_greater_than_1:
             assert len(banned_token_seq) > 0, f"Banned words token sequences {bad_words_ids} cannot have an empty list"
@@ -385,87 +456,65 @@ class NoBadWordsLogitsProcessor(LogitsProcessor):
     def __call__(self, input_ids: "torch.LongTensor", scores: "torch.FloatTensor") -> "torch.FloatTensor":
         if self.static_bad_words_mask is None and len(self.bad_words_id_length_1) > 0:
             self.static_bad_words_mask = self._calc_static_bad_word_mask(scores)
-
-        dynamic_banned_tokens = self._calc_banned_bad_words_ids(input_ids.tolist())
-        scores = self._set_scores_to_inf_for_banned_tokens(scores, dynamic_banned_tokens)
-
-        return scores
+        if self._dynamic_bad_words is None:
+            self._dynamic_bad_words = self._group_dynamic_bad_words(scores)
+
+        banned_mask = self._calc_dynamic_bad_word_mask(input_ids, scores)
+        if banned_mask is None:
+            banned_mask = self.static_bad_words_mask
+        elif self.static_bad_words_mask is not None:
+            banned_mask = banned_mask | self.static_bad_words_mask
+        if banned_mask is None:
+            return scores
+        return scores.masked_fill(banned_mask, -float("inf"))
 
     def _calc_static_bad_word_mask(self, scores: "torch.FloatTensor") -> "torch.BoolTensor":
         static_bad_words_mask = torch.zeros(scores.shape[1])
         static_bad_words_mask[self.bad_words_id_length_1] = 1
         return static_bad_words_mask.unsqueeze(0).to(scores.device).bool()
 
-    def _tokens_match(self, prev_tokens: List[int], tokens: List[int]) -> bool:
-        if len(tokens) == 0:
-            # if bad word tokens is just one token always ban it
-            return True
-        elif len(tokens) > len(prev_tokens):
-            # if bad word tokens are longer then prev input_ids they can't be equal
-            return False
-        else:
-            return prev_tokens[-len(tokens) :] == tokens
-
-    def _calc_banned_bad_words_ids(self, prev_input_ids: List[List[int]]) -> Iterable[int]:
-        banned_tokens = []
-        for prev_input_ids_slice in prev_input_ids:
-            banned_tokens_slice = []
-            for banned_token_seq in self.bad_words_id_length_greater_than_1:
-                if self._tokens_match(prev_input_ids_slice, banned_token_seq[:-1]):
-                    banned_tokens_slice.append(banned_token_seq[-1])
-
-            banned_tokens.append(banned_tokens_slice)
-
-        return banned_tokens
-
-    def _set_scores_to_inf_for_banned_tokens(
-        self, scores: "torch.Tensor", banned_tokens: List[List[int]]
-    ) -> "torch.Tensor":
-        """
-        Modifies the scores in place by setting the banned token positions to `-inf`. Banned token is expected to be a
-        list of list of banned tokens to ban in the format [[batch index, vocabulary position],...
-
-        Args:
-            scores: logits distribution of shape (batch size, vocabulary size)
-            banned_tokens: list of list of tokens to ban of length (batch_size)
-        """
-        banned_mask_list = []
-        for idx, batch_banned_tokens in enumerate(banned_tokens):
-            for token in batch_banned_tokens:
-                # Eliminates invalid bad word IDs that are over the vocabulary size.
-                if token <= scores.shape[1]:
-                    banned_mask_list.append([idx, token])
-                else:
-                    logger.error(
-                        f"An invalid bad word ID is defined: {token}. This ID is not contained in the"
-                        f"vocabulary, and is therefore ignored."
-                    )
-        if not banned_mask_list and self.static_bad_words_mask is None:
-            return scores
-
-        else:
-            if banned_mask_list:
-                banned_mask = torch.LongTensor(banned_mask_list)
-                indices = torch.ones(len(banned_mask))
-                # A sparse tensor is generated from a list of coordinates: [[0, 1], [0, 2], [2, 0]]. A conversion to dense tensor generates:
-                # [ 0  1  1 ]
-                # [ 0  0  0 ]
-                # [ 1  0  0 ]
-
-                banned_mask = (
-                    torch.sparse.LongTensor(banned_mask.t(), indices, scores.size())
-                    .to(scores.device)
-                    .to_dense()
-                    .bool()
+    def _group_dynamic_bad_words(self, scores: "torch.FloatTensor"):
+        vocab_size = scores.shape[1]
+        groups = {}
+        for banned_token_seq in self.bad_words_id_length_greater_than_1:
+            # Eliminates invalid bad word IDs that are over the vocabulary size.
+            if banned_token_seq[-1] >= vocab_size:
+                logger.error(
+                    f"An invalid bad word ID is defined: {banned_token_seq[-1]}. This ID is not contained in the"
+                    f"vocabulary, and is therefore ignored."
                 )
+                continue
+            prefixes, last_tokens = groups.setdefault(len(banned_token_seq) - 1, ([], []))
+            prefixes.append(banned_token_seq[:-1])
+            last_tokens.append(banned_token_seq[-1])
+        return [
+            (
+                prefix_len,
+                torch.tensor(prefixes, dtype=torch.long, device=scores.device),
+                torch.tensor(last_tokens, dtype=torch.long, device=scores.device),
+            )
+            for prefix_len, (prefixes, last_tokens) in sorted(groups.items())
+        ]
 
-                if self.static_bad_words_mask is not None:
-                    banned_mask = torch.bitwise_or(banned_mask, self.static_bad_words_mask)
-            else:
-                banned_mask = self.static_bad_words_mask
-
-            scores = scores.masked_fill(banned_mask, -float("inf"))
-            return scores
+    def _calc_dynamic_bad_word_mask(
+        self, input_ids: "torch.LongTensor", scores: "torch.FloatTensor"
+    ) -> Optional["torch.BoolTensor"]:
+        num_hypos, vocab_size = scores.shape
+        banned_tokens = []
+        for prefix_len, prefixes, last_tokens in self._dynamic_bad_words:
+            if prefix_len > input_ids.shape[1]:
+                # the bad words are sorted by length, the next ones cannot match either
+                break
+            # (num_hypos, num_bad_words)
+            matches = (input_ids[:, None, input_ids.shape[1] - prefix_len:] == prefixes.unsqueeze(0)).all(-1)
+            # the bad words that do not match point to an extra column dropped below
+            banned_tokens.append(torch.where(matches, last_tokens.unsqueeze(0), last_tokens.new_tensor(vocab_size)))
+        if len(banned_tokens) == 0:
+            return None
+        banned_tokens = torch.cat(banned_tokens, dim=1)
+        banned_mask = torch.zeros(num_hypos, vocab_size + 1, dtype=torch.bool, device=scores.device)
+        banned_mask.scatter_(1, banned_tokens, True)
+        return banned_mask[:, :vocab_size]
 
 
 class PrefixConstrainedLogitsProcessor(LogitsProcessor):
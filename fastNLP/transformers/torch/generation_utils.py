@@ -17,6 +17,7 @@
 from dataclasses import dataclass
 from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
+from .cache_utils import StaticCache
 from .file_utils import ModelOutput
 from .generation_beam_search import BeamScorer, BeamSearchScorer
 from .generation_logits_process import (
@@ -502,6 +503,10 @@ class GenerationMixin:
         else:
             model_kwargs["past"] = None
 
+        # keep the past in the preallocated buffers
+        if model_kwargs.get("static_cache") is not None and model_kwargs["past"] is not None:
+            model_kwargs["past"] = model_kwargs["static_cache"].update_from_outputs(model_kwargs["past"])
+
         # update token_type_ids with last value
         if "token_type_ids" in model_kwargs:
             token_type_ids = model_kwargs["token_type_ids"]
@@ -522,6 +527,11 @@ class GenerationMixin:
             f"Make sure that a `_reorder_cache` function is correctly implemented in {self.__class__.__module__} to enable beam search for {self.__class__}"
         )
 
+    def _reorder_past(self, past, beam_idx):
+        if isinstance(past, StaticCache):
+            return past.reorder_(beam_idx)
+        return self._reorder_cache(past, beam_idx)
+
     def _get_logits_warper(
         self, top_k: int = None, top_p: float = None, temperature: float = None, num_beams: int = None
     ) -> LogitsProcessorList:
@@ -677,6 +687,7 @@ class GenerationMixin:
         forced_eos_token_id: Optional[int] = None,
         remove_invalid_values: Optional[bool] = None,
         synced_gpus: Optional[bool] = None,
+        use_static_cache: Optional[bool] = None,
         **model_kwargs,
     ) -> Union[GreedySearchOutput, SampleOutput, BeamSearchOutput, BeamSampleOutput, "torch.LongTensor"]:
         r"""
@@ -787,6 +798,12 @@ class GenerationMixin:
                 crash. Note that using ``remove_invalid_values`` can slow down generation.
             synced_gpus (:obj:`bool`, `optional`, defaults to :obj:`False`):
                 Whether to continue running the while loop until max_length (needed for ZeRO stage 3)
+            use_static_cache (:obj:`bool`, `optional`, defaults to :obj:`False`):
+                Whether to keep the past key/values in a :class:`~fastNLP.transformers.torch.cache_utils.StaticCache`
+                preallocated for ``max_length`` positions, written in place at every step and reordered in place by
+                beam search, instead of concatenating them at every step. Only models whose attention modules support
+                it (GPT-2, BART, CPT and the BERT-like decoders) can use it, and it needs ``use_cache`` and a
+                ``max_length`` stopping criteria.
 
             model_kwargs:
                 Additional model specific kwargs will be forwarded to the :obj:`forward` function of the model. If the
@@ -980,6 +997,13 @@ class GenerationMixin:
             max_length=max_length, max_time=max_time, max_new_tokens=max_new_tokens, start_length=cur_len
         )
 
+        if use_static_cache:
+            if use_cache is False:
+                raise ValueError("`use_static_cache=True` needs `use_cache=True`.")
+            if stopping_criteria.max_length is None:
+                raise ValueError("`use_static_cache=True` needs `max_length` or `max_new_tokens`.")
+            model_kwargs["static_cache"] = StaticCache(stopping_criteria.max_length)
+
         if is_greedy_gen_mode:
             if num_return_sequences > 1:
                 raise ValueError(
@@ -1855,7 +1879,7 @@ class GenerationMixin:
                 outputs, model_kwargs, is_encoder_decoder=self.config.is_encoder_decoder
             )
             if model_kwargs["past"] is not None:
-                model_kwargs["past"] = self._reorder_cache(model_kwargs["past"], beam_idx)
+                model_kwargs["past"] = self._reorder_past(model_kwargs["past"], beam_idx)
 
             # increase cur_len
             cur_len = cur_len + 1
@@ -2158,7 +2182,7 @@ class GenerationMixin:
                 outputs, model_kwargs, is_encoder_decoder=self.config.is_encoder_decoder
             )
             if model_kwargs["past"] is not None:
-                model_kwargs["past"] = self._reorder_cache(model_kwargs["past"], beam_idx)
+                model_kwargs["past"] = self._reorder_past(model_kwargs["past"], beam_idx)
 
             # increase cur_len
             cur_len = cur_len + 1
@@ -2499,7 +2523,7 @@ class GenerationMixin:
                 outputs, model_kwargs, is_encoder_decoder=self.config.is_encoder_decoder
             )
             if model_kwargs["past"] is not None:
-                model_kwargs["past"] = self._reorder_cache(model_kwargs["past"], reordering_indices)
+                model_kwargs["past"] = self._reorder_past(model_kwargs["past"], reordering_indices)
 
             # increase cur_len
             cur_len = cur_len + 1
@@ -1,8 +1,12 @@
 import inspect
+import json
+import math
+import mmap
 import os
 import re
+from collections import OrderedDict
 from contextlib import contextmanager
-from functools import partial
+from functools import partial, reduce
 from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
 from .activations import get_activation
@@ -11,6 +15,7 @@ from .deepspeed import deepspeed_config, is_deepspeed_zero3_enabled
 from .utils.versions import require_version_core
 from .file_utils import (
     DUMMY_INPUTS,
+    FLAT_WEIGHTS_SUFFIX,
     WEIGHTS_NAME,
     cached_path,
     hf_bucket_url,
@@ -60,6 +65,162 @@ def no_init_weights(_enable=True):
     finally:
         _init_weights = True
 
+
+@contextmanager
+def init_empty_weights(_enable=True):
+    """
+    Context manager under which the parameters of the new modules are created on the ``meta`` device, so that neither
+    their memory is allocated nor their default initialization is run. The buffers are still created normally.
+    """
+    if not _enable:
+        yield
+        return
+    register_parameter = nn.Module.register_parameter
+
+    def register_empty_parameter(module, name, param):
+        register_parameter(module, name, param)
+        if param is not None:
+            param_cls = type(module._parameters[name])
+            module._parameters[name] = param_cls(module._parameters[name].to("meta"), requires_grad=param.requires_grad)
+
+    nn.Module.register_parameter = register_empty_parameter
+    try:
+        yield
+    finally:
+        nn.Module.register_parameter = register_parameter
+
+
+_FLAT_MAGIC = b"FNLPFLAT"
+# the data of every tensor starts at a multiple of this number of bytes
+_FLAT_ALIGNMENT = 64
+
+
+def _dtype_to_str(dtype: "torch.dtype") -> str:
+    return str(dtype)[len("torch."):]
+
+
+def convert_to_flat_checkpoint(checkpoint_file: str, flat_file: Optional[str] = None) -> str:
+    """
+    Converts a checkpoint saved by :func:`torch.save` into a flat file: a json header giving the dtype, the shape and
+    the offset of every tensor, followed by the raw data of the tensors. Such a file is memory-mapped by
+    :func:`load_flat_checkpoint` without being parsed or copied, and the pages of the mapping are shared by all the
+    processes loading it.
+
+    Args:
+        checkpoint_file (:obj:`str`):
+            The path of the checkpoint, usually a ``pytorch_model.bin``.
+        flat_file (:obj:`str`, `optional`):
+            Where to write the flat file, defaults to ``checkpoint_file`` followed by ``.flat``.
+
+    Returns:
+        :obj:`str`: The path of the flat file.
+    """
+    if flat_file is None:
+        flat_file = checkpoint_file + FLAT_WEIGHTS_SUFFIX
+    state_dict = _torch_load_mmap(checkpoint_file)
+
+    tensors = {}
+    offsets = {}
+    end = 0
+    for name, tensor in state_dict.items():
+        # the tied weights are saved once
+        key = (tensor.data_ptr(), tensor.dtype, tuple(tensor.shape), tensor.stride())
+        if key not in offsets:
+            offsets[key] = (end, tensor)
+            end += -(-tensor.numel() * tensor.element_size() // _FLAT_ALIGNMENT) * _FLAT_ALIGNMENT
+        tensors[name] = {
+            "dtype": _dtype_to_str(tensor.dtype),
+            "shape": list(tensor.shape),
+            "offset": offsets[key][0],
+        }
+    metadata = getattr(state_dict, "_metadata", None)
+    header = json.dumps({"tensors": tensors, "metadata": metadata}).encode("utf-8")
+    data_start = -(-(len(_FLAT_MAGIC) + 8 + len(header)) // _FLAT_ALIGNMENT) * _FLAT_ALIGNMENT
+
+    # written under a temporary name, so that the processes converting the same checkpoint do not read a partial file
+    tmp_file = f"{flat_file}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, "wb") as f:
+            f.write(_FLAT_MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for offset, tensor in offsets.values():
+                f.seek(data_start + offset)
+                f.write(memoryview(tensor.detach().contiguous().reshape(-1).view(torch.uint8).numpy()))
+            f.truncate(data_start + end)
+        os.replace(tmp_file, flat_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+    return flat_file
+
+
+def load_flat_checkpoint(flat_file: str) -> Dict[str, "torch.Tensor"]:
+    """
+    Memory-maps a file written by :func:`convert_to_flat_checkpoint`. The returned tensors are views of a private
+    mapping of the file: nothing is read before the tensors are used and writing to them does not modify the file.
+
+    Args:
+        flat_file (:obj:`str`):
+            The path of the flat file.
+
+    Returns:
+        :obj:`Dict[str, torch.Tensor]`: The state dict.
+    """
+    with open(flat_file, "rb") as f:
+        if f.read(len(_FLAT_MAGIC)) != _FLAT_MAGIC:
+            raise ValueError(f"{flat_file} is not a flat checkpoint.")
+        header_len = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_len).decode("utf-8"))
+        data_start = -(-(len(_FLAT_MAGIC) + 8 + header_len) // _FLAT_ALIGNMENT) * _FLAT_ALIGNMENT
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    state_dict = {}
+    for name, info in header["tensors"].items():
+        dtype = getattr(torch, info["dtype"])
+        numel = reduce(lambda x, y: x * y, info["shape"], 1)
+        if numel == 0:
+            tensor = torch.empty(info["shape"], dtype=dtype)
+        else:
+            tensor = torch.frombuffer(buffer, dtype=dtype, count=numel, offset=data_start + info["offset"])
+            tensor = tensor.view(info["shape"])
+        state_dict[name] = tensor
+    if header["metadata"] is not None:
+        state_dict = OrderedDict(state_dict)
+        state_dict._metadata = header["metadata"]
+    return state_dict
+
+
+def _torch_load_mmap(checkpoint_file: str) -> Dict[str, "torch.Tensor"]:
+    """
+    Loads ``checkpoint_file`` with :func:`torch.load` memory-mapping the tensors when possible, that is for the zip
+    checkpoints written by torch>=1.6.
+    """
+    try:
+        return torch.load(checkpoint_file, map_location="cpu", mmap=True)
+    except (TypeError, RuntimeError) as e:
+        logger.info(f"Cannot memory-map {checkpoint_file} ({e}), loading it in memory instead.")
+        return torch.load(checkpoint_file, map_location="cpu")
+
+
+def _load_checkpoint_mmap(checkpoint_file: str, convert_to_flat: bool = False) -> Dict[str, "torch.Tensor"]:
+    """
+    Loads the tensors of ``checkpoint_file`` lazily. The flat copy of the checkpoint is used when it is up to date; it
+    is written first when ``convert_to_flat`` is :obj:`True`.
+    """
+    if checkpoint_file.endswith(FLAT_WEIGHTS_SUFFIX):
+        return load_flat_checkpoint(checkpoint_file)
+    flat_file = checkpoint_file + FLAT_WEIGHTS_SUFFIX
+    if os.path.isfile(flat_file) and os.path.getmtime(flat_file) >= os.path.getmtime(checkpoint_file):
+        return load_flat_checkpoint(flat_file)
+    if convert_to_flat:
+        try:
+            return load_flat_checkpoint(convert_to_flat_checkpoint(checkpoint_file, flat_file))
+        except OSError as e:
+            logger.warning(f"Failed to write the flat checkpoint {flat_file}: {e}")
+    return _torch_load_mmap(checkpoint_file)
+
+
 def find_pruneable_heads_and_indices(
     heads: List[int], n_heads: int, head_size: int, already_pruned_heads: Set[int]
 ) -> Tuple[Set[int], "torch.LongTensor"]:
@@ -422,6 +583,9 @@ class PreTrainedModel(Module, ModuleUtilsMixin, GenerationMixin):
     # a list of of tensor names to ignore when saving the model (useful for keys that aren't
     # trained, but which are deterministic, or tied variables)
     _keys_to_ignore_on_save = None
+    # a list of re pattern of module names, the ``nn.Linear`` layers matching one of them are quantized by
+    # :meth:`quantize_dynamic` (the attention and feed-forward projections of the transformer layers by default)
+    _keys_to_quantize = [r"(^|\.)layers?\.\d+\."]
 
     is_parallelizable = False
     supports_gradient_checkpointing = False
@@ -932,6 +1096,53 @@ class PreTrainedModel(Module, ModuleUtilsMixin, GenerationMixin):
         if self.supports_gradient_checkpointing:
             self.apply(partial(self._set_gradient_checkpointing, value=False))
 
+    @property
+    def is_quantized(self) -> bool:
+        """
+        :obj:`bool`: Whether the model has been quantized by :meth:`quantize_dynamic`.
+        """
+        return getattr(self.config, "quantization_config", None) is not None
+
+    def quantize_dynamic(self, dtype: str = "qint8"):
+        """
+        Switches the model to a CPU inference mode where the ``nn.Linear`` layers of the attention and feed-forward
+        blocks (the modules matching :obj:`_keys_to_quantize`) are replaced by dynamically quantized ones: the weights
+        are stored in ``dtype`` and the activations are quantized on the fly, batch by batch. The embeddings, the
+        layer norms and the task heads are kept in float32. The quantization is recorded in
+        :obj:`config.quantization_config`, so the model can be saved with :meth:`save_pretrained` and reloaded with
+        :meth:`from_pretrained`. The quantization happens in place and cannot be undone.
+
+        Args:
+            dtype (:obj:`str`, `optional`, defaults to :obj:`"qint8"`):
+                The dtype of the quantized weights, either ``"qint8"`` or ``"float16"``.
+
+        Returns:
+            The model itself.
+        """
+        if self.is_quantized:
+            raise RuntimeError(f"{self.__class__.__name__} has already been quantized.")
+        self._apply_dynamic_quantization(dtype)
+        self.config.quantization_config = {"method": "dynamic", "dtype": dtype}
+        return self
+
+    def _apply_dynamic_quantization(self, dtype: str):
+        if dtype not in ("qint8", "float16"):
+            raise ValueError(f"`dtype` should be either 'qint8' or 'float16', but received {dtype}.")
+        if self.device.type != "cpu":
+            raise RuntimeError("Dynamic quantization is only supported for models on cpu.")
+        try:
+            from torch.ao.quantization import quantize_dynamic
+        except ImportError:
+            from torch.quantization import quantize_dynamic
+        module_names = {
+            name
+            for name, module in self.named_modules()
+            if isinstance(module, nn.Linear) and any(re.search(pat, name) for pat in self._keys_to_quantize)
+        }
+        if len(module_names) == 0:
+            logger.warning(f"No module of {self.__class__.__name__} matches {self._keys_to_quantize}, nothing is quantized.")
+        quantize_dynamic(self, qconfig_spec=module_names, dtype=getattr(torch, dtype), inplace=True)
+
     def save_pretrained(
         self,
         save_directory: Union[str, os.PathLike],
@@ -1106,6 +1317,22 @@ class PreTrainedModel(Module, ModuleUtilsMixin, GenerationMixin):
             low_cpu_mem_usage(:obj:`bool`, `optional`, defaults to `:obj:`False`):
                 Tries to not use more than 1x model size in CPU memory (including peak memory) while loading the model.
                 This is an experimental feature and a subject to change at any moment.
+            mmap(:obj:`bool`, `optional`, defaults to :obj:`False`):
+                Memory-maps the checkpoint instead of reading it, requires torch>=2.1. The parameters are created on
+                the ``meta`` device without being initialized and are then replaced by the mapped tensors, so the
+                weights are only read when they are used and the pages are shared by all the processes loading the
+                same file (e.g. the ranks of a distributed training). The weights missing from the checkpoint are
+                initialized with :meth:`_init_weights`. Takes precedence over :obj:`low_cpu_mem_usage` and cannot be
+                used with DeepSpeed ZeRO-3.
+            convert_to_flat(:obj:`bool`, `optional`, defaults to :obj:`False`):
+                Used with :obj:`mmap`. Converts the checkpoint once into a flat file next to it (see
+                :func:`convert_to_flat_checkpoint`), which the next loads map directly without unpickling anything.
+                An up to date flat file is always used by :obj:`mmap`, whether this argument is set or not.
+            quantization_config (:obj:`dict`, `optional`):
+                Like any other attribute of the configuration, overrides :obj:`config.quantization_config`. The model
+                is quantized with :meth:`quantize_dynamic` when it is set, e.g. ``{"method": "dynamic", "dtype":
+                "qint8"}`` loads a float checkpoint and quantizes it. Checkpoints saved from a quantized model are
+                reloaded quantized without this argument.
             torch_dtype (:obj:`str` or :obj:`torch.dtype`, `optional`):
                 Override the default ``torch.dtype`` and load the model under this dtype. If ``"auto"`` is passed the
                 dtype will be automatically derived from the model's weights.
@@ -1175,6 +1402,14 @@ class PreTrainedModel(Module, ModuleUtilsMixin, GenerationMixin):
         _fast_init = kwargs.pop("_fast_init", True)
         torch_dtype = kwargs.pop("torch_dtype", None)
         low_cpu_mem_usage = kwargs.pop("low_cpu_mem_usage", False)
+        use_mmap = kwargs.pop("mmap", False)
+        convert_to_flat = kwargs.pop("convert_to_flat", False)
+
+        if use_mmap:
+            require_version_core("torch>=2.1")
+            if is_deepspeed_zero3_enabled():
+                raise ValueError("mmap arg cannot be used with DeepSpeed ZeRO-3")
+            low_cpu_mem_usage = False
 
         user_agent = {"file_type": "model", "framework": "pytorch", "from_auto_class": from_auto_class}
         if from_pipeline is not None:
@@ -1205,6 +1440,15 @@ class PreTrainedModel(Module, ModuleUtilsMixin, GenerationMixin):
         else:
             model_kwargs = kwargs
 
+        quantization_config = getattr(config, "quantization_config", None)
+        if quantization_config is not None:
+            if use_mmap or low_cpu_mem_usage or is_deepspeed_zero3_enabled():
+                raise ValueError(
+                    "Quantized models cannot be loaded with `mmap`, `low_cpu_mem_usage` or DeepSpeed ZeRO-3."
+                )
+            if quantization_config.get("method") != "dynamic":
+                raise ValueError(f"Unsupported quantization method: {quantization_config.get('method')}.")
+
         # Load model
         if pretrained_model_name_or_path is not None:
             pretrained_model_name_or_path = str(pretrained_model_name_or_path)
@@ -1212,6 +1456,11 @@ class PreTrainedModel(Module, ModuleUtilsMixin, GenerationMixin):
                 if os.path.isfile(os.path.join(pretrained_model_name_or_path, WEIGHTS_NAME)):
                     # Load from a PyTorch checkpoint
                     archive_file = os.path.join(pretrained_model_name_or_path, WEIGHTS_NAME)
+                elif use_mmap and os.path.isfile(
+                    os.path.join(pretrained_model_name_or_path, WEIGHTS_NAME + FLAT_WEIGHTS_SUFFIX)
+                ):
+                    # Load from the flat copy of a PyTorch checkpoint
+                    archive_file = os.path.join(pretrained_model_name_or_path, WEIGHTS_NAME + FLAT_WEIGHTS_SUFFIX)
                 else:
                     raise EnvironmentError(
                         f"Error no file named {[WEIGHTS_NAME]} found in "
@@ -1269,7 +1518,10 @@ class PreTrainedModel(Module, ModuleUtilsMixin, GenerationMixin):
         # load pt weights early so that we know which dtype to init the model under
         if state_dict is None:
             try:
-                state_dict = torch.load(resolved_archive_file, map_location="cpu")
+                if use_mmap:
+                    state_dict = _load_checkpoint_mmap(resolved_archive_file, convert_to_flat=convert_to_flat)
+                else:
+                    state_dict = torch.load(resolved_archive_file, map_location="cpu")
             except Exception as e:
                 try:
                     with open(resolved_archive_file) as f:
@@ -1322,12 +1574,21 @@ class PreTrainedModel(Module, ModuleUtilsMixin, GenerationMixin):
                 with no_init_weights(_enable=_fast_init):
                     model = cls(config, *model_args, **model_kwargs)
         else:
-            with no_init_weights(_enable=_fast_init):
+            with no_init_weights(_enable=_fast_init or use_mmap), init_empty_weights(_enable=use_mmap):
                 model = cls(config, *model_args, **model_kwargs)
 
         if dtype_orig is not None:
             torch.set_default_dtype(dtype_orig)
 
+        # a quantized checkpoint is loaded into a model quantized the same way, a float one into the float model which
+        # is quantized afterwards
+        quantize_after_loading = quantization_config is not None and not any(
+            "_packed_params" in key for key in state_dict.keys()
+        )
+        if quantization_config is not None and not quantize_after_loading:
+            config.quantization_config = None
+            model.quantize_dynamic(quantization_config["dtype"])
+
         if low_cpu_mem_usage:
             cls._load_state_dict_into_model_low_mem(model, loaded_state_dict_keys, resolved_archive_file)
         else:
@@ -1337,11 +1598,19 @@ class PreTrainedModel(Module, ModuleUtilsMixin, GenerationMixin):
                 pretrained_model_name_or_path,
                 ignore_mismatched_sizes=ignore_mismatched_sizes,
                 _fast_init=_fast_init,
+                _assign=use_mmap,
             )
 
         # make sure token embedding weights are still tied if needed
         model.tie_weights()
 
+        if use_mmap:
+            model._init_meta_weights()
+
+        if quantize_after_loading:
+            config.quantization_config = None
+            model.quantize_dynamic(quantization_config["dtype"])
+
         # Set model in evaluation mode to deactivate DropOut modules by default
         model.eval()
 
@@ -1358,7 +1627,13 @@ class PreTrainedModel(Module, ModuleUtilsMixin, GenerationMixin):
 
     @classmethod
     def _load_state_dict_into_model(
-        cls, model, state_dict, pretrained_model_name_or_path, ignore_mismatched_sizes=False, _fast_init=True
+        cls,
+        model,
+        state_dict,
+        pretrained_model_name_or_path,
+        ignore_mismatched_sizes=False,
+        _fast_init=True,
+        _assign=False,
     ):
 
         # Convert old format to new format if needed from a PyTorch state_dict
@@ -1412,6 +1687,7 @@ class PreTrainedModel(Module, ModuleUtilsMixin, GenerationMixin):
 
                 if (
                     model_key in model_state_dict
+                    and isinstance(state_dict[checkpoint_key], torch.Tensor)
                     and state_dict[checkpoint_key].shape != model_state_dict[model_key].shape
                 ):
                     mismatched_keys.append(
@@ -1449,6 +1725,19 @@ class PreTrainedModel(Module, ModuleUtilsMixin, GenerationMixin):
         # so we need to apply the function recursively.
         def load(module: nn.Module, prefix=""):
             local_metadata = {} if metadata is None else metadata.get(prefix[:-1], {})
+            if _assign:
+                # the tensors of the state dict replace the parameters instead of being copied into them, the ones
+                # whose dtype differs from the model are converted first
+                local_metadata = dict(local_metadata, assign_to_params_buffers=True)
+                for name, tensor in list(module._parameters.items()) + list(module._buffers.items()):
+                    key = prefix + name
+                    if (
+                        tensor is not None
+                        and key in state_dict
+                        and state_dict[key].dtype != tensor.dtype
+                        and state_dict[key].is_floating_point()
+                    ):
+                        state_dict[key] = state_dict[key].to(tensor.dtype)
             args = (state_dict, prefix, local_metadata, True, [], [], error_msgs)
             if is_deepspeed_zero3_enabled():
                 import deepspeed
@@ -1523,6 +1812,38 @@ class PreTrainedModel(Module, ModuleUtilsMixin, GenerationMixin):
 
         return model, missing_keys, unexpected_keys, mismatched_keys, error_msgs
 
+    def _init_meta_weights(self):
+        """
+        Materializes and initializes the parameters and buffers still on the ``meta`` device after loading a
+        checkpoint with ``mmap=True``, i.e. the ones missing from the checkpoint or whose shape did not match. The
+        loaded weights of the same modules are left untouched.
+        """
+        for module in self.modules():
+            tensors = [(module._parameters, name) for name in module._parameters] + [
+                (module._buffers, name) for name in module._buffers
+            ]
+            tensors = [(store, name) for store, name in tensors if store[name] is not None]
+            if not any(store[name].is_meta for store, name in tensors):
+                continue
+            loaded = {}
+            for store, name in tensors:
+                tensor = store[name]
+                if not tensor.is_meta:
+                    # _init_weights works in place, the loaded tensors are swapped out while it runs
+                    loaded[(id(store), name)] = tensor
+                new_tensor = torch.empty_like(tensor, device="cpu")
+                if isinstance(tensor, nn.Parameter):
+                    new_tensor = type(tensor)(new_tensor, requires_grad=tensor.requires_grad)
+                store[name] = new_tensor
+            # the default initialization of the module first, as when it is created, for the weights _init_weights
+            # does not handle
+            if hasattr(module, "reset_parameters"):
+                module.reset_parameters()
+            self._init_weights(module)
+            for store, name in tensors:
+                if (id(store), name) in loaded:
+                    store[name] = loaded[(id(store), name)]
+
     def retrieve_modules_from_names(self, names, add_prefix=False, remove_prefix=False):
         module_keys = set([".".join(key.split(".")[:-1]) for key in names])
 
@@ -1885,4 +2206,102 @@ def apply_chunking_to_forward(
         # concatenate output at same dimension
         return torch.cat(output_chunks, dim=chunk_dim)
 
-    return forward_fn(*input_tensors)
\ No newline at end of file
+    return forward_fn(*input_tensors)
+
+
+class UnpaddedBatch:
+    """
+    Records where the real tokens of a padded batch are, so that the position-wise parts of an encoder (the
+    projections, the feed forward layers and the layer norms) can run on the ``total_tokens`` real tokens only instead
+    of ``batch_size * seq_length`` tokens, and the attention runs over ``max_length`` (the longest real sequence of the
+    batch) instead of ``seq_length``.
+
+    The real tokens do not need to be contiguous: inside each sequence they keep their relative order.
+
+    Args:
+        attention_mask (:obj:`torch.Tensor` of shape :obj:`(batch_size, seq_length)`):
+            1 for the real tokens and 0 for the padding tokens.
+    """
+
+    def __init__(self, attention_mask: "torch.Tensor"):
+        mask = attention_mask.bool()
+        self.batch_size, self.seq_length = mask.shape
+        lengths = mask.sum(-1)
+        self.indices = torch.nonzero(mask.flatten(), as_tuple=False).flatten()
+        self.total_tokens = self.indices.numel()
+        self.max_length = max(int(lengths.max()), 1) if self.batch_size > 0 else 1
+        # position of each real token in the [batch_size, max_length] layout used by the attention
+        positions = mask.long().cumsum(-1) - 1
+        batch_ids = torch.arange(self.batch_size, device=mask.device).unsqueeze(-1).expand_as(positions)
+        dense_positions = batch_ids * self.max_length + positions
+        self.dense_indices = dense_positions.flatten()[self.indices]
+        # True for the keys that can be attended to
+        key_mask = torch.arange(self.max_length, device=mask.device).unsqueeze(0) < lengths.unsqueeze(-1)
+        self.key_padding_mask = key_mask[:, None, None, :]
+
+    def unpad(self, tensor: "torch.Tensor") -> "torch.Tensor":
+        """
+        Gathers the real tokens of ``[batch_size, seq_length, ...]`` into ``[total_tokens, ...]``.
+        """
+        return tensor.reshape(self.batch_size * self.seq_length, *tensor.shape[2:]).index_select(0, self.indices)
+
+    def pad(self, tensor: "torch.Tensor") -> "torch.Tensor":
+        """
+        The inverse of :meth:`unpad`, padding positions are filled with zeros.
+        """
+        output = tensor.new_zeros((self.batch_size * self.seq_length,) + tuple(tensor.shape[1:]))
+        output = output.index_copy(0, self.indices, tensor)
+        return output.view(self.batch_size, self.seq_length, *tensor.shape[1:])
+
+    def to_dense(self, tensor: "torch.Tensor") -> "torch.Tensor":
+        """
+        Scatters ``[total_tokens, ...]`` to ``[batch_size, max_length, ...]`` for the attention.
+        """
+        output = tensor.new_zeros((self.batch_size * self.max_length,) + tuple(tensor.shape[1:]))
+        output = output.index_copy(0, self.dense_indices, tensor)
+        return output.view(self.batch_size, self.max_length, *tensor.shape[1:])
+
+    def from_dense(self, tensor: "torch.Tensor") -> "torch.Tensor":
+        """
+        The inverse of :meth:`to_dense`.
+        """
+        return tensor.reshape(self.batch_size * self.max_length, *tensor.shape[2:]).index_select(0, self.dense_indices)
+
+
+def unpadded_attention(
+    query: "torch.Tensor",
+    key: "torch.Tensor",
+    value: "torch.Tensor",
+    batch: UnpaddedBatch,
+    dropout_p: float = 0.0,
+) -> "torch.Tensor":
+    """
+    Bidirectional attention over the real tokens of :obj:`batch`.
+
+    Args:
+        query, key, value (:obj:`torch.Tensor` of shape :obj:`(total_tokens, num_heads, head_size)`):
+            The projected real tokens.
+        batch (:class:`UnpaddedBatch`):
+            Where the tokens come from.
+        dropout_p (:obj:`float`):
+            The dropout probability of the attention probabilities.
+
+    Returns:
+        :obj:`torch.Tensor` of shape :obj:`(total_tokens, num_heads * head_size)`: The context of each real token.
+    """
+    num_heads, head_size = query.shape[1:]
+    # [batch_size, num_heads, max_length, head_size]
+    query = batch.to_dense(query).transpose(1, 2)
+    key = batch.to_dense(key).transpose(1, 2)
+    value = batch.to_dense(value).transpose(1, 2)
+    if hasattr(nn.functional, "scaled_dot_product_attention"):
+        context = nn.functional.scaled_dot_product_attention(
+            query, key, value, attn_mask=batch.key_padding_mask, dropout_p=dropout_p
+        )
+    else:
+        scores = torch.matmul(query, key.transpose(-1, -2)) / math.sqrt(head_size)
+        scores = scores.masked_fill(~batch.key_padding_mask, torch.finfo(scores.dtype).min)
+        probs = nn.functional.dropout(scores.softmax(dim=-1), p=dropout_p)
+        context = torch.matmul(probs, value)
+    context = context.transpose(1, 2)
+    return batch.from_dense(context).reshape(-1, num_heads * head_size)
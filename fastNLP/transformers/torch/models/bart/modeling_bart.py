@@ -35,6 +35,7 @@ from fastNLP.transformers.torch.modeling_outputs import (
     Seq2SeqQuestionAnsweringModelOutput,
     Seq2SeqSequenceClassifierOutput,
 )
+from fastNLP.transformers.torch.cache_utils import StaticCacheLayer
 from fastNLP.transformers.torch.modeling_utils import PreTrainedModel
 from .configuration_bart import BartConfig
 from fastNLP.envs.imports import _NEED_IMPORT_TORCH
@@ -195,8 +196,11 @@ class BartAttention(Module):
             # reuse k, v, self_attention
             key_states = self._shape(self.k_proj(hidden_states), -1, bsz)
             value_states = self._shape(self.v_proj(hidden_states), -1, bsz)
-            key_states = torch.cat([past_key_value[0], key_states], dim=2)
-            value_states = torch.cat([past_key_value[1], value_states], dim=2)
+            if isinstance(past_key_value, StaticCacheLayer):
+                key_states, value_states = past_key_value.update(key_states, value_states)
+            else:
+                key_states = torch.cat([past_key_value[0], key_states], dim=2)
+                value_states = torch.cat([past_key_value[1], value_states], dim=2)
         else:
             # self_attention
             key_states = self._shape(self.k_proj(hidden_states), -1, bsz)
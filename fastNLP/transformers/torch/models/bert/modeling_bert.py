@@ -41,11 +41,14 @@ from fastNLP.transformers.torch.modeling_outputs import (
     SequenceClassifierOutput,
     TokenClassifierOutput,
 )
+from fastNLP.transformers.torch.cache_utils import StaticCacheLayer
 from fastNLP.transformers.torch.modeling_utils import (
     PreTrainedModel,
+    UnpaddedBatch,
     apply_chunking_to_forward,
     find_pruneable_heads_and_indices,
     prune_linear_layer,
+    unpadded_attention,
 )
 from .configuration_bert import BertConfig
 from fastNLP.envs.imports import _NEED_IMPORT_TORCH
@@ -223,8 +226,11 @@ class BertSelfAttention(Module):
         elif past_key_value is not None:
             key_layer = self.transpose_for_scores(self.key(hidden_states))
             value_layer = self.transpose_for_scores(self.value(hidden_states))
-            key_layer = torch.cat([past_key_value[0], key_layer], dim=2)
-            value_layer = torch.cat([past_key_value[1], value_layer], dim=2)
+            if isinstance(past_key_value, StaticCacheLayer):
+                key_layer, value_layer = past_key_value.update(key_layer, value_layer)
+            else:
+                key_layer = torch.cat([past_key_value[0], key_layer], dim=2)
+                value_layer = torch.cat([past_key_value[1], value_layer], dim=2)
         else:
             key_layer = self.transpose_for_scores(self.key(hidden_states))
             value_layer = self.transpose_for_scores(self.value(hidden_states))
@@ -288,6 +294,17 @@ class BertSelfAttention(Module):
             outputs = outputs + (past_key_value,)
         return outputs
 
+    def forward_unpadded(self, hidden_states, batch):
+        """
+        Self-attention over the real tokens only, :obj:`hidden_states` is of shape ``(total_tokens, hidden_size)``.
+        """
+        new_shape = (hidden_states.size(0), self.num_attention_heads, self.attention_head_size)
+        query_layer = self.query(hidden_states).view(*new_shape)
+        key_layer = self.key(hidden_states).view(*new_shape)
+        value_layer = self.value(hidden_states).view(*new_shape)
+        dropout_p = self.dropout.p if self.training else 0.0
+        return unpadded_attention(query_layer, key_layer, value_layer, batch, dropout_p)
+
 
 class BertSelfOutput(Module):
     def __init__(self, config):
@@ -351,6 +368,9 @@ class BertAttention(Module):
         outputs = (attention_output,) + self_outputs[1:]  # add attentions if we output them
         return outputs
 
+    def forward_unpadded(self, hidden_states, batch):
+        return self.output(self.self.forward_unpadded(hidden_states, batch), hidden_states)
+
 
 class BertIntermediate(Module):
     def __init__(self, config):
@@ -463,6 +483,10 @@ class BertLayer(Module):
         layer_output = self.output(intermediate_output, attention_output)
         return layer_output
 
+    def forward_unpadded(self, hidden_states, batch):
+        attention_output = self.attention.forward_unpadded(hidden_states, batch)
+        return apply_chunking_to_forward(self.feed_forward_chunk, self.chunk_size_feed_forward, 0, attention_output)
+
 
 class BertEncoder(Module):
     def __init__(self, config):
@@ -560,6 +584,29 @@ class BertEncoder(Module):
             cross_attentions=all_cross_attentions,
         )
 
+    def forward_unpadded(self, hidden_states, attention_mask, output_hidden_states=False, return_dict=True):
+        """
+        Runs the layers on the real tokens only. :obj:`attention_mask` is the 2D mask of shape ``(batch_size,
+        seq_length)``; the outputs are padded back and are zeros at the padding positions.
+        """
+        batch = UnpaddedBatch(attention_mask)
+        hidden_states = batch.unpad(hidden_states)
+        all_hidden_states = () if output_hidden_states else None
+        for layer_module in self.layer:
+            if output_hidden_states:
+                all_hidden_states = all_hidden_states + (batch.pad(hidden_states),)
+            hidden_states = layer_module.forward_unpadded(hidden_states, batch)
+        hidden_states = batch.pad(hidden_states)
+        if output_hidden_states:
+            all_hidden_states = all_hidden_states + (hidden_states,)
+
+        if not return_dict:
+            return tuple(v for v in [hidden_states, all_hidden_states] if v is not None)
+        return BaseModelOutputWithPastAndCrossAttentions(
+            last_hidden_state=hidden_states,
+            hidden_states=all_hidden_states,
+        )
+
 
 class BertPooler(Module):
     def __init__(self, config):
@@ -822,6 +869,23 @@ class BertModel(BertPreTrainedModel):
         for layer, heads in heads_to_prune.items():
             self.encoder.layer[layer].attention.prune_heads(heads)
 
+    def _use_unpadded_encoder(self, attention_mask, head_mask, encoder_hidden_states, past_key_values, output_attentions):
+        """
+        Whether the encoder can run on the real tokens only, see :obj:`config.unpad_inputs`. It falls back to the padded
+        execution for everything the unpadded one does not support.
+        """
+        return (
+            getattr(self.config, "unpad_inputs", False)
+            and not self.config.is_decoder
+            and attention_mask.dim() == 2
+            and head_mask is None
+            and encoder_hidden_states is None
+            and past_key_values is None
+            and not output_attentions
+            and getattr(self.config, "position_embedding_type", "absolute") == "absolute"
+            and not (self.encoder.gradient_checkpointing and self.training)
+        )
+
     @add_start_docstrings_to_model_forward(BERT_INPUTS_DOCSTRING.format("batch_size, sequence_length"))
     @add_code_sample_docstrings(
         tokenizer_class=_TOKENIZER_FOR_DOC,
@@ -922,6 +986,9 @@ class BertModel(BertPreTrainedModel):
         # attention_probs has shape bsz x n_heads x N x N
         # input head_mask has shape [num_heads] or [num_hidden_layers x num_heads]
         # and head_mask is converted to shape [num_hidden_layers x batch x num_heads x seq_length x seq_length]
+        unpad = self._use_unpadded_encoder(
+            attention_mask, head_mask, encoder_hidden_states, past_key_values, output_attentions
+        )
         head_mask = self.get_head_mask(head_mask, self.config.num_hidden_layers)
 
         embedding_output = self.embeddings(
@@ -931,18 +998,26 @@ class BertModel(BertPreTrainedModel):
             inputs_embeds=inputs_embeds,
             past_key_values_length=past_key_values_length,
         )
-        encoder_outputs = self.encoder(
-            embedding_output,
-            attention_mask=extended_attention_mask,
-            head_mask=head_mask,
-            encoder_hidden_states=encoder_hidden_states,
-            encoder_attention_mask=encoder_extended_attention_mask,
-            past_key_values=past_key_values,
-            use_cache=use_cache,
-            output_attentions=output_attentions,
-            output_hidden_states=output_hidden_states,
-            return_dict=return_dict,
-        )
+        if unpad:
+            encoder_outputs = self.encoder.forward_unpadded(
+                embedding_output,
+                attention_mask,
+                output_hidden_states=output_hidden_states,
+                return_dict=return_dict,
+            )
+        else:
+            encoder_outputs = self.encoder(
+                embedding_output,
+                attention_mask=extended_attention_mask,
+                head_mask=head_mask,
+                encoder_hidden_states=encoder_hidden_states,
+                encoder_attention_mask=encoder_extended_attention_mask,
+                past_key_values=past_key_values,
+                use_cache=use_cache,
+                output_attentions=output_attentions,
+                output_hidden_states=output_hidden_states,
+                return_dict=return_dict,
+            )
         sequence_output = encoder_outputs[0]
         pooled_output = self.pooler(sequence_output) if self.pooler is not None else None
 
@@ -16,6 +16,7 @@
 
 
 import collections
+import multiprocessing
 import os
 import unicodedata
 from typing import List, Optional, Tuple
@@ -108,6 +109,23 @@ def load_vocab(vocab_file):
     return vocab
 
 
+_batch_worker_tokenizer = None
+
+
+def _init_batch_worker(tokenizer):
+    global _batch_worker_tokenizer
+    _batch_worker_tokenizer = tokenizer
+
+
+def _tokenize_batch_worker(texts):
+    return [_batch_worker_tokenizer.tokenize(text) for text in texts]
+
+
+def _encode_batch_worker(args):
+    texts, add_special_tokens = args
+    return _batch_worker_tokenizer.encode_batch(texts, add_special_tokens)
+
+
 def whitespace_tokenize(text):
     """Runs basic whitespace cleaning and splitting on a piece of text."""
     text = text.strip()
@@ -248,6 +266,60 @@ class BertTokenizer(PreTrainedTokenizer):
         out_string = " ".join(tokens).replace(" ##", "").strip()
         return out_string
 
+    def _map_in_pool(self, worker, tasks, num_proc):
+        with multiprocessing.Pool(num_proc, initializer=_init_batch_worker, initargs=(self,)) as pool:
+            results = []
+            # imap keeps the order of the chunks
+            for chunk_result in pool.imap(worker, tasks):
+                results.extend(chunk_result)
+        return results
+
+    def tokenize_batch(self, texts: List[str], num_proc: int = 0, chunksize: int = 1000) -> List[List[str]]:
+        """
+        Tokenizes a list of texts, the same as ``[self.tokenize(text) for text in texts]``.
+
+        Args:
+            texts (:obj:`List[str]`):
+                The texts to be tokenized.
+            num_proc (:obj:`int`, `optional`, defaults to 0):
+                Number of processes used to tokenize. When it is smaller than 2 or there is only one chunk, the texts
+                are tokenized in the current process.
+            chunksize (:obj:`int`, `optional`, defaults to 1000):
+                Number of texts sent to a sub process at a time.
+
+        Returns:
+            :obj:`List[List[str]]`: The tokens of each text, in the same order as :obj:`texts`.
+        """
+        if num_proc < 2 or len(texts) <= chunksize:
+            return [self.tokenize(text) for text in texts]
+        chunks = [texts[i: i + chunksize] for i in range(0, len(texts), chunksize)]
+        return self._map_in_pool(_tokenize_batch_worker, chunks, num_proc)
+
+    def encode_batch(
+        self, texts: List[str], add_special_tokens: bool = True, num_proc: int = 0, chunksize: int = 1000
+    ) -> List[List[int]]:
+        """
+        Same as :meth:`PreTrainedTokenizer.encode_batch`, but can encode large corpora across a process pool.
+
+        Args:
+            texts (:obj:`List[str]`):
+                The texts to be encoded.
+            add_special_tokens (:obj:`bool`, `optional`, defaults to :obj:`True`):
+                Whether or not to add ``[CLS]`` and ``[SEP]`` around each text.
+            num_proc (:obj:`int`, `optional`, defaults to 0):
+                Number of processes used to encode. When it is smaller than 2 or there is only one chunk, the texts
+                are encoded in the current process.
+            chunksize (:obj:`int`, `optional`, defaults to 1000):
+                Number of texts sent to a sub process at a time.
+
+        Returns:
+            :obj:`List[List[int]]`: The ids of each text, in the same order as :obj:`texts`.
+        """
+        if num_proc < 2 or len(texts) <= chunksize:
+            return super().encode_batch(texts, add_special_tokens)
+        tasks = [(texts[i: i + chunksize], add_special_tokens) for i in range(0, len(texts), chunksize)]
+        return self._map_in_pool(_encode_batch_worker, tasks, num_proc)
+
     def build_inputs_with_special_tokens(
         self, token_ids_0: List[int], token_ids_1: Optional[List[int]] = None
     ) -> List[int]:
@@ -508,6 +580,37 @@ class WordpieceTokenizer(object):
         self.vocab = vocab
         self.unk_token = unk_token
         self.max_input_chars_per_word = max_input_chars_per_word
+        self._trie = None
+        self._trie_vocab_size = -1
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the trie is rebuilt lazily, there is no need to pickle it to the sub processes
+        state["_trie"] = None
+        state["_trie_vocab_size"] = -1
+        return state
+
+    def _build_trie(self):
+        """
+        Builds two character tries out of the vocabulary: one for the pieces at the beginning of a word and one for
+        the ``##`` continuation pieces (stored without the ``##`` prefix). The special key ``""`` marks the end of a
+        vocabulary entry.
+        """
+        word_trie, continuation_trie = {}, {}
+        for piece in self.vocab:
+            if not piece:
+                continue
+            ref = word_trie
+            for char in piece:
+                ref = ref.setdefault(char, {})
+            ref[""] = piece
+            if piece.startswith("##") and len(piece) > 2:
+                ref = continuation_trie
+                for char in piece[2:]:
+                    ref = ref.setdefault(char, {})
+                ref[""] = piece
+        self._trie = (word_trie, continuation_trie)
+        self._trie_vocab_size = len(self.vocab)
 
     def tokenize(self, text):
         """
@@ -516,6 +619,9 @@ class WordpieceTokenizer(object):
 
         For example, :obj:`input = "unaffable"` wil return as output :obj:`["un", "##aff", "##able"]`.
 
+        The longest match is found by walking a character trie built from the vocabulary, so each piece costs at most
+        the length of the longest vocabulary entry instead of probing the vocabulary with every substring.
+
         Args:
           text: A single token or whitespace separated tokens. This should have
             already been passed through `BasicTokenizer`.
@@ -523,35 +629,39 @@ class WordpieceTokenizer(object):
         Returns:
           A list of wordpiece tokens.
         """
+        if self._trie is None or self._trie_vocab_size != len(self.vocab):
+            self._build_trie()
+        word_trie, continuation_trie = self._trie
 
         output_tokens = []
         for token in whitespace_tokenize(text):
-            chars = list(token)
-            if len(chars) > self.max_input_chars_per_word:
+            length = len(token)
+            if length > self.max_input_chars_per_word:
                 output_tokens.append(self.unk_token)
                 continue
 
-            is_bad = False
             start = 0
             sub_tokens = []
-            while start < len(chars):
-                end = len(chars)
+            while start < length:
+                ref = word_trie if start == 0 else continuation_trie
                 cur_substr = None
-                while start < end:
-                    substr = "".join(chars[start:end])
-                    if start > 0:
-                        substr = "##" + substr
-                    if substr in self.vocab:
-                        cur_substr = substr
+                end = start
+                pos = start
+                while pos < length:
+                    ref = ref.get(token[pos])
+                    if ref is None:
                         break
-                    end -= 1
+                    pos += 1
+                    piece = ref.get("")
+                    if piece is not None:
+                        cur_substr = piece
+                        end = pos
                 if cur_substr is None:
-                    is_bad = True
                     break
                 sub_tokens.append(cur_substr)
                 start = end
 
-            if is_bad:
+            if start < length:
                 output_tokens.append(self.unk_token)
             else:
                 output_tokens.extend(sub_tokens)
@@ -32,6 +32,7 @@ from fastNLP.transformers.torch.modeling_outputs import (
     Seq2SeqQuestionAnsweringModelOutput,
     Seq2SeqSequenceClassifierOutput,
 )
+from fastNLP.transformers.torch.cache_utils import StaticCacheLayer
 from fastNLP.transformers.torch.modeling_utils import PreTrainedModel
 from ..bart import BartConfig as CPTConfig
 from ..bert import BertModel, BertConfig
@@ -204,8 +205,11 @@ class CPTAttention(Module):
             # reuse k, v, self_attention
             key_states = self._shape(self.k_proj(hidden_states), -1, bsz)
             value_states = self._shape(self.v_proj(hidden_states), -1, bsz)
-            key_states = torch.cat([past_key_value[0], key_states], dim=2)
-            value_states = torch.cat([past_key_value[1], value_states], dim=2)
+            if isinstance(past_key_value, StaticCacheLayer):
+                key_states, value_states = past_key_value.update(key_states, value_states)
+            else:
+                key_states = torch.cat([past_key_value[0], key_states], dim=2)
+                value_states = torch.cat([past_key_value[1], value_states], dim=2)
         else:
             # self_attention
             key_states = self._shape(self.k_proj(hidden_states), -1, bsz)
@@ -807,6 +811,7 @@ class CPTModel(CPTPretrainedModel):
             intermediate_size=config.encoder_ffn_dim,
             hidden_dropout_prob=config.activation_dropout,
             attention_probs_dropout_prob=config.attention_dropout,
+            unpad_inputs=getattr(config, "unpad_inputs", False),
         )
         config.vocab_size = encoder_config.vocab_size
         self.encoder = BertModel(encoder_config, add_pooling_layer=False)
@@ -42,6 +42,16 @@ class ElasticBertConfig(PretrainedConfig):
         num_output_layers (:obj: `int`, default to 1):
             The number of classification layers. Used to specify how many classification layers there are. 
             It is 1 in static usage, and equal to num_hidden_layers in dynamic usage.
+        early_exit_criterion (:obj:`str`, `optional`):
+            Used by :class:`ElasticBertForSequenceClassification` and :class:`ElasticBertForTokenClassification` in
+            evaluation mode when ``num_output_layers > 1``. ``"entropy"`` makes a sample exit at the first output layer
+            whose prediction has an entropy lower than ``early_exit_entropy``, ``"patience"`` at the first output layer
+            whose prediction is the same as the one of the ``early_exit_patience`` previous output layers. For token
+            classification, all the tokens of a sample have to meet the criterion. :obj:`None` runs all the layers.
+        early_exit_entropy (:obj:`float`, default to 0.5):
+            The entropy threshold of the ``"entropy"`` criterion.
+        early_exit_patience (:obj:`int`, default to 2):
+            The number of consecutive identical predictions needed by the ``"patience"`` criterion.
     """
 
     model_type = "elasticbert"
@@ -66,6 +76,9 @@ class ElasticBertConfig(PretrainedConfig):
         gradient_checkpointing=False,
         position_embedding_type="absolute",
         use_cache=True,
+        early_exit_criterion=None,
+        early_exit_entropy=0.5,
+        early_exit_patience=2,
         **kwargs
     ):
         super().__init__(pad_token_id=pad_token_id, **kwargs)
@@ -86,4 +99,11 @@ class ElasticBertConfig(PretrainedConfig):
         self.layer_norm_eps = layer_norm_eps
         self.gradient_checkpointing = gradient_checkpointing
         self.position_embedding_type = position_embedding_type
-        self.use_cache = use_cache
\ No newline at end of file
+        self.use_cache = use_cache
+        if early_exit_criterion not in (None, "entropy", "patience"):
+            raise ValueError(
+                f"`early_exit_criterion` must be None, 'entropy' or 'patience', but is {early_exit_criterion}."
+            )
+        self.early_exit_criterion = early_exit_criterion
+        self.early_exit_entropy = early_exit_entropy
+        self.early_exit_patience = early_exit_patience
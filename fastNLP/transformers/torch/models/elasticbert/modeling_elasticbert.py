@@ -22,11 +22,14 @@ from typing import Optional, Tuple
 
 from fastNLP.transformers.torch.activations import ACT2FN
 
+from fastNLP.transformers.torch.cache_utils import StaticCacheLayer
 from fastNLP.transformers.torch.modeling_utils import (
     PreTrainedModel,
+    UnpaddedBatch,
     apply_chunking_to_forward,
     find_pruneable_heads_and_indices,
     prune_linear_layer,
+    unpadded_attention,
 )
 
 from fastNLP.transformers.torch.file_utils import (
@@ -200,8 +203,11 @@ class ElasticBertSelfAttention(Module):
         elif past_key_value is not None:
             key_layer = self.transpose_for_scores(self.key(hidden_states))
             value_layer = self.transpose_for_scores(self.value(hidden_states))
-            key_layer = torch.cat([past_key_value[0], key_layer], dim=2)
-            value_layer = torch.cat([past_key_value[1], value_layer], dim=2)
+            if isinstance(past_key_value, StaticCacheLayer):
+                key_layer, value_layer = past_key_value.update(key_layer, value_layer)
+            else:
+                key_layer = torch.cat([past_key_value[0], key_layer], dim=2)
+                value_layer = torch.cat([past_key_value[1], value_layer], dim=2)
         else:
             key_layer = self.transpose_for_scores(self.key(hidden_states))
             value_layer = self.transpose_for_scores(self.value(hidden_states))
@@ -265,6 +271,17 @@ class ElasticBertSelfAttention(Module):
             outputs = outputs + (past_key_value,)
         return outputs
 
+    def forward_unpadded(self, hidden_states, batch):
+        """
+        Self-attention over the real tokens only, :obj:`hidden_states` is of shape ``(total_tokens, hidden_size)``.
+        """
+        new_shape = (hidden_states.size(0), self.num_attention_heads, self.attention_head_size)
+        query_layer = self.query(hidden_states).view(*new_shape)
+        key_layer = self.key(hidden_states).view(*new_shape)
+        value_layer = self.value(hidden_states).view(*new_shape)
+        dropout_p = self.dropout.p if self.training else 0.0
+        return unpadded_attention(query_layer, key_layer, value_layer, batch, dropout_p)
+
 
 class ElasticBertSelfOutput(Module):
     def __init__(self, config):
@@ -329,6 +346,9 @@ class ElasticBertAttention(Module):
         outputs = (attention_output,) + self_outputs[1:]  # add attentions if we output them
         return outputs
 
+    def forward_unpadded(self, hidden_states, batch):
+        return self.output(self.self.forward_unpadded(hidden_states, batch), hidden_states)
+
 
 class ElasticBertIntermediate(Module):
     def __init__(self, config):
@@ -441,6 +461,10 @@ class ElasticBertLayer(Module):
         layer_output = self.output(intermediate_output, attention_output)
         return layer_output
 
+    def forward_unpadded(self, hidden_states, batch):
+        attention_output = self.attention.forward_unpadded(hidden_states, batch)
+        return apply_chunking_to_forward(self.feed_forward_chunk, self.chunk_size_feed_forward, 0, attention_output)
+
 
 class ElasticBertPooler(Module):
     def __init__(self, config):
@@ -592,6 +616,29 @@ class ElasticBertEncoder(Module):
             attentions=all_self_attentions,
             cross_attentions=all_cross_attentions,
         )
+
+    def forward_unpadded(self, hidden_states, attention_mask, output_hidden_states=False, return_dict=None):
+        """
+        Runs the layers on the real tokens only. :obj:`attention_mask` is the 2D mask of shape ``(batch_size,
+        seq_length)``; the outputs are padded back and are zeros at the padding positions.
+        """
+        batch = UnpaddedBatch(attention_mask)
+        hidden_states = batch.unpad(hidden_states)
+        all_hidden_states = () if output_hidden_states else None
+        for layer_module in self.layer:
+            if output_hidden_states:
+                all_hidden_states = all_hidden_states + (batch.pad(hidden_states),)
+            hidden_states = layer_module.forward_unpadded(hidden_states, batch)
+        hidden_states = batch.pad(hidden_states)
+        if output_hidden_states:
+            all_hidden_states = all_hidden_states + (hidden_states,)
+
+        if not return_dict:
+            return (hidden_states, all_hidden_states, None, None, None)
+        return BaseModelOutputWithPastAndCrossAttentions(
+            last_hidden_state=hidden_states,
+            hidden_states=all_hidden_states,
+        )
         
 
 class ElasticBertPreTrainedModel(PreTrainedModel):
@@ -705,6 +752,8 @@ class ElasticBertModel(ElasticBertPreTrainedModel):
 
         self.embeddings = ElasticBertEmbeddings(config)
         self.encoder = ElasticBertEncoder(config, add_pooling_layer=add_pooling_layer)
+        # number of samples that exited at each layer, see `forward_early_exit`
+        self.early_exit_counts = None
 
         self.init_weights()
 
@@ -722,6 +771,166 @@ class ElasticBertModel(ElasticBertPreTrainedModel):
         for layer, heads in heads_to_prune.items():
             self.encoder.layer[layer].attention.prune_heads(heads)
 
+    def _use_unpadded_encoder(self, attention_mask, head_mask, encoder_hidden_states, past_key_values, output_attentions):
+        """
+        Whether the encoder can run on the real tokens only, see :obj:`config.unpad_inputs`. It falls back to the padded
+        execution for everything the unpadded one does not support.
+        """
+        return (
+            getattr(self.config, "unpad_inputs", False)
+            and not self.config.is_decoder
+            and attention_mask.dim() == 2
+            and head_mask is None
+            and encoder_hidden_states is None
+            and past_key_values is None
+            and not output_attentions
+            and getattr(self.config, "position_embedding_type", "absolute") == "absolute"
+            and not (getattr(self.config, "gradient_checkpointing", False) and self.training)
+        )
+
+    def forward_early_exit(
+        self,
+        exit_head,
+        input_ids=None,
+        attention_mask=None,
+        token_type_ids=None,
+        position_ids=None,
+        inputs_embeds=None,
+    ):
+        r"""
+        Runs the encoder layer by layer and lets every sample exit at the first output layer whose prediction meets
+        :obj:`config.early_exit_criterion`. The samples that exit are removed from the batch, and so are the padding
+        positions no remaining sample needs, before the next layer runs. The samples that never meet the criterion
+        exit at the last layer.
+
+        Args:
+            exit_head (:obj:`Callable`):
+                Called as ``exit_head(layer_idx, hidden_states)`` with the output of an output layer for the samples
+                still running, returns the logits of the exit of this layer, of shape :obj:`(num_samples, num_labels)`
+                or :obj:`(num_samples, sequence_length, num_labels)`.
+
+        Returns:
+            :obj:`tuple(torch.FloatTensor, torch.LongTensor)`: The logits of the exit of each sample, padded with zeros
+            to the input length for token-level logits, and the index of the layer each sample exited at.
+        """
+        criterion = self.config.early_exit_criterion
+        if criterion not in ("entropy", "patience"):
+            raise ValueError(f"`config.early_exit_criterion` must be 'entropy' or 'patience', but is {criterion}.")
+        if input_ids is not None and inputs_embeds is not None:
+            raise ValueError("You cannot specify both input_ids and inputs_embeds at the same time")
+        elif input_ids is not None:
+            batch_size, seq_length = input_ids.size()
+        elif inputs_embeds is not None:
+            batch_size, seq_length = inputs_embeds.size()[:-1]
+        else:
+            raise ValueError("You have to specify either input_ids or inputs_embeds")
+        device = input_ids.device if input_ids is not None else inputs_embeds.device
+        if attention_mask is None:
+            attention_mask = torch.ones((batch_size, seq_length), dtype=torch.long, device=device)
+        if token_type_ids is None:
+            token_type_ids = torch.zeros((batch_size, seq_length), dtype=torch.long, device=device)
+
+        hidden_states = self.embeddings(
+            input_ids=input_ids,
+            position_ids=position_ids,
+            token_type_ids=token_type_ids,
+            inputs_embeds=inputs_embeds,
+        )
+        start_output_layer = self.encoder.start_output_layer if self.num_output_layers > 1 else self.num_hidden_layers - 1
+
+        # the indices in the input batch of the samples still running
+        active = torch.arange(batch_size, device=device)
+        exit_logits = None
+        exit_layers = torch.full((batch_size,), self.num_hidden_layers - 1, dtype=torch.long, device=device)
+        patience_counts = torch.zeros(batch_size, dtype=torch.long, device=device)
+        last_predictions = None
+        for i, layer_module in enumerate(self.encoder.layer):
+            extended_attention_mask = self.get_extended_attention_mask(attention_mask, attention_mask.shape, device)
+            hidden_states = layer_module(hidden_states, extended_attention_mask)[0]
+            if i < start_output_layer:
+                continue
+
+            logits = exit_head(i, hidden_states)
+            if exit_logits is None:
+                shape = (batch_size, seq_length) if logits.dim() == 3 else (batch_size,)
+                exit_logits = logits.new_zeros(shape + (logits.shape[-1],))
+            if i == self.num_hidden_layers - 1:
+                exits = torch.ones_like(active, dtype=torch.bool)
+            else:
+                token_mask = attention_mask.bool() if logits.dim() == 3 else None
+                if criterion == "entropy":
+                    log_probs = torch.log_softmax(logits.float(), dim=-1)
+                    entropy = -(log_probs.exp() * log_probs).sum(-1)
+                    confident = entropy < self.config.early_exit_entropy
+                else:
+                    predictions = logits.argmax(-1)
+                    if last_predictions is None:
+                        confident = torch.zeros_like(predictions, dtype=torch.bool)
+                    else:
+                        confident = predictions == last_predictions
+                    last_predictions = predictions
+                if token_mask is not None:
+                    # the padding tokens always agree
+                    confident = (confident | ~token_mask).all(-1)
+                if criterion == "entropy":
+                    exits = confident
+                else:
+                    patience_counts = torch.where(confident, patience_counts + 1, torch.zeros_like(patience_counts))
+                    exits = patience_counts >= self.config.early_exit_patience
+
+            exited = active[exits]
+            if exited.numel() > 0:
+                if logits.dim() == 3:
+                    exit_logits[exited, :logits.shape[1]] = logits[exits].to(exit_logits.dtype)
+                else:
+                    exit_logits[exited] = logits[exits].to(exit_logits.dtype)
+                exit_layers[exited] = i
+            if bool(exits.all()):
+                break
+            if exited.numel() > 0:
+                keep = ~exits
+                active = active[keep]
+                hidden_states = hidden_states[keep]
+                attention_mask = attention_mask[keep]
+                patience_counts = patience_counts[keep]
+                if last_predictions is not None:
+                    last_predictions = last_predictions[keep]
+                # drop the trailing positions that are padding for all the remaining samples
+                length = int(attention_mask.nonzero()[:, 1].max()) + 1 if bool(attention_mask.any()) else 1
+                if length < attention_mask.shape[1]:
+                    hidden_states = hidden_states[:, :length]
+                    attention_mask = attention_mask[:, :length]
+                    if last_predictions is not None and last_predictions.dim() == 2:
+                        last_predictions = last_predictions[:, :length]
+
+        counts = torch.bincount(exit_layers, minlength=self.num_hidden_layers).cpu()
+        self.early_exit_counts = counts if self.early_exit_counts is None else self.early_exit_counts + counts
+        return exit_logits, exit_layers
+
+    def early_exit_stats(self):
+        """
+        Returns the statistics of the exits taken by :meth:`forward_early_exit` since the last
+        :meth:`reset_early_exit_stats`: the number of samples that exited at each layer (``"counts"``), their
+        proportion (``"ratios"``), the average number of layers run per sample (``"average_layers"``) and the speedup
+        over running all the layers it corresponds to (``"speedup"``).
+        """
+        if self.early_exit_counts is None or int(self.early_exit_counts.sum()) == 0:
+            return {"counts": [0] * self.num_hidden_layers, "ratios": [0.0] * self.num_hidden_layers,
+                    "average_layers": 0.0, "speedup": 1.0}
+        counts = self.early_exit_counts
+        total = int(counts.sum())
+        average_layers = float((counts * torch.arange(1, self.num_hidden_layers + 1)).sum()) / total
+        return {
+            "counts": counts.tolist(),
+            "ratios": (counts.double() / total).tolist(),
+            "average_layers": average_layers,
+            "speedup": self.num_hidden_layers / average_layers,
+        }
+
+    def reset_early_exit_stats(self):
+        """Resets the statistics returned by :meth:`early_exit_stats`."""
+        self.early_exit_counts = None
+
     @add_start_docstrings_to_model_forward(ELASTICBERT_INPUTS_DOCSTRING.format("batch_size, sequence_length"))
     @add_code_sample_docstrings(
         tokenizer_class=_TOKENIZER_FOR_DOC,
@@ -822,6 +1031,9 @@ class ElasticBertModel(ElasticBertPreTrainedModel):
         # attention_probs has shape bsz x n_heads x N x N
         # input head_mask has shape [num_heads] or [num_hidden_layers x num_heads]
         # and head_mask is converted to shape [num_hidden_layers x batch x num_heads x seq_length x seq_length]
+        unpad = self._use_unpadded_encoder(
+            attention_mask, head_mask, encoder_hidden_states, past_key_values, output_attentions
+        )
         head_mask = self.get_head_mask(head_mask, self.config.num_hidden_layers)
 
         embedding_output = self.embeddings(
@@ -832,18 +1044,26 @@ class ElasticBertModel(ElasticBertPreTrainedModel):
             past_key_values_length=past_key_values_length,
         )
 
-        encoder_outputs = self.encoder(
-            embedding_output,
-            attention_mask=extended_attention_mask,
-            head_mask=head_mask,
-            encoder_hidden_states=encoder_hidden_states,
-            encoder_attention_mask=encoder_extended_attention_mask,
-            past_key_values=past_key_values,
-            use_cache=use_cache,
-            output_attentions=output_attentions,
-            output_hidden_states=output_hidden_states,
-            return_dict=return_dict,
-        )
+        if unpad:
+            encoder_outputs = self.encoder.forward_unpadded(
+                embedding_output,
+                attention_mask,
+                output_hidden_states=output_hidden_states,
+                return_dict=return_dict,
+            )
+        else:
+            encoder_outputs = self.encoder(
+                embedding_output,
+                attention_mask=extended_attention_mask,
+                head_mask=head_mask,
+                encoder_hidden_states=encoder_hidden_states,
+                encoder_attention_mask=encoder_extended_attention_mask,
+                past_key_values=past_key_values,
+                use_cache=use_cache,
+                output_attentions=output_attentions,
+                output_hidden_states=output_hidden_states,
+                return_dict=return_dict,
+            )
 
         sequence_output = encoder_outputs[0]
 
@@ -999,6 +1219,26 @@ class ElasticBertForPreTrainingOutput(ModelOutput):
     attentions: Optional[Tuple["torch.FloatTensor"]] = None
 
 
+@dataclass
+class ElasticBertEarlyExitOutput(ModelOutput):
+    """
+    Output type of :class:`ElasticBertForSequenceClassification` and :class:`ElasticBertForTokenClassification` when
+    they run with early exits.
+
+    Args:
+        loss (`optional`, returned when ``labels`` is provided, ``torch.FloatTensor`` of shape :obj:`(1,)`):
+            Classification loss of the logits the samples exited with.
+        logits (:obj:`torch.FloatTensor` of shape :obj:`(batch_size, config.num_labels)` or :obj:`(batch_size, sequence_length, config.num_labels)`):
+            Classification scores (before SoftMax) of the output layer each sample exited at.
+        exit_layers (:obj:`torch.LongTensor` of shape :obj:`(batch_size,)`):
+            Index of the layer each sample exited at.
+    """
+
+    loss: Optional["torch.FloatTensor"] = None
+    logits: "torch.FloatTensor" = None
+    exit_layers: "torch.LongTensor" = None
+
+
 @add_start_docstrings(
     """
     Bert Model with two heads on top as done during the pretraining: a `masked language modeling` head and a `next
@@ -1369,21 +1609,54 @@ class ElasticBertForSequenceClassification(ElasticBertPreTrainedModel):
     def __init__(self, config):
         super().__init__(config)
 
-        if config.num_output_layers > 1:
-            raise ValueError("The number of output layers must be equal one, but the value that was passed in was {}.".format(config.num_output_layers))
-
         self.config = config
         self.num_labels = config.num_labels
+        self.num_output_layers = config.num_output_layers
+        self.num_hidden_layers = config.num_hidden_layers
 
         self.elasticbert = ElasticBertModel(config)
         classifier_dropout = (
             config.classifier_dropout if hasattr(config, 'classifier_dropout') else config.hidden_dropout_prob
         )
         self.dropout = nn.Dropout(classifier_dropout)
-        self.classifier = nn.Linear(config.hidden_size, config.num_labels)
+        self.start_output_layer = None
+        if self.num_output_layers > 1:
+            # one classifier per output layer, trained together and used for the early exits
+            self.start_output_layer = self.num_hidden_layers - self.num_output_layers
+            self.classifiers = nn.ModuleList([nn.Linear(config.hidden_size, config.num_labels) if i >= self.start_output_layer and \
+                                                i < self.num_hidden_layers else None for i in range(config.max_output_layers)])
+        else:
+            self.classifier = nn.Linear(config.hidden_size, config.num_labels)
 
         self.init_weights()
 
+    def _exit_logits(self, layer_idx, hidden_states):
+        pooled_output = self.elasticbert.encoder.pooler[layer_idx](hidden_states)
+        return self.classifiers[layer_idx](self.dropout(pooled_output))
+
+    def _compute_loss(self, logits, labels):
+        if self.config.problem_type is None:
+            if self.num_labels == 1:
+                self.config.problem_type = "regression"
+            elif self.num_labels > 1 and (labels.dtype == torch.long or labels.dtype == torch.int):
+                self.config.problem_type = "single_label_classification"
+            else:
+                self.config.problem_type = "multi_label_classification"
+
+        if self.config.problem_type == "regression":
+            loss_fct = MSELoss()
+            if self.num_labels == 1:
+                loss = loss_fct(logits.squeeze(), labels.squeeze())
+            else:
+                loss = loss_fct(logits, labels)
+        elif self.config.problem_type == "single_label_classification":
+            loss_fct = CrossEntropyLoss()
+            loss = loss_fct(logits.view(-1, self.num_labels), labels.view(-1))
+        elif self.config.problem_type == "multi_label_classification":
+            loss_fct = BCEWithLogitsLoss()
+            loss = loss_fct(logits, labels)
+        return loss
+
     @add_start_docstrings_to_model_forward(ELASTICBERT_INPUTS_DOCSTRING.format("batch_size, sequence_length"))
     @add_code_sample_docstrings(
         tokenizer_class=_TOKENIZER_FOR_DOC,
@@ -1409,8 +1682,32 @@ class ElasticBertForSequenceClassification(ElasticBertPreTrainedModel):
             Labels for computing the sequence classification/regression loss. Indices should be in :obj:`[0, ...,
             config.num_labels - 1]`. If :obj:`config.num_labels == 1` a regression loss is computed (Mean-Square loss),
             If :obj:`config.num_labels > 1` a classification loss is computed (Cross-Entropy).
+
+        When :obj:`config.num_output_layers > 1`, the logits of all the output layers are stacked on a first dimension
+        and the loss is the sum of their losses. In evaluation mode with :obj:`config.early_exit_criterion` set, each
+        sample exits at the first output layer meeting the criterion instead and an
+        :class:`ElasticBertEarlyExitOutput` is returned, see :meth:`ElasticBertModel.forward_early_exit`.
         """
 
+        if self.num_output_layers > 1 and not self.training and self.config.early_exit_criterion is not None:
+            if head_mask is not None or output_attentions or output_hidden_states:
+                raise ValueError(
+                    "`head_mask`, `output_attentions` and `output_hidden_states` are not supported with early exits."
+                )
+            logits, exit_layers = self.elasticbert.forward_early_exit(
+                self._exit_logits,
+                input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids,
+                position_ids=position_ids,
+                inputs_embeds=inputs_embeds,
+            )
+            loss = self._compute_loss(logits, labels) if labels is not None else None
+            if not return_dict:
+                output = (logits, exit_layers)
+                return ((loss,) + output) if loss is not None else output
+            return ElasticBertEarlyExitOutput(loss=loss, logits=logits, exit_layers=exit_layers)
+
         outputs = self.elasticbert(
             input_ids,
             attention_mask=attention_mask,
@@ -1423,33 +1720,25 @@ class ElasticBertForSequenceClassification(ElasticBertPreTrainedModel):
             return_dict=return_dict,
         )
 
-        output = outputs[1]
+        if self.num_output_layers > 1:
+            # ElasticBertModel returns all the hidden states when there are several output layers
+            all_hidden_states = outputs[2]
+            logits = torch.stack([
+                self._exit_logits(i, all_hidden_states[i + 1])
+                for i in range(self.start_output_layer, self.num_hidden_layers)
+            ], dim=0)
+        else:
+            output = outputs[1]
 
-        output = self.dropout(output)
-        logits = self.classifier(output)
+            output = self.dropout(output)
+            logits = self.classifier(output)
 
         loss = None
         if labels is not None:
-            if self.config.problem_type is None:
-                if self.num_labels == 1:
-                    self.config.problem_type = "regression"
-                elif self.num_labels > 1 and (labels.dtype == torch.long or labels.dtype == torch.int):
-                    self.config.problem_type = "single_label_classification"
-                else:
-                    self.config.problem_type = "multi_label_classification"
-
-            if self.config.problem_type == "regression":
-                loss_fct = MSELoss()
-                if self.num_labels == 1:
-                    loss = loss_fct(logits.squeeze(), labels.squeeze())
-                else:
-                    loss = loss_fct(logits, labels)
-            elif self.config.problem_type == "single_label_classification":
-                loss_fct = CrossEntropyLoss()
-                loss = loss_fct(logits.view(-1, self.num_labels), labels.view(-1))
-            elif self.config.problem_type == "multi_label_classification":
-                loss_fct = BCEWithLogitsLoss()
-                loss = loss_fct(logits, labels)
+            if self.num_output_layers > 1:
+                loss = sum(self._compute_loss(layer_logits, labels) for layer_logits in logits)
+            else:
+                loss = self._compute_loss(logits, labels)
 
         if not return_dict:
             output = (logits,) + outputs[2:]
@@ -1458,8 +1747,8 @@ class ElasticBertForSequenceClassification(ElasticBertPreTrainedModel):
         return SequenceClassifierOutput(
             loss=loss,
             logits=logits,
-            hidden_states=outputs.hidden_states,
-            attentions=outputs.attentions,
+            hidden_states=outputs[2] if self.num_output_layers > 1 else outputs.hidden_states,
+            attentions=outputs[3] if self.num_output_layers > 1 else outputs.attentions,
         )
 
 
@@ -1576,20 +1865,43 @@ class ElasticBertForTokenClassification(ElasticBertPreTrainedModel):
     def __init__(self, config):
         super().__init__(config)
 
-        if config.num_output_layers > 1:
-            raise ValueError("The number of output layers must be equal one, but the value that was passed in was {}.".format(config.num_output_layers))
-
         self.num_labels = config.num_labels
+        self.num_output_layers = config.num_output_layers
+        self.num_hidden_layers = config.num_hidden_layers
 
         self.elasticbert = ElasticBertModel(config, add_pooling_layer=False)
         classifier_dropout = (
             config.classifier_dropout if hasattr(config, 'classifier_dropout') else config.hidden_dropout_prob
         )
         self.dropout = nn.Dropout(classifier_dropout)
-        self.classifier = nn.Linear(config.hidden_size, config.num_labels)
+        self.start_output_layer = None
+        if self.num_output_layers > 1:
+            # one classifier per output layer, trained together and used for the early exits
+            self.start_output_layer = self.num_hidden_layers - self.num_output_layers
+            self.classifiers = nn.ModuleList([nn.Linear(config.hidden_size, config.num_labels) if i >= self.start_output_layer and \
+                                                i < self.num_hidden_layers else None for i in range(config.max_output_layers)])
+        else:
+            self.classifier = nn.Linear(config.hidden_size, config.num_labels)
 
         self.init_weights()
 
+    def _exit_logits(self, layer_idx, hidden_states):
+        return self.classifiers[layer_idx](self.dropout(hidden_states))
+
+    def _compute_loss(self, logits, labels, attention_mask=None):
+        loss_fct = CrossEntropyLoss()
+        # Only keep active parts of the loss
+        if attention_mask is not None:
+            active_loss = attention_mask.view(-1) == 1
+            active_logits = logits.view(-1, self.num_labels)
+            active_labels = torch.where(
+                active_loss, labels.view(-1), torch.tensor(loss_fct.ignore_index).type_as(labels)
+            )
+            loss = loss_fct(active_logits, active_labels)
+        else:
+            loss = loss_fct(logits.view(-1, self.num_labels), labels.view(-1))
+        return loss
+
     @add_start_docstrings_to_model_forward(ELASTICBERT_INPUTS_DOCSTRING.format("batch_size, sequence_length"))
     @add_code_sample_docstrings(
         tokenizer_class=_TOKENIZER_FOR_DOC,
@@ -1614,8 +1926,32 @@ class ElasticBertForTokenClassification(ElasticBertPreTrainedModel):
         labels (:obj:`torch.LongTensor` of shape :obj:`(batch_size, sequence_length)`, `optional`):
             Labels for computing the token classification loss. Indices should be in ``[0, ..., config.num_labels -
             1]``.
+
+        When :obj:`config.num_output_layers > 1`, the logits of all the output layers are stacked on a first dimension
+        and the loss is the sum of their losses. In evaluation mode with :obj:`config.early_exit_criterion` set, each
+        sample exits at the first output layer where all its tokens meet the criterion instead and an
+        :class:`ElasticBertEarlyExitOutput` is returned, see :meth:`ElasticBertModel.forward_early_exit`.
         """
 
+        if self.num_output_layers > 1 and not self.training and self.config.early_exit_criterion is not None:
+            if head_mask is not None or output_attentions or output_hidden_states:
+                raise ValueError(
+                    "`head_mask`, `output_attentions` and `output_hidden_states` are not supported with early exits."
+                )
+            logits, exit_layers = self.elasticbert.forward_early_exit(
+                self._exit_logits,
+                input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids,
+                position_ids=position_ids,
+                inputs_embeds=inputs_embeds,
+            )
+            loss = self._compute_loss(logits, labels, attention_mask) if labels is not None else None
+            if not return_dict:
+                output = (logits, exit_layers)
+                return ((loss,) + output) if loss is not None else output
+            return ElasticBertEarlyExitOutput(loss=loss, logits=logits, exit_layers=exit_layers)
+
         outputs = self.elasticbert(
             input_ids,
             attention_mask=attention_mask,
@@ -1628,24 +1964,25 @@ class ElasticBertForTokenClassification(ElasticBertPreTrainedModel):
             return_dict=return_dict,
         )
 
-        sequence_output = outputs[0]
+        if self.num_output_layers > 1:
+            # ElasticBertModel returns all the hidden states when there are several output layers
+            all_hidden_states = outputs[2]
+            logits = torch.stack([
+                self._exit_logits(i, all_hidden_states[i + 1])
+                for i in range(self.start_output_layer, self.num_hidden_layers)
+            ], dim=0)
+        else:
+            sequence_output = outputs[0]
 
-        sequence_output = self.dropout(sequence_output)
-        logits = self.classifier(sequence_output)
+            sequence_output = self.dropout(sequence_output)
+            logits = self.classifier(sequence_output)
 
         loss = None
         if labels is not None:
-            loss_fct = CrossEntropyLoss()
-            # Only keep active parts of the loss
-            if attention_mask is not None:
-                active_loss = attention_mask.view(-1) == 1
-                active_logits = logits.view(-1, self.num_labels)
-                active_labels = torch.where(
-                    active_loss, labels.view(-1), torch.tensor(loss_fct.ignore_index).type_as(labels)
-                )
-                loss = loss_fct(active_logits, active_labels)
+            if self.num_output_layers > 1:
+                loss = sum(self._compute_loss(layer_logits, labels, attention_mask) for layer_logits in logits)
             else:
-                loss = loss_fct(logits.view(-1, self.num_labels), labels.view(-1))
+                loss = self._compute_loss(logits, labels, attention_mask)
 
         if not return_dict:
             output = (logits,) + outputs[2:]
@@ -1654,8 +1991,8 @@ class ElasticBertForTokenClassification(ElasticBertPreTrainedModel):
         return TokenClassifierOutput(
             loss=loss,
             logits=logits,
-            hidden_states=outputs.hidden_states,
-            attentions=outputs.attentions,
+            hidden_states=outputs[2] if self.num_output_layers > 1 else outputs.hidden_states,
+            attentions=outputs[3] if self.num_output_layers > 1 else outputs.attentions,
         )
 
 
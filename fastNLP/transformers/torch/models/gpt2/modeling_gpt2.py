@@ -33,6 +33,7 @@ from fastNLP.transformers.torch.modeling_outputs import (
     SequenceClassifierOutputWithPast,
     TokenClassifierOutput,
 )
+from fastNLP.transformers.torch.cache_utils import StaticCacheLayer
 from fastNLP.transformers.torch.modeling_utils import (
     Conv1D,
     PreTrainedModel,
@@ -199,7 +200,9 @@ class GPT2Attention(Module):
         key = self._split_heads(key, self.num_heads, self.head_dim)
         value = self._split_heads(value, self.num_heads, self.head_dim)
 
-        if layer_past is not None:
+        if isinstance(layer_past, StaticCacheLayer):
+            key, value = layer_past.update(key, value)
+        elif layer_past is not None:
             past_key, past_value = layer_past
             key = torch.cat((past_key, key), dim=-2)
             value = torch.cat((past_value, value), dim=-2)
@@ -14,8 +14,10 @@
 # limitations under the License.
 """Tokenization classes for OpenAI GPT."""
 
+import heapq
 import json
 import os
+from collections import OrderedDict
 from functools import lru_cache
 from typing import TYPE_CHECKING, List, Optional, Tuple
 
@@ -100,6 +102,57 @@ def get_pairs(word):
     return pairs
 
 
+class BPECache:
+    """
+    A size-bounded LRU cache mapping a pre-tokenized word to its BPE result, with hit and miss counters.
+
+    Args:
+        maxsize (:obj:`int`):
+            The maximum number of entries. The least recently used entry is evicted when the cache is full. A value
+            smaller than 1 disables the cache, and :obj:`None` makes it unbounded.
+    """
+
+    def __init__(self, maxsize: Optional[int] = 50000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if self.maxsize is not None and self.maxsize < 1:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if self.maxsize is not None and len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __len__(self):
+        return len(self._data)
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+
 class GPT2Tokenizer(PreTrainedTokenizer):
     """
     Construct a GPT-2 tokenizer. Based on byte-level Byte-Pair-Encoding.
@@ -145,6 +198,9 @@ class GPT2Tokenizer(PreTrainedTokenizer):
         add_prefix_space (:obj:`bool`, `optional`, defaults to :obj:`False`):
             Whether or not to add an initial space to the input. This allows to treat the leading word just as any
             other word. (GPT2 tokenizer detect beginning of words by the preceding space).
+        bpe_cache_size (:obj:`int`, `optional`, defaults to 50000):
+            Maximum number of words whose BPE results are kept in the LRU cache :obj:`self.cache`. :obj:`None` means
+            unbounded.
     """
 
     vocab_files_names = VOCAB_FILES_NAMES
@@ -161,6 +217,7 @@ class GPT2Tokenizer(PreTrainedTokenizer):
         bos_token="<|endoftext|>",
         eos_token="<|endoftext|>",
         add_prefix_space=False,
+        bpe_cache_size=50000,
         **kwargs
     ):
         bos_token = AddedToken(bos_token, lstrip=False, rstrip=False) if isinstance(bos_token, str) else bos_token
@@ -185,7 +242,8 @@ class GPT2Tokenizer(PreTrainedTokenizer):
             bpe_merges = merges_handle.read().split("\n")[1:-1]
         bpe_merges = [tuple(merge.split()) for merge in bpe_merges]
         self.bpe_ranks = dict(zip(bpe_merges, range(len(bpe_merges))))
-        self.cache = {}
+        self._build_bpe_merges()
+        self.cache = BPECache(bpe_cache_size)
         self.add_prefix_space = add_prefix_space
 
         # Should have added re.IGNORECASE so BPE merges can happen for capitalized versions of contractions
@@ -198,46 +256,85 @@ class GPT2Tokenizer(PreTrainedTokenizer):
     def get_vocab(self):
         return dict(self.encoder, **self.added_tokens_encoder)
 
-    def bpe(self, token):
-        if token in self.cache:
-            return self.cache[token]
-        word = tuple(token)
-        pairs = get_pairs(word)
+    def _build_bpe_merges(self):
+        """
+        Converts :obj:`self.bpe_ranks` to integer ids: every symbol appearing in the merges gets an id, and
+        :obj:`self._bpe_merges` maps ``(left_id, right_id)`` to ``(rank, merged_id)``. Symbols not appearing in the
+        merges can never be merged and get the id ``-1``.
+        """
+        symbol_ids = {}
+        merges = {}
+        for pair, rank in self.bpe_ranks.items():
+            if len(pair) != 2:
+                # malformed lines of the merges file can never match a pair of symbols
+                continue
+            first, second = pair
+            for symbol in (first, second, first + second):
+                if symbol not in symbol_ids:
+                    symbol_ids[symbol] = len(symbol_ids)
+            merges[(symbol_ids[first], symbol_ids[second])] = (rank, symbol_ids[first + second])
+        self._bpe_symbol_ids = symbol_ids
+        self._bpe_merges = merges
 
-        if not pairs:
+    def bpe(self, token):
+        cached = self.cache.get(token)
+        if cached is not None:
+            return cached
+        if len(token) < 2:
             return token
 
-        while True:
-            bigram = min(pairs, key=lambda pair: self.bpe_ranks.get(pair, float("inf")))
-            if bigram not in self.bpe_ranks:
-                break
-            first, second = bigram
-            new_word = []
-            i = 0
-            while i < len(word):
-                try:
-                    j = word.index(first, i)
-                except ValueError:
-                    new_word.extend(word[i:])
-                    break
-                else:
-                    new_word.extend(word[i:j])
-                    i = j
-
-                if word[i] == first and i < len(word) - 1 and word[i + 1] == second:
-                    new_word.append(first + second)
-                    i += 2
-                else:
-                    new_word.append(word[i])
-                    i += 1
-            new_word = tuple(new_word)
-            word = new_word
-            if len(word) == 1:
-                break
-            else:
-                pairs = get_pairs(word)
-        word = " ".join(word)
-        self.cache[token] = word
+        # The symbols of the word are kept in a doubly linked list indexed by their start position in ``token``, and
+        # the candidate merges in a heap ordered by (rank, position). As the original algorithm merges every
+        # occurrence of the best pair from left to right before looking at the new pairs, merges are applied rank by
+        # rank and the pairs created in a round are only pushed after the round ends.
+        merges = self._bpe_merges
+        symbol_ids = self._bpe_symbol_ids
+        symbols = list(token)
+        ids = [symbol_ids.get(char, -1) for char in symbols]
+        length = len(symbols)
+        prev = list(range(-1, length - 1))
+        next_ = list(range(1, length + 1))
+        next_[-1] = -1
+
+        heap = []
+        for i in range(length - 1):
+            merge = merges.get((ids[i], ids[i + 1]))
+            if merge is not None:
+                heap.append((merge[0], i, ids[i], ids[i + 1]))
+        heapq.heapify(heap)
+
+        num_symbols = length
+        while heap and num_symbols > 1:
+            rank = heap[0][0]
+            new_pairs = []
+            while heap and heap[0][0] == rank:
+                _, i, left_id, right_id = heapq.heappop(heap)
+                j = next_[i]
+                if symbols[i] is None or ids[i] != left_id or j == -1 or ids[j] != right_id:
+                    # the pair has been changed by a previous merge
+                    continue
+                merged_id = merges[(left_id, right_id)][1]
+                symbols[i] = symbols[i] + symbols[j]
+                ids[i] = merged_id
+                symbols[j] = None
+                next_[i] = next_[j]
+                if next_[j] != -1:
+                    prev[next_[j]] = i
+                num_symbols -= 1
+                if prev[i] != -1:
+                    new_pairs.append(prev[i])
+                if next_[i] != -1:
+                    new_pairs.append(i)
+            for i in new_pairs:
+                j = next_[i]
+                if symbols[i] is None or j == -1:
+                    continue
+                merge = merges.get((ids[i], ids[j]))
+                if merge is not None:
+                    heapq.heappush(heap, (merge[0], i, ids[i], ids[j]))
+
+        word = " ".join(symbol for symbol in symbols if symbol is not None)
+        self.cache.put(token, word)
         return word
 
     def _tokenize(self, text):
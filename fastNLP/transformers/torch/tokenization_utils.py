@@ -290,6 +290,50 @@ def _insert_one_token_to_ordered_list(token_list: List[str], new_token: str):
         token_list.insert(insertion_idx, new_token)
 
 
+class _TokenizeCache:
+    """
+    The structures :meth:`PreTrainedTokenizer.tokenize` computes from the added and special tokens.
+    """
+
+    def __init__(self, tokenizer: "PreTrainedTokenizer", do_lower_case: bool):
+        # a copy, so that in place changes of ``unique_no_split_tokens`` are noticed as well
+        self.no_split_tokens = list(tokenizer.unique_no_split_tokens)
+        self.do_lower_case = do_lower_case
+        # Simple mapping string => AddedToken for special tokens with specific tokenization behaviors
+        self.all_special_tokens_extended = dict(
+            (str(t), t) for t in tokenizer.all_special_tokens_extended if isinstance(t, AddedToken)
+        )
+        self.no_split_token = set(tokenizer.unique_no_split_tokens)
+        self.special_pattern = None
+        if do_lower_case:
+            escaped_special_toks = [
+                re.escape(s_tok) for s_tok in (tokenizer.unique_no_split_tokens + tokenizer.all_special_tokens) if s_tok
+            ]
+            if escaped_special_toks:
+                self.special_pattern = re.compile(r"(" + r"|".join(escaped_special_toks) + r")")
+
+    @staticmethod
+    def _lower(text: str) -> str:
+        # str.lower() only differs from lowering each character alone on the context dependent final sigma
+        if "\u03a3" in text:
+            return "".join(char.lower() for char in text)
+        return text.lower()
+
+    def lower(self, text: str) -> str:
+        """
+        Lowercases everything in ``text`` except the special and no split tokens. Splitting on the compiled pattern
+        finds the same tokens, in the same alternation order, as the per-character substitution done before.
+        """
+        if self.special_pattern is None:
+            return self._lower(text)
+        pieces = self.special_pattern.split(text)
+        # the odd positions hold the special tokens
+        for i in range(0, len(pieces), 2):
+            if pieces[i]:
+                pieces[i] = self._lower(pieces[i])
+        return "".join(pieces)
+
+
 @add_end_docstrings(INIT_TOKENIZER_DOCSTRING)
 class PreTrainedTokenizer(PreTrainedTokenizerBase):
     """
@@ -313,6 +357,7 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
         self.added_tokens_decoder: Dict[int, str] = {}
         self.unique_no_split_tokens: List[str] = []
         self.tokens_trie = Trie()
+        self._tokenize_cache = None
 
         self._decode_use_source_tokenizer = False
 
@@ -403,6 +448,7 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
             else:
                 self.unique_no_split_tokens = sorted(set(self.unique_no_split_tokens).union(set(tokens_to_add)))
         self._create_trie(self.unique_no_split_tokens)
+        self._tokenize_cache = None
 
         return len(tokens_to_add)
 
@@ -435,6 +481,27 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
         token_ids_1 = []
         return len(self.build_inputs_with_special_tokens(token_ids_0, token_ids_1 if pair else None))
 
+    def _special_tokens_updated(self):
+        self._tokenize_cache = None
+
+    def _get_tokenize_cache(self) -> _TokenizeCache:
+        """
+        Returns the structures used by :meth:`tokenize` that only depend on the added and special tokens. They are
+        built once and rebuilt after :meth:`_add_tokens`, after a special token attribute is set, or when the content
+        of ``unique_no_split_tokens`` or ``do_lower_case`` is changed. The no split trie is rebuilt along with them.
+        """
+        do_lower_case = bool(getattr(self, "do_lower_case", False))
+        cache = self._tokenize_cache
+        if (
+            cache is None
+            or cache.no_split_tokens != self.unique_no_split_tokens
+            or cache.do_lower_case != do_lower_case
+        ):
+            self._create_trie(self.unique_no_split_tokens)
+            cache = _TokenizeCache(self, do_lower_case)
+            self._tokenize_cache = cache
+        return cache
+
     def tokenize(self, text: TextInput, **kwargs) -> List[str]:
         """
         Converts a string in a sequence of tokens, using the tokenizer.
@@ -451,26 +518,21 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
         Returns:
             :obj:`List[str]`: The list of tokens.
         """
-        # Simple mapping string => AddedToken for special tokens with specific tokenization behaviors
-        all_special_tokens_extended = dict(
-            (str(t), t) for t in self.all_special_tokens_extended if isinstance(t, AddedToken)
-        )
-
         text, kwargs = self.prepare_for_tokenization(text, **kwargs)
 
         if kwargs:
             logger.warning(f"Keyword arguments {kwargs} not recognized.")
 
+        return self._tokenize_with_cache(text, self._get_tokenize_cache())
+
+    def _tokenize_with_cache(self, text: str, cache: "_TokenizeCache") -> List[str]:
         # TODO: should this be in the base class?
-        if hasattr(self, "do_lower_case") and self.do_lower_case:
+        if cache.do_lower_case:
             # convert non-special tokens to lowercase
-            escaped_special_toks = [
-                re.escape(s_tok) for s_tok in (self.unique_no_split_tokens + self.all_special_tokens)
-            ]
-            pattern = r"(" + r"|".join(escaped_special_toks) + r")|" + r"(.+?)"
-            text = re.sub(pattern, lambda m: m.groups()[0] or m.groups()[1].lower(), text)
+            text = cache.lower(text)
 
-        no_split_token = set(self.unique_no_split_tokens)
+        no_split_token = cache.no_split_token
+        all_special_tokens_extended = cache.all_special_tokens_extended
         tokens = self.tokens_trie.split(text)
         # ["This is something", "<special_token_1>", "  else"]
         for i, token in enumerate(tokens):
@@ -505,6 +567,32 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
         # ["This", " is", " something", "<special_token_1>", "else"]
         return tokenized_text
 
+    def encode_batch(self, texts: List[TextInput], add_special_tokens: bool = True) -> List[List[int]]:
+        """
+        Converts a list of strings to lists of ids. Without truncation or padding, the result is the same as
+        ``[self.encode(text, add_special_tokens=add_special_tokens) for text in texts]``, but the structures built from
+        the special tokens are fetched once for the whole batch and the overhead of :meth:`encode_plus` is skipped.
+
+        Args:
+            texts (:obj:`List[str]`):
+                The sequences to be encoded.
+            add_special_tokens (:obj:`bool`, `optional`, defaults to :obj:`True`):
+                Whether or not to encode the sequences with the special tokens relative to their model.
+
+        Returns:
+            :obj:`List[List[int]]`: The ids of each sequence.
+        """
+        cache = self._get_tokenize_cache()
+        convert = self._convert_token_to_id_with_added_voc
+        output = []
+        for text in texts:
+            text, _ = self.prepare_for_tokenization(text)
+            ids = [convert(token) for token in self._tokenize_with_cache(text, cache)]
+            if add_special_tokens:
+                ids = self.build_inputs_with_special_tokens(ids)
+            output.append(ids)
+        return output
+
     def _tokenize(self, text, **kwargs):
         """
         Converts a string in a sequence of tokens (string), using the tokenizer. Split in words for word-based
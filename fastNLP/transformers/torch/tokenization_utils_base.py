@@ -1000,34 +1000,49 @@ class SpecialTokensMixin:
     @bos_token.setter
     def bos_token(self, value):
         self._bos_token = value
+        self._special_tokens_updated()
 
     @eos_token.setter
     def eos_token(self, value):
         self._eos_token = value
+        self._special_tokens_updated()
 
     @unk_token.setter
     def unk_token(self, value):
         self._unk_token = value
+        self._special_tokens_updated()
 
     @sep_token.setter
     def sep_token(self, value):
         self._sep_token = value
+        self._special_tokens_updated()
 
     @pad_token.setter
     def pad_token(self, value):
         self._pad_token = value
+        self._special_tokens_updated()
 
     @cls_token.setter
     def cls_token(self, value):
         self._cls_token = value
+        self._special_tokens_updated()
 
     @mask_token.setter
     def mask_token(self, value):
         self._mask_token = value
+        self._special_tokens_updated()
 
     @additional_special_tokens.setter
     def additional_special_tokens(self, value):
         self._additional_special_tokens = value
+        self._special_tokens_updated()
+
+    def _special_tokens_updated(self):
+        """
+        Called whenever a special token attribute is set, so that subclasses can drop anything computed from the
+        special tokens.
+        """
+        pass
 
     @property
     def bos_token_id(self) -> Optional[int]:
@@ -0,0 +1,115 @@
+import pytest
+
+from fastNLP.core.callbacks import Callback
+from fastNLP.core.callbacks.callback import _CallbackWrapper
+from fastNLP.core.callbacks.callback_event import Event
+from fastNLP.core.callbacks.callback_manager import CallbackManager, _no_callback_fn
+
+
+class RecordCallback(Callback):
+    def __init__(self, name):
+        self.name = name
+        self.records = []
+
+    @property
+    def callback_name(self):
+        return self.name
+
+    def on_train_batch_begin(self, trainer, batch, indices=None):
+        self.records.append(('on_train_batch_begin', batch))
+
+    def on_after_backward(self, trainer):
+        self.records.append(('on_after_backward', ))
+
+
+class ErrorCallback(Callback):
+    def on_train_batch_end(self, trainer):
+        raise RuntimeError("error in callback")
+
+
+class TestCallbackManagerDispatch:
+    def test_no_subscriber_is_noop(self):
+        manager = CallbackManager([])
+        manager.initialize_class_callbacks()
+        manager.compile_dispatch()
+
+        assert manager.on_train_batch_begin is _no_callback_fn
+        assert manager.on_fetch_data_begin is _no_callback_fn
+        manager.on_train_batch_begin(None, batch=1)
+        # 没有订阅者的时机不应当插入到 callback_fns 中，也不应当计数；
+        assert 'on_train_batch_begin' not in manager.callback_fns
+        assert manager.callback_counter['on_train_batch_begin'] == 0
+
+    def test_dispatch_order_and_counter(self):
+        cb1, cb2 = RecordCallback('cb1'), RecordCallback('cb2')
+        manager = CallbackManager([cb1, cb2])
+        manager.initialize_class_callbacks()
+        manager.compile_dispatch()
+
+        assert manager.on_train_batch_end is _no_callback_fn
+        for i in range(3):
+            manager.on_train_batch_begin(None, i, indices=None)
+            manager.on_after_backward(None)
+        assert cb1.records == cb2.records == [('on_train_batch_begin', 0), ('on_after_backward', ),
+                                              ('on_train_batch_begin', 1), ('on_after_backward', ),
+                                              ('on_train_batch_begin', 2), ('on_after_backward', )]
+        assert manager.callback_counter['on_train_batch_begin'] == 3
+        assert manager.callback_counter['on_after_backward'] == 3
+
+    def test_add_callback_after_compile(self):
+        manager = CallbackManager([])
+        manager.initialize_class_callbacks()
+        manager.compile_dispatch()
+
+        records = []
+        manager.dissect_one_callback(_CallbackWrapper(Event.on_train_epoch_begin(every=2),
+                                                      lambda trainer: records.append(trainer)))
+        assert manager.on_train_epoch_begin is not _no_callback_fn
+        for i in range(4):
+            manager.on_train_epoch_begin(i)
+        assert records == [1, 3]
+        assert manager.callback_counter['on_train_epoch_begin'] == 4
+
+    def test_without_compile(self):
+        # 未预编译时通过类上的方法调用也应当可以正常运行；
+        cb = RecordCallback('cb')
+        manager = CallbackManager([cb])
+        manager.initialize_class_callbacks()
+        manager.on_train_batch_begin(None, 1)
+        assert cb.records == [('on_train_batch_begin', 1)]
+        assert manager.callback_counter['on_train_batch_begin'] == 1
+
+    def test_exception(self):
+        manager = CallbackManager([RecordCallback('cb'), ErrorCallback()])
+        manager.initialize_class_callbacks()
+        manager.compile_dispatch()
+        with pytest.raises(RuntimeError):
+            manager.on_train_batch_end(None)
+
+    def test_checkpoint_after_compile(self):
+        # on_save_checkpoint 与 on_load_checkpoint 不能被预编译的分发函数覆盖；
+        class StateCallback(RecordCallback):
+            def on_save_checkpoint(self, trainer):
+                return {'records': list(self.records)}
+
+            def on_load_checkpoint(self, trainer, states):
+                self.records = states['records']
+
+        cb1, cb2 = StateCallback('cb1'), StateCallback('cb2')
+        manager = CallbackManager([cb1, cb2])
+        manager.initialize_class_callbacks()
+        manager.compile_dispatch()
+        manager.on_train_batch_begin(None, 1)
+        cb2.records.append('cb2 only')
+
+        states = manager.on_save_checkpoint(None)
+        assert states['cb1']['states'] == {'records': [('on_train_batch_begin', 1)]}
+        assert states['cb2']['states'] == {'records': [('on_train_batch_begin', 1), 'cb2 only']}
+
+        new_cb1, new_cb2 = StateCallback('cb1'), StateCallback('cb2')
+        new_manager = CallbackManager([new_cb1, new_cb2])
+        new_manager.initialize_class_callbacks()
+        new_manager.compile_dispatch()
+        new_manager.on_load_checkpoint(None, states)
+        assert new_cb1.records == cb1.records
+        assert new_cb2.records == cb2.records
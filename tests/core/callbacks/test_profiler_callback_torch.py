@@ -0,0 +1,137 @@
+import os
+import json
+import urllib.request
+
+import pytest
+
+from fastNLP import Trainer
+from fastNLP.core.callbacks import Callback, ProfilerCallback, RingBufferProfilerSink, JsonlProfilerSink, PrometheusProfilerSink
+from fastNLP.core.callbacks.callback_manager import _no_callback_fn
+from tests.helpers.utils import magic_argv_env_context, Capturing
+from fastNLP.envs.imports import _NEED_IMPORT_TORCH
+if _NEED_IMPORT_TORCH:
+    from torch.utils.data import DataLoader
+    from torch.optim import SGD
+
+from tests.helpers.models.torch_model import TorchNormalModel_Classification_1
+from tests.helpers.datasets.torch_data import TorchArgMaxDataset
+
+
+def _prepare_trainer(callbacks, n_epochs=2, **kwargs):
+    model = TorchNormalModel_Classification_1(num_labels=10, feature_dimension=10)
+    dataloader = DataLoader(TorchArgMaxDataset(feature_dimension=10, data_num=20, seed=0), batch_size=4)
+    return Trainer(
+        model=model,
+        driver='torch',
+        device='cpu',
+        optimizers=SGD(model.parameters(), lr=0.001),
+        train_dataloader=dataloader,
+        n_epochs=n_epochs,
+        callbacks=callbacks,
+        progress_bar=None,
+        **kwargs
+    )
+
+
+@pytest.mark.torch
+@magic_argv_env_context
+def test_profiler_callback(tmp_path):
+    ring = RingBufferProfilerSink(capacity=100)
+    jsonl_path = os.path.join(tmp_path, 'profile.jsonl')
+    callback = ProfilerCallback(sinks=[ring, JsonlProfilerSink(jsonl_path, flush_every=3)],
+                                num_tokens=lambda batch: 7 * len(batch['x']),
+                                trace_steps=(2, 3), trace_folder=os.path.join(tmp_path, 'traces'))
+    trainer = _prepare_trainer([callback])
+    with Capturing():
+        trainer.run()
+
+    records = ring.records
+    assert len(records) == 10
+    assert [record['step'] for record in records] == list(range(1, 11))
+    for record in records:
+        assert record['event'] == 'step'
+        assert record['samples'] == 4
+        assert record['tokens'] == 28
+        for key in ('data_fetch', 'to_device', 'forward', 'backward', 'optimize', 'callbacks', 'step_time'):
+            assert record[key] >= 0
+        assert record['step_time'] >= record['forward'] + record['backward']
+        assert record['samples_per_sec'] > 0 and record['tokens_per_sec'] > 0
+
+    with open(jsonl_path, 'r') as f:
+        lines = [json.loads(line) for line in f]
+    assert lines == json.loads(json.dumps(records))
+    assert os.path.exists(os.path.join(tmp_path, 'traces', 'trace_rank0_2-3.json'))
+
+    summary = ring.summary()
+    assert summary['num_records'] == 10 and summary['samples'] == 4
+    assert callback.summary()['samples_per_sec'] > 0
+
+
+@pytest.mark.torch
+@magic_argv_env_context
+def test_profiler_callback_every_and_disable():
+    ring = RingBufferProfilerSink()
+    trainer = _prepare_trainer([ProfilerCallback(sinks=ring, every=3, log_summary=False)])
+    trainer.run()
+    assert [record['step'] for record in ring.records] == [3, 6, 9]
+
+    # 关闭时不应当注册任何 callback 函数；
+    ring = RingBufferProfilerSink()
+    trainer = _prepare_trainer([ProfilerCallback(sinks=ring, enable=False)])
+    assert trainer.callback_manager.on_train_batch_begin is _no_callback_fn
+    trainer.run()
+    assert len(ring.records) == 0
+
+
+def test_prometheus_sink():
+    sink = PrometheusProfilerSink(port=0)
+    # 创建时不会绑定端口；
+    assert sink._server is None and sink.port == 0
+    sink.open()
+    try:
+        sink.write({'event': 'step', 'step': 1, 'samples': 4, 'forward': 0.5, 'starved': 1})
+        sink.write({'event': 'step', 'step': 2, 'samples': 4, 'forward': 0.25, 'starved': 0})
+        body = urllib.request.urlopen(f'http://127.0.0.1:{sink.port}/metrics').read().decode('utf-8')
+    finally:
+        sink.close()
+    assert 'fastnlp_samples_total 8.0' in body
+    assert 'fastnlp_steps_total 2.0' in body
+    assert 'fastnlp_starved_total 1.0' in body
+    assert 'fastnlp_step_forward 0.25' in body
+    port = sink.port
+    # 关闭后端口被释放；
+    assert sink._server is None
+    with pytest.raises(OSError):
+        urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics', timeout=1)
+
+
+@pytest.mark.torch
+@magic_argv_env_context
+def test_profiler_callback_closes_sinks(tmp_path):
+    jsonl_path = os.path.join(tmp_path, 'profile.jsonl')
+    jsonl = JsonlProfilerSink(jsonl_path, flush_every=100)
+    prometheus = PrometheusProfilerSink(port=0)
+    callback = ProfilerCallback(sinks=[jsonl, prometheus], log_summary=False)
+    # 创建 callback 时不会打开文件或绑定端口；
+    assert not os.path.exists(jsonl_path) and prometheus._server is None
+
+    trainer = _prepare_trainer([callback])
+    trainer.run()
+    assert jsonl._fp is None and prometheus._server is None
+    with open(jsonl_path, 'r') as f:
+        assert len(f.readlines()) == 10
+
+    # 出现异常时同样会关闭所有的输出端；
+    class RaiseCallback(Callback):
+        def on_train_batch_end(self, trainer):
+            if trainer.global_forward_batches == 3:
+                raise RuntimeError("stop")
+
+    jsonl = JsonlProfilerSink(jsonl_path, flush_every=100)
+    prometheus = PrometheusProfilerSink(port=0)
+    trainer = _prepare_trainer([ProfilerCallback(sinks=[jsonl, prometheus], log_summary=False), RaiseCallback()])
+    with pytest.raises(RuntimeError):
+        trainer.run()
+    assert jsonl._fp is None and prometheus._server is None
+    with open(jsonl_path, 'r') as f:
+        assert len(f.readlines()) == 13
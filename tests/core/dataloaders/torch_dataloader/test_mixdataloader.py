@@ -493,4 +493,50 @@ class TestMixDataLoader:
 
             if idx > 18:
                 raise ValueError(f"out of range")
-            _test_pad_val(batch['x'], val=0)
\ No newline at end of file
+            _test_pad_val(batch['x'], val=0)
+
+    def test_reproducible_mix(self):
+        from fastNLP.core.samplers import MixBatchSampler
+        from fastNLP.core.drivers.torch_driver.utils import replace_batch_sampler
+
+        datasets = {'d1': d1, 'd2': d2, 'd3': d3}
+        sampler = MixBatchSampler(datasets, batch_size=8, temperature=2, seed=1)
+        sampler.set_epoch(0)
+        dl = MixDataLoader(datasets=datasets, mode=sampler, collate_fn='auto')
+        expected = [batch['y'].tolist() for batch in dl]
+        assert len(expected) == len(sampler) == (360 + 7) // 8
+
+        iterator = iter(dl)
+        consumed = [next(iterator)['y'].tolist() for _ in range(4)]
+        states = sampler.state_dict()
+        assert consumed == expected[:4]
+
+        # 与 driver 中断点重训时相同，使用新的 batch_sampler 替换
+        new_sampler = MixBatchSampler(datasets, batch_size=8, temperature=2)
+        new_sampler.load_state_dict(states)
+        new_dl = replace_batch_sampler(dl, new_sampler)
+        assert new_dl.batch_sampler is new_sampler
+        assert [batch['y'].tolist() for batch in new_dl] == expected[4:]
+
+    def test_batched_fetch(self):
+        from fastNLP.core.dataloaders.torch_dataloader.mix_dataloader import _MixDataset, _MixCollateFn
+
+        list_ds = [{'x': [i] * (i % 3 + 1), 'y': i} for i in range(7)]
+        mix_dataset = _MixDataset([d1, list_ds, d2])
+        for indices in [[0, 5, 2], [30, 36, 31], [40, 3, 33, 66, 29, 37]]:
+            batch = mix_dataset.__getitems__(indices)
+            expected = [mix_dataset[idx] for idx in indices]
+            assert [dict(sample.items()) for sample in batch.samples] == [dict(ins.items()) for ins, _ in expected]
+            assert batch.ds_index == expected[-1][1]
+
+        mix_dataset = _MixDataset([d1, d2])
+        dataset, ds_index = mix_dataset[[0, 40, 5]]
+        assert dataset['y'].content == [1, 10, 1] and ds_index == 0
+
+        with pytest.raises(ValueError):
+            mix_dataset.__getitems__([1, 67])
+
+        collate_fn = _MixCollateFn([lambda lst: ('d1', len(lst)), lambda lst: ('list', len(lst)),
+                                    lambda lst: ('d2', len(lst))])
+        assert collate_fn(mix_dataset.__getitems__([31, 32])) == ('list', 2)
+        assert collate_fn([mix_dataset[31], mix_dataset[32]]) == ('list', 2)
@@ -275,6 +275,71 @@ class TestDataSetMethods:
         assert len(d2) == (len(ds) * 0.9)
         assert len(d1) == (len(ds) * 0.1)
 
+        ds = DataSet({"x": list(range(10)), "y": [[i] for i in range(10)]})
+        ds.set_pad('y', pad_val=-1)
+        np.random.seed(0)
+        d1, d2 = ds.split(0.3)
+        np.random.seed(0)
+        indices = list(range(10))
+        np.random.shuffle(indices)
+        assert d1['x'].content == indices[:3] and d2['x'].content == indices[3:]
+        assert d1['y'].content == [[i] for i in indices[:3]]
+        assert d1.collator is not ds.collator and d1.collator.input_fields == ds.collator.input_fields
+
+        d1, d2 = ds.split(0.3, shuffle=False)
+        assert d1['x'].content == [0, 1, 2] and d2['x'].content == list(range(3, 10))
+
+    def test_take(self):
+        ds = DataSet({"x": list(range(10)), "y": [[i] for i in range(10)]})
+        sub_ds = ds.take([3, 0, 3, -1])
+        assert sub_ds['x'].content == [3, 0, 3, 9]
+        assert sub_ds['y'].content == [[3], [0], [3], [9]]
+        assert sub_ds[0]['y'] is ds[3]['y']
+        assert ds.take(np.array([1, 2]))['x'].content == [1, 2]
+        assert ds[[1, 2]]['x'].content == [1, 2]
+
+        empty_ds = ds.take([])
+        assert len(empty_ds) == 0 and empty_ds.get_field_names() == ['x', 'y']
+
+        with pytest.raises(IndexError):
+            ds.take([0, 10])
+        with pytest.raises(TypeError):
+            ds.take(np.array([0.0, 1.0]))
+
+    def test_shared_collator(self):
+        ds = DataSet({"x": list(range(10)), "y": [[i] for i in range(10)]})
+        ds.set_pad('y', pad_val=-1)
+        sub_ds1, sub_ds2 = ds.take([0, 1]), ds[2:4]
+        assert sub_ds1._collator is ds._collator and sub_ds2._collator is ds._collator
+
+        sub_ds1.set_pad('y', pad_val=-2)
+        ds.set_ignore('x')
+        assert ds.collator is not sub_ds1.collator and sub_ds2.collator is not ds.collator
+        assert sub_ds1.collator.ignore_fields == set() and ds.collator.ignore_fields == {'x'}
+        assert sub_ds2.collator.ignore_fields == set()
+        assert sub_ds1.collator.input_fields['y']['pad_val'] == -2
+        assert ds.collator.input_fields['y']['pad_val'] == sub_ds2.collator.input_fields['y']['pad_val'] == -1
+
+    def test_filter(self):
+        ds = DataSet({"x": list(range(10)), "y": [[i] for i in range(10)]})
+        mask = [x % 3 == 0 for x in range(10)]
+        sub_ds = ds.filter(mask)
+        assert sub_ds['x'].content == [0, 3, 6, 9] and len(ds) == 10
+        assert ds.filter(np.array(mask))['x'].content == [0, 3, 6, 9]
+        assert len(ds.filter([False] * 10)) == 0
+
+        assert ds.filter(mask, inplace=True) is ds
+        assert ds['y'].content == [[0], [3], [6], [9]]
+
+        with pytest.raises(ValueError):
+            ds.filter([True])
+
+        ds = DataSet({"x": [[1, 2, 3, 4]] * 40, "y": [[5, 6], [7, 8, 9, 0]] * 20})
+        new_ds = ds.drop(lambda ins: len(ins["y"]) < 3, inplace=False)
+        assert len(new_ds) == 20 and len(ds) == 40
+        new_ds = ds.drop(lambda ins: True, inplace=False)
+        assert len(new_ds) == 0 and new_ds.get_field_names() == ['x', 'y']
+
     def test_add_field_v2(self):
         ds = DataSet({"x": [3, 4]})
         ds.add_field('y', [['hello', 'world'], ['this', 'is', 'a', 'test']])
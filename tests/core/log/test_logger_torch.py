@@ -305,3 +305,50 @@ class TestLogger:
         assert captured.out.count('#') == 1
         assert captured.out.count('@') == 1
 
+    @recover_logger
+    def test_every_n(self, capsys):
+        logger.set_stdout(stdout="raw")
+        for i in range(10):
+            logger.every_n(3, f'every_n {i}')
+        for i in range(4):
+            logger.every_n(2, 'every_n key', key='key')
+        captured = capsys.readouterr()
+        assert [line for line in captured.out.split('\n') if line.startswith('every_n')] == \
+               ['every_n 0', 'every_n 3', 'every_n 6', 'every_n 9', 'every_n key', 'every_n key']
+
+    @recover_logger
+    def test_every_seconds(self, capsys):
+        logger.set_stdout(stdout="raw")
+        for i in range(5):
+            logger.every_seconds(100, f'every_seconds {i}')
+        captured = capsys.readouterr()
+        assert captured.out.count('every_seconds') == 1
+        assert 'every_seconds 0' in captured.out
+
+    @recover_logger
+    def test_async(self, capsys):
+        path = Path(tempfile.mkdtemp())
+        try:
+            logger.set_stdout(stdout="raw")
+            logger.set_async(True)
+            assert logger.is_async
+            filepath = path.joinpath('log.txt')
+            # 异步模式下仍然可以添加文件
+            logger.add_file(filepath)
+            assert logger.is_async
+            for i in range(1000):
+                logger.info('async msg %d', i)
+            logger.warning_once('async once')
+            logger.warning_once('async once')
+            logger.flush()
+            with open(filepath, 'r') as f:
+                lines = [line for line in f if 'async msg' in line]
+            assert len(lines) == 1000
+            assert lines[-1].strip().endswith('async msg 999')
+            captured = capsys.readouterr()
+            assert captured.out.count('async msg') == 1000
+            assert captured.out.count('async once') == 1
+        finally:
+            logger.set_async(False)
+            assert not logger.is_async
+            rank_zero_rm(path)
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+from collections import Counter
+
+from fastNLP.core.samplers import MixBatchSampler
+
+
+def prepare_datasets(lengths=(30, 7, 100)):
+    return {f'd{i}': list(range(length)) for i, length in enumerate(lengths)}
+
+
+class TestMixBatchSampler:
+    @pytest.mark.parametrize('shuffle', [True, False])
+    def test_cover_all(self, shuffle):
+        datasets = prepare_datasets()
+        sampler = MixBatchSampler(datasets, batch_size=8, shuffle=shuffle)
+        batches = list(sampler)
+        assert len(batches) == len(sampler) == (137 + 7) // 8
+        assert all(len(batch) == 8 for batch in batches[:-1])
+        indices = [idx for batch in batches for idx in batch]
+        assert sorted(indices) == list(range(137))
+        if not shuffle:
+            assert indices == list(range(137))
+
+    @pytest.mark.parametrize('ds_ratio', ['pad_to_most', 'truncate_to_least', {'d0': 0.5, 'd1': 2, 'd2': 1.5}])
+    def test_ds_ratio(self, ds_ratio):
+        datasets = prepare_datasets()
+        sampler = MixBatchSampler(datasets, batch_size=16, ds_ratio=ds_ratio, drop_last=True)
+        if isinstance(ds_ratio, dict):
+            expected = [15, 14, 150]
+        else:
+            expected = {'pad_to_most': [100, 100, 100], 'truncate_to_least': [7, 7, 7]}[ds_ratio]
+        assert sampler.sampler_lengths == expected
+        indices = [idx for batch in sampler for idx in batch]
+        assert len(indices) == sum(expected) // 16 * 16 == len(sampler) * 16
+
+        sampler = MixBatchSampler(datasets, batch_size=16, ds_ratio=ds_ratio)
+        counter = Counter(np.searchsorted([30, 37, 137], [idx for batch in sampler for idx in batch], side='right'))
+        assert [counter[i] for i in range(3)] == expected
+        if ds_ratio == 'pad_to_most':
+            # 重复采样时每一轮都完整地覆盖整个数据集
+            indices = [idx for batch in sampler for idx in batch if 30 <= idx < 37]
+            assert sorted(indices) == sorted(list(range(30, 37)) * 14 + list(range(30, 32)))
+
+    def test_temperature(self):
+        datasets = prepare_datasets()
+        sampler = MixBatchSampler(datasets, batch_size=16, temperature=1)
+        assert sampler.sampler_lengths == [30, 7, 100]
+        sampler = MixBatchSampler(datasets, batch_size=16, temperature=1e8)
+        lengths = sampler.sampler_lengths
+        assert sum(lengths) == 137 and max(lengths) - min(lengths) <= 1
+        sampler = MixBatchSampler(datasets, batch_size=16, temperature=2)
+        lengths = sampler.sampler_lengths
+        assert sum(lengths) == 137 and lengths[1] > 7 and lengths[2] < 100
+
+        with pytest.raises(ValueError):
+            MixBatchSampler(datasets, temperature=2, ds_ratio='pad_to_most')
+
+    def test_reproducible(self):
+        datasets = prepare_datasets()
+        sampler = MixBatchSampler(datasets, batch_size=8, seed=1)
+        sampler.set_epoch(0)
+        batches = list(sampler)
+        np.random.seed(100)  # 不受全局随机状态的影响
+        assert list(sampler) == batches
+        sampler.set_epoch(1)
+        assert list(sampler) != batches
+        sampler = MixBatchSampler(datasets, batch_size=8, seed=2)
+        sampler.set_epoch(0)
+        assert list(sampler) != batches
+
+    @pytest.mark.parametrize('new_batch_size', [8, 5])
+    @pytest.mark.parametrize('ds_ratio', [None, 'pad_to_most'])
+    def test_save_and_load(self, new_batch_size, ds_ratio):
+        datasets = prepare_datasets()
+        sampler = MixBatchSampler(datasets, batch_size=8, ds_ratio=ds_ratio, seed=3)
+        sampler.set_epoch(2)
+        expected = [idx for batch in sampler for idx in batch]
+
+        iterator = iter(sampler)
+        consumed = [idx for _ in range(5) for idx in next(iterator)]
+        states = sampler.state_dict()
+        assert states['num_consumed_samples'] == 40
+
+        new_sampler = MixBatchSampler(datasets, batch_size=new_batch_size, ds_ratio=ds_ratio)
+        new_sampler.load_state_dict(states)
+        assert new_sampler.batch_idx_in_epoch == 40 // new_batch_size
+        left = [idx for batch in new_sampler for idx in batch]
+        assert consumed + left == expected
+
+        with pytest.raises(AssertionError):
+            MixBatchSampler(prepare_datasets((30, 7, 99)), ds_ratio=ds_ratio).load_state_dict(states)
+
+    @pytest.mark.parametrize('pad', [True, False])
+    @pytest.mark.parametrize('num_replicas', [2, 3])
+    def test_distributed(self, pad, num_replicas):
+        datasets = prepare_datasets()
+        samplers = [MixBatchSampler(datasets, batch_size=4).set_distributed(num_replicas, rank, pad=pad)
+                    for rank in range(num_replicas)]
+        results = [[idx for batch in sampler for idx in batch] for sampler in samplers]
+        assert len(set(map(len, results))) == 1
+        indices = set(idx for res in results for idx in res)
+        if pad:
+            assert indices == set(range(137))
+        else:
+            assert len(indices) == 137 // num_replicas * num_replicas
+
+    def test_distributed_resume(self):
+        # 单卡保存后在两张卡上继续
+        datasets = prepare_datasets()
+        sampler = MixBatchSampler(datasets, batch_size=8)
+        expected = [idx for batch in sampler for idx in batch]
+        iterator = iter(sampler)
+        consumed = [idx for _ in range(3) for idx in next(iterator)]
+        states = sampler.state_dict()
+
+        samplers = [MixBatchSampler(datasets, batch_size=8).set_distributed(2, rank, pad=True) for rank in range(2)]
+        left = []
+        for sampler in samplers:
+            sampler.load_state_dict(states)
+            left.append([idx for batch in sampler for idx in batch])
+        assert sorted(consumed + left[0] + left[1][:-1]) == sorted(expected)
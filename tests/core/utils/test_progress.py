@@ -13,4 +13,44 @@ def test_raise():
 
     t = f_tqdm_progress.add_task('test', total=10)
     with pytest.raises(AssertionError):
-        f_rich_progress.add_task('test')
\ No newline at end of file
+        f_rich_progress.add_task('test')
+
+def test_rich_background_refresh():
+    import io
+    from rich.console import Console
+    from fastNLP.core.utils.rich_progress import FRichProgress
+
+    progress = FRichProgress().new_progess(transient=True, background_refresh=True)
+    progress.live.console = Console(file=io.StringIO())
+    progress.set_background_refresh(True, refresh_per_second=100)
+    try:
+        # 只有存在 task 时才会启动刷新的线程
+        assert progress._refresh_thread is None
+        task_id = progress.add_task('test', total=10000)
+        assert progress._refresh_thread.is_alive()
+        progress.set_background_refresh(False)
+        assert progress._refresh_thread is None
+        progress.set_background_refresh(True)
+        refresh_thread = progress._refresh_thread
+        assert refresh_thread.is_alive()
+
+        for i in range(10000):
+            progress.update(task_id, advance=1, description=f'test:{i}', post_desc='loss')
+        progress._sync_pending()
+        assert progress.tasks[0].completed == 10000
+        assert progress.tasks[0].description == 'test:9999'
+        assert progress.tasks[0].fields['post_desc'] == 'loss'
+
+        progress.update(task_id, completed=5, refresh=False)
+        progress.update(task_id, advance=2)
+        progress.reset(task_id, completed=3)
+        assert progress.tasks[0].completed == 3
+        progress.update(task_id, advance=4)
+        progress.destroy_task(task_id)
+        assert len(progress.tasks) == 0
+        # 所有 task 都结束后线程退出
+        assert progress._refresh_thread is None
+        refresh_thread.join(timeout=5)
+        assert not refresh_thread.is_alive()
+    finally:
+        progress.set_background_refresh(False)
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from fastNLP.io.loader import CSVLoader
+from fastNLP.io.utils import check_loader_paths
+
+
+def write_shards(directory, split, num_shards, num_rows=5):
+    for i in range(num_shards):
+        with open(os.path.join(directory, f'{split}-{i:03d}.tsv'), 'w', encoding='utf-8') as f:
+            f.write('raw_words\ttarget\n')
+            for j in range(num_rows):
+                f.write(f'{split} shard {i} row {j}\t{j % 2}\n')
+
+
+class TestCheckLoaderPaths:
+    def test_shards(self, tmp_path):
+        write_shards(tmp_path, 'train', 12)
+        write_shards(tmp_path, 'dev', 2)
+        pattern = str(tmp_path / 'train-*.tsv')
+        train_files = [str(tmp_path / f'train-{i:03d}.tsv') for i in range(12)]
+
+        assert check_loader_paths(pattern) == {'train': train_files}
+        assert check_loader_paths([pattern, str(tmp_path / 'dev-000.tsv')]) == \
+               {'train': train_files + [str(tmp_path / 'dev-000.tsv')]}
+        paths = check_loader_paths({'train': pattern, 'dev': str(tmp_path / 'dev-001.tsv')})
+        assert paths == {'train': train_files, 'dev': str(tmp_path / 'dev-001.tsv')}
+
+        with pytest.raises(FileNotFoundError):
+            check_loader_paths(str(tmp_path / 'test-*.tsv'))
+        with pytest.raises(FileNotFoundError):
+            check_loader_paths({'train': [str(tmp_path / 'train-100.tsv')]})
+
+
+class TestLoaderShards:
+    @pytest.mark.parametrize('num_proc', [0, 2])
+    def test_load(self, tmp_path, num_proc):
+        write_shards(tmp_path, 'train', 12)
+        write_shards(tmp_path, 'dev', 1, num_rows=3)
+        loader = CSVLoader(sep='\t')
+        data_bundle = loader.load({'train': str(tmp_path / 'train-*.tsv'), 'dev': str(tmp_path / 'dev-000.tsv')},
+                                  num_proc=num_proc, progress_bar=None)
+        train = data_bundle.get_dataset('train')
+        assert len(train) == 60
+        assert train[0]['raw_words'] == 'train shard 0 row 0'
+        assert train[-1]['raw_words'] == 'train shard 11 row 4'
+        assert len(data_bundle.get_dataset('dev')) == 3
+
+    @pytest.mark.parametrize('num_proc', [0, 2])
+    def test_iter_load(self, tmp_path, num_proc):
+        write_shards(tmp_path, 'train', 6)
+        results = list(CSVLoader(sep='\t').iter_load(str(tmp_path / 'train-*.tsv'), num_proc=num_proc,
+                                                     progress_bar=None))
+        assert [path for _, path, _ in results] == [str(tmp_path / f'train-{i:03d}.tsv') for i in range(6)]
+        assert all(name == 'train' and len(dataset) == 5 for name, _, dataset in results)
+        assert results[3][2][0]['raw_words'] == 'train shard 3 row 0'
+
+    @pytest.mark.parametrize('num_proc', [0, 2])
+    def test_error(self, tmp_path, num_proc):
+        write_shards(tmp_path, 'train', 4)
+        with open(tmp_path / 'train-002.tsv', 'a', encoding='utf-8') as f:
+            f.write('invalid line\n')
+        with pytest.raises(ValueError, match='Line 6 has 1 parts'):
+            CSVLoader(sep='\t').load(str(tmp_path / 'train-*.tsv'), num_proc=num_proc, progress_bar=None)
+
+    def test_chunked_loader(self, tmp_path):
+        # 每个文件都大到会被 CSVLoader 切分为多块，shard 的子进程中不能再启动进程池
+        write_shards(tmp_path, 'train', 2, num_rows=100000)
+        expected = CSVLoader(sep='\t').load(str(tmp_path / 'train-*.tsv'), progress_bar=None).get_dataset('train')
+        train = CSVLoader(sep='\t', num_proc=2).load(str(tmp_path / 'train-*.tsv'), num_proc=2,
+                                                      progress_bar=None).get_dataset('train')
+        assert len(train) == len(expected) == 200000
+        assert train['raw_words'].content == expected['raw_words'].content
+        assert train[-1]['raw_words'] == 'train shard 1 row 99999'
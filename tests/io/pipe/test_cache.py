@@ -0,0 +1,95 @@
+import os
+import time
+
+from fastNLP.io import DataBundle
+from fastNLP.io.loader import CSVLoader
+from fastNLP.io.pipe import Pipe, PipePlan, PipeCache
+from fastNLP.io.pipe.utils import _add_indexize_ops
+
+TOKENIZED = []
+
+
+def counting_tokenizer(sent):
+    TOKENIZED.append(sent)
+    return sent.split()
+
+
+class CountingPipe(Pipe):
+    def __init__(self, lower=False):
+        self.lower = lower
+
+    def process(self, data_bundle: DataBundle) -> DataBundle:
+        plan = PipePlan().copy_field('raw_words', 'words')
+        if self.lower:
+            plan.lower('words')
+        plan.apply_field(counting_tokenizer, 'words')
+        _add_indexize_ops(plan)
+        plan.add_seq_len('words')
+        return plan.run(data_bundle)
+
+
+def write_file(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('raw_words\ttarget\n')
+        for words, target in rows:
+            f.write(f'{words}\t{target}\n')
+    # 保证修改时间发生变化
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + len(rows)))
+
+
+def assert_same_bundle(data_bundle, expected):
+    assert data_bundle.get_dataset_names() == expected.get_dataset_names()
+    for name, dataset in expected.iter_datasets():
+        other = data_bundle.get_dataset(name)
+        assert other.get_field_names() == dataset.get_field_names()
+        for field_name in dataset.get_field_names():
+            assert other.get_field(field_name).content == dataset.get_field(field_name).content
+    for name, vocab in expected.iter_vocabs():
+        other = data_bundle.get_vocab(name)
+        assert list(other._word2idx.items()) == list(vocab._word2idx.items())
+        assert other._no_create_word == vocab._no_create_word
+
+
+class TestPipeCache:
+    def test_incremental(self, tmp_path):
+        write_file(tmp_path / 'train-0.tsv', [('the cat sat', 'a'), ('a dog', 'b')])
+        write_file(tmp_path / 'train-1.tsv', [('the dog ran', 'b'), ('cat and dog', 'a')])
+        write_file(tmp_path / 'dev.tsv', [('the bird sang', 'a')])
+        paths = {'train': str(tmp_path / 'train-*.tsv'), 'dev': str(tmp_path / 'dev.tsv')}
+        loader = CSVLoader(sep='\t')
+        cache = PipeCache(tmp_path / 'cache')
+
+        def expected():
+            TOKENIZED.clear()
+            data_bundle = CountingPipe().process(loader.load(paths, progress_bar=None))
+            TOKENIZED.clear()
+            return data_bundle
+
+        target = expected()
+        assert_same_bundle(cache.process_from_file(CountingPipe(), loader, paths), target)
+        assert len(TOKENIZED) == 5
+
+        # 全部命中缓存
+        TOKENIZED.clear()
+        assert_same_bundle(cache.process_from_file(CountingPipe(), loader, paths), target)
+        assert TOKENIZED == []
+
+        # 只重新处理修改过的文件与新增的文件
+        write_file(tmp_path / 'dev.tsv', [('a new bird', 'c')])
+        write_file(tmp_path / 'train-2.tsv', [('the end', 'a')])
+        target = expected()
+        assert_same_bundle(cache.process_from_file(CountingPipe(), loader, paths), target)
+        assert sorted(TOKENIZED) == ['a new bird', 'the end']
+
+        # Pipe 的参数不同时不使用之前的缓存
+        TOKENIZED.clear()
+        cache.process_from_file(CountingPipe(lower=True), loader, paths)
+        assert len(TOKENIZED) == 6
+
+    def test_fingerprint(self, tmp_path):
+        write_file(tmp_path / 'train.tsv', [('the cat sat', 'a')])
+        cache = PipeCache(tmp_path / 'cache', fingerprint='hash')
+        fingerprint = cache.file_fingerprint(tmp_path / 'train.tsv')
+        os.utime(tmp_path / 'train.tsv', ns=(0, 0))
+        assert cache.file_fingerprint(tmp_path / 'train.tsv') == fingerprint
+        assert PipeCache(tmp_path / 'cache').file_fingerprint(tmp_path / 'train.tsv') != fingerprint
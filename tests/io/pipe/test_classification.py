@@ -32,6 +32,22 @@ class TestRunPipe:
             data_bundle = pipe(tokenizer='raw', num_proc=2).process_from_file('data_for_tests/io/imdb')
             print(data_bundle)
 
+    def test_override_tokenize(self):
+        from fastNLP import DataSet
+
+        class DashPipe(IMDBPipe):
+            # 使用 ``-`` 而不是空格切分
+            def _tokenize(self, data_bundle, field_name='words', new_field_name=None):
+                data_bundle.apply_field(lambda words: words.split('-'), field_name=field_name,
+                                        new_field_name=new_field_name or field_name)
+                return data_bundle
+
+        data_bundle = DataBundle(datasets={'train': DataSet({'raw_words': ['A-b c-d'], 'target': ['pos']})})
+        data_bundle = DashPipe(lower=True, tokenizer='raw').process(data_bundle)
+        vocab = data_bundle.get_vocab('words')
+        assert [vocab.to_word(idx) for idx in data_bundle.get_dataset('train')[0]['words']] == ['a', 'b c', 'd']
+        assert data_bundle.get_dataset('train')[0]['seq_len'] == 3
+
 
 @pytest.mark.skipif('download' not in os.environ, reason="Skip download")
 class TestCNClassificationPipe:
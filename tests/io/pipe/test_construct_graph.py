@@ -0,0 +1,76 @@
+import itertools
+import math
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+from fastNLP import DataSet
+from fastNLP.io import DataBundle
+from fastNLP.io.pipe.construct_graph import R8PmiGraphPipe
+
+
+def build_graph_by_loop(docs, window_size, threshold):
+    tokens = [doc.lower().split() for doc in docs]
+    vocab = sorted(set(itertools.chain(*tokens)))
+    word2id = {word: ind for ind, word in enumerate(vocab)}
+    num_docs = len(docs)
+    num_nodes = num_docs + len(vocab)
+    graph = np.zeros((num_nodes, num_nodes))
+
+    df = defaultdict(int)
+    for words in tokens:
+        for word in set(words):
+            df[word] += 1
+    for ind, words in enumerate(tokens):
+        for word in set(words):
+            tfidf = words.count(word) * (math.log(num_docs / df[word]) + 1)
+            graph[ind, num_docs + word2id[word]] = graph[num_docs + word2id[word], ind] = tfidf
+
+    word_window_freq, word_pair_count, windows_len = defaultdict(int), defaultdict(int), 0
+    for words in tokens:
+        if len(words) <= window_size:
+            windows = [words]
+        else:
+            windows = [list(set(words[j: j + window_size])) for j in range(len(words) - window_size + 1)]
+        for window in windows:
+            for word in window:
+                word_window_freq[word] += 1
+            for word1, word2 in itertools.combinations(window, 2):
+                word_pair_count[tuple(sorted((word1, word2)))] += 1
+        windows_len += len(windows)
+    for (word1, word2), count in word_pair_count.items():
+        if word1 == word2:
+            continue
+        pmi = math.log(count * windows_len / (word_window_freq[word1] * word_window_freq[word2]))
+        if pmi > threshold:
+            ind1, ind2 = num_docs + word2id[word1], num_docs + word2id[word2]
+            graph[ind1, ind2] = graph[ind2, ind1] = pmi
+    return graph
+
+
+class TestPmiGraphPipe:
+    @pytest.mark.parametrize('num_proc', [0, 2])
+    def test_same_as_loop(self, num_proc):
+        rng = np.random.RandomState(0)
+        words = [f'w{i}' for i in range(30)] + ['W1', 'W2']
+        docs = [' '.join(rng.choice(words, size=rng.randint(0, 25))) for _ in range(40)]
+        data_bundle = DataBundle(datasets={'train': DataSet({'raw_words': docs[:30]}),
+                                           'dev': DataSet({'raw_words': docs[30:35]}),
+                                           'test': DataSet({'raw_words': docs[35:]})})
+        pipe = R8PmiGraphPipe(widow_size=6, threshold=0.1, num_proc=num_proc, chunk_size=7)
+        graph, (tr_index, dev_index, te_index) = pipe.build_graph(data_bundle)
+        expected = build_graph_by_loop(docs, window_size=6, threshold=0.1)
+
+        assert graph.format == 'csr' and graph.dtype == np.float32
+        assert graph.shape == expected.shape
+        assert np.allclose(graph.toarray(), expected, atol=1e-5)
+        assert (tr_index, dev_index, te_index) == (list(range(30)), list(range(30, 35)), list(range(35, 40)))
+        assert 'w1' in pipe.word2id and 'W1' not in pipe.word2id
+
+    def test_build_graph_from_file(self):
+        graph, (tr_index, dev_index, te_index) = R8PmiGraphPipe().build_graph_from_file('data_for_tests/io/R8')
+        num_docs = len(tr_index) + len(dev_index) + len(te_index)
+        assert graph.shape[0] == graph.shape[1] > num_docs
+        assert (graph != graph.T).nnz == 0
+        assert graph[:num_docs, :num_docs].nnz == 0
@@ -23,6 +23,24 @@ class TestCWSPipe:
         data_bundle = CWSPipe().process(data_bundle)
         assert('<' not in data_bundle.get_vocab('chars'))
 
+    def test_override_tokenize(self):
+        from fastNLP import DataSet
+        from fastNLP.io import DataBundle
+
+        class WholeWordCWSPipe(CWSPipe):
+            # 每个词作为一个整体，不再切分为字
+            def _tokenize(self, data_bundle):
+                data_bundle.apply_field(lambda raw_chars: [[word] for word in raw_chars.split()], field_name='chars',
+                                        new_field_name='chars')
+                return data_bundle
+
+        data_bundle = DataBundle(datasets={'train': DataSet({'raw_words': ["截流 进入 最后 冲刺"]})})
+        data_bundle = WholeWordCWSPipe(replace_num_alpha=False).process(data_bundle)
+        vocab = data_bundle.get_vocab('chars')
+        assert [vocab.to_word(idx) for idx in data_bundle.get_dataset('train')[0]['chars']] == \
+               ['截流', '进入', '最后', '冲刺']
+        assert data_bundle.get_dataset('train')[0]['seq_len'] == 4
+
 
 class TestRunCWSPipe:
     def test_process_from_file(self):
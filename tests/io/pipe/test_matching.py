@@ -110,6 +110,28 @@ class TestRunMatchingPipe:
                 name, vocabs = y
                 assert (x + 1 if name == 'words' else x == len(vocabs))
 
+    def test_override_tokenize(self):
+        from fastNLP import DataSet
+
+        def dash_tokenize(self, data_bundle, field_names, new_field_names):
+            # 使用 ``-`` 而不是空格切分
+            for field_name, new_field_name in zip(field_names, new_field_names):
+                data_bundle.apply_field(lambda words: words.split('-'), field_name=field_name,
+                                        new_field_name=new_field_name)
+            return data_bundle
+
+        for pipe_class, field_name in [(RTEPipe, 'words1'), (RTEBertPipe, 'words')]:
+            pipe = type('DashPipe', (pipe_class, ), {'_tokenize': dash_tokenize})(lower=True)
+            data_bundle = DataBundle(datasets={'train': DataSet({'raw_words1': ['A-b c'], 'raw_words2': ['d-E'],
+                                                                 'target': ['entailment']})})
+            data_bundle = pipe.process(data_bundle)
+            vocab = data_bundle.get_vocab(field_name)
+            words = [vocab.to_word(idx) for idx in data_bundle.get_dataset('train')[0][field_name]]
+            if field_name == 'words':
+                assert words == ['a', 'b c', '[SEP]', 'd', 'e']
+            else:
+                assert words == ['a', 'b c']
+
     @pytest.mark.skipif('download' not in os.environ, reason="Skip download")
     def test_spacy(self):
         data_set_dict = {
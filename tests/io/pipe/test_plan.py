@@ -0,0 +1,88 @@
+import pytest
+
+from fastNLP import DataSet, Vocabulary
+from fastNLP.io import DataBundle
+from fastNLP.io.pipe import PipePlan
+
+
+def prepare_data_bundle():
+    train = DataSet({'raw_words': ['A b c', 'b C d', 'x y', 'e f A'], 'target': ['1', '2', '-', '1']})
+    dev = DataSet({'raw_words': ['a g', 'c h h'], 'target': ['2', '3']})
+    test = DataSet({'raw_words': ['g i', 'A z']})
+    return DataBundle(datasets={'train': train, 'dev': dev, 'test': test})
+
+
+def process_step_by_step(data_bundle):
+    for name, dataset in data_bundle.iter_datasets():
+        if dataset.has_field('target'):
+            dataset.drop(lambda ins: ins['target'] == '-')
+        dataset.copy_field('raw_words', 'words')
+        dataset['words'].lower()
+        dataset.apply_field(str.split, field_name='words', new_field_name='words', progress_bar=None)
+        dataset.apply(lambda ins: ins['words'] + ['[SEP]'], new_field_name='tmp', progress_bar=None)
+        dataset.delete_field('words')
+        dataset.rename_field('tmp', 'words')
+    word_vocab = Vocabulary().from_dataset(data_bundle.get_dataset('train'), field_name='words',
+                                           no_create_entry_dataset=[data_bundle.get_dataset('dev'),
+                                                                    data_bundle.get_dataset('test')])
+    word_vocab.index_dataset(*data_bundle.datasets.values(), field_name='words')
+    target_vocab = Vocabulary(padding=None, unknown=None).from_dataset(
+        data_bundle.get_dataset('train'), field_name='target', no_create_entry_dataset=[data_bundle.get_dataset('dev')])
+    target_vocab.index_dataset(data_bundle.get_dataset('train'), data_bundle.get_dataset('dev'), field_name='target')
+    for name, dataset in data_bundle.iter_datasets():
+        dataset.add_seq_len('words')
+    data_bundle.set_vocab(word_vocab, 'words')
+    data_bundle.set_vocab(target_vocab, 'target')
+    return data_bundle
+
+
+def prepare_plan():
+    return PipePlan().drop(lambda ins: ins['target'] == '-', field_name='target') \
+        .copy_field('raw_words', 'words').lower('words').apply_field(str.split, 'words') \
+        .apply(lambda ins: ins['words'] + ['[SEP]'], new_field_name='tmp').delete_field('words') \
+        .rename_field('tmp', 'words') \
+        .build_vocab('words').build_vocab('target', vocab=Vocabulary(padding=None, unknown=None)) \
+        .index('words').index('target').add_seq_len('words')
+
+
+def assert_same(data_bundle, expected):
+    for name, dataset in expected.iter_datasets():
+        result = data_bundle.get_dataset(name)
+        assert result.get_field_names() == dataset.get_field_names()
+        for field_name in dataset.get_field_names():
+            assert result[field_name].content == dataset[field_name].content
+    assert data_bundle.get_vocab_names() == expected.get_vocab_names()
+    for name, vocab in expected.iter_vocabs():
+        result = data_bundle.get_vocab(name)
+        assert result.word2idx == vocab.word2idx
+        assert result._no_create_word == vocab._no_create_word
+        assert list(result.word_count.items()) == list(vocab.word_count.items())
+
+
+class TestPipePlan:
+    @pytest.mark.parametrize('num_proc', [0, 2])
+    def test_same_as_step_by_step(self, num_proc):
+        expected = process_step_by_step(prepare_data_bundle())
+        plan = prepare_plan()
+        assert len(plan._stages()) == 2
+        data_bundle = plan.run(prepare_data_bundle(), num_proc=num_proc)
+        assert_same(data_bundle, expected)
+        assert len(data_bundle.get_dataset('train')) == 3
+        assert data_bundle.get_vocab('words')._is_word_no_create_entry('g')
+
+    def test_reuse(self):
+        plan = prepare_plan()
+        first = plan.run(prepare_data_bundle())
+        second = plan.run(prepare_data_bundle())
+        assert_same(second, first)
+        assert first.get_vocab('words') is not second.get_vocab('words')
+
+    def test_existing_vocab_and_missing_field(self):
+        data_bundle = prepare_data_bundle()
+        vocab = Vocabulary().add_word_lst(['a', 'b'])
+        data_bundle.set_vocab(vocab, 'words')
+        PipePlan().apply_field(str.split, 'raw_words', 'words').lower('words').index('words') \
+            .apply_field(len, 'target', 'target_len').run(data_bundle)
+        assert data_bundle.get_dataset('dev')['words'].content == [[2, 1], [1, 1, 1]]
+        assert not data_bundle.get_dataset('test').has_field('target_len')
+        assert data_bundle.get_dataset('train')['target_len'].content == [1, 1, 1, 1]
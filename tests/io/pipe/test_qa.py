@@ -1,6 +1,7 @@
 
+import numpy as np
 import pytest
-from fastNLP.io.pipe.qa import CMRC2018BertPipe
+from fastNLP.io.pipe.qa import CMRC2018BertPipe, merge_window_predictions
 from fastNLP.io.loader.qa import CMRC2018Loader
 
 
@@ -22,3 +23,68 @@ class CMRC2018PipeTest:
                 raw_chars = ins['raw_chars']
                 expect_len = raw_chars.index('[SEP]')
                 assert(expect_len == ins['context_len'])
+
+
+class TestCMRC2018BertPipe:
+    def test_process(self):
+        data_bundle = CMRC2018BertPipe().process_from_file('data_for_tests/io/cmrc/')
+        for name, dataset in data_bundle.iter_datasets():
+            for ins in dataset:
+                assert ''.join(ins['raw_chars'][ins['target_start']:ins['target_end'] + 1]) == ins['answers'][0]
+                assert ins['raw_chars'].index('[SEP]') == ins['context_len']
+        vocab = data_bundle.get_vocab('chars')
+        ins = data_bundle.get_dataset('train')[0]
+        assert ins['chars'] == [vocab.to_index(char) for char in ins['raw_chars']]
+
+    @pytest.mark.parametrize('doc_stride', [16, 50, 1000])
+    def test_doc_stride(self, doc_stride):
+        data_bundle = CMRC2018Loader().load('data_for_tests/io/cmrc/')
+        contexts = {name: dataset.get_field('context').content for name, dataset in data_bundle.iter_datasets()}
+        # 答案长度不超过 窗口长度 - 步长 + 1 时一定完整地出现在某个窗口中
+        expected = {name: {i for i, ins in enumerate(dataset)
+                           if len(ins['answers'][0]) <= 64 - 3 - len(ins['question']) - min(doc_stride, 64) + 1}
+                    for name, dataset in data_bundle.iter_datasets()}
+        data_bundle = CMRC2018BertPipe(max_len=64, doc_stride=doc_stride).process(data_bundle)
+
+        for name, dataset in data_bundle.iter_datasets():
+            found = set()
+            covered = {}
+            for ins in dataset:
+                context = contexts[name][ins['doc_index']]
+                offset = ins['context_offset']
+                assert len(ins['raw_chars']) <= 64
+                assert ins['raw_chars'][:ins['context_len']] == list(context[offset:offset + ins['context_len']])
+                assert ins['raw_chars'][ins['context_len']] == '[SEP]'
+                covered.setdefault(ins['doc_index'], []).append((offset, offset + ins['context_len']))
+                if ins['target_start'] != -1:
+                    answer = ''.join(ins['raw_chars'][ins['target_start']:ins['target_end'] + 1])
+                    assert answer == ins['answers'][0]
+                    found.add(ins['doc_index'])
+            # 每个样本的窗口覆盖整个 context
+            assert sorted(covered) == list(range(len(contexts[name])))
+            for doc_index, windows in covered.items():
+                assert windows[0][0] == 0 and windows[-1][1] == len(contexts[name][doc_index])
+                assert all(start <= prev_end for (_, prev_end), (start, _) in zip(windows, windows[1:]))
+            assert expected[name] <= found
+
+    def test_merge_window_predictions(self):
+        data_bundle = CMRC2018BertPipe(max_len=64, doc_stride=20).process_from_file('data_for_tests/io/cmrc/')
+        dataset = data_bundle.get_dataset('dev')
+        # 使用标注作为预测，没有答案的窗口预测为 context 的第一个字并给一个较低的分数
+        has_answer = np.array(dataset.get_field('target_start').content) != -1
+        pred_starts = np.where(has_answer, dataset.get_field('target_start').content, 0)
+        pred_ends = np.where(has_answer, dataset.get_field('target_end').content, 0)
+        scores = has_answer.astype(float)
+        starts, ends = merge_window_predictions(dataset, pred_starts, pred_ends, scores)
+
+        contexts = {}
+        for ins in dataset:
+            contexts[ins['doc_index']] = (ins['context'], ins['answers'][0])
+        assert len(starts) == len(contexts)
+        for doc_index, (context, answer) in contexts.items():
+            assert context[starts[doc_index]:ends[doc_index] + 1] == answer
+
+        # 超出 context 的预测不会被选中
+        pred_ends = np.full(len(dataset), 1000)
+        starts, ends = merge_window_predictions(dataset, pred_starts, pred_ends, scores)
+        assert (starts == -1).all() and (ends == -1).all()
@@ -1,4 +1,5 @@
 import numpy as np
+import pytest
 
 from fastNLP import Vocabulary
 from fastNLP.io import EmbedLoader
@@ -36,3 +37,31 @@ class TestEmbedLoader:
         assert np.allclose(np.linalg.norm(w_m, axis=1).sum(), 7)
         for word in words:
             assert(word in vocab)
+
+    def test_load_compressed(self, tmp_path):
+        import gzip
+        for name in ['glove.6B.50d_test.txt', 'word2vec_test.txt']:
+            path = f"data_for_tests/embedding/small_static_embedding/{name}"
+            with open(path, 'rb') as f, gzip.open(tmp_path / f'{name}.gz', 'wb') as f_out:
+                f_out.write(f.read())
+            np.random.seed(0)
+            expected, expected_vocab = EmbedLoader.load_without_vocab(path, normalize=False)
+            np.random.seed(0)
+            matrix, vocab = EmbedLoader.load_without_vocab(str(tmp_path / f'{name}.gz'), normalize=False)
+            assert np.allclose(matrix, expected)
+            assert list(vocab.word2idx.items()) == list(expected_vocab.word2idx.items())
+
+    def test_load_with_vocab_zstd(self, tmp_path):
+        # zstd 的流式解压不支持 seek
+        zstandard = pytest.importorskip('zstandard')
+        vocab = Vocabulary()
+        vocab.add_word_lst(['the', 'of', 'none'])
+        for name in ['glove.6B.50d_test.txt', 'word2vec_test.txt']:
+            path = f"data_for_tests/embedding/small_static_embedding/{name}"
+            with open(path, 'rb') as f, open(tmp_path / f'{name}.zst', 'wb') as f_out:
+                f_out.write(zstandard.ZstdCompressor().compress(f.read()))
+            np.random.seed(0)
+            expected = EmbedLoader.load_with_vocab(path, vocab, normalize=False)
+            np.random.seed(0)
+            matrix = EmbedLoader.load_with_vocab(str(tmp_path / f'{name}.zst'), vocab, normalize=False)
+            assert np.allclose(matrix, expected)
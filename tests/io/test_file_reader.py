@@ -0,0 +1,227 @@
+import json
+import random
+
+import pytest
+
+from fastNLP.io.file_reader import _read_csv, _read_json, _read_conll, _read_csv_columns, _read_json_columns, \
+    _read_conll_columns, _split_file
+from fastNLP.io.loader import CSVLoader, JsonLoader, ConllLoader
+
+
+def write_csv(path, num_rows, bad_rows=()):
+    random.seed(0)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('words\tlabel\n')
+        for i in range(num_rows):
+            if i in bad_rows:
+                f.write(f'only-one-part-{i}\n')
+            else:
+                f.write(f'{" ".join(str(random.randint(0, 100)) for _ in range(i % 7 + 1))}\t{i % 3}\n')
+
+
+def write_conll(path, num_samples, bad_samples=()):
+    random.seed(0)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('-DOCSTART- -X- O\n\n')
+        for i in range(num_samples):
+            if i % 10 == 0:
+                f.write('# comment\n')
+            for j in range(i % 5 + 1):
+                if i in bad_samples:
+                    f.write(f'word{j}\n')
+                else:
+                    f.write(f'word{j} NN {random.choice(["O", "B-PER", "I-PER"])}\n')
+            f.write('\n' if i % 4 else '\n\n')
+
+
+class TestSplitFile:
+    @pytest.mark.parametrize('blank_line', [True, False])
+    def test_split(self, tmp_path, blank_line):
+        path = tmp_path / 'train.conll'
+        write_conll(path, 50)
+        with open(path, 'rb') as f:
+            data = f.read()
+        for num_chunks in [1, 3, 8, 1000]:
+            ranges = _split_file(path, num_chunks, blank_line=blank_line)
+            assert len(ranges) <= num_chunks
+            assert b''.join(data[start:end] for start, end in ranges) == data
+            for start, end in ranges[1:]:
+                assert data[start - 1:start] == b'\n'
+                if blank_line:
+                    assert data[start - 2:start] == b'\n\n'
+
+
+class TestChunkedReader:
+    @pytest.mark.parametrize('num_proc', [0, 2])
+    def test_csv(self, tmp_path, num_proc):
+        path = tmp_path / 'train.tsv'
+        write_csv(path, 200, bad_rows=(3, 150))
+        expected = [data for _, data in _read_csv(path, sep='\t', dropna=True)]
+        columns = _read_csv_columns(path, sep='\t', dropna=True, num_proc=num_proc, chunk_size=100)
+        assert list(columns) == ['words', 'label']
+        assert [dict(zip(columns, values)) for values in zip(*columns.values())] == expected
+
+        columns = _read_csv_columns(path, headers=['a', 'b'], sep='\t', dropna=True, num_proc=num_proc,
+                                    chunk_size=100)
+        assert len(columns['a']) == len(expected) + 1
+        # 非法数据交给逐行读取来报错
+        assert _read_csv_columns(path, sep='\t', dropna=False, num_proc=num_proc, chunk_size=100) is None
+
+    def test_csv_multiline_record(self, tmp_path):
+        path = tmp_path / 'train.csv'
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('words,label\n' + '"a\nb",1\n' * 50)
+        assert _read_csv_columns(path, num_proc=0, chunk_size=10) is None
+
+    def test_csv_multiline_record_at_boundary(self, tmp_path):
+        # 跨越切分位置的多行记录不能被截断
+        path = tmp_path / 'train.csv'
+        for position in range(0, 100, 3):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('words,label\n')
+                for i in range(100):
+                    f.write(f'{i},"multi\nline"\n' if i == position else f'{i},single\n')
+            expected = [data for _, data in _read_csv(path, dropna=True)]
+            columns = _read_csv_columns(path, dropna=True, num_proc=1, chunk_size=100)
+            if columns is not None:
+                assert [dict(zip(columns, values)) for values in zip(*columns.values())] == expected
+
+    @pytest.mark.parametrize('num_proc', [0, 2])
+    def test_json(self, tmp_path, num_proc):
+        path = tmp_path / 'train.jsonl'
+        with open(path, 'w', encoding='utf-8') as f:
+            for i in range(200):
+                data = {'words': f'第{i}句', 'label': i % 3, 'extra': [i]}
+                if i in (5, 120):
+                    data.pop('label')
+                f.write(json.dumps(data, ensure_ascii=False) + '\n')
+        fields = ['words', 'label']
+        expected = [data for _, data in _read_json(path, fields=fields, dropna=True)]
+        columns = _read_json_columns(path, fields=fields, dropna=True, num_proc=num_proc, chunk_size=100)
+        assert [dict(zip(columns, values)) for values in zip(*columns.values())] == expected
+        assert _read_json_columns(path, fields=fields, dropna=False, num_proc=num_proc, chunk_size=100) is None
+        # 属性不一致时无法按列读取
+        assert _read_json_columns(path, num_proc=num_proc, chunk_size=100) is None
+
+    @pytest.mark.parametrize('num_proc', [0, 2])
+    @pytest.mark.parametrize('drophash', [True, False])
+    def test_conll(self, tmp_path, num_proc, drophash):
+        path = tmp_path / 'train.conll'
+        write_conll(path, 100, bad_samples=(7, 61))
+        indexes = [0, 2]
+        expected = [data for _, data in _read_conll(path, indexes=indexes, drophash=drophash)]
+        columns = _read_conll_columns(path, indexes=indexes, drophash=drophash, num_proc=num_proc, chunk_size=100)
+        assert [list(values) for values in zip(*columns)] == expected
+        assert _read_conll_columns(path, indexes=indexes, dropna=False, num_proc=num_proc, chunk_size=100) is None
+
+
+class TestParallelLoader:
+    def test_same_as_serial(self, tmp_path):
+        write_csv(tmp_path / 'train.tsv', 300, bad_rows=(10,))
+        write_conll(tmp_path / 'train.conll', 100, bad_samples=(3,))
+        with open(tmp_path / 'train.jsonl', 'w', encoding='utf-8') as f:
+            for i in range(300):
+                f.write(json.dumps({'raw_words': str(i), 'target': i % 2}) + '\n')
+
+        loaders = [(CSVLoader, dict(sep='\t', dropna=True), 'train.tsv'),
+                   (JsonLoader, dict(fields={'raw_words': 'words', 'target': None}), 'train.jsonl'),
+                   (ConllLoader, dict(headers=['raw_words', 'target'], indexes=[0, 2]), 'train.conll')]
+        for loader, kwargs, name in loaders:
+            expected = loader(**kwargs)._load(tmp_path / name)
+            dataset = loader(num_proc=2, **kwargs)._load(tmp_path / name)
+            assert dataset.get_field_names() == expected.get_field_names()
+            assert len(dataset) == len(expected) > 0
+            for name in expected.get_field_names():
+                assert dataset.get_field(name).content == expected.get_field(name).content
+
+    def test_error(self, tmp_path):
+        write_csv(tmp_path / 'train.tsv', 100, bad_rows=(42,))
+        with pytest.raises(ValueError, match='Line 43 has 1 parts'):
+            CSVLoader(sep='\t', num_proc=2)._load(tmp_path / 'train.tsv')
+        write_conll(tmp_path / 'train.conll', 30, bad_samples=(5,))
+        with pytest.raises(ValueError, match='Invalid instance'):
+            ConllLoader(headers=['raw_words', 'target'], indexes=[0, 2], dropna=False,
+                        num_proc=2)._load(tmp_path / 'train.conll')
+
+
+def write_bgzf(path, data, block_size=64):
+    # 与 bgzip 相同的格式：每个 gzip 成员的 extra field `BC` 中记录了成员的大小
+    import struct
+    import zlib
+    with open(path, 'wb') as f:
+        for start in range(0, len(data), block_size):
+            block = data[start:start + block_size]
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+            deflated = compressor.compress(block) + compressor.flush()
+            bsize = 18 + len(deflated) + 8
+            f.write(b'\x1f\x8b\x08\x04' + b'\x00' * 4 + b'\x00\xff' + struct.pack('<H', 6) + b'BC' +
+                    struct.pack('<HH', 2, bsize - 1) + deflated +
+                    struct.pack('<II', zlib.crc32(block) & 0xffffffff, len(block) & 0xffffffff))
+
+
+class TestCompressed:
+    @pytest.mark.parametrize('suffix', ['.gz', '.bz2', '.xz'])
+    def test_readers(self, tmp_path, suffix):
+        import bz2
+        import gzip
+        import lzma
+        opener = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}[suffix]
+        write_csv(tmp_path / 'train.tsv', 100, bad_rows=(3,))
+        write_conll(tmp_path / 'train.conll', 50, bad_samples=(7,))
+        for name in ['train.tsv', 'train.conll']:
+            with open(tmp_path / name, 'rb') as f, opener(tmp_path / (name + suffix), 'wb') as f_out:
+                f_out.write(f.read())
+
+        kwargs = dict(sep='\t', dropna=True)
+        assert list(_read_csv(tmp_path / ('train.tsv' + suffix), **kwargs)) == \
+               list(_read_csv(tmp_path / 'train.tsv', **kwargs))
+        # 压缩文件无法按字节切分，交给逐行读取
+        assert _read_csv_columns(tmp_path / ('train.tsv' + suffix), num_proc=2, **kwargs) is None
+        expected = CSVLoader(**kwargs)._load(tmp_path / 'train.tsv')
+        dataset = CSVLoader(num_proc=2, **kwargs)._load(tmp_path / ('train.tsv' + suffix))
+        assert dataset.get_field('words').content == expected.get_field('words').content
+
+        kwargs = dict(indexes=[0, 2])
+        assert list(_read_conll(tmp_path / ('train.conll' + suffix), **kwargs)) == \
+               list(_read_conll(tmp_path / 'train.conll', **kwargs))
+
+    @pytest.mark.parametrize('num_proc', [0, 2])
+    def test_bgzf(self, tmp_path, num_proc):
+        from fastNLP.io.file_reader import _find_members, _open_file
+        with open(tmp_path / 'train.jsonl', 'w', encoding='utf-8') as f:
+            for i in range(300):
+                f.write(json.dumps({'words': f'第{i}句', 'label': i % 3}, ensure_ascii=False) + '\n')
+        with open(tmp_path / 'train.jsonl', 'rb') as f:
+            data = f.read()
+        write_bgzf(tmp_path / 'train.jsonl.gz', data)
+        members = _find_members(tmp_path / 'train.jsonl.gz', 'gzip')
+        assert len(members) == (len(data) + 63) // 64
+
+        with _open_file(tmp_path / 'train.jsonl.gz', num_proc=num_proc) as f:
+            assert f.read() == data.decode('utf-8')
+        assert list(_read_json(tmp_path / 'train.jsonl.gz', num_proc=num_proc)) == \
+               list(_read_json(tmp_path / 'train.jsonl'))
+
+        # 普通的 gzip 文件无法得知每个成员的位置
+        import gzip
+        with gzip.open(tmp_path / 'plain.jsonl.gz', 'wb') as f:
+            f.write(data)
+        assert _find_members(tmp_path / 'plain.jsonl.gz', 'gzip') is None
+
+    def test_zstd(self, tmp_path):
+        zstandard = pytest.importorskip('zstandard')
+        import struct
+        from fastNLP.io.file_reader import _find_members, _open_file
+        data = ''.join(f'{i}\t{i % 3}\n' for i in range(1000)).encode('utf-8')
+        cctx = zstandard.ZstdCompressor()
+        frames = [(cctx.compress(data[start:start + 500]), len(data[start:start + 500]))
+                  for start in range(0, len(data), 500)]
+        table = b''.join(struct.pack('<II', len(frame), size) for frame, size in frames)
+        footer = struct.pack('<IBI', len(frames), 0, 0x8F92EAB1)
+        with open(tmp_path / 'train.tsv.zst', 'wb') as f:
+            f.write(b''.join(frame for frame, _ in frames))
+            f.write(struct.pack('<II', 0x184D2A5E, len(table) + len(footer)) + table + footer)
+        assert len(_find_members(tmp_path / 'train.tsv.zst', 'zstd')) == len(frames)
+        for num_proc in [0, 2]:
+            with _open_file(tmp_path / 'train.tsv.zst', num_proc=num_proc) as f:
+                assert f.read() == data.decode('utf-8')
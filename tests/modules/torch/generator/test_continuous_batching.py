@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from fastNLP.envs.imports import _NEED_IMPORT_TORCH
+if _NEED_IMPORT_TORCH:
+    import torch
+    from torch import nn
+    from fastNLP.modules.torch.generator import SequenceGenerator, ContinuousBatchingGenerator, \
+        Seq2SeqDecoderBackend, CausalLMBackend
+    from fastNLP.modules.torch import TransformerSeq2SeqDecoder, LSTMSeq2SeqDecoder
+    from fastNLP.transformers.torch import GPT2Config, GPT2LMHeadModel
+
+
+def prepare_decoder(decoder_type):
+    if decoder_type == 'transformer':
+        return TransformerSeq2SeqDecoder(embed=nn.Embedding(30, 16), pos_embed=nn.Embedding(40, 16), d_model=16,
+                                         num_layers=2, n_head=2, dim_ff=32).eval()
+    return LSTMSeq2SeqDecoder(embed=nn.Embedding(30, 16), num_layers=2, hidden_size=16).eval()
+
+
+@pytest.mark.torch
+class TestContinuousBatchingGenerator:
+    @pytest.mark.parametrize('decoder_type', ['transformer', 'lstm'])
+    def test_seq2seq_same_as_sequence_generator(self, decoder_type):
+        torch.manual_seed(0)
+        decoder = prepare_decoder(decoder_type)
+        encoder_outputs = [torch.randn(length, 16) for length in [3, 7, 5, 2, 9, 4, 6]]
+        max_new_tokens = [4, 9, 2, 12, 5, 7, 3]
+
+        expected = []
+        for encoder_output, num_tokens in zip(encoder_outputs, max_new_tokens):
+            generator = SequenceGenerator(decoder, max_length=num_tokens + 1, do_sample=False, bos_token_id=1,
+                                          eos_token_id=None)
+            state = decoder.init_state(encoder_output[None], torch.ones(1, len(encoder_output)).bool())
+            expected.append(generator.generate(state)[0, 1:].tolist())
+
+        generator = ContinuousBatchingGenerator(Seq2SeqDecoderBackend(decoder, bos_token_id=1), max_batch_size=3)
+        requests = [generator.submit(encoder_output, max_new_tokens=num_tokens)
+                    for encoder_output, num_tokens in zip(encoder_outputs, max_new_tokens)]
+        # 在运行的过程中加入新的请求
+        for _ in range(4):
+            generator.step()
+        assert 0 < generator.num_running <= 3 and generator.num_waiting > 0
+        requests.append(generator.submit(encoder_outputs[0], max_new_tokens=max_new_tokens[0]))
+        expected.append(expected[0])
+        generator.run_until_complete()
+
+        assert [request.result() for request in requests] == expected
+        assert generator.num_running == 0 and generator.num_waiting == 0
+        stats = generator.stats()
+        assert stats['finished'] == len(requests)
+        assert stats['generated_tokens'] == sum(map(len, expected))
+        assert stats['avg_batch_size'] > 2
+
+    def test_causal_lm_same_as_generate(self):
+        torch.manual_seed(0)
+        config = GPT2Config(vocab_size=30, n_positions=64, n_ctx=64, n_embd=16, n_layer=2, n_head=2,
+                            bos_token_id=1, eos_token_id=2, pad_token_id=0)
+        model = GPT2LMHeadModel(config).eval()
+        prompts = [[3, 4, 5], [7], [9, 2, 2, 8, 1], [6, 6], [11, 3, 12, 4]]
+        max_new_tokens = [5, 8, 3, 10, 6]
+
+        # 每个 prompt 单独通过 GenerationMixin.generate 进行贪心生成，不会有任何 padding
+        expected = []
+        with torch.no_grad():
+            for prompt, num_tokens in zip(prompts, max_new_tokens):
+                outputs = model.generate(torch.tensor([prompt]), max_length=len(prompt) + num_tokens, do_sample=False,
+                                         num_beams=1, min_length=0, no_repeat_ngram_size=0, eos_token_id=None)
+                expected.append(outputs[0, len(prompt):].tolist())
+        assert [len(tokens) for tokens in expected] == max_new_tokens
+
+        generator = ContinuousBatchingGenerator(CausalLMBackend(model), max_batch_size=2)
+        requests = [generator.submit(prompt, max_new_tokens=num_tokens)
+                    for prompt, num_tokens in zip(prompts, max_new_tokens)]
+        generator.run_until_complete()
+        assert [request.result() for request in requests] == expected
+
+    def test_stopping(self):
+        torch.manual_seed(0)
+        decoder = prepare_decoder('transformer')
+        encoder_output = torch.randn(5, 16)
+        generator = ContinuousBatchingGenerator(Seq2SeqDecoderBackend(decoder, bos_token_id=1), max_new_tokens=10)
+        tokens = generator.generate([encoder_output])[0]
+        assert len(tokens) == 10
+
+        eos_request = generator.submit(encoder_output, eos_token_id=tokens[3])
+        criteria_request = generator.submit(encoder_output, stopping_criteria=lambda generated: len(generated) == 2)
+        generator.run_until_complete()
+        assert eos_request.result() == tokens[:tokens.index(tokens[3]) + 1]
+        assert criteria_request.result() == tokens[:2]
+
+        zero_request = generator.submit(encoder_output, max_new_tokens=0)
+        assert zero_request.result(timeout=0) == []
+        assert generator.num_waiting == 0
+
+    def test_sample_and_async(self):
+        torch.manual_seed(0)
+        decoder = prepare_decoder('lstm')
+        generator = ContinuousBatchingGenerator(Seq2SeqDecoderBackend(decoder, bos_token_id=1), max_batch_size=4,
+                                                do_sample=True, top_k=5)
+
+        async def run():
+            return await asyncio.gather(*[generator.generate_async(torch.randn(length, 16), max_new_tokens=length)
+                                          for length in range(2, 10)])
+        try:
+            outputs = asyncio.run(run())
+        finally:
+            generator.stop()
+        assert [len(tokens) for tokens in outputs] == list(range(2, 10))
+        assert all(0 <= token < 30 for tokens in outputs for token in tokens)
+        with pytest.raises(RuntimeError):
+            generator.start()
+            try:
+                generator.generate([torch.randn(3, 16)])
+            finally:
+                generator.stop()
@@ -0,0 +1,125 @@
+import random
+
+import pytest
+
+from fastNLP.envs.imports import _NEED_IMPORT_TORCH
+
+if _NEED_IMPORT_TORCH:
+    import torch
+    from fastNLP.transformers.torch.generation_logits_process import NoRepeatNGramLogitsProcessor, \
+        EncoderNoRepeatNGramLogitsProcessor, NoBadWordsLogitsProcessor
+
+
+# 以下为改写前逐个假设循环的实现，用于对比
+def get_ngrams(ngram_size, prev_input_ids, num_hypos):
+    generated_ngrams = [{} for _ in range(num_hypos)]
+    for idx in range(num_hypos):
+        gen_tokens = prev_input_ids[idx].tolist()
+        generated_ngram = generated_ngrams[idx]
+        for ngram in zip(*[gen_tokens[i:] for i in range(ngram_size)]):
+            prev_ngram_tuple = tuple(ngram[:-1])
+            generated_ngram[prev_ngram_tuple] = generated_ngram.get(prev_ngram_tuple, []) + [ngram[-1]]
+    return generated_ngrams
+
+
+def get_generated_ngrams(banned_ngrams, prev_input_ids, ngram_size, cur_len):
+    start_idx = cur_len + 1 - ngram_size
+    ngram_idx = tuple(prev_input_ids[start_idx:cur_len].tolist())
+    return banned_ngrams.get(ngram_idx, [])
+
+
+def loop_no_repeat_ngram(ngram_size, input_ids, scores):
+    scores = scores.clone()
+    num_hypos, cur_len = input_ids.shape
+    if cur_len + 1 < ngram_size:
+        return scores
+    generated_ngrams = get_ngrams(ngram_size, input_ids, num_hypos)
+    for i in range(num_hypos):
+        scores[i, get_generated_ngrams(generated_ngrams[i], input_ids[i], ngram_size, cur_len)] = -float("inf")
+    return scores
+
+
+def loop_encoder_no_repeat_ngram(ngram_size, encoder_input_ids, input_ids, scores):
+    scores = scores.clone()
+    num_hypos, cur_len = input_ids.shape
+    num_beams = num_hypos // encoder_input_ids.shape[0]
+    generated_ngrams = get_ngrams(ngram_size, encoder_input_ids, encoder_input_ids.shape[0])
+    for i in range(num_hypos):
+        scores[i, get_generated_ngrams(generated_ngrams[i // num_beams], input_ids[i], ngram_size,
+                                       cur_len)] = -float("inf")
+    return scores
+
+
+def loop_bad_words(bad_words_ids, eos_token_id, input_ids, scores):
+    scores = scores.clone()
+    bad_words_ids = [word for word in bad_words_ids if word != [eos_token_id]]
+    for i, prev_tokens in enumerate(input_ids.tolist()):
+        for word in bad_words_ids:
+            prefix = word[:-1]
+            if len(prefix) == 0 or (len(prefix) <= len(prev_tokens) and prev_tokens[-len(prefix):] == prefix):
+                scores[i, word[-1]] = -float("inf")
+    return scores
+
+
+def random_inputs(rng, num_hypos, cur_len, vocab_size):
+    # 词表很小，保证会出现重复的 n-gram
+    input_ids = torch.tensor([[rng.randrange(vocab_size) for _ in range(cur_len)] for _ in range(num_hypos)])
+    return input_ids, torch.randn(num_hypos, vocab_size)
+
+
+@pytest.mark.torch
+class TestVectorizedProcessors:
+    @pytest.mark.parametrize("ngram_size", [1, 2, 3, 4])
+    def test_no_repeat_ngram(self, ngram_size):
+        rng = random.Random(ngram_size)
+        processor = NoRepeatNGramLogitsProcessor(ngram_size)
+        for num_hypos, cur_len in [(1, 1), (1, 2), (3, 3), (4, 10), (6, 25)]:
+            input_ids, scores = random_inputs(rng, num_hypos, cur_len, 6)
+            expected = loop_no_repeat_ngram(ngram_size, input_ids, scores)
+            assert torch.equal(processor(input_ids, scores.clone()), expected)
+
+    @pytest.mark.parametrize("ngram_size", [1, 2, 3, 4])
+    def test_no_repeat_ngram_beam_steps(self, ngram_size):
+        # 模拟 beam search：每一步对假设重新排序（可能重复选择同一个假设）后追加一个 token ，此时只应在第一步重建
+        rng = random.Random(ngram_size)
+        processor = NoRepeatNGramLogitsProcessor(ngram_size)
+        rebuilds = []
+        rebuild = processor._rebuild
+        processor._rebuild = lambda input_ids: rebuilds.append(input_ids.shape[1]) or rebuild(input_ids)
+        input_ids, _ = random_inputs(rng, 4, 3, 5)
+        for _ in range(20):
+            scores = torch.randn(4, 5)
+            expected = loop_no_repeat_ngram(ngram_size, input_ids, scores)
+            assert torch.equal(processor(input_ids, scores.clone()), expected)
+            beam_idx = torch.tensor([rng.randrange(4) for _ in range(4)])
+            next_tokens = torch.tensor([[rng.randrange(5)] for _ in range(4)])
+            input_ids = torch.cat([input_ids[beam_idx], next_tokens], dim=1)
+        assert len(rebuilds) == 1
+
+    @pytest.mark.parametrize("ngram_size", [1, 2, 3])
+    @pytest.mark.parametrize("num_beams", [1, 3])
+    def test_encoder_no_repeat_ngram(self, ngram_size, num_beams):
+        rng = random.Random(ngram_size * 10 + num_beams)
+        encoder_input_ids, _ = random_inputs(rng, 2, 15, 6)
+        processor = EncoderNoRepeatNGramLogitsProcessor(ngram_size, encoder_input_ids)
+        for cur_len in [1, 2, 5, 12]:
+            input_ids, scores = random_inputs(rng, 2 * num_beams, cur_len, 6)
+            expected = loop_encoder_no_repeat_ngram(ngram_size, encoder_input_ids, input_ids, scores)
+            assert torch.equal(processor(input_ids, scores.clone()), expected)
+
+    def test_bad_words(self):
+        rng = random.Random(0)
+        eos_token_id = 7
+        bad_words_ids = [[1], [eos_token_id], [2, 3], [3, 2], [1, 2, 3], [4, 4, 4, 4], [0, 5], [5, 5, 1], [2, 3, 6]]
+        processor = NoBadWordsLogitsProcessor(bad_words_ids, eos_token_id)
+        for num_hypos, cur_len in [(1, 1), (2, 2), (4, 3), (5, 8), (8, 20)]:
+            for _ in range(5):
+                input_ids, scores = random_inputs(rng, num_hypos, cur_len, 8)
+                expected = loop_bad_words(bad_words_ids, eos_token_id, input_ids, scores)
+                assert torch.equal(processor(input_ids, scores.clone()), expected)
+        # 只有多个词的 bad word
+        processor = NoBadWordsLogitsProcessor([[2, 3], [1, 1, 1]], eos_token_id)
+        input_ids = torch.tensor([[0, 1, 1], [1, 1, 2], [2, 3, 2]])
+        scores = torch.zeros(3, 8)
+        assert torch.equal(processor(input_ids, scores.clone()),
+                           loop_bad_words([[2, 3], [1, 1, 1]], eos_token_id, input_ids, scores))
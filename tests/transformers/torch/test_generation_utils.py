@@ -0,0 +1,50 @@
+import pytest
+
+from fastNLP.envs.imports import _NEED_IMPORT_TORCH
+
+if _NEED_IMPORT_TORCH:
+    import torch
+    from fastNLP.transformers.torch import GPT2Config, GPT2LMHeadModel, BartConfig, BartForConditionalGeneration
+    from fastNLP.transformers.torch.cache_utils import StaticCache
+
+
+def tiny_gpt2():
+    config = GPT2Config(vocab_size=40, n_positions=64, n_ctx=64, n_embd=16, n_layer=2, n_head=2,
+                        bos_token_id=1, eos_token_id=2, pad_token_id=0)
+    return GPT2LMHeadModel(config).eval()
+
+
+def tiny_bart():
+    config = BartConfig(vocab_size=40, d_model=16, encoder_layers=2, decoder_layers=2, encoder_attention_heads=2,
+                        decoder_attention_heads=2, encoder_ffn_dim=32, decoder_ffn_dim=32,
+                        max_position_embeddings=64, bos_token_id=1, eos_token_id=2, pad_token_id=0,
+                        decoder_start_token_id=2, forced_bos_token_id=None, forced_eos_token_id=None)
+    return BartForConditionalGeneration(config).eval()
+
+
+@pytest.mark.torch
+class TestStaticCache:
+    @pytest.mark.parametrize("build_model", [tiny_gpt2, tiny_bart] if _NEED_IMPORT_TORCH else [])
+    @pytest.mark.parametrize("num_beams", [1, 3])
+    def test_same_as_dynamic_cache(self, build_model, num_beams, monkeypatch):
+        calls = []
+        update_from_outputs = StaticCache.update_from_outputs
+        monkeypatch.setattr(StaticCache, "update_from_outputs",
+                            lambda self, past: calls.append(1) or update_from_outputs(self, past))
+        torch.manual_seed(0)
+        model = build_model()
+        input_ids = torch.randint(3, 40, (2, 6))
+        attention_mask = torch.ones_like(input_ids)
+        attention_mask[1, :2] = 0
+        kwargs = dict(input_ids=input_ids, attention_mask=attention_mask, max_length=20, num_beams=num_beams,
+                      do_sample=False, no_repeat_ngram_size=0, min_length=0)
+        with torch.no_grad():
+            expected = model.generate(**kwargs)
+            outputs = model.generate(use_static_cache=True, **kwargs)
+        assert len(calls) > 0
+        assert torch.equal(outputs, expected)
+
+    def test_requires_use_cache(self):
+        model = tiny_gpt2()
+        with pytest.raises(ValueError):
+            model.generate(torch.randint(3, 40, (1, 4)), max_length=10, use_static_cache=True, use_cache=False)
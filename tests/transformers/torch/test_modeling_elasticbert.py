@@ -0,0 +1,94 @@
+import pytest
+
+from fastNLP.envs.imports import _NEED_IMPORT_TORCH
+
+if _NEED_IMPORT_TORCH:
+    import torch
+    from fastNLP.transformers.torch import ElasticBertConfig, ElasticBertForSequenceClassification, \
+        ElasticBertForTokenClassification
+
+
+def build_model(model_class, **kwargs):
+    torch.manual_seed(0)
+    config = ElasticBertConfig(vocab_size=50, hidden_size=16, num_hidden_layers=4, num_attention_heads=2,
+                               max_output_layers=4, num_output_layers=3, intermediate_size=32,
+                               max_position_embeddings=40, num_labels=3, **kwargs)
+    return model_class(config).eval()
+
+
+def inputs(lengths, seq_length=10):
+    torch.manual_seed(1)
+    input_ids = torch.randint(1, 50, (len(lengths), seq_length))
+    attention_mask = (torch.arange(seq_length)[None, :] < torch.tensor(lengths)[:, None]).long()
+    return input_ids * attention_mask, attention_mask
+
+
+def full_forward(model, input_ids, attention_mask):
+    criterion = model.config.early_exit_criterion
+    model.config.early_exit_criterion = None
+    try:
+        with torch.no_grad():
+            return model(input_ids=input_ids, attention_mask=attention_mask, return_dict=True).logits
+    finally:
+        model.config.early_exit_criterion = criterion
+
+
+@pytest.mark.torch
+class TestEarlyExit:
+    def test_no_exit(self):
+        # entropy 不可能小于 0 ，所有样本都在最后一层退出
+        model = build_model(ElasticBertForSequenceClassification, early_exit_criterion="entropy",
+                            early_exit_entropy=0.0)
+        input_ids, attention_mask = inputs([10, 3, 7, 1])
+        expected = full_forward(model, input_ids, attention_mask)
+        with torch.no_grad():
+            outputs = model(input_ids=input_ids, attention_mask=attention_mask, return_dict=True)
+        assert outputs.exit_layers.tolist() == [3] * 4
+        assert torch.allclose(outputs.logits, expected[-1], atol=1e-5)
+        assert model.elasticbert.early_exit_stats()["counts"] == [0, 0, 0, 4]
+        assert model.elasticbert.early_exit_stats()["speedup"] == 1.0
+
+    def test_token_classification_no_exit(self):
+        model = build_model(ElasticBertForTokenClassification, early_exit_criterion="entropy",
+                            early_exit_entropy=0.0)
+        input_ids, attention_mask = inputs([10, 3, 7])
+        expected = full_forward(model, input_ids, attention_mask)
+        with torch.no_grad():
+            outputs = model(input_ids=input_ids, attention_mask=attention_mask, return_dict=True)
+        mask = attention_mask.bool()
+        assert torch.allclose(outputs.logits[mask], expected[-1][mask], atol=1e-5)
+
+    def test_exit(self):
+        # 任意预测都满足条件，所有样本都在第一个输出层退出
+        model = build_model(ElasticBertForSequenceClassification, early_exit_criterion="entropy",
+                            early_exit_entropy=1e9)
+        input_ids, attention_mask = inputs([10, 3, 7, 1])
+        expected = full_forward(model, input_ids, attention_mask)
+        with torch.no_grad():
+            outputs = model(input_ids=input_ids, attention_mask=attention_mask, return_dict=True)
+        assert outputs.exit_layers.tolist() == [1] * 4
+        assert torch.allclose(outputs.logits, expected[0], atol=1e-5)
+
+        stats = model.elasticbert.early_exit_stats()
+        assert stats["counts"] == [0, 4, 0, 0]
+        assert stats["average_layers"] == 2.0 and stats["speedup"] == 2.0
+        # 统计会累加，直到 reset
+        with torch.no_grad():
+            model(input_ids=input_ids[:2], attention_mask=attention_mask[:2])
+        assert model.elasticbert.early_exit_stats()["counts"] == [0, 6, 0, 0]
+        model.elasticbert.reset_early_exit_stats()
+        assert model.elasticbert.early_exit_stats()["counts"] == [0, 0, 0, 0]
+
+    def test_patience(self):
+        model = build_model(ElasticBertForSequenceClassification, early_exit_criterion="patience",
+                            early_exit_patience=1)
+        input_ids, attention_mask = inputs([10, 3, 7, 1, 5, 8])
+        expected = full_forward(model, input_ids, attention_mask)
+        with torch.no_grad():
+            outputs = model(input_ids=input_ids, attention_mask=attention_mask, return_dict=True)
+        predictions = expected.argmax(-1)
+        for i, layer in enumerate(outputs.exit_layers.tolist()):
+            # 第一个与前一个输出层预测相同的输出层，或者最后一层
+            agree = [j for j in range(1, 3) if predictions[j, i] == predictions[j - 1, i]]
+            assert layer - 1 == (agree[0] if agree else 2)
+            assert torch.allclose(outputs.logits[i], expected[layer - 1, i], atol=1e-5)
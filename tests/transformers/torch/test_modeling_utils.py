@@ -0,0 +1,159 @@
+import os
+
+import pytest
+
+from fastNLP.envs.imports import _NEED_IMPORT_TORCH
+
+if _NEED_IMPORT_TORCH:
+    import torch
+    from fastNLP.transformers.torch import BertConfig, BertModel, RobertaConfig, RobertaModel, ElasticBertConfig, \
+        ElasticBertModel
+    from fastNLP.transformers.torch.modeling_utils import UnpaddedBatch, convert_to_flat_checkpoint, \
+        load_flat_checkpoint, init_empty_weights
+    from fastNLP.transformers.torch import BertForMaskedLM
+
+
+def tiny_config(config_class, **kwargs):
+    return config_class(vocab_size=50, hidden_size=16, num_hidden_layers=2, num_attention_heads=2,
+                        intermediate_size=32, max_position_embeddings=40, **kwargs)
+
+
+def padded_inputs(lengths, seq_length=12, vocab_size=50):
+    torch.manual_seed(0)
+    input_ids = torch.randint(5, vocab_size, (len(lengths), seq_length))
+    attention_mask = (torch.arange(seq_length)[None, :] < torch.tensor(lengths)[:, None]).long()
+    return input_ids * attention_mask + 1 - attention_mask, attention_mask
+
+
+@pytest.mark.torch
+class TestUnpadded:
+    def test_batch(self):
+        attention_mask = torch.tensor([[1, 1, 0, 0], [1, 0, 1, 1], [0, 0, 0, 0]])
+        batch = UnpaddedBatch(attention_mask)
+        assert batch.total_tokens == 5 and batch.max_length == 3
+        tensor = torch.randn(3, 4, 2)
+        unpadded = batch.unpad(tensor)
+        assert torch.equal(unpadded, tensor[attention_mask.bool()])
+        assert torch.equal(batch.pad(unpadded), tensor * attention_mask[..., None])
+        assert torch.equal(batch.from_dense(batch.to_dense(unpadded)), unpadded)
+
+    @pytest.mark.parametrize("model_class, config_class", [(BertModel, BertConfig), (RobertaModel, RobertaConfig)]
+                             if _NEED_IMPORT_TORCH else [])
+    def test_same_as_padded(self, model_class, config_class, monkeypatch):
+        torch.manual_seed(0)
+        model = model_class(tiny_config(config_class)).eval()
+        calls = []
+        forward_unpadded = model.encoder.forward_unpadded
+        monkeypatch.setattr(model.encoder, "forward_unpadded",
+                            lambda *args, **kwargs: calls.append(1) or forward_unpadded(*args, **kwargs))
+        input_ids, attention_mask = padded_inputs([12, 7, 1, 4])
+        with torch.no_grad():
+            expected = model(input_ids=input_ids, attention_mask=attention_mask, output_hidden_states=True)
+            model.config.unpad_inputs = True
+            outputs = model(input_ids=input_ids, attention_mask=attention_mask, output_hidden_states=True)
+        assert len(calls) == 1
+
+        mask = attention_mask.bool()
+        assert torch.allclose(outputs.last_hidden_state[mask], expected.last_hidden_state[mask], atol=1e-5)
+        assert (outputs.last_hidden_state[~mask] == 0).all()
+        for hidden, expected_hidden in zip(outputs.hidden_states, expected.hidden_states):
+            assert torch.allclose(hidden[mask], expected_hidden[mask], atol=1e-5)
+        assert torch.allclose(outputs.pooler_output, expected.pooler_output, atol=1e-5)
+
+    def test_elasticbert_same_as_padded(self, monkeypatch):
+        torch.manual_seed(0)
+        config = tiny_config(ElasticBertConfig, max_output_layers=2, num_output_layers=1)
+        model = ElasticBertModel(config).eval()
+        calls = []
+        forward_unpadded = model.encoder.forward_unpadded
+        monkeypatch.setattr(model.encoder, "forward_unpadded",
+                            lambda *args, **kwargs: calls.append(1) or forward_unpadded(*args, **kwargs))
+        # 最后一行全部是 padding
+        input_ids, attention_mask = padded_inputs([12, 7, 1, 0])
+        with torch.no_grad():
+            expected = model(input_ids=input_ids, attention_mask=attention_mask, output_hidden_states=True,
+                             return_dict=True)
+            model.config.unpad_inputs = True
+            outputs = model(input_ids=input_ids, attention_mask=attention_mask, output_hidden_states=True,
+                            return_dict=True)
+        assert len(calls) == 1
+
+        mask = attention_mask.bool()
+        assert not outputs.last_hidden_state.isnan().any()
+        assert torch.allclose(outputs.last_hidden_state[mask], expected.last_hidden_state[mask], atol=1e-5)
+        assert (outputs.last_hidden_state[~mask] == 0).all()
+        assert len(outputs.hidden_states) == len(expected.hidden_states)
+        for hidden, expected_hidden in zip(outputs.hidden_states, expected.hidden_states):
+            assert torch.allclose(hidden[mask], expected_hidden[mask], atol=1e-5)
+        assert torch.allclose(outputs.pooler_output[:3], expected.pooler_output[:3], atol=1e-5)
+
+
+@pytest.mark.torch
+class TestMmapLoading:
+    def test_init_empty_weights(self):
+        with init_empty_weights():
+            layer = torch.nn.Linear(4, 3)
+        assert layer.weight.is_meta and layer.bias.is_meta
+        assert not torch.nn.Linear(4, 3).weight.is_meta
+
+    def test_flat_round_trip(self, tmp_path):
+        torch.manual_seed(0)
+        model = BertForMaskedLM(tiny_config(BertConfig)).eval()
+        model.save_pretrained(str(tmp_path))
+        state_dict = torch.load(str(tmp_path / "pytorch_model.bin"), map_location="cpu")
+
+        flat_file = convert_to_flat_checkpoint(str(tmp_path / "pytorch_model.bin"))
+        flat_state_dict = load_flat_checkpoint(flat_file)
+        assert list(flat_state_dict) == list(state_dict)
+        for name, tensor in state_dict.items():
+            assert flat_state_dict[name].dtype == tensor.dtype
+            assert torch.equal(flat_state_dict[name], tensor)
+
+        input_ids, attention_mask = padded_inputs([12, 5])
+        with torch.no_grad():
+            expected = model(input_ids=input_ids, attention_mask=attention_mask).logits
+        # 依次从原始文件、转换后新写入的 flat 文件、已有的 flat 文件读取
+        os.remove(flat_file)
+        for kwargs in [dict(mmap=True), dict(mmap=True, convert_to_flat=True), dict(mmap=True)]:
+            loaded = BertForMaskedLM.from_pretrained(str(tmp_path), **kwargs).eval()
+            loaded_state_dict = loaded.state_dict()
+            assert loaded_state_dict.keys() == model.state_dict().keys()
+            for name, tensor in model.state_dict().items():
+                assert not loaded_state_dict[name].is_meta
+                assert torch.equal(loaded_state_dict[name], tensor)
+            # 共享的参数仍然是同一个
+            assert loaded.cls.predictions.decoder.weight is loaded.bert.embeddings.word_embeddings.weight
+            with torch.no_grad():
+                assert torch.equal(loaded(input_ids=input_ids, attention_mask=attention_mask).logits, expected)
+        assert os.path.exists(flat_file)
+
+
+@pytest.mark.torch
+class TestQuantizeDynamic:
+    @pytest.mark.parametrize("dtype", ["qint8", "float16"])
+    def test_quantize_and_reload(self, tmp_path, dtype):
+        torch.manual_seed(0)
+        model = BertForMaskedLM(tiny_config(BertConfig)).eval()
+        input_ids, attention_mask = padded_inputs([12, 5])
+        with torch.no_grad():
+            expected = model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+        model.quantize_dynamic(dtype)
+        assert model.is_quantized
+        quantized_layers = [name for name, module in model.named_modules() if "quantized" in type(module).__module__]
+        assert len(quantized_layers) > 0
+        # 词向量与输出层保持 float32
+        assert model.bert.embeddings.word_embeddings.weight.dtype == torch.float32
+        with torch.no_grad():
+            outputs = model(input_ids=input_ids, attention_mask=attention_mask).logits
+        assert torch.allclose(outputs, expected, atol=1e-2)
+        with pytest.raises(RuntimeError):
+            model.quantize_dynamic(dtype)
+
+        model.save_pretrained(str(tmp_path))
+        loaded = BertForMaskedLM.from_pretrained(str(tmp_path)).eval()
+        assert loaded.is_quantized
+        assert [name for name, module in loaded.named_modules()
+                if "quantized" in type(module).__module__] == quantized_layers
+        with torch.no_grad():
+            assert torch.equal(loaded(input_ids=input_ids, attention_mask=attention_mask).logits, outputs)
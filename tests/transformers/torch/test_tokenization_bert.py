@@ -0,0 +1,34 @@
+import pytest
+
+from fastNLP.envs.imports import _NEED_IMPORT_TORCH
+
+if _NEED_IMPORT_TORCH:
+    from fastNLP.transformers.torch import BertTokenizer
+
+VOCAB = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "[KEEP]", "[keep]", "the", "un", "##aff", "##able", "run", "##ning",
+         "play", "##ed", "中", "国", ",", ".", "!", "a", "##b", "##c"]
+TEXTS = ["The unaffable running played.", "UNAFFABLE [MASK] played!", "中国, the [KEEP] a[KEEP]b",
+         "unknownword [SEP] runs", "", "abc abcabc [CLS]the", "  played   [PAD] 中  "]
+
+
+def build_tokenizer(tmp_path, **kwargs):
+    vocab_file = tmp_path / "vocab.txt"
+    vocab_file.write_text("\n".join(VOCAB) + "\n", encoding="utf-8")
+    return BertTokenizer(str(vocab_file), never_split=["[KEEP]"], **kwargs)
+
+
+@pytest.mark.torch
+class TestBatchEncode:
+    @pytest.mark.parametrize("num_proc", [0, 2])
+    @pytest.mark.parametrize("do_lower_case", [True, False])
+    def test_same_as_single(self, tmp_path, num_proc, do_lower_case):
+        tokenizer = build_tokenizer(tmp_path, do_lower_case=do_lower_case)
+        tokenizer.add_special_tokens({"additional_special_tokens": ["<e>"]})
+        texts = TEXTS + [text + " <e> " + text for text in TEXTS]
+
+        assert tokenizer.tokenize_batch(texts, num_proc=num_proc, chunksize=3) == \
+               [tokenizer.tokenize(text) for text in texts]
+        for add_special_tokens in [True, False]:
+            assert tokenizer.encode_batch(texts, add_special_tokens=add_special_tokens, num_proc=num_proc,
+                                          chunksize=3) == \
+                   [tokenizer.encode(text, add_special_tokens=add_special_tokens) for text in texts]
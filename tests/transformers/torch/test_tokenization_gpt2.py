@@ -0,0 +1,96 @@
+import json
+import random
+
+import pytest
+
+from fastNLP.envs.imports import _NEED_IMPORT_TORCH
+
+if _NEED_IMPORT_TORCH:
+    from fastNLP.transformers.torch import GPT2Tokenizer
+    from fastNLP.transformers.torch.models.gpt2.tokenization_gpt2 import get_pairs
+
+
+def greedy_bpe(bpe_ranks, token):
+    # 原来每次合并都重新扫描整个词的实现
+    word = tuple(token)
+    pairs = get_pairs(word)
+    if not pairs:
+        return token
+    while True:
+        bigram = min(pairs, key=lambda pair: bpe_ranks.get(pair, float("inf")))
+        if bigram not in bpe_ranks:
+            break
+        first, second = bigram
+        new_word = []
+        i = 0
+        while i < len(word):
+            try:
+                j = word.index(first, i)
+            except ValueError:
+                new_word.extend(word[i:])
+                break
+            else:
+                new_word.extend(word[i:j])
+                i = j
+            if word[i] == first and i < len(word) - 1 and word[i + 1] == second:
+                new_word.append(first + second)
+                i += 2
+            else:
+                new_word.append(word[i])
+                i += 1
+        word = tuple(new_word)
+        if len(word) == 1:
+            break
+        pairs = get_pairs(word)
+    return " ".join(word)
+
+
+def build_tokenizer(tmp_path, merges, **kwargs):
+    symbols = sorted({symbol for pair in merges for symbol in pair} | {a + b for a, b in merges})
+    with open(tmp_path / "vocab.json", "w", encoding="utf-8") as f:
+        json.dump({symbol: i for i, symbol in enumerate(symbols + ["<|endoftext|>"])}, f)
+    with open(tmp_path / "merges.txt", "w", encoding="utf-8") as f:
+        f.write("#version: 0.2\n" + "".join(f"{a} {b}\n" for a, b in merges))
+    return GPT2Tokenizer(str(tmp_path / "vocab.json"), str(tmp_path / "merges.txt"), **kwargs)
+
+
+def random_merges(rng, alphabet, num_merges):
+    symbols = list(alphabet)
+    merges = []
+    while len(merges) < num_merges:
+        pair = (rng.choice(symbols), rng.choice(symbols))
+        if pair not in merges:
+            merges.append(pair)
+            symbols.append(pair[0] + pair[1])
+    # 打乱一部分顺序，得到 rank 不一致的合并表
+    for _ in range(num_merges // 5):
+        i, j = rng.randrange(num_merges), rng.randrange(num_merges)
+        merges[i], merges[j] = merges[j], merges[i]
+    return merges
+
+
+@pytest.mark.torch
+class TestBPE:
+    def test_same_as_greedy(self, tmp_path):
+        rng = random.Random(0)
+        for _ in range(5):
+            tokenizer = build_tokenizer(tmp_path, random_merges(rng, "abcd", 40))
+            for _ in range(200):
+                token = "".join(rng.choice("abcde") for _ in range(rng.randint(1, 20)))
+                assert tokenizer.bpe(token) == greedy_bpe(tokenizer.bpe_ranks, token)
+
+    def test_cache_bounded(self, tmp_path):
+        tokenizer = build_tokenizer(tmp_path, [("a", "b"), ("ab", "c")], bpe_cache_size=3)
+        for token in ["abc", "ab", "ca", "cab", "abca"]:
+            tokenizer.bpe(token)
+        assert len(tokenizer.cache) == 3
+        assert "abc" not in tokenizer.cache and "abca" in tokenizer.cache
+        # 命中时移动到最近使用的位置
+        tokenizer.bpe("ca")
+        tokenizer.bpe("bb")
+        assert "ca" in tokenizer.cache and "cab" not in tokenizer.cache
+        assert tokenizer.cache.info()["hits"] == 1 and tokenizer.cache.info()["maxsize"] == 3
+
+        tokenizer = build_tokenizer(tmp_path, [("a", "b")], bpe_cache_size=0)
+        assert tokenizer.bpe("ab") == "ab"
+        assert len(tokenizer.cache) == 0
@@ -0,0 +1,43 @@
+import pytest
+
+from fastNLP.envs.imports import _NEED_IMPORT_TORCH
+
+if _NEED_IMPORT_TORCH:
+    from fastNLP.transformers.torch import BertTokenizer
+    from fastNLP.transformers.torch.tokenization_utils import PreTrainedTokenizer
+
+VOCAB = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "hello", "world", "new", "##word", "!"]
+
+
+def build_tokenizer(tmp_path):
+    vocab_file = tmp_path / "vocab.txt"
+    vocab_file.write_text("\n".join(VOCAB) + "\n", encoding="utf-8")
+    return BertTokenizer(str(vocab_file))
+
+
+@pytest.mark.torch
+class TestTokenizeCache:
+    def test_docstring(self):
+        assert "model_max_length" in PreTrainedTokenizer.__doc__
+
+    def test_add_tokens(self, tmp_path):
+        tokenizer = build_tokenizer(tmp_path)
+        assert tokenizer.tokenize("hello newword [SEP]") == ["hello", "new", "##word", "[SEP]"]
+
+        # 只添加一个词时原位修改 unique_no_split_tokens
+        tokenizer.add_tokens(["newword"])
+        assert tokenizer.tokenize("hello newword [SEP]") == ["hello", "newword", "[SEP]"]
+        tokenizer.add_tokens(["helloworld", "worldhello"])
+        assert tokenizer.tokenize("helloworld!") == ["helloworld", "!"]
+
+        tokenizer.add_special_tokens({"additional_special_tokens": ["<X>"]})
+        assert tokenizer.tokenize("hello<X>world") == ["hello", "<X>", "world"]
+        assert tokenizer.encode_batch(["hello<X>world"]) == [tokenizer.encode("hello<X>world")]
+
+    def test_in_place_change(self, tmp_path):
+        tokenizer = build_tokenizer(tmp_path)
+        assert tokenizer.tokenize("hello newword") == ["hello", "new", "##word"]
+        tokenizer.unique_no_split_tokens.append("newword")
+        assert tokenizer.tokenize("hello newword") == ["hello", "newword"]
+        tokenizer.unique_no_split_tokens.remove("newword")
+        assert tokenizer.tokenize("hello newword") == ["hello", "new", "##word"]